@@ -494,11 +494,7 @@ class AliasPanel(wx.Panel):
 
 	def _invalidate_display_caches(self):
 		"""Clear display caches so aliases are refreshed."""
-		for tl in getattr(self.account, 'timelines', []):
-			tl.invalidate_display_cache()
-			for status in getattr(tl, 'statuses', []):
-				if hasattr(status, '_display_cache'):
-					delattr(status, '_display_cache')
+		self.account.app.render_cache.bump()
 
 	def on_edit(self, event):
 		"""Edit the selected alias."""
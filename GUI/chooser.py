@@ -176,11 +176,7 @@ class ChooseGui(wx.Dialog):
 						self.account.prefs.save()
 						speak.speak(f"Alias set for {acct}")
 						# Clear display caches to refresh with new alias
-						for tl in self.account.timelines:
-							tl.invalidate_display_cache()
-							for status in getattr(tl, 'statuses', []):
-								if hasattr(status, '_display_cache'):
-									delattr(status, '_display_cache')
+						self.account.app.render_cache.bump()
 					else:
 						# Remove alias if empty
 						if user_id in self.account.prefs.aliases:
@@ -188,11 +184,7 @@ class ChooseGui(wx.Dialog):
 							self.account.prefs.save()
 							speak.speak(f"Alias removed for {acct}")
 							# Clear display caches
-							for tl in self.account.timelines:
-								tl.invalidate_display_cache()
-								for status in getattr(tl, 'statuses', []):
-									if hasattr(status, '_display_cache'):
-										delattr(status, '_display_cache')
+							self.account.app.render_cache.bump()
 				dlg.Destroy()
 			else:
 				speak.speak("Could not find user")
@@ -0,0 +1,89 @@
+"""Row diffing for incremental list2 updates.
+
+refreshList used to replace the whole list with list2.Set() on every change.
+On a large buffer with a screen reader attached that stalls the UI and resets
+the accessible tree. diff_rows() compares the rows currently shown with the
+new ones by item id and returns the Delete/Insert/SetString operations that
+turn one into the other, or None when a full Set() is the better choice.
+"""
+
+# Above this fraction of changed rows a single Set() is cheaper
+MAX_CHANGE_RATIO = 0.5
+
+
+def row_key(item):
+	"""Identity of a timeline item for diffing."""
+	return str(getattr(item, 'id', '')) or None
+
+
+def diff_rows(old_keys, old_strings, new_keys, new_strings, max_change_ratio=MAX_CHANGE_RATIO):
+	"""Return the operations turning the old rows into the new ones.
+
+	Operations are applied in order:
+	- ('delete', index): indices are descending, against the old rows
+	- ('insert', index, [strings]): indices are ascending, against the rows
+	  after the deletes, with contiguous rows grouped
+	- ('set', index, string): rows kept in place whose text changed
+
+	Returns None if a full Set() should be used instead: nothing to diff
+	against, duplicate or missing ids, kept rows that changed order, or more
+	changes than max_change_ratio of the list.
+	"""
+	if not old_keys or not new_keys or None in old_keys or None in new_keys:
+		return None
+	old_index = {key: i for i, key in enumerate(old_keys)}
+	new_set = set(new_keys)
+	if len(old_index) != len(old_keys) or len(new_set) != len(new_keys):
+		return None
+
+	# Kept rows must appear in the same relative order (no moves)
+	last = -1
+	kept = 0
+	for key in new_keys:
+		i = old_index.get(key)
+		if i is not None:
+			if i < last:
+				return None
+			last = i
+			kept += 1
+
+	deletes = len(old_keys) - kept
+	inserts = len(new_keys) - kept
+	ops = []
+	for i in range(len(old_keys) - 1, -1, -1):
+		if old_keys[i] not in new_set:
+			ops.append(('delete', i))
+
+	run_start = None
+	run = []
+	sets = []
+	for i, key in enumerate(new_keys):
+		old = old_index.get(key)
+		if old is None:
+			if run_start is None:
+				run_start = i
+			run.append(new_strings[i])
+			continue
+		if run:
+			ops.append(('insert', run_start, run))
+			run_start, run = None, []
+		if old_strings[old] != new_strings[i]:
+			sets.append(('set', i, new_strings[i]))
+	if run:
+		ops.append(('insert', run_start, run))
+
+	if deletes + inserts + len(sets) > max_change_ratio * max(len(old_keys), len(new_keys)):
+		return None
+	ops.extend(sets)
+	return ops
+
+
+def apply_ops(target, ops):
+	"""Apply diff_rows() operations to a wx.ListBox (or anything with the same methods)."""
+	for op in ops:
+		if op[0] == 'delete':
+			target.Delete(op[1])
+		elif op[0] == 'insert':
+			target.InsertItems(op[2], op[1])
+		else:
+			target.SetString(op[1], op[2])
@@ -1,6 +1,7 @@
 import os
 import re
 import webbrowser
+import bisect
 import platform
 import pyperclip
 import application
@@ -8,7 +9,7 @@ from application import get_app
 import wx
 from keyboard_handler.wx_handler import WXKeyboardHandler
 import speak
-from . import account_options, accounts, chooser, custom_timelines, explore_dialog, hashtag_dialog, invisible, keymap_manager, lists, misc, options, profile, search, theme, timeline_filter, timelines, tray, tweet, view
+from . import account_options, accounts, chooser, custom_timelines, explore_dialog, hashtag_dialog, invisible, keymap_manager, list_diff, lists, misc, options, profile, search, theme, timeline_filter, timelines, tray, tweet, view, virtual_list
 import sound
 import timeline
 import threading
@@ -471,20 +472,52 @@ class MainGui(wx.Frame):
 		self.main_box.Add(self.list2_label, 0, wx.LEFT | wx.TOP, 10)
 		self.list2=wx.ListBox(self.panel, -1,size=(1200,800))
 		self.main_box.Add(self.list2, 1, wx.LEFT | wx.RIGHT | wx.BOTTOM | wx.EXPAND, 10)
-		self.list2.Bind(wx.EVT_LISTBOX, self.on_list2_change)
-		self.list2.Bind(wx.EVT_CONTEXT_MENU, self.OnPostContextMenu)
+		self._bind_list2()
 		# On Mac, bind key events directly to list controls for shortcuts
 		# (menu accelerators are disabled on Mac to prevent firing in dialogs)
 		if platform.system() == "Darwin":
-			self.list2.Bind(wx.EVT_KEY_DOWN, self.OnListKeyDown)
 			self.list.Bind(wx.EVT_KEY_DOWN, self.OnListKeyDown)
 			# Use CHAR_HOOK for Option+M since it produces special characters
-			self.list2.Bind(wx.EVT_CHAR_HOOK, self.OnListCharHook)
 			self.list.Bind(wx.EVT_CHAR_HOOK, self.OnListCharHook)
 		self.panel.SetSizer(self.main_box)
 		self.panel.Layout()
 		# Note: theme is applied in FastSM.pyw after prefs are loaded
 
+	def _bind_list2(self):
+		self.list2.Bind(wx.EVT_LISTBOX, self.on_list2_change)
+		self.list2.Bind(wx.EVT_CONTEXT_MENU, self.OnPostContextMenu)
+		if platform.system() == "Darwin":
+			self.list2.Bind(wx.EVT_KEY_DOWN, self.OnListKeyDown)
+			self.list2.Bind(wx.EVT_CHAR_HOOK, self.OnListCharHook)
+
+	def use_virtual_list(self, enabled):
+		"""Show the contents in a VirtualList (rows rendered on demand) or a wx.ListBox.
+
+		Returns True if list2 was replaced; the caller refreshes it.
+		"""
+		enabled = bool(enabled) and virtual_list.available()
+		if enabled == isinstance(self.list2, virtual_list.VirtualList):
+			return False
+		old = self.list2
+		if enabled:
+			new = virtual_list.VirtualList(self.panel, size=(1200,800))
+		else:
+			new = wx.ListBox(self.panel, -1, size=(1200,800))
+		had_focus = wx.Window.FindFocus() is old
+		self.main_box.Replace(old, new)
+		# Keep the "Contents" label right before the list so it stays the list's accessible name
+		new.MoveAfterInTabOrder(self.list2_label)
+		old.Destroy()
+		self.list2 = new
+		self._list2_rows = None
+		self._bind_list2()
+		self.panel.Layout()
+		if self.IsShown():
+			theme.apply_theme(new)
+		if had_focus:
+			new.SetFocus()
+		return True
+
 	def _load_keymap_file(self, path):
 		"""Load a keymap file and return dict of key -> action mappings.
 
@@ -640,51 +673,14 @@ class MainGui(wx.Frame):
 			status_id: The ID of the status to update
 			**state_updates: Key-value pairs of state to update (e.g., favourited=True)
 		"""
-		status_id_str = str(status_id)
-		for tl in account.timelines:
-			for status in tl.statuses:
-				# Check the status itself
-				matched = False
-				if str(getattr(status, 'id', '')) == status_id_str:
-					matched = True
-					target = status
-				# Check if it's a reblog containing the status
-				elif hasattr(status, 'reblog') and status.reblog:
-					reblog_id = getattr(status.reblog, 'id', '')
-					# Also check _original_status_id for mentions
-					orig_id = getattr(status.reblog, '_original_status_id', reblog_id)
-					if str(reblog_id) == status_id_str or str(orig_id) == status_id_str:
-						matched = True
-						target = status.reblog
-				# Check _original_status_id for mentions (status could be notification-wrapped)
-				elif hasattr(status, '_original_status_id'):
-					if str(status._original_status_id) == status_id_str:
-						matched = True
-						target = status
-
-				if matched:
-					for key, value in state_updates.items():
-						setattr(target, key, value)
-					# Clear display cache so it gets re-rendered
-					if hasattr(status, '_display_cache'):
-						try:
-							delattr(status, '_display_cache')
-						except (AttributeError, TypeError):
-							pass
-
-				# Also check notification statuses
-				if tl.type == "notifications" and hasattr(status, 'status') and status.status:
-					notif_status = status.status
-					notif_id = getattr(notif_status, 'id', '')
-					orig_id = getattr(notif_status, '_original_status_id', notif_id)
-					if str(notif_id) == status_id_str or str(orig_id) == status_id_str:
-						for key, value in state_updates.items():
-							setattr(notif_status, key, value)
-						if hasattr(status, '_display_cache'):
-							try:
-								delattr(status, '_display_cache')
-							except (AttributeError, TypeError):
-								pass
+		index = getattr(account, 'status_index', None)
+		if index is None:
+			return
+		# Every copy: the status itself, boosts and quotes of it, notifications about it
+		for tl, item, target in index.holders(status_id):
+			for key, value in state_updates.items():
+				setattr(target, key, value)
+			tl.refresh_item(item)
 
 	def _get_status_state_for_menu(self, status):
 		"""Return status to check and state flags for menu labels."""
@@ -882,6 +878,8 @@ class MainGui(wx.Frame):
 			except Exception as e:
 				print(f"Error saving account prefs: {e}")
 		# Save all timeline caches (positions, gaps, etc.) before exit
+		# Accounts whose cache writer is stuck; their cache is left alone from here on
+		busy = set()
 		for account in get_app().accounts:
 			for tl in account.timelines:
 				try:
@@ -889,8 +887,28 @@ class MainGui(wx.Frame):
 						tl._cache_timeline()
 				except Exception as e:
 					print(f"Error caching {tl.name}: {e}")
+			# Wait for the cache writer to write them
+			cache = getattr(getattr(account, '_platform', None), 'timeline_cache', None)
+			if cache:
+				try:
+					# Bounded, so a stuck write can't hang exit; the writer logs what's left
+					if not cache.writer.flush(cache.writer.EXIT_TIMEOUT):
+						busy.add(id(account))
+				except Exception as e:
+					print(f"Error writing timeline cache: {e}")
+		# Persist users seen this session to the on-disk user directory
+		for account in get_app().accounts:
+			if id(account) in busy:
+				continue
+			try:
+				if getattr(account, 'user_cache', None):
+					account.user_cache.save()
+			except Exception as e:
+				print(f"Error saving user cache: {e}")
 		# Clean up orphaned cache data (timelines that were dismissed)
 		for account in get_app().accounts:
+			if id(account) in busy:
+				continue
 			if hasattr(account, '_platform') and account._platform:
 				cache = getattr(account._platform, 'timeline_cache', None)
 				if cache and cache.is_available():
@@ -1240,12 +1258,30 @@ class MainGui(wx.Frame):
 					top_item_id = str(getattr(previous_statuses[top_index], "id", ""))
 			except Exception:
 				top_item_id = None
-		stuffage=tl.get()
+		virtual = isinstance(self.list2, virtual_list.VirtualList)
+		ops = None
+		if not virtual:
+			stuffage=tl.get()
+			keys = [list_diff.row_key(item) for item in tl.statuses]
+			previous = getattr(self, '_list2_rows', None)
+			if previous and len(keys) == len(stuffage) and len(previous[0]) == self.list2.GetCount():
+				ops = list_diff.diff_rows(previous[0], previous[1], keys, stuffage)
 		self.list2.Freeze()
 		try:
 			self._programmatic_list2_selection = True
-			# Use Set() for batch update - much faster than Clear() + individual Append()
-			self.list2.Set(stuffage)
+			if virtual:
+				# Rows are rendered as they're shown; the rest are prerendered below
+				self.list2.set_rows(len(tl.statuses), tl.display_row)
+				self._list2_rows = None
+			elif ops is not None:
+				# Apply only the changed rows so the screen reader keeps its place
+				list_diff.apply_ops(self.list2, ops)
+			else:
+				# Use Set() for batch update - much faster than Clear() + individual Append()
+				self.list2.Set(stuffage)
+			if not virtual:
+				# Copy: the timeline may extend its display list in place
+				self._list2_rows = (keys, list(stuffage))
 			count = self.list2.GetCount()
 			if count == 0:
 				# Empty list - ensure index is 0
@@ -1254,16 +1290,20 @@ class MainGui(wx.Frame):
 				# Clamp index to valid range and set selection
 				tl.index = max(0, min(tl.index, count - 1))
 				self.list2.SetSelection(tl.index)
+				startup = get_app().startup
+				if startup:
+					startup.mark_first_paint(tl.name)
 				if top_item_id and hasattr(self.list2, "SetFirstItem"):
-					for idx, item in enumerate(tl.statuses):
-						if str(getattr(item, "id", "")) == top_item_id:
-							self.list2.SetFirstItem(idx)
-							break
+					top_index = tl.statuses.position(top_item_id)
+					if top_index is not None:
+						self.list2.SetFirstItem(top_index)
 		finally:
 			self._programmatic_list2_selection = False
 			self.list2.Thaw()
 			if hasattr(tl, "_previous_refresh_statuses"):
 				del tl._previous_refresh_statuses
+		if virtual:
+			tl.prerender()
 
 	def insertListItem(self, display_text, position=0):
 		"""Insert a single item at a position (for incremental streaming updates).
@@ -1277,6 +1317,7 @@ class MainGui(wx.Frame):
 
 		self.list2.Freeze()
 		self.list2.Insert(display_text, position)
+		self._list2_rows = None  # Row ids unknown; next refreshList does a full Set()
 
 		# Adjust index if item was inserted before current position
 		if position <= old_index:
@@ -1300,6 +1341,31 @@ class MainGui(wx.Frame):
 			self.list2.EnsureVisible(tl.index)
 		self.list2.Thaw()
 
+	def removeListItem(self, position):
+		"""Remove a single row (for stream deletes). The timeline has already dropped the item and fixed its index."""
+		tl = get_app().currentAccount.currentTimeline
+		if isinstance(self.list2, virtual_list.VirtualList) or not 0 <= position < self.list2.GetCount():
+			# The virtual list only renders what's on screen, so a refresh is cheap
+			self.refreshList()
+			return
+		self.list2.Freeze()
+		try:
+			self._programmatic_list2_selection = True
+			self.list2.Delete(position)
+			rows = getattr(self, '_list2_rows', None)
+			if rows and len(rows[0]) == self.list2.GetCount() + 1:
+				del rows[0][position]
+				del rows[1][position]
+			else:
+				self._list2_rows = None
+			count = self.list2.GetCount()
+			tl.index = max(0, min(tl.index, count - 1)) if count else 0
+			if count:
+				self.list2.SetSelection(tl.index)
+		finally:
+			self._programmatic_list2_selection = False
+			self.list2.Thaw()
+
 	def OnViewUserDb(self, event=None):
 		u=view.UserViewGui(get_app().currentAccount,get_app().users,"User Database containing "+str(len(get_app().users))+" users.")
 		u.Show()
@@ -2012,23 +2078,11 @@ class MainGui(wx.Frame):
 
 		self._find_text = search_text
 
-		# Get displayed text for each post
-		displayed = tl.get()
-
 		# Search from start_index, wrapping around
-		found = False
-		for offset in range(len(displayed)):
-			idx = (start_index + offset) % len(displayed)
-			if search_text in displayed[idx].lower():
-				# Found a match
-				tl.index = idx
-				self.list2.SetSelection(idx)
-				self.on_list2_change(None)
-				speak.speak(displayed[idx])
-				found = True
-				break
-
-		if not found:
+		positions = self._find_positions(tl)
+		if positions:
+			self._select_found(tl, positions[bisect.bisect_left(positions, start_index) % len(positions)])
+		else:
 			speak.speak(f"Not found: {self._find_text}")
 
 	def OnFindNext(self, event=None):
@@ -2043,19 +2097,13 @@ class MainGui(wx.Frame):
 			speak.speak("No posts to search")
 			return
 
-		# Get displayed text for each post
-		displayed = tl.get()
-
 		# Search forward from current position (no wrapping)
-		for idx in range(tl.index + 1, len(displayed)):
-			if self._find_text in displayed[idx].lower():
-				tl.index = idx
-				self.list2.SetSelection(idx)
-				self.on_list2_change(None)
-				speak.speak(displayed[idx])
-				return
-
-		speak.speak("No more items found")
+		positions = self._find_positions(tl)
+		following = bisect.bisect_right(positions, tl.index)
+		if following < len(positions):
+			self._select_found(tl, positions[following])
+		else:
+			speak.speak("No more items found")
 
 	def OnFindPrevious(self, event=None):
 		"""Find previous occurrence of the search text."""
@@ -2069,19 +2117,24 @@ class MainGui(wx.Frame):
 			speak.speak("No posts to search")
 			return
 
-		# Get displayed text for each post
-		displayed = tl.get()
-
 		# Search backward from current position (no wrapping)
-		for idx in range(tl.index - 1, -1, -1):
-			if self._find_text in displayed[idx].lower():
-				tl.index = idx
-				self.list2.SetSelection(idx)
-				self.on_list2_change(None)
-				speak.speak(displayed[idx])
-				return
+		positions = self._find_positions(tl)
+		preceding = bisect.bisect_left(positions, tl.index) - 1
+		if preceding >= 0:
+			self._select_found(tl, positions[preceding])
+		else:
+			speak.speak("No more items found")
+
+	def _find_positions(self, tl):
+		"""Positions of the items matching the find text, in list order."""
+		# The text anywhere in the displayed item
+		return [idx for idx, text in enumerate(tl.get()) if self._find_text in text.lower()]
 
-		speak.speak("No more items found")
+	def _select_found(self, tl, idx):
+		tl.index = idx
+		self.list2.SetSelection(idx)
+		self.on_list2_change(None)
+		speak.speak(tl.display_row(idx))
 
 	def OnLists(self, event=None):
 		s=lists.ListsGui(get_app().currentAccount)
@@ -2272,6 +2325,7 @@ class MainGui(wx.Frame):
 				except Exception as e:
 					print(f"Error clearing cache for {tl.name}: {e}")
 				get_app().currentAccount.timelines.remove(tl)
+				tl.release_items()
 				sound.play(get_app().currentAccount,"close")
 				self.refreshTimelines()
 				self.list.SetSelection(0)
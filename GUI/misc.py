@@ -5,6 +5,7 @@ import subprocess
 import speak
 import sound
 from . import chooser, main, tweet, view
+import movement_units
 import timeline
 from application import get_app
 
@@ -406,8 +407,11 @@ def not_following(account):
 
 def havent_posted(account):
 	# Find users who haven't posted recently
-	flw = view.UserViewGui(account, account.havent_posted(), "Users who haven't posted recently")
-	flw.Show()
+	try:
+		flw = view.UserViewGui(account, account.havent_posted(), "Users who haven't posted recently")
+		flw.Show()
+	except Exception as error:
+		account.app.handle_error(error, "Get users who haven't posted")
 
 
 def blocked_users(account):
@@ -531,6 +535,19 @@ def search(account, q, focus=True):
 		main.window.on_list_change(None)
 
 
+def history_search(account, q):
+	"""Open a timeline of the loaded and cached posts matching q (works offline)."""
+	cache = getattr(getattr(account, '_platform', None), 'timeline_cache', None)
+	if not cache or not cache.search_available():
+		speak.speak("Searching cached posts needs the timeline cache")
+		return
+	account.timelines.append(timeline.timeline(account, name=q + " Cached Search", type="history", data=q))
+	main.window.refreshTimelines()
+	account.currentIndex = len(account.timelines) - 1
+	main.window.list.SetSelection(len(account.timelines) - 1)
+	main.window.on_list_change(None)
+
+
 def user_search(account, q):
 	try:
 		from logging_config import get_logger
@@ -645,40 +662,19 @@ def previous_in_thread(account):
 
 
 def previous_from_user(account):
-	newindex = -1
-	oldindex = account.currentTimeline.index
-	user = account.currentTimeline.statuses[account.currentTimeline.index].account
-	newindex2 = 0
-	for i in account.currentTimeline.statuses:
-		if newindex2 >= oldindex:
-			break
-		if i.account.id == user.id:
-			newindex = newindex2
-		newindex2 += 1
-
-	if newindex > -1:
-		account.currentTimeline.mark_navigation_step()
-		account.currentTimeline.index = newindex
-		main.window.list2.SetSelection(newindex)
-	else:
-		sound.play(account, "boundary")
+	_move_to_same_user(account, "up")
 
 
 def next_from_user(account):
-	newindex = -1
-	oldindex = account.currentTimeline.index
-	status = account.currentTimeline.statuses[account.currentTimeline.index]
-	user = account.currentTimeline.statuses[account.currentTimeline.index].account
-	newindex2 = 0
-	for i in account.currentTimeline.statuses:
-		if i != status and i.account.id == user.id and newindex2 >= oldindex:
-			newindex = newindex2
-			break
-		newindex2 += 1
+	_move_to_same_user(account, "down")
 
-	if newindex > -1:
-		account.currentTimeline.mark_navigation_step()
-		account.currentTimeline.index = newindex
+
+def _move_to_same_user(account, direction):
+	tl = account.currentTimeline
+	newindex = movement_units.destination(tl.statuses, tl.index, movement_units.MovementUnit(kind="same_user"), direction)
+	if newindex is not None:
+		tl.mark_navigation_step()
+		tl.index = newindex
 		main.window.list2.SetSelection(newindex)
 	else:
 		sound.play(account, "boundary")
@@ -696,25 +692,12 @@ def delete(account, status):
 			account._platform.delete_status(status.id)
 		else:
 			account.api.status_delete(id=status.id)
-		# Remove from all timelines by ID (not object identity)
+		# Remove from all timelines, filtered-out copies included
 		status_id_str = str(status.id)
 		for tl in account.timelines:
-			for i, s in enumerate(tl.statuses):
-				if hasattr(s, 'id') and str(s.id) == status_id_str:
-					# Adjust index if deleted item was at or before current position
-					if i < tl.index:
-						tl.index = max(0, tl.index - 1)
-					elif i == tl.index and tl.index >= len(tl.statuses) - 1:
-						# Deleted item was at current position and at end of list
-						tl.index = max(0, len(tl.statuses) - 2)
-					tl.statuses.pop(i)
-					# Update _status_ids set and invalidate display cache
-					if hasattr(tl, '_status_ids'):
-						tl._status_ids.discard(status_id_str)
-					tl.invalidate_display_cache()
-					break
-		# Update GUI for current timeline
-		main.window.refreshList()
+			position = tl.remove_status(status_id_str)
+			if position is not None and tl == account.currentTimeline and account == account.app.currentAccount:
+				main.window.removeListItem(position)
 		sound.play(account, "delete")
 	except Exception as error:
 		account.app.handle_error(error, "Delete post")
@@ -3,7 +3,7 @@ import platform
 import os, sys
 import wx
 import locale
-from . import main, theme
+from . import main, theme, virtual_list
 from application import get_app
 from version import APP_NAME, APP_VERSION
 
@@ -130,6 +130,11 @@ class timelines_tab(wx.Panel, wx.Dialog):
 		self.main_box.Add(self.timeline_cache_enabled, 0, wx.ALL, 10)
 		self.timeline_cache_enabled.SetValue(get_app().prefs.timeline_cache_enabled)
 
+		self.virtual_list=wx.CheckBox(self, -1, "Only render the posts on screen, for faster switching to large timelines (Windows only)")
+		self.main_box.Add(self.virtual_list, 0, wx.ALL, 10)
+		self.virtual_list.SetValue(get_app().prefs.virtual_list)
+		self.virtual_list.Enable(virtual_list.available())
+
 		self.show_fusion_view=wx.CheckBox(self, -1, "Show unified Fusion View account")
 		self.main_box.Add(self.show_fusion_view, 0, wx.ALL, 10)
 		self.show_fusion_view.SetValue(get_app().prefs.show_fusion_view)
@@ -139,6 +144,11 @@ class timelines_tab(wx.Panel, wx.Dialog):
 		self.timeline_cache_limit = wx.SpinCtrl(self, -1, min=100, max=20000, initial=get_app().prefs.timeline_cache_limit, name="Maximum items to cache per timeline")
 		self.main_box.Add(self.timeline_cache_limit, 0, wx.ALL, 10)
 
+		user_cache_size_label = wx.StaticText(self, -1, "Users to remember per account (100-100000):")
+		self.main_box.Add(user_cache_size_label, 0, wx.LEFT | wx.TOP, 10)
+		self.user_cache_size = wx.SpinCtrl(self, -1, min=100, max=100000, initial=get_app().prefs.user_cache_size, name="Users to remember per account")
+		self.main_box.Add(self.user_cache_size, 0, wx.ALL, 10)
+
 		# Calculate total cache size across all accounts
 		self.clear_cache_btn = wx.Button(self, -1, self._get_cache_button_label())
 		self.clear_cache_btn.Bind(wx.EVT_BUTTON, self.on_clear_cache)
@@ -1090,10 +1100,18 @@ class OptionsGui(wx.Dialog):
 		get_app().prefs.load_all_previous=self.advanced.load_all_previous.GetValue()
 		get_app().prefs.sync_timeline_position=self.timelines_tab.sync_timeline_position.GetValue()
 		get_app().prefs.timeline_cache_enabled=self.timelines_tab.timeline_cache_enabled.GetValue()
+		get_app().prefs.virtual_list=self.timelines_tab.virtual_list.GetValue()
+		if main.window.use_virtual_list(get_app().prefs.virtual_list):
+			main.window.refreshList()
 		new_show_fusion_view = self.timelines_tab.show_fusion_view.GetValue()
 		if get_app().prefs.show_fusion_view != new_show_fusion_view:
 			get_app().set_show_fusion_view(new_show_fusion_view)
 		get_app().prefs.timeline_cache_limit=self.timelines_tab.timeline_cache_limit.GetValue()
+		get_app().prefs.user_cache_size=self.timelines_tab.user_cache_size.GetValue()
+		for account in get_app().accounts:
+			cache = getattr(getattr(account, '_platform', None), 'user_cache', None)
+			if cache:
+				cache.max_size = get_app().prefs.user_cache_size
 		get_app().prefs.check_for_updates=self.advanced.check_for_updates.GetValue()
 		# Dark mode setting
 		dark_mode_values = ['off', 'on', 'auto']
@@ -1215,12 +1233,9 @@ class OptionsGui(wx.Dialog):
 		if reverse:
 			timeline.reverse(get_app())
 		if refresh:
-			# Clear display caches on all statuses when templates/display settings change
-			for account in get_app().accounts:
-				for tl in account.timelines:
-					for status in tl.statuses:
-						if hasattr(status, '_display_cache'):
-							delattr(status, '_display_cache')
+			get_app().template_engine.invalidate()
+			# New render settings version: every timeline re-renders its items
+			get_app().render_cache.bump()
 			main.window.refreshList()
 
 	def OnClose(self, event):
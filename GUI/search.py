@@ -6,6 +6,7 @@ _SEARCH_TYPES = [
 	("Posts", "posts"),
 	("Users", "users"),
 	("Hashtags", "hashtags"),
+	("Cached posts (offline)", "history"),
 ]
 
 
@@ -63,6 +64,8 @@ class SearchGui(wx.Dialog):
 			wx.CallAfter(misc.user_search, account, query)
 		elif key == "hashtags":
 			wx.CallAfter(misc.hashtag_search, account, query)
+		elif key == "history":
+			wx.CallAfter(misc.history_search, account, query)
 		else:
 			wx.CallAfter(misc.search, account, query)
 
@@ -2,19 +2,19 @@
 
 import wx
 from application import get_app
+from status_filter import StatusFilter
 
 
-def should_show_status(status, settings, app=None, _parent_cache=None, account=None):
+def should_show_status(status, settings, app=None, account=None):
     """Check if a status should be shown based on filter settings.
 
-    This is a standalone function so it can be used by both the dialog
-    and the timeline when new posts come in.
+    This compiles the settings on every call. Timelines keep a compiled
+    filter (timeline.status_filter()); use that for more than one status.
 
     Args:
         status: The status to check
         settings: Dict with filter settings (original, replies, threads, boosts, quotes, media, no_media, replies_to_me)
-        app: Application instance for looking up parent posts (optional)
-        _parent_cache: Dict cache for parent lookups (optional, for batch filtering)
+        app: Application instance, for stripping HTML from post content (optional)
         account: Account instance for checking replies to self (optional)
 
     Returns:
@@ -26,172 +26,8 @@ def should_show_status(status, settings, app=None, _parent_cache=None, account=N
     if app is None:
         app = get_app()
 
-    def get_post_for_check(s):
-        """Get the actual post to check (unwrap boosts for content checks)."""
-        if hasattr(s, 'reblog') and s.reblog:
-            return s.reblog
-        return s
-
-    def is_boost(s):
-        return hasattr(s, 'reblog') and s.reblog is not None
-
-    def is_quote(s):
-        post = get_post_for_check(s)
-        return hasattr(post, 'quote') and post.quote is not None
-
-    def has_media(s):
-        post = get_post_for_check(s)
-        attachments = getattr(post, 'media_attachments', None)
-        return attachments is not None and len(attachments) > 0
-
-    def is_reply_to_id(s):
-        post = get_post_for_check(s)
-        return hasattr(post, 'in_reply_to_id') and post.in_reply_to_id is not None
-
-    def is_thread(s):
-        """Check if status is a self-reply (thread continuation)."""
-        post = get_post_for_check(s)
-        if not hasattr(post, 'in_reply_to_id') or post.in_reply_to_id is None:
-            return False
-
-        # Get author of this post
-        post_author = getattr(post, 'account', None)
-        if not post_author:
-            return False
-        post_author_id = str(getattr(post_author, 'id', ''))
-
-        # Fast path: use in_reply_to_account_id if available (no API call needed)
-        if hasattr(post, 'in_reply_to_account_id') and post.in_reply_to_account_id is not None:
-            return str(post.in_reply_to_account_id) == post_author_id
-
-        # Fallback: check if we know this is a self-reply from other fields
-        # Don't make API calls for filtering - too slow
-        # If we can't determine, assume it's a reply to others (safer default)
-        return False
-
-    def is_reply(s):
-        """Check if status is a reply to someone else (not self)."""
-        if not is_reply_to_id(s):
-            return False
-        return not is_thread(s)
-
-    def is_reply_to_me(s):
-        """Check if status is a reply to the current user."""
-        post = get_post_for_check(s)
-        if not hasattr(post, 'in_reply_to_id') or post.in_reply_to_id is None:
-            return False
-
-        if not account:
-            return False
-
-        # Get current user ID
-        me_id = str(getattr(account.me, 'id', '')) if hasattr(account, 'me') else ''
-        if not me_id:
-            return False
-
-        # Use in_reply_to_account_id if available
-        if hasattr(post, 'in_reply_to_account_id') and post.in_reply_to_account_id is not None:
-            return str(post.in_reply_to_account_id) == me_id
-
-        return False
-
-    def is_original(s):
-        """Check if status is an original post (not reply, not boost)."""
-        if is_boost(s):
-            return False
-        return not is_reply_to_id(s)
-
-    def is_my_post(s):
-        """Check if status is posted by the current user."""
-        if not account:
-            return False
-        post = get_post_for_check(s)
-        me_id = str(getattr(account.me, 'id', '')) if hasattr(account, 'me') else ''
-        if not me_id:
-            return False
-        post_author = getattr(post, 'account', None)
-        if not post_author:
-            return False
-        post_author_id = str(getattr(post_author, 'id', ''))
-        return post_author_id == me_id
-
-    def is_my_reply(s):
-        """Check if status is a reply posted by the current user."""
-        if not is_reply_to_id(s):
-            return False
-        return is_my_post(s)
-
-    # Now apply filters
-    _is_boost = is_boost(status)
-    _is_quote = is_quote(status)
-    _is_thread = is_thread(status)
-    _is_reply = is_reply(status)
-    _is_reply_to_me = is_reply_to_me(status)
-    _is_original = is_original(status)
-    _has_media = has_media(status)
-    _is_my_post = is_my_post(status)
-    _is_my_reply = is_my_reply(status)
-
-    # Check boost filter
-    if _is_boost and not settings.get('boosts', True):
-        return False
-
-    # Check quote filter
-    if _is_quote and not settings.get('quotes', True):
-        return False
-
-    # Check thread filter (self-replies)
-    if _is_thread and not settings.get('threads', True):
-        return False
-
-    # Check reply filter (replies to others)
-    if _is_reply and not settings.get('replies', True):
-        return False
-
-    # Check replies to me filter
-    if _is_reply_to_me and not settings.get('replies_to_me', True):
-        return False
-
-    # Check original post filter
-    if _is_original and not _is_boost and not settings.get('original', True):
-        return False
-
-    # Check media filters
-    if _has_media and not settings.get('media', True):
-        return False
-    if not _has_media and not settings.get('no_media', True):
-        return False
-
-    # Check your posts filter
-    if _is_my_post and not settings.get('my_posts', True):
-        return False
-
-    # Check your replies filter
-    if _is_my_reply and not settings.get('my_replies', True):
-        return False
-
-    # Check text filter
-    filter_text = settings.get('text', '').strip().lower()
-    if filter_text:
-        post = get_post_for_check(status)
-        # Get text content - try 'text' attribute first, then strip HTML from 'content'
-        post_text = getattr(post, 'text', '')
-        if not post_text:
-            content = getattr(post, 'content', '')
-            if content and app:
-                post_text = app.strip_html(content)
-        post_text = post_text.lower() if post_text else ''
-
-        # Also check display name and username
-        account = getattr(post, 'account', None)
-        display_name = getattr(account, 'display_name', '') if account else ''
-        acct = getattr(account, 'acct', '') if account else ''
-
-        searchable = f"{post_text} {display_name} {acct}".lower()
-        if filter_text not in searchable:
-            return False
-
-    return True
+    strip_html = app.strip_html if app else None
+    return StatusFilter(settings, account=account, strip_html=strip_html)(status)
 
 
 class TimelineFilterDialog(wx.Dialog):
@@ -374,12 +210,8 @@ class TimelineFilterDialog(wx.Dialog):
             _save_filter_settings(self.timeline.account, self.timeline)
 
             # Filter statuses from the unfiltered list
-            filtered = []
-            for status in self.timeline._unfiltered_statuses:
-                if should_show_status(status, self.timeline._filter_settings, self.app, account=self.timeline.account):
-                    filtered.append(status)
-
-            self.timeline.statuses = filtered
+            status_filter = self.timeline.status_filter()
+            self.timeline.statuses = [status for status in self.timeline._unfiltered_statuses if status_filter(status)]
             self.timeline._is_filtered = True
 
             # Refresh the list and restore position
@@ -496,11 +328,7 @@ def apply_saved_filter(timeline):
     timeline._filter_settings = saved
 
     # Filter statuses
-    filtered = []
-    for status in timeline._unfiltered_statuses:
-        if should_show_status(status, timeline._filter_settings, timeline.app, account=timeline.account):
-            filtered.append(status)
-
-    timeline.statuses = filtered
+    status_filter = timeline.status_filter()
+    timeline.statuses = [status for status in timeline._unfiltered_statuses if status_filter(status)]
     timeline._is_filtered = True
     return True
@@ -595,20 +595,14 @@ class TweetGui(wx.Dialog):
 		matches = []
 		seen_accts = set()
 
-		# First check account's user cache
+		# First check account's user cache (memory, then the on-disk user directory)
 		if hasattr(self.account, '_platform') and self.account._platform:
 			cache = self.account._platform.user_cache
-			for user in cache.get_all_users():
+			for user in cache.search(search_text, limit=15):
 				acct_lower = user.acct.lower()
-				display_name = getattr(user, 'display_name', '') or ''
-				# Match against username (with or without domain) and display name
-				username_part = acct_lower.split('@')[0] if '@' in acct_lower else acct_lower
-				if (acct_lower.startswith(search_text.lower()) or
-					username_part.startswith(search_text.lower()) or
-					display_name.lower().startswith(search_text.lower())):
-					if acct_lower not in seen_accts:
-						matches.append(user)
-						seen_accts.add(acct_lower)
+				if acct_lower not in seen_accts:
+					matches.append(user)
+					seen_accts.add(acct_lower)
 
 		# Also search the API for more suggestions (limit to keep it fast)
 		if len(matches) < 10:
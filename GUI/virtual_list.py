@@ -0,0 +1,100 @@
+"""Virtual list for the timeline contents (list2).
+
+A wx.ListBox needs the text of every row before it can show any, so switching
+to a freshly loaded 1000-item buffer rendered all 1000 items first. VirtualList
+is a wx.ListCtrl in virtual report mode with one column and no header: the
+control asks for a row's text when the row is drawn or read, so only the rows
+on screen are rendered up front. The main window prefetches the rest into the
+render cache in the background (see timeline.prerender()).
+
+It has the parts of the wx.ListBox interface the main window uses (GetCount,
+GetSelection, SetSelection, SetFirstItem, Set, EVT_LISTBOX), so the rest of
+the code treats it as list2. As with wx.ListBox, SetSelection() doesn't send a
+selection event; only the user's moves do.
+
+Only used on Windows, where the virtual list view is the native control screen
+readers already read. On macOS and GTK wx.ListCtrl is drawn by wx and isn't
+exposed to VoiceOver or Orca.
+"""
+
+import platform
+
+import wx
+
+
+def available():
+	"""Whether the virtual list can replace the list box on this platform."""
+	return platform.system() == "Windows"
+
+
+class VirtualList(wx.ListCtrl):
+	"""Single-column virtual list that renders rows on demand."""
+
+	def __init__(self, parent, size=wx.DefaultSize):
+		super(VirtualList, self).__init__(parent, -1, size=size,
+			style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_SINGLE_SEL | wx.LC_NO_HEADER)
+		self.InsertColumn(0, "")
+		self._row = lambda index: ""
+		self._programmatic = False
+		self.Bind(wx.EVT_LIST_ITEM_SELECTED, self._on_selected)
+		self.Bind(wx.EVT_SIZE, self._on_size)
+
+	def set_rows(self, count, row):
+		"""Show count rows; row(index) returns the text of one."""
+		self._row = row
+		if self.GetItemCount() != count:
+			self.SetItemCount(count)
+		# Visible rows ask for their text again
+		self.Refresh()
+
+	def OnGetItemText(self, item, column):
+		try:
+			return self._row(item)
+		except Exception:
+			return ""
+
+	def _on_selected(self, event):
+		event.Skip()
+		if self._programmatic:
+			return
+		command = wx.CommandEvent(wx.wxEVT_LISTBOX, self.GetId())
+		command.SetEventObject(self)
+		command.SetInt(event.GetIndex())
+		self.GetEventHandler().ProcessEvent(command)
+
+	def _on_size(self, event):
+		event.Skip()
+		self.SetColumnWidth(0, max(self.GetClientSize().width, 1))
+
+	# ---- wx.ListBox interface ----
+
+	def GetCount(self):
+		return self.GetItemCount()
+
+	def GetSelection(self):
+		return self.GetFirstSelected()
+
+	def SetSelection(self, index):
+		self._programmatic = True
+		try:
+			if 0 <= index < self.GetItemCount():
+				state = wx.LIST_STATE_SELECTED | wx.LIST_STATE_FOCUSED
+				self.SetItemState(index, state, state)
+				self.EnsureVisible(index)
+			else:
+				selected = self.GetFirstSelected()
+				if selected >= 0:
+					self.SetItemState(selected, 0, wx.LIST_STATE_SELECTED)
+		finally:
+			self._programmatic = False
+
+	def SetFirstItem(self, index):
+		count = self.GetItemCount()
+		if 0 <= index < count:
+			# Scrolling to the end first leaves index at the top
+			self.EnsureVisible(count - 1)
+			self.EnsureVisible(index)
+
+	def Set(self, items):
+		items = list(items)
+		self.set_rows(len(items), items.__getitem__)
@@ -12,8 +12,12 @@ import re
 import requests
 import webbrowser
 import config
+import movement_units
 import wx
 from version import APP_NAME, APP_SHORTNAME, APP_VERSION, APP_AUTHOR
+from render_cache import Prefetcher, RenderCache
+from templates import TemplateEngine
+from text_utils import collapse_whitespace, demojify, html_to_text
 
 shortname = APP_SHORTNAME
 name = APP_NAME
@@ -83,6 +87,14 @@ class Application:
 		self.timeline_settings = []
 		self._initialized = False
 		self._fusion_refresh_pending = False
+		# Startup scheduler/profiler; set during load()
+		self.startup = None
+		# Compiled postTemplate/boostTemplate/... used by template_to_string
+		self.template_engine = TemplateEngine(self)
+		# Rendered list text shared by every timeline
+		self.render_cache = RenderCache()
+		# Fills render_cache in the background for the virtual list
+		self.render_prefetcher = Prefetcher()
 
 	@classmethod
 	def get_instance(cls):
@@ -100,6 +112,12 @@ class Application:
 		from GUI import main
 		import mastodon_api as t
 		import timeline
+		from startup import StartupScheduler
+
+		# Timelines created while loading accounts hand their cache restore and
+		# first refresh to the scheduler, which runs them once all accounts exist.
+		self.startup = StartupScheduler(self)
+		config_started = self.startup.profiler.now()
 
 		self.prefs = config.Config(name="FastSM", autosave=True)
 		# In portable mode, userdata folder is already app-specific, don't add /FastSM
@@ -218,6 +236,14 @@ class Application:
 		# Timeline caching settings
 		self.prefs.timeline_cache_enabled = self.prefs.get("timeline_cache_enabled", True)  # Enable timeline caching for fast startup
 		self.prefs.timeline_cache_limit = self.prefs.get("timeline_cache_limit", 1000)  # Max items to cache per timeline
+		# Per-account in-memory user cache size
+		self.prefs.user_cache_size = self.prefs.get("user_cache_size", 500)
+		# Days before users nobody has seen are dropped from the on-disk user directory
+		self.prefs.user_cache_max_age_days = self.prefs.get("user_cache_max_age_days", 30)
+		# Render list rows as they're shown instead of the whole buffer up front (Windows only)
+		self.prefs.virtual_list = self.prefs.get("virtual_list", False)
+		main.window.use_virtual_list(self.prefs.virtual_list)
+		self.startup.profiler.record("config load", "preferences", config_started)
 
 		# Initialize audio output with selected device
 		import sound
@@ -235,7 +261,7 @@ class Application:
 		if self.prefs.invisible:
 			main.window.register_keys()
 
-		# User cache is now in-memory only per-account, no global cache needed
+		# User cache is per-account now (see UserCache), no global cache needed
 		self.users = []
 
 		self.load_timeline_settings()
@@ -285,6 +311,9 @@ class Application:
 
 		self.ensure_fusion_account()
 
+		# All accounts exist now: restore caches, then refresh from the API
+		self.startup.start()
+
 		self._initialized = True
 
 		# Check for updates on startup if enabled
@@ -309,7 +338,10 @@ class Application:
 			index = self._next_free_folder_index()
 		try:
 			self._remove_fusion_account()
+			started = self.startup.profiler.now() if self.startup else None
 			account = t.mastodon(self, index)
+			if started is not None:
+				self.startup.profiler.record("account init", f"account{index}", started)
 			self.accounts.append(account)
 			if getattr(self, '_initialized', False):
 				self.ensure_fusion_account()
@@ -546,14 +578,15 @@ class Application:
 		"""Add account session from a background thread."""
 		import mastodon_api as t
 		try:
-			account = t.mastodon(self, index)
+			with self.startup.profiler.measure("account init", f"account{index}"):
+				account = t.mastodon(self, index)
 			# Store directly - account is fully initialized
 			self.accounts.append(account)
 		except Exception as e:
 			print(f"Error loading account {index}: {e}")
 
 	def save_users(self):
-		"""No-op - user cache is in-memory only now."""
+		"""No-op - user caches are per-account now."""
 		pass
 
 	def save_timeline_settings(self):
@@ -588,16 +621,7 @@ class Application:
 
 	def strip_html(self, text):
 		"""Strip HTML tags and decode entities"""
-		# Add spaces for block elements and line breaks to prevent text concatenation
-		# Note: Don't add spaces for inline elements like <span> - Mastodon uses spans
-		# within URLs (e.g., <span class="invisible">https://</span>) and adding spaces
-		# would break the URL (causing "https:// example.com" instead of "https://example.com")
-		text = re.sub(r'</(p|div)>', ' ', text, flags=re.IGNORECASE)
-		text = re.sub(r'<br\s*/?>', ' ', text, flags=re.IGNORECASE)
-		text = html_tag_re.sub('', text)
-		text = html.unescape(text)
-		text = re.sub(r'\s+', ' ', text).strip()
-		return text
+		return html_to_text(text)
 
 	def html_to_text_for_edit(self, content, mentions=None):
 		"""Convert HTML content to plain text for editing, preserving newlines and full handles.
@@ -651,7 +675,12 @@ class Application:
 		if is_scheduled:
 			return self._process_scheduled_status(s)
 
-		if hasattr(s, 'content'):
+		# Universal statuses already carry the stripped text from ingest (or the
+		# cache); only fall back to converting the HTML when it's missing
+		text = getattr(s, 'text', None)
+		if text and isinstance(text, str):
+			text = collapse_whitespace(text)
+		elif hasattr(s, 'content'):
 			text = self.strip_html(s.content)
 		else:
 			text = ""
@@ -1127,10 +1156,11 @@ class Application:
 		if template == "":
 			template = self.prefs.postTemplate
 
-		# Prepare text content now, but replace AFTER other substitutions
-		# to prevent $..$ patterns in post text from being interpreted as template vars
-		text_content = None
-		if "$text$" in template:
+		# The template is parsed once and cached; $..$ patterns inside post
+		# text are never interpreted since rendering is a single join
+		compiled = self.template_engine.get(template)
+		text_content = ""
+		if compiled.uses_text:
 			# First check if we have a pre-processed text attribute (from StatusWrapper)
 			# This includes media descriptions and other processed content from process_status()
 			text_content = getattr(s, 'text', '')
@@ -1165,96 +1195,7 @@ class Application:
 					else:
 						text_content += f" ({type_display}) with no description"
 
-		temp = template.split(" ")
-		for i in range(len(temp)):
-			if "$" in temp[i]:
-				t = temp[i].split("$")
-				r = t[1]
-				if r == "text":
-					continue  # Already handled above
-				if "." in r:
-					q = r.split(".")
-					# Support multi-level attribute access (e.g., reblog.account.display_name)
-					try:
-						obj = s
-						parent_obj = None
-						for attr in q:
-							if obj is None:
-								break
-							parent_obj = obj
-							obj = getattr(obj, attr, None)
-						if obj is not None:
-							# Check if we need to demojify
-							last_attr = q[-1]
-							# Check for alias if this is display_name and we have an account
-							if last_attr in ('name', 'display_name') and account and parent_obj:
-								user_id = str(getattr(parent_obj, 'id', ''))
-								if user_id and user_id in account.prefs.aliases:
-									obj = account.prefs.aliases[user_id]
-								elif self.prefs.demojify:
-									demojied = self.demojify(str(obj))
-									if demojied == "":
-										obj = getattr(parent_obj, "acct", obj)
-									else:
-										obj = demojied
-							elif (last_attr in ('name', 'display_name')) and self.prefs.demojify:
-								demojied = self.demojify(str(obj))
-								if demojied == "":
-									# Try to get acct as fallback
-									fallback_obj = s
-									for attr in q[:-1]:
-										fallback_obj = getattr(fallback_obj, attr, None)
-										if fallback_obj is None:
-											break
-									if fallback_obj:
-										obj = getattr(fallback_obj, "acct", obj)
-								else:
-									obj = demojied
-							elif last_attr == 'note':
-								# Strip HTML from bio/note field
-								obj = self.strip_html(str(obj))
-							template = template.replace("$" + t[1] + "$", str(obj))
-						else:
-							# Value is None - replace with empty string to avoid showing raw template
-							template = template.replace("$" + t[1] + "$", "")
-					except Exception as e:
-						pass  # Leave placeholder if we can't resolve it
-				else:
-					if hasattr(s, t[1]):
-						try:
-							# Check for alias if this is display_name and we have an account
-							if t[1] in ('name', 'display_name') and account:
-								user_id = str(getattr(s, 'id', ''))
-								if user_id and user_id in account.prefs.aliases:
-									template = template.replace("$" + t[1] + "$", account.prefs.aliases[user_id])
-									continue
-							if t[1] == "name" or t[1] == "display_name" and self.prefs.demojify or t[1] == "text" and self.prefs.demojify_post:
-								deEmojify = True
-							else:
-								deEmojify = False
-							if deEmojify:
-								demojied = self.demojify(str(getattr(s, t[1])))
-								if demojied == "" and (t[1] == "name" or t[1] == "display_name"):
-									template = template.replace("$" + t[1] + "$", getattr(s, "acct", ""))
-								else:
-									template = template.replace("$" + t[1] + "$", demojied)
-							else:
-								if t[1] == "created_at":
-									template = template.replace("$" + t[1] + "$", self.parse_date(getattr(s, t[1])))
-								elif t[1] == "note":
-									# Strip HTML from bio/note field
-									template = template.replace("$" + t[1] + "$", self.strip_html(str(getattr(s, t[1]))))
-								else:
-									template = template.replace("$" + t[1] + "$", str(getattr(s, t[1])))
-						except:
-							try:
-								template = template.replace("$" + t[1] + "$", str(getattr(s, t[1])))
-							except Exception as e:
-								print(e)
-		# Replace $text$ last to prevent post content with $..$ from being interpreted as template vars
-		if text_content is not None:
-			template = template.replace("$text$", text_content)
-		return template
+		return compiled.render(s, account, text_content)
 
 	def get_users_in_status(self, account, s):
 		"""Get usernames mentioned in a status for reply"""
@@ -1395,7 +1336,7 @@ class Application:
 			except:
 				pass
 		if account and hasattr(account, 'user_cache') and account.user_cache:
-			account.user_cache.unknown_users.append(str(id))
+			account.user_cache.unknown_users.add(str(id))
 		else:
 			self.unknown_users.append(id)
 		print(str(id) + " not found. Added to queue.")
@@ -1534,20 +1475,12 @@ class Application:
 			return None
 
 	def find_status(self, tl, id):
-		index = 0
-		for i in tl.statuses:
-			if i.id == id:
-				return index
-			index += 1
-		return -1
+		position = tl.statuses.position(id)
+		return position if position is not None else -1
 
 	def find_reply(self, tl, id):
-		index = 0
-		for i in tl.statuses:
-			if hasattr(i, "in_reply_to_id") and i.in_reply_to_id == id:
-				return index
-			index += 1
-		return -1
+		position = movement_units.navigation(tl.statuses).first_reply(id)
+		return position if position is not None else -1
 
 	def speak_reply(self, account, status):
 		import speak
@@ -1799,32 +1732,7 @@ class Application:
 
 	def demojify(self, text):
 		"""Remove emoji from text while preserving accented characters."""
-		import re
-		text = str(text)
-
-		# First remove Mastodon-style custom emoji shortcodes like :emoji_name:
-		# These are in format :shortcode: where shortcode is alphanumeric with underscores
-		shortcode_pattern = re.compile(r':[a-zA-Z0-9_]+:', flags=re.UNICODE)
-		text = shortcode_pattern.sub('', text)
-
-		# Pattern to match most Unicode emoji ranges
-		emoji_pattern = re.compile(
-			"["
-			"\U0001F300-\U0001F9FF"  # Miscellaneous Symbols and Pictographs, Emoticons, etc.
-			"\U0001FA00-\U0001FAFF"  # Chess, symbols, etc.
-			"\U00002600-\U000027BF"  # Misc symbols, Dingbats
-			"\U0001F600-\U0001F64F"  # Emoticons
-			"\U0001F680-\U0001F6FF"  # Transport and Map
-			"\U0001F1E0-\U0001F1FF"  # Flags
-			"\U00002300-\U000023FF"  # Misc Technical
-			"\U00002B50-\U00002B55"  # Stars
-			"\U0000FE00-\U0000FE0F"  # Variation Selectors
-			"\U0000200D"             # Zero Width Joiner
-			"\U00003030\U000025AA\U000025AB\U000025B6\U000025C0\U000025FB-\U000025FE"
-			"]+",
-			flags=re.UNICODE
-		)
-		return emoji_pattern.sub('', text)
+		return demojify(text)
 
 	def handle_error(self, error, name="Unknown"):
 		"""Handle API errors from Mastodon or Bluesky"""
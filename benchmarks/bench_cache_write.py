@@ -0,0 +1,99 @@
+"""Benchmark: saving a timeline to the cache after a load.
+
+Saves a 1000-item home timeline, then times the saves a session makes:
+
+- initial: the same items again (an initial load that found nothing new).
+- refresh: 40 new posts on top, the oldest 40 dropped.
+- previous: 40 older posts added at the bottom (load previous).
+
+for:
+
+- legacy: save_timeline() as it was, rewriting every status and deleting
+  and re-inserting every timeline_items row one execute at a time.
+- diff: save_timeline() now, writing only new, removed and moved entries
+  and statuses that changed.
+
+Run from the repository root:
+
+	python benchmarks/bench_cache_write.py [items]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import TimelineCache
+from models import UniversalStatus, UniversalUser
+
+KEY = ("home", "Home", None)
+
+
+def statuses(first, count):
+	users = [UniversalUser(id=str(n), acct=f"user{n}@example.social", username=f"user{n}", display_name=f"User {n}") for n in range(50)]
+	start = datetime(2024, 1, 1)
+	return [UniversalStatus(id=str(110000000000000000 + n), account=users[n % len(users)], content=f"<p>post {n}</p>",
+		text=f"post {n}", created_at=start + timedelta(seconds=n)) for n in range(first + count - 1, first - 1, -1)]
+
+
+def legacy_save(cache, items, limit):
+	"""save_timeline() before it diffed against the stored entries."""
+	with cache._lock:
+		cache.save_statuses_batch(items[:limit])
+		cursor = cache._conn.cursor()
+		cached_at = datetime.now().isoformat()
+		cursor.execute('''
+			DELETE FROM timeline_items
+			WHERE timeline_type = ? AND timeline_name = ? AND timeline_data = ?
+		''', (KEY[0], KEY[1], ''))
+		for position, item in enumerate(items[:limit]):
+			cursor.execute('''
+				INSERT OR REPLACE INTO timeline_items
+				(timeline_type, timeline_name, timeline_data, item_id, item_type, position, cached_at)
+				VALUES (?, ?, ?, ?, ?, ?, ?)
+			''', (KEY[0], KEY[1], '', str(item.id), 'status', position, cached_at))
+		cache._conn.commit()
+
+
+def diff_save(cache, items, limit):
+	cache.save_timeline(*KEY, items, "status", limit=limit)
+
+
+def timed(cache, save, before, after, limit, runs=5):
+	best = None
+	for _ in range(runs):
+		diff_save(cache, before, limit)
+		started = time.perf_counter()
+		save(cache, after, limit)
+		elapsed = time.perf_counter() - started
+		best = elapsed if best is None else min(best, elapsed)
+	return best
+
+
+def main(count=1000):
+	base = statuses(1000, count)
+	cases = {
+		"initial": base,
+		"refresh": statuses(1000 + count, 40) + base[:-40],
+		"previous": base + statuses(960, 40),
+	}
+	limit = count + 40
+	with tempfile.TemporaryDirectory() as directory:
+		cache = TimelineCache(directory, "bench")
+		print(f"{count} items")
+		print(f"{'save':<12}{'legacy':>10}{'diff':>10}")
+		for name, after in cases.items():
+			legacy_time = timed(cache, legacy_save, base, after, limit)
+			diff_time = timed(cache, diff_save, base, after, limit)
+			loaded = cache.load_timeline(*KEY, "status")[0]
+			if [s.id for s in loaded] != [s.id for s in after]:
+				raise SystemExit(f"{name}: the cache loads a different timeline")
+			print(f"{name:<12}{legacy_time * 1000:>8.1f}ms{diff_time * 1000:>8.1f}ms")
+		cache.close()
+
+
+if __name__ == "__main__":
+	main(*(int(arg) for arg in sys.argv[1:2]))
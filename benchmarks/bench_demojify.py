@@ -0,0 +1,75 @@
+"""Micro-benchmark: demojify over mixed-script display names.
+
+Run from the repository root:
+
+	python benchmarks/bench_demojify.py [count]
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_utils import demojify
+
+NAME_PARTS = [
+	"Alice", "bob", "Zoë", "José", "Ærøskøbing", "Дмитрий", "李小龍", "さくら", "محمد",
+	"Ψυχή", "\U0001F600", "\U0001F3F3️‍\U0001F308", "✨", ":blobcat:", ":verified:",
+	"\U0001F1FA\U0001F1E6", "(he/him)", "|", "Writer", "dev",
+]
+
+
+def legacy_demojify(text):
+	"""The previous Application.demojify, which compiled both patterns per call."""
+	text = str(text)
+	shortcode_pattern = re.compile(r':[a-zA-Z0-9_]+:', flags=re.UNICODE)
+	text = shortcode_pattern.sub('', text)
+	emoji_pattern = re.compile(
+		"["
+		"\U0001F300-\U0001F9FF"
+		"\U0001FA00-\U0001FAFF"
+		"\U00002600-\U000027BF"
+		"\U0001F600-\U0001F64F"
+		"\U0001F680-\U0001F6FF"
+		"\U0001F1E0-\U0001F1FF"
+		"\U00002300-\U000023FF"
+		"\U00002B50-\U00002B55"
+		"\U0000FE00-\U0000FE0F"
+		"\U0000200D"
+		"\U00003030\U000025AA\U000025AB\U000025B6\U000025C0\U000025FB-\U000025FE"
+		"]+",
+		flags=re.UNICODE
+	)
+	return emoji_pattern.sub('', text)
+
+
+def make_names(count, distinct=2000):
+	rng = random.Random(1)
+	pool = [" ".join(rng.choice(NAME_PARTS) for _ in range(rng.randint(1, 4))) for _ in range(distinct)]
+	# Timelines repeat a few authors heavily
+	return [pool[min(int(rng.expovariate(1 / 150)), distinct - 1)] for _ in range(count)]
+
+
+def run(func, names):
+	started = time.perf_counter()
+	for name in names:
+		func(name)
+	return time.perf_counter() - started
+
+
+def main():
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+	names = make_names(count)
+	mismatches = sum(1 for n in names[:5000] if demojify(n) != legacy_demojify(n))
+	legacy = run(legacy_demojify, names)
+	current = run(demojify, names)
+	print(f"{count} names, {len(set(names))} distinct, {mismatches} mismatches in the first 5000")
+	print(f"legacy:  {legacy * 1000:8.2f} ms ({legacy / count * 1e6:.2f} us/name)")
+	print(f"current: {current * 1000:8.2f} ms ({current / count * 1e6:.2f} us/name)")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,224 @@
+"""Benchmark: applying a timeline filter to a loaded buffer.
+
+Converts the federated-stream fixture from bench_stream_convert.py and
+filters it the way the Filter Timeline dialog does, with a few typical
+settings:
+
+- legacy: should_show_status() as it was, defining its helper closures and
+  working out every post type for every status.
+- compiled: one status_filter.StatusFilter per apply, as timelines use now.
+- indexed: the same, with the parent-author lookup a timeline gives it
+  (StatusList.position over the buffer), which also finds self-replies
+  that came without in_reply_to_account_id.
+
+legacy and compiled must keep the same statuses; the run stops if they
+don't.
+
+Run from the repository root:
+
+	python benchmarks/bench_filter.py [statuses]
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_model_memory import fixture
+from platforms.mastodon.models import mastodon_status_to_universal, strip_html
+from status_filter import StatusFilter
+from status_index import StatusList
+
+ME_ID = "109000000000000007"
+SETTINGS = {
+	"hide boosts": {"boosts": False},
+	"hide replies and threads": {"replies": False, "threads": False},
+	"only media": {"no_media": False},
+	"hide mine and replies to me": {"my_posts": False, "replies_to_me": False},
+	"text": {"text": "coffee"},
+	"text, no boosts or replies": {"boosts": False, "replies": False, "text": "rust"},
+}
+
+
+class _Account(object):
+	class me(object):
+		id = ME_ID
+
+
+def legacy_should_show_status(status, settings, strip_html=None, account=None):
+	"""should_show_status() before the filter was compiled."""
+	if not settings:
+		return True
+
+	def get_post_for_check(s):
+		if hasattr(s, 'reblog') and s.reblog:
+			return s.reblog
+		return s
+
+	def is_boost(s):
+		return hasattr(s, 'reblog') and s.reblog is not None
+
+	def is_quote(s):
+		post = get_post_for_check(s)
+		return hasattr(post, 'quote') and post.quote is not None
+
+	def has_media(s):
+		post = get_post_for_check(s)
+		attachments = getattr(post, 'media_attachments', None)
+		return attachments is not None and len(attachments) > 0
+
+	def is_reply_to_id(s):
+		post = get_post_for_check(s)
+		return hasattr(post, 'in_reply_to_id') and post.in_reply_to_id is not None
+
+	def is_thread(s):
+		post = get_post_for_check(s)
+		if not hasattr(post, 'in_reply_to_id') or post.in_reply_to_id is None:
+			return False
+		post_author = getattr(post, 'account', None)
+		if not post_author:
+			return False
+		post_author_id = str(getattr(post_author, 'id', ''))
+		if hasattr(post, 'in_reply_to_account_id') and post.in_reply_to_account_id is not None:
+			return str(post.in_reply_to_account_id) == post_author_id
+		return False
+
+	def is_reply(s):
+		if not is_reply_to_id(s):
+			return False
+		return not is_thread(s)
+
+	def is_reply_to_me(s):
+		post = get_post_for_check(s)
+		if not hasattr(post, 'in_reply_to_id') or post.in_reply_to_id is None:
+			return False
+		if not account:
+			return False
+		me_id = str(getattr(account.me, 'id', '')) if hasattr(account, 'me') else ''
+		if not me_id:
+			return False
+		if hasattr(post, 'in_reply_to_account_id') and post.in_reply_to_account_id is not None:
+			return str(post.in_reply_to_account_id) == me_id
+		return False
+
+	def is_original(s):
+		if is_boost(s):
+			return False
+		return not is_reply_to_id(s)
+
+	def is_my_post(s):
+		if not account:
+			return False
+		post = get_post_for_check(s)
+		me_id = str(getattr(account.me, 'id', '')) if hasattr(account, 'me') else ''
+		if not me_id:
+			return False
+		post_author = getattr(post, 'account', None)
+		if not post_author:
+			return False
+		return str(getattr(post_author, 'id', '')) == me_id
+
+	def is_my_reply(s):
+		if not is_reply_to_id(s):
+			return False
+		return is_my_post(s)
+
+	_is_boost = is_boost(status)
+	_is_quote = is_quote(status)
+	_is_thread = is_thread(status)
+	_is_reply = is_reply(status)
+	_is_reply_to_me = is_reply_to_me(status)
+	_is_original = is_original(status)
+	_has_media = has_media(status)
+	_is_my_post = is_my_post(status)
+	_is_my_reply = is_my_reply(status)
+
+	if _is_boost and not settings.get('boosts', True):
+		return False
+	if _is_quote and not settings.get('quotes', True):
+		return False
+	if _is_thread and not settings.get('threads', True):
+		return False
+	if _is_reply and not settings.get('replies', True):
+		return False
+	if _is_reply_to_me and not settings.get('replies_to_me', True):
+		return False
+	if _is_original and not _is_boost and not settings.get('original', True):
+		return False
+	if _has_media and not settings.get('media', True):
+		return False
+	if not _has_media and not settings.get('no_media', True):
+		return False
+	if _is_my_post and not settings.get('my_posts', True):
+		return False
+	if _is_my_reply and not settings.get('my_replies', True):
+		return False
+
+	filter_text = settings.get('text', '').strip().lower()
+	if filter_text:
+		post = get_post_for_check(status)
+		post_text = getattr(post, 'text', '')
+		if not post_text:
+			content = getattr(post, 'content', '')
+			if content and strip_html:
+				post_text = strip_html(content)
+		post_text = post_text.lower() if post_text else ''
+		author = getattr(post, 'account', None)
+		display_name = getattr(author, 'display_name', '') if author else ''
+		acct = getattr(author, 'acct', '') if author else ''
+		if filter_text not in f"{post_text} {display_name} {acct}".lower():
+			return False
+	return True
+
+
+def parent_lookup(items):
+	"""A timeline's parent_author_id() over items."""
+	def parent_author(status_id):
+		position = items.position(status_id)
+		if position is None:
+			return None
+		item = items[position]
+		if item.reblog is not None:
+			return None
+		return str(item.account.id)
+	return parent_author
+
+
+def best_of(runs, func):
+	best = None
+	for _ in range(runs):
+		start = time.perf_counter()
+		result = func()
+		elapsed = time.perf_counter() - start
+		best = elapsed if best is None else min(best, elapsed)
+	return best, result
+
+
+def main(count=5000):
+	statuses = [mastodon_status_to_universal(json.loads(payload)) for payload in fixture(count)]
+	account = _Account()
+	items = StatusList(None, statuses)
+	print(f"{len(statuses)} statuses")
+	print(f"{'settings':<30}{'legacy':>10}{'compiled':>10}{'indexed':>10}{'shown':>8}")
+	for name, settings in SETTINGS.items():
+		legacy_time, legacy = best_of(5, lambda: [s for s in statuses if legacy_should_show_status(s, settings, strip_html, account)])
+
+		def compiled():
+			status_filter = StatusFilter(settings, account=account, strip_html=strip_html)
+			return [s for s in statuses if status_filter(s)]
+
+		def indexed():
+			status_filter = StatusFilter(settings, account=account, strip_html=strip_html, parent_author=parent_lookup(items))
+			return [s for s in statuses if status_filter(s)]
+
+		compiled_time, shown = best_of(5, compiled)
+		if [s.id for s in shown] != [s.id for s in legacy]:
+			raise SystemExit(f"{name}: compiled filter keeps different statuses")
+		indexed_time, indexed_shown = best_of(5, indexed)
+		print(f"{name:<30}{legacy_time * 1000:>8.1f}ms{compiled_time * 1000:>8.1f}ms{indexed_time * 1000:>8.1f}ms{len(indexed_shown):>8}")
+
+
+if __name__ == "__main__":
+	main(*(int(arg) for arg in sys.argv[1:2]))
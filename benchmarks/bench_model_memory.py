@@ -0,0 +1,96 @@
+"""Benchmark: memory held by converted statuses.
+
+Converts the federated-stream fixture from bench_stream_convert.py (a few
+hundred distinct authors posting, boosting, replying) and measures, with
+tracemalloc, what stays allocated while the statuses are held, as a
+timeline buffer would hold them:
+
+- full: every status keeps its whole API object as _platform_data, as it
+  did before compaction (nested account, reblog, media and mentions
+  included).
+- compact: what the converters keep now: _platform_data holds only the
+  keys the model doesn't already have.
+
+Both runs use the slotted models and share identical users, so the
+difference is the platform data alone. The last line shows the size of a
+slotted status and user object, which no longer carry a __dict__.
+
+Run from the repository root:
+
+	python benchmarks/bench_model_memory.py [statuses]
+"""
+
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_stream_convert import _status
+from platforms.mastodon.models import attrib_dict, mastodon_status_to_universal
+
+
+def fixture(count):
+	"""Status JSON, with each author's account the same wherever it appears, as in real pages."""
+	rng = random.Random(7)
+	accounts = {}
+	payloads = []
+	for n in range(count):
+		status = _status(rng, n)
+		for post in (status, status["reblog"]):
+			if post is not None:
+				post["account"] = accounts.setdefault(post["account"]["id"], post["account"])
+		payloads.append(json.dumps(status))
+	return payloads
+
+
+def full(data):
+	return mastodon_status_to_universal(data, platform_data=attrib_dict(data))
+
+
+def compact(data):
+	return mastodon_status_to_universal(data)
+
+
+def measure(convert, payloads):
+	"""(bytes held by the converted statuses, conversion time, statuses)."""
+	gc.collect()
+	tracemalloc.start()
+	started = time.perf_counter()
+	statuses = [convert(json.loads(payload)) for payload in payloads]
+	elapsed = time.perf_counter() - started
+	gc.collect()
+	held = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	return held, elapsed, statuses
+
+
+def authors(statuses):
+	users = [s.account for s in statuses] + [s.reblog.account for s in statuses if s.reblog]
+	return len(users), len({id(user) for user in users})
+
+
+def main():
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+	payloads = fixture(count)
+	print(f"{count} statuses, {sum(map(len, payloads)) / 1e6:.1f} MB of JSON")
+	results = {}
+	for name, convert in (("full", full), ("compact", compact)):
+		held, elapsed, statuses = measure(convert, payloads)
+		references, objects = authors(statuses)
+		results[name] = held
+		print(f"{name:8} {held / 1e6:7.2f} MB held ({held / count:6.0f} B/status), "
+			f"{references} author references -> {objects} user objects, converted in {elapsed * 1000:.0f} ms")
+		del statuses
+	print(f"compact holds {results['compact'] / results['full']:.0%} of full")
+	sample = compact(json.loads(payloads[0]))
+	print(f"instance sizes: status {sys.getsizeof(sample)} B, user {sys.getsizeof(sample.account)} B, "
+		f"__dict__: {hasattr(sample, '__dict__')}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,82 @@
+"""Benchmark: full-text search over the timeline cache.
+
+Fills a throwaway timeline_cache.db with synthetic posts through
+save_statuses_batch(), which indexes them as it saves, then times ranked
+searches the way the app runs them:
+
+- history: the best 200 matches in the whole cache (the cached history
+  timeline).
+- buffer: every match among the ids of one 5000-item buffer
+  (search(within=...)).
+
+Run from the repository root:
+
+	python benchmarks/bench_search.py [posts]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import TimelineCache
+from models import UniversalStatus, UniversalUser
+
+# Rough word frequencies: a few common words, a long tail of rare ones
+WORDS = ("the a and to of in is it for on that this with my just today".split() * 20
+	+ "coffee cats rust python accessibility screen reader weather mastodon garden music".split() * 3
+	+ [f"word{n}" for n in range(5000)])
+QUERIES = ("the", "coffee", "screen reader", "acc", "word1234", "cats garden", "user12")
+
+
+def fixture(count):
+	rng = random.Random(5)
+	users = [UniversalUser(id=str(n), acct=f"user{n}@example.social", username=f"user{n}", display_name=f"User {n}") for n in range(2000)]
+	start = datetime(2024, 1, 1)
+	for n in range(count):
+		text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 50)))
+		yield UniversalStatus(id=str(110000000000000000 + n), account=rng.choice(users), content=f"<p>{text}</p>",
+			text=text, created_at=start + timedelta(seconds=n))
+
+
+def timed(func, runs=5):
+	best = None
+	for _ in range(runs):
+		started = time.perf_counter()
+		result = func()
+		elapsed = time.perf_counter() - started
+		best = elapsed if best is None else min(best, elapsed)
+	return best, result
+
+
+def main(count=200000):
+	with tempfile.TemporaryDirectory() as directory:
+		cache = TimelineCache(directory, "bench")
+		if not cache.search_available():
+			raise SystemExit("This SQLite has no FTS5")
+		started = time.perf_counter()
+		batch = []
+		for status in fixture(count):
+			batch.append(status)
+			if len(batch) == 1000:
+				cache.save_statuses_batch(batch)
+				batch = []
+		cache.save_statuses_batch(batch)
+		print(f"{count} posts saved and indexed in {time.perf_counter() - started:.1f}s "
+			f"({os.path.getsize(cache.db_path) / (1024 * 1024):.0f}MB)")
+
+		buffer = [str(110000000000000000 + n) for n in range(count - 5000, count)]
+		print(f"{'query':<16}{'history':>10}{'matches':>9}{'buffer':>10}{'matches':>9}")
+		for query in QUERIES:
+			history_time, history = timed(lambda: cache.search(query, limit=200))
+			buffer_time, found = timed(lambda: cache.search(query, limit=len(buffer), within=buffer))
+			print(f"{query:<16}{history_time * 1000:>8.1f}ms{len(history):>9}{buffer_time * 1000:>8.1f}ms{len(found):>9}")
+		cache.close()
+
+
+if __name__ == "__main__":
+	main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,135 @@
+"""Micro-benchmark: federated-stream events to UniversalStatus.
+
+Feeds a federated-stream fixture through SSEParser and converts every update
+the way the stream handlers do: the legacy path rebuilt each payload as nested
+AttribAccessDicts first, the current one converts the parsed JSON directly.
+
+The fixture is synthesized in the shape of real /api/v1/streaming/public
+traffic (boosts, replies, media, mentions, custom emoji, cards, polls,
+heartbeats and deletes), so the benchmark runs offline and repeatably.
+
+Run from the repository root:
+
+	python benchmarks/bench_stream_convert.py [events]
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mastodon import AttribAccessDict
+
+from platforms.mastodon.models import attrib_dict, mastodon_status_to_universal
+from stream_engine import SSEParser
+
+INSTANCES = ["mastodon.social", "fosstodon.org", "hachyderm.io", "mas.to", "infosec.exchange", "tech.lgbt"]
+WORDS = "the a stream of posts about cats coffee rust python accessibility screen readers weather today is".split()
+
+
+def _account(rng, n):
+	domain = rng.choice(INSTANCES)
+	return {
+		"id": str(109000000000000000 + n), "username": f"user{n}", "acct": f"user{n}@{domain}",
+		"display_name": f"User {n} :blobcat:", "locked": False, "bot": rng.random() < 0.05,
+		"discoverable": True, "group": False, "created_at": "2022-11-05T00:00:00.000Z",
+		"note": f"<p>Hi, I'm user {n}. I post about {' and '.join(rng.sample(WORDS, 3))}.</p>",
+		"url": f"https://{domain}/@user{n}", "uri": f"https://{domain}/users/user{n}",
+		"avatar": f"https://files.{domain}/avatars/{n}.png", "avatar_static": f"https://files.{domain}/avatars/{n}.png",
+		"header": f"https://files.{domain}/headers/{n}.png", "header_static": f"https://files.{domain}/headers/{n}.png",
+		"followers_count": rng.randint(0, 5000), "following_count": rng.randint(0, 2000),
+		"statuses_count": rng.randint(0, 40000), "last_status_at": "2024-05-01",
+		"emojis": [{"shortcode": "blobcat", "url": f"https://files.{domain}/emoji/blobcat.png",
+			"static_url": f"https://files.{domain}/emoji/blobcat.png", "visible_in_picker": True}],
+		"fields": [{"name": "Web", "value": f"<a href=\"https://example.com/{n}\">example.com/{n}</a>", "verified_at": None}],
+	}
+
+
+def _status(rng, n, depth=0):
+	account = _account(rng, rng.randint(1, 400))
+	domain = account["acct"].split("@")[1]
+	words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 60)))
+	mentions = [{"id": str(n + i), "username": f"friend{i}", "acct": f"friend{i}@{domain}", "url": f"https://{domain}/@friend{i}"} for i in range(rng.randint(0, 2))]
+	content = "<p>" + " ".join(f"<span class=\"h-card\"><a href=\"{m['url']}\" class=\"u-url mention\">@<span>{m['username']}</span></a></span>" for m in mentions) + f" {words} &amp; more</p><p><a href=\"https://{domain}/tags/cats\" class=\"mention hashtag\" rel=\"tag\">#<span>cats</span></a></p>"
+	status = {
+		"id": str(112000000000000000 + n), "created_at": "2024-05-01T12:34:56.789Z",
+		"in_reply_to_id": str(112000000000000000 + n - 1) if rng.random() < 0.3 else None,
+		"in_reply_to_account_id": account["id"] if rng.random() < 0.3 else None,
+		"sensitive": False, "spoiler_text": "cw: food" if rng.random() < 0.1 else "", "visibility": "public",
+		"language": "en", "uri": f"https://{domain}/users/x/statuses/{n}", "url": f"https://{domain}/@x/{n}",
+		"replies_count": rng.randint(0, 20), "reblogs_count": rng.randint(0, 50), "favourites_count": rng.randint(0, 200),
+		"edited_at": None, "content": content, "reblog": None, "application": None, "account": account,
+		"media_attachments": [{"id": str(n * 10 + i), "type": "image", "url": f"https://files.{domain}/m/{n}/{i}.jpg",
+			"preview_url": f"https://files.{domain}/m/{n}/{i}_s.jpg", "remote_url": None, "description": "A cat on a keyboard",
+			"blurhash": "UBL_:rOpGG-;~qRjWBay", "meta": {"original": {"width": 1024, "height": 768}, "small": {"width": 400, "height": 300}}}
+			for i in range(rng.choice((0, 0, 0, 1, 4)))],
+		"mentions": mentions, "tags": [{"name": "cats", "url": f"https://{domain}/tags/cats"}], "emojis": [],
+		"card": {"url": "https://example.com/article", "title": "An article", "description": "About things", "type": "link",
+			"image": None, "width": 0, "height": 0} if rng.random() < 0.2 else None,
+		"poll": {"id": str(n), "expires_at": "2024-05-02T12:00:00.000Z", "expired": False, "multiple": False, "votes_count": 10,
+			"options": [{"title": "Yes", "votes_count": 7}, {"title": "No", "votes_count": 3}], "emojis": []} if rng.random() < 0.03 else None,
+		"filtered": [],
+	}
+	if depth == 0 and rng.random() < 0.25:
+		boosted = _status(rng, n + 500000, depth=1)
+		status.update(content="", media_attachments=[], mentions=[], tags=[], card=None, poll=None, reblog=boosted)
+	return status
+
+
+def make_stream(count):
+	"""SSE body for a federated stream with count updates, plus heartbeats and deletes."""
+	rng = random.Random(7)
+	parts = []
+	for n in range(count):
+		if n % 20 == 0:
+			parts.append(":thump\n\n")
+		if n % 15 == 0:
+			parts.append(f"event: delete\ndata: {111000000000000000 + n}\n\n")
+		parts.append("event: update\ndata: " + json.dumps(_status(rng, n)) + "\n\n")
+	return "".join(parts).encode("utf-8")
+
+
+def legacy_convert(obj):
+	"""The previous stream handlers' recursive AttribAccessDict rebuild."""
+	if isinstance(obj, dict):
+		return AttribAccessDict(**{k: legacy_convert(v) for k, v in obj.items()})
+	elif isinstance(obj, list):
+		return [legacy_convert(item) for item in obj]
+	return obj
+
+
+def events(body):
+	parser = SSEParser()
+	out = []
+	# Stream bodies arrive in network-sized pieces
+	for i in range(0, len(body), 16384):
+		out.extend(parser.feed(body[i:i + 16384]))
+	return out
+
+
+def run(prepare, parsed):
+	started = time.perf_counter()
+	result = [mastodon_status_to_universal(prepare(data)) for event_type, data in parsed if event_type == "update"]
+	return time.perf_counter() - started, result
+
+
+def main():
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+	body = make_stream(count)
+	started = time.perf_counter()
+	parsed = events(body)
+	parse_time = time.perf_counter() - started
+
+	legacy, old = run(legacy_convert, json.loads(json.dumps(parsed)))
+	current, new = run(attrib_dict, parsed)
+	mismatches = sum(1 for a, b in zip(old, new) if (a.id, a.text, a.account.acct, len(a.media_attachments), bool(a.reblog)) != (b.id, b.text, b.account.acct, len(b.media_attachments), bool(b.reblog)))
+	print(f"{count} updates, {len(body) / 1e6:.1f} MB of SSE, parsed in {parse_time * 1000:.1f} ms, {mismatches} mismatches")
+	print(f"legacy:  {legacy * 1000:8.2f} ms ({legacy / count * 1e6:.1f} us/status)")
+	print(f"current: {current * 1000:8.2f} ms ({current / count * 1e6:.1f} us/status)")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,73 @@
+"""Micro-benchmark: per-row cost of rendering postTemplate/boostTemplate.
+
+Run from the repository root:
+
+	python benchmarks/bench_templates.py [count]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import UniversalStatus, UniversalUser
+from templates import TemplateEngine
+
+POST_TEMPLATE = "$account.display_name$ (@$account.acct$): $text$ $created_at$"
+BOOST_TEMPLATE = "$account.display_name$ boosted $reblog.account.display_name$: $text$ $created_at$"
+
+
+class _App(object):
+	"""The three Application helpers templates call into, kept trivial so the
+	numbers measure template rendering itself."""
+
+	def __init__(self):
+		self.prefs = SimpleNamespace(demojify=False, demojify_post=False)
+
+	def demojify(self, text):
+		return text
+
+	def strip_html(self, text):
+		return text
+
+	def parse_date(self, date):
+		return date.strftime("%I:%M %p")
+
+
+def make_statuses(count):
+	statuses = []
+	for i in range(count):
+		user = UniversalUser(id=str(i % 500), acct=f"user{i % 500}@example.com", username=f"user{i % 500}", display_name=f"User {i % 500}")
+		status = UniversalStatus(id=str(i), account=user, content=f"<p>post {i}</p>", text=f"post {i}", created_at=datetime(2024, 1, 1, 12, i % 60))
+		if i % 5 == 0:
+			status = UniversalStatus(id=f"b{i}", account=user, content="", text="", created_at=status.created_at, reblog=status)
+		statuses.append(status)
+	return statuses
+
+
+def main():
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+	statuses = make_statuses(count)
+	account = SimpleNamespace(prefs=SimpleNamespace(aliases={"7": "Seven"}))
+	engine = TemplateEngine(_App())
+
+	started = time.perf_counter()
+	for _ in range(1000):
+		engine.compile(POST_TEMPLATE)
+	compile_cost = (time.perf_counter() - started) / 1000
+
+	started = time.perf_counter()
+	for s in statuses:
+		template = BOOST_TEMPLATE if s.reblog else POST_TEMPLATE
+		engine.get(template).render(s, account, s.text or s.reblog.text)
+	elapsed = time.perf_counter() - started
+
+	print(f"compile once:     {compile_cost * 1e6:8.2f} us")
+	print(f"render {count} rows: {elapsed * 1000:8.2f} ms total, {elapsed / count * 1e6:.2f} us/row")
+
+
+if __name__ == "__main__":
+	main()
@@ -2,5 +2,6 @@
 """Timeline caching module for fast app startup."""
 
 from .timeline_cache import TimelineCache
+from .writer import CacheWriter
 
-__all__ = ['TimelineCache']
+__all__ = ['TimelineCache', 'CacheWriter']
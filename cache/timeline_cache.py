@@ -1,13 +1,17 @@
 # -*- coding: utf-8 -*-
 """SQLite-based timeline caching for fast app startup."""
 
+import bisect
 import sqlite3
 import os
+import re
 import threading
 import time
 import json
+import zlib
 from datetime import datetime
 from typing import Optional, List, Dict, Any, Tuple
+from urllib.request import pathname2url
 
 from .serialization import (
     user_to_row, row_to_user,
@@ -15,6 +19,8 @@ from .serialization import (
     notification_to_row, row_to_notification,
 )
 from models import UniversalUser, UniversalStatus, UniversalNotification
+from text_utils import html_to_text
+from .writer import CacheWriter
 
 # Get logger for cache operations
 try:
@@ -43,6 +49,116 @@ def _log_debug(msg: str):
     if _logger:
         _logger.debug(msg)
 
+_search_word_re = re.compile(r'\w+')
+
+
+# Statuses indexed per step of the search backfill after an upgrade
+_SEARCH_BACKFILL_CHUNK = 500
+
+# Spacing between the stored positions of timeline entries, so entries
+# added above, below or between others rarely move the rest
+_POSITION_STEP = 1024
+
+
+def _increasing_run(values: List[int]) -> List[int]:
+    """Indexes of a longest strictly increasing subsequence of values."""
+    tails = []  # tails[k]: index ending the best run of length k + 1
+    tail_values = []
+    previous = [None] * len(values)
+    for i, value in enumerate(values):
+        k = bisect.bisect_left(tail_values, value)
+        previous[i] = tails[k - 1] if k else None
+        if k == len(tails):
+            tails.append(i)
+            tail_values.append(value)
+        else:
+            tails[k] = i
+            tail_values[k] = value
+    run = []
+    i = tails[-1] if tails else None
+    while i is not None:
+        run.append(i)
+        i = previous[i]
+    run.reverse()
+    return run
+
+
+def _timeline_positions(item_ids: List[str], stored: Dict[str, int]) -> List[int]:
+    """Positions to store for item_ids, in order, given the stored id -> position.
+
+    As many stored entries as possible keep their position; the others
+    are spaced out between them. Everything is renumbered only when
+    there's no room left between two entries.
+    """
+    known = [i for i, item_id in enumerate(item_ids) if item_id in stored]
+    anchors = [known[k] for k in _increasing_run([stored[item_ids[i]] for i in known])]
+    positions = [None] * len(item_ids)
+    for i in anchors:
+        positions[i] = stored[item_ids[i]]
+    # Fill each run of new or moved entries between two anchors
+    bounds = [-1] + anchors + [len(item_ids)]
+    for lower, upper in zip(bounds, bounds[1:]):
+        count = upper - lower - 1
+        if not count:
+            continue
+        if lower < 0 and upper == len(item_ids):
+            run = [k * _POSITION_STEP for k in range(count)]
+        elif lower < 0:
+            run = [positions[upper] - (count - k) * _POSITION_STEP for k in range(count)]
+        elif upper == len(item_ids):
+            run = [positions[lower] + (k + 1) * _POSITION_STEP for k in range(count)]
+        else:
+            gap = positions[upper] - positions[lower]
+            if gap <= count:
+                return [k * _POSITION_STEP for k in range(len(item_ids))]
+            run = [positions[lower] + (k + 1) * gap // (count + 1) for k in range(count)]
+        positions[lower + 1:upper] = run
+    return positions
+
+
+def search_query(text: str) -> Optional[str]:
+    """FTS5 query for text typed by the user: every word, matched as a prefix.
+
+    Returns None if text has no words.
+    """
+    words = _search_word_re.findall(text or '')
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _search_document(status) -> Tuple[str, str]:
+    """(author, text) indexed for a status.
+
+    The text is the content warning, the post and the media descriptions.
+    """
+    author = getattr(status, 'account', None)
+    names = ''
+    if author is not None:
+        names = f"{getattr(author, 'display_name', '') or ''} {getattr(author, 'acct', '') or ''}"
+    parts = [getattr(status, 'spoiler_text', '') or '',
+             getattr(status, 'text', '') or html_to_text(getattr(status, 'content', '') or '')]
+    for media in getattr(status, 'media_attachments', None) or ():
+        description = getattr(media, 'description', None)
+        if description:
+            parts.append(description)
+    return names, ' '.join(part for part in parts if part)
+
+
+def _searchable_statuses(items):
+    """The statuses in timeline items: the item (a notification's status, a conversation's last status) and what it boosts or quotes."""
+    for item in items:
+        if isinstance(item, UniversalNotification):
+            item = item.status
+        elif getattr(item, 'last_status', None) is not None:
+            item = item.last_status
+        if item is None:
+            continue
+        yield item
+        for nested in (getattr(item, 'reblog', None), getattr(item, 'quote', None)):
+            if nested is not None and not isinstance(nested, (str, bool)):
+                yield nested
+
 
 class TimelineCache:
     """SQLite-based timeline cache for one account.
@@ -65,10 +181,24 @@ class TimelineCache:
         self.db_path = os.path.join(confpath, 'timeline_cache.db')
         self._lock = threading.RLock()
         self._conn = None
+        # Read-only connection for lookups made on the GUI thread, so they
+        # never wait for the writer to release self._lock
+        self._read_lock = threading.Lock()
+        self._read_conn = None
         self._initialized = False
+        # Full-text search (needs SQLite with FTS5)
+        self._search_available = False
+        # status id -> digest of its indexed text, for statuses indexed this session
+        self._search_digests = {}
+        # "s:<status id>" or "n:<notification id>" -> digest of the rows this session wrote
+        self._row_digests = {}
+        # Timelines queue their saves here instead of saving on their own threads
+        self.writer = CacheWriter(self)
 
         # Initialize database
         self._init_db()
+        if self._search_backfill_row() is not None:
+            self.writer.backfill_search()
 
     def _init_db(self):
         """Initialize the database schema."""
@@ -84,10 +214,21 @@ class TimelineCache:
                 # Create tables
                 self._create_tables()
                 self._initialized = True
+                self._open_reader()
             except Exception as e:
                 _log_error(f"Timeline cache init error: {e}")
                 self._initialized = False
 
+    def _open_reader(self):
+        """Open the read-only connection. Lookups fall back to self._conn without it."""
+        try:
+            uri = 'file:' + pathname2url(os.path.abspath(self.db_path)) + '?mode=ro'
+            self._read_conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._read_conn.row_factory = sqlite3.Row
+        except Exception as e:
+            _log_warning(f"Timeline cache reader unavailable: {e}")
+            self._read_conn = None
+
     def _create_tables(self):
         """Create database tables if they don't exist."""
         cursor = self._conn.cursor()
@@ -191,6 +332,25 @@ class TimelineCache:
             )
         ''')
 
+        # Snapshot of the account's own followers/following, newest first
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS relationships (
+                kind TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                last_status_at TEXT,
+                PRIMARY KEY (kind, user_id)
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS relationship_metadata (
+                kind TEXT PRIMARY KEY,
+                updated_at REAL,
+                missing INTEGER DEFAULT 0
+            )
+        ''')
+
         # Add last_position_id column if it doesn't exist (migration for existing DBs)
         try:
             cursor.execute('ALTER TABLE timeline_metadata ADD COLUMN last_position_id TEXT')
@@ -207,6 +367,12 @@ class TimelineCache:
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_timeline_items_lookup ON timeline_items(timeline_type, timeline_name, timeline_data)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_timeline_items_position ON timeline_items(timeline_type, timeline_name, timeline_data, position)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_statuses_account ON statuses(account_id)')
+        # Case-insensitive indexes for the persistent user directory
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_acct ON users(acct COLLATE NOCASE)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_username ON users(username COLLATE NOCASE)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_display_name ON users(display_name COLLATE NOCASE)')
+
+        self._search_available = self._create_search_tables(cursor)
 
         # Schema version tracking
         cursor.execute('''
@@ -218,9 +384,63 @@ class TimelineCache:
 
         self._conn.commit()
 
-    def close(self):
-        """Close the database connection."""
-        with self._lock:
+    def _create_search_tables(self, cursor) -> bool:
+        """Create the full-text index of statuses. Returns False if SQLite lacks FTS5.
+
+        status_search holds the indexed text; status_search_ids maps its
+        rowids to status ids, with a digest of the text so unchanged
+        statuses aren't indexed again. While status_search_backfill has a
+        row, statuses cached before the index existed are still being
+        indexed from that statuses rowid on (see backfill_search()).
+        """
+        try:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'status_search'")
+            existed = cursor.fetchone() is not None
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS status_search USING fts5(
+                    author, text,
+                    tokenize = 'unicode61 remove_diacritics 2',
+                    prefix = '2 3'
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS status_search_ids (
+                    row INTEGER PRIMARY KEY,
+                    status_id TEXT NOT NULL UNIQUE,
+                    digest INTEGER
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            _log_warning(f"Timeline cache search unavailable: {e}")
+            return False
+
+        cursor.execute('CREATE TABLE IF NOT EXISTS status_search_backfill (next_row INTEGER NOT NULL)')
+        if not existed:
+            # Index the statuses cached before the index existed, a chunk
+            # at a time on the writer
+            cursor.execute('INSERT INTO status_search_backfill (next_row) VALUES (0)')
+        return True
+
+    def close(self, timeout: Optional[float] = CacheWriter.EXIT_TIMEOUT):
+        """Write queued timeline saves and close the database connection.
+
+        Waits at most about timeout seconds for the writer; if it's stuck
+        in a write, the connection is left for the process exit to close.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # Before taking the lock, which the writer needs to finish
+        self.writer.close(timeout)
+        with self._read_lock:
+            if self._read_conn:
+                try:
+                    self._read_conn.close()
+                except:
+                    pass
+                self._read_conn = None
+        if not self._lock.acquire(timeout=-1 if deadline is None else max(0.0, deadline - time.monotonic())):
+            _log_warning("Timeline cache still writing at close; leaving the connection open")
+            return
+        try:
             if self._conn:
                 try:
                     # Checkpoint WAL to main database before closing
@@ -230,6 +450,8 @@ class TimelineCache:
                     pass
                 self._conn = None
                 self._initialized = False
+        finally:
+            self._lock.release()
 
     def is_available(self) -> bool:
         """Check if cache is available and initialized."""
@@ -279,28 +501,119 @@ class TimelineCache:
         """Save multiple users efficiently."""
         if not self.is_available() or not users:
             return
+        with self._lock:
+            try:
+                self._write_users(self._conn.cursor(), users)
+                self._conn.commit()
+            except Exception as e:
+                _log_error(f"Cache save_users_batch error: {e}")
+
+    def _write_users(self, cursor, users: List[UniversalUser]):
+        """Insert or replace user rows (without committing)."""
+        cached_at = datetime.now().isoformat()
+        values = []
+        for user in users:
+            if user is None:
+                continue
+            row = user_to_row(user)
+            values.append((row['id'], row['acct'], row['username'], row['display_name'],
+                           row['note'], row['avatar'], row['header'], row['followers_count'],
+                           row['following_count'], row['statuses_count'], row['created_at'],
+                           row['url'], row['bot'], row['locked'], row['platform'], cached_at))
+        cursor.executemany('''
+            INSERT OR REPLACE INTO users
+            (id, acct, username, display_name, note, avatar, header,
+             followers_count, following_count, statuses_count, created_at,
+             url, bot, locked, platform, cached_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', values)
+
+    def get_user_by_acct(self, name: str) -> Optional[UniversalUser]:
+        """Get a user by acct or local username (case-insensitive).
+
+        An exact acct match wins; otherwise the most recently cached user
+        with that local username is returned.
+        """
+        if not self.is_available() or not name:
+            return None
+        name = name.lstrip('@')
         with self._lock:
             try:
                 cursor = self._conn.cursor()
-                cached_at = datetime.now().isoformat()
-                for user in users:
-                    if user is None:
-                        continue
-                    row = user_to_row(user)
-                    row['cached_at'] = cached_at
+                cursor.execute('SELECT * FROM users WHERE acct = ? COLLATE NOCASE LIMIT 1', (name,))
+                row = cursor.fetchone()
+                if row is None and '@' not in name:
                     cursor.execute('''
-                        INSERT OR REPLACE INTO users
-                        (id, acct, username, display_name, note, avatar, header,
-                         followers_count, following_count, statuses_count, created_at,
-                         url, bot, locked, platform, cached_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (row['id'], row['acct'], row['username'], row['display_name'],
-                          row['note'], row['avatar'], row['header'], row['followers_count'],
-                          row['following_count'], row['statuses_count'], row['created_at'],
-                          row['url'], row['bot'], row['locked'], row['platform'], row['cached_at']))
+                        SELECT * FROM users WHERE username = ? COLLATE NOCASE
+                        ORDER BY cached_at DESC LIMIT 1
+                    ''', (name,))
+                    row = cursor.fetchone()
+                if row:
+                    return row_to_user(dict(row))
+            except Exception as e:
+                _log_error(f"Cache get_user_by_acct error: {e}")
+        return None
+
+    def search_users_prefix(self, prefix: str, limit: int = 20) -> List[UniversalUser]:
+        """Find users whose acct, username or display name starts with a prefix.
+
+        Most recently cached users come first. Runs on the read-only
+        connection, as it's called on the GUI thread for every keystroke;
+        each column has a NOCASE index, so the LIKEs are index range scans.
+        """
+        if not self.is_available() or not prefix:
+            return []
+        prefix = prefix.lstrip('@')
+        pattern = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        with self._read_lock:
+            if self._read_conn is not None:
+                return self._search_users_prefix(self._read_conn, pattern, limit)
+        with self._lock:
+            return self._search_users_prefix(self._conn, pattern, limit)
+
+    def _search_users_prefix(self, conn, pattern: str, limit: int) -> List[UniversalUser]:
+        # Called holding the lock of conn
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM users
+                WHERE acct LIKE ? ESCAPE '\\'
+                   OR username LIKE ? ESCAPE '\\'
+                   OR display_name LIKE ? ESCAPE '\\'
+                ORDER BY cached_at DESC
+                LIMIT ?
+            ''', (pattern, pattern, pattern, int(limit)))
+            return [row_to_user(dict(row)) for row in cursor.fetchall()]
+        except Exception as e:
+            _log_error(f"Cache search_users_prefix error: {e}")
+        return []
+
+    def evict_stale_users(self, max_age_days: float) -> int:
+        """Delete users not seen for max_age_days that no cached item references.
+
+        Returns the number of users removed.
+        """
+        if not self.is_available() or not max_age_days or max_age_days <= 0:
+            return 0
+        cutoff = datetime.fromtimestamp(time.time() - max_age_days * 86400).isoformat()
+        with self._lock:
+            try:
+                cursor = self._conn.cursor()
+                cursor.execute('''
+                    DELETE FROM users
+                    WHERE (cached_at IS NULL OR cached_at < ?)
+                      AND id NOT IN (SELECT account_id FROM statuses WHERE account_id IS NOT NULL)
+                      AND id NOT IN (SELECT account_id FROM notifications WHERE account_id IS NOT NULL)
+                      AND id NOT IN (SELECT user_id FROM relationships)
+                ''', (cutoff,))
+                removed = cursor.rowcount
                 self._conn.commit()
+                if removed > 0:
+                    _log_info(f"Cache cleanup: removed {removed} stale user(s)")
+                return removed
             except Exception as e:
-                _log_error(f"Cache save_users_batch error: {e}")
+                _log_error(f"Cache evict_stale_users error: {e}")
+        return 0
 
     # ============ Status Operations ============
 
@@ -338,7 +651,9 @@ class TimelineCache:
                       row['mentions_json'], row['card_json'], row['poll_json'],
                       row.get('_notification_id'), row.get('_original_status_id'),
                       row['cached_at']))
+                self._index_statuses(cursor, [status])
                 self._conn.commit()
+                self._row_digests.pop(f"s:{status.id}", None)
             except Exception as e:
                 _log_error(f"Cache save_status error: {e}")
 
@@ -371,47 +686,59 @@ class TimelineCache:
             return
         with self._lock:
             try:
-                # Collect all users first
-                users = []
-                for status in statuses:
-                    if status is None:
-                        continue
-                    if status.account:
-                        users.append(status.account)
-                    if status.reblog and status.reblog.account:
-                        users.append(status.reblog.account)
-                    if status.quote and status.quote.account:
-                        users.append(status.quote.account)
-
-                # Save users
-                self.save_users_batch(users)
-
-                # Save statuses
-                cursor = self._conn.cursor()
-                cached_at = datetime.now().isoformat()
-                for status in statuses:
-                    if status is None:
-                        continue
-                    # Save nested statuses first
-                    if status.reblog:
-                        row = status_to_row(status.reblog)
-                        row['cached_at'] = cached_at
-                        self._insert_status_row(cursor, row)
-                    if status.quote:
-                        row = status_to_row(status.quote)
-                        row['cached_at'] = cached_at
-                        self._insert_status_row(cursor, row)
-                    # Save main status
-                    row = status_to_row(status)
-                    row['cached_at'] = cached_at
-                    self._insert_status_row(cursor, row)
+                digests = self._write_statuses(self._conn.cursor(), statuses)
                 self._conn.commit()
+                self._row_digests.update(digests)
             except Exception as e:
                 _log_error(f"Cache save_statuses_batch error: {e}")
 
-    def _insert_status_row(self, cursor, row: Dict[str, Any]):
-        """Insert a status row."""
-        cursor.execute('''
+    def _unchanged(self, key: str, rows: List[Dict[str, Any]], digests: Dict[str, int], changed_only: bool) -> bool:
+        """Whether changed_only is set and rows are what this session last wrote under key.
+
+        Otherwise the rows' digest goes into digests, for the caller to
+        record once the write is committed.
+        """
+        # Row values are plain scalars in a fixed column order
+        digest = zlib.crc32(repr([tuple(row.values()) for row in rows]).encode('utf-8'))
+        if changed_only and self._row_digests.get(key) == digest:
+            return True
+        digests[key] = digest
+        return False
+
+    def _write_statuses(self, cursor, statuses: List[UniversalStatus], changed_only: bool = False) -> Dict[str, int]:
+        """Insert or replace statuses, the statuses they boost or quote, and their authors (without committing).
+
+        With changed_only, statuses whose rows are the same as when this
+        session last wrote them are skipped. Returns the digests to record
+        after commit.
+        """
+        digests = {}
+        users = []
+        saved = []
+        values = []
+        cached_at = datetime.now().isoformat()
+        for status in statuses:
+            if status is None:
+                continue
+            # Nested statuses first
+            group = [nested for nested in (status.reblog, status.quote) if nested] + [status]
+            rows = [status_to_row(item) for item in group]
+            if self._unchanged(f"s:{status.id}", rows, digests, changed_only):
+                continue
+            for item, row in zip(group, rows):
+                if item.account:
+                    users.append(item.account)
+                values.append((row['id'], row['account_id'], row['content'], row['text'],
+                               row['created_at'], row['favourites_count'], row['boosts_count'],
+                               row['replies_count'], row['in_reply_to_id'], row['reblog_id'],
+                               row['quote_id'], row['url'], row['visibility'], row['spoiler_text'],
+                               row['pinned'], row['platform'], row['media_attachments_json'],
+                               row['mentions_json'], row['card_json'], row['poll_json'],
+                               row.get('_notification_id'), row.get('_original_status_id'),
+                               cached_at))
+            saved.extend(group)
+        self._write_users(cursor, users)
+        cursor.executemany('''
             INSERT OR REPLACE INTO statuses
             (id, account_id, content, text, created_at, favourites_count,
              boosts_count, replies_count, in_reply_to_id, reblog_id, quote_id,
@@ -419,14 +746,182 @@ class TimelineCache:
              media_attachments_json, mentions_json, card_json, poll_json,
              _notification_id, _original_status_id, cached_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (row['id'], row['account_id'], row['content'], row['text'],
-              row['created_at'], row['favourites_count'], row['boosts_count'],
-              row['replies_count'], row['in_reply_to_id'], row['reblog_id'],
-              row['quote_id'], row['url'], row['visibility'], row['spoiler_text'],
-              row['pinned'], row['platform'], row['media_attachments_json'],
-              row['mentions_json'], row['card_json'], row['poll_json'],
-              row.get('_notification_id'), row.get('_original_status_id'),
-              row['cached_at']))
+        ''', values)
+        self._index_statuses(cursor, saved)
+        return digests
+
+    # ============ Search Operations ============
+
+    def search_available(self) -> bool:
+        """Check if the full-text search index is available."""
+        return self.is_available() and self._search_available
+
+    def _index_statuses(self, cursor, statuses):
+        """Add statuses to the search index, or re-index them if their text changed.
+
+        Returns the number of statuses (re)indexed.
+        """
+        if not self._search_available:
+            return 0
+        digests = self._search_digests
+        indexed = 0
+        for status in statuses:
+            status_id = getattr(status, 'id', None)
+            if status_id is None:
+                continue
+            status_id = str(status_id)
+            author, text = _search_document(status)
+            digest = zlib.crc32(f"{author}\0{text}".encode('utf-8'))
+            if digests.get(status_id) == digest:
+                continue
+            cursor.execute('SELECT row, digest FROM status_search_ids WHERE status_id = ?', (status_id,))
+            found = cursor.fetchone()
+            if found is None:
+                cursor.execute('INSERT INTO status_search_ids (status_id, digest) VALUES (?, ?)', (status_id, digest))
+                row = cursor.lastrowid
+            elif found['digest'] == digest:
+                digests[status_id] = digest
+                continue
+            else:
+                row = found['row']
+                cursor.execute('DELETE FROM status_search WHERE rowid = ?', (row,))
+                cursor.execute('UPDATE status_search_ids SET digest = ? WHERE row = ?', (digest, row))
+            cursor.execute('INSERT INTO status_search (rowid, author, text) VALUES (?, ?, ?)', (row, author, text))
+            digests[status_id] = digest
+            indexed += 1
+        return indexed
+
+    def _search_backfill_row(self) -> Optional[int]:
+        """The statuses rowid the search backfill continues from, or None when it's done."""
+        if not self.search_available():
+            return None
+        with self._lock:
+            try:
+                row = self._conn.execute('SELECT next_row FROM status_search_backfill').fetchone()
+                return row[0] if row else None
+            except Exception as e:
+                _log_error(f"Cache search backfill error: {e}")
+                return None
+
+    def backfill_search(self, limit: int = _SEARCH_BACKFILL_CHUNK) -> bool:
+        """Index the next limit statuses cached before the search index existed.
+
+        Returns True while there are more to index.
+        """
+        next_row = self._search_backfill_row()
+        if next_row is None:
+            return False
+        with self._lock:
+            try:
+                cursor = self._conn.cursor()
+                cursor.execute('SELECT rowid AS backfill_row, * FROM statuses WHERE rowid >= ? ORDER BY rowid LIMIT ?',
+                               (next_row, limit))
+                rows = [dict(row) for row in cursor.fetchall()]
+                more = len(rows) == limit
+                if rows:
+                    next_row = max(row.pop('backfill_row') for row in rows) + 1
+                    self._index_statuses(cursor, self._hydrate_statuses(cursor, rows))
+                if more:
+                    cursor.execute('UPDATE status_search_backfill SET next_row = ?', (next_row,))
+                else:
+                    cursor.execute('DELETE FROM status_search_backfill')
+                self._conn.commit()
+                return more
+            except Exception as e:
+                self._conn.rollback()
+                _log_error(f"Cache search backfill error: {e}")
+                return False
+
+    def index_statuses(self, items: List) -> int:
+        """Add loaded timeline items to the search index without caching them.
+
+        Takes statuses or notifications; the statuses they boost or quote
+        are indexed too. Returns the number of statuses (re)indexed.
+        """
+        if not self.search_available() or not items:
+            return 0
+        with self._lock:
+            try:
+                cursor = self._conn.cursor()
+                indexed = self._index_statuses(cursor, _searchable_statuses(items))
+                if indexed:
+                    self._conn.commit()
+                return indexed
+            except Exception as e:
+                _log_error(f"Cache index_statuses error: {e}")
+                return 0
+
+    def search(self, text: str, limit: int = 100, within=None) -> List[str]:
+        """Ids of indexed statuses matching text, best match first.
+
+        Each word of text matches as a prefix, in the author's name or
+        handle or the post. within, if given, limits the results to those
+        status ids.
+        """
+        query = search_query(text)
+        if query is None or not self.search_available():
+            return []
+        select = '''
+            SELECT m.status_id FROM status_search
+            JOIN status_search_ids m ON m.row = status_search.rowid
+            WHERE status_search MATCH ?
+        '''
+        with self._lock:
+            try:
+                cursor = self._conn.cursor()
+                if within is None:
+                    cursor.execute(select + ' ORDER BY status_search.rank LIMIT ?', (query, limit))
+                    return [row[0] for row in cursor.fetchall()]
+                within = set(str(status_id) for status_id in within)
+                # A timeline's posts were mostly indexed together, so their
+                # rows are close: only match within the range they span
+                rows = []
+                ids = list(within)
+                for start in range(0, len(ids), self._IN_CHUNK_SIZE):
+                    chunk = ids[start:start + self._IN_CHUNK_SIZE]
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor.execute(f'SELECT row FROM status_search_ids WHERE status_id IN ({placeholders})', chunk)
+                    rows.extend(row[0] for row in cursor.fetchall())
+                if not rows:
+                    return []
+                cursor.execute(select + ' AND status_search.rowid BETWEEN ? AND ? ORDER BY status_search.rank',
+                               (query, min(rows), max(rows)))
+                hits = [row[0] for row in cursor.fetchall() if row[0] in within]
+                return hits[:limit]
+            except Exception as e:
+                _log_error(f"Cache search error: {e}")
+                return []
+
+    def load_statuses(self, status_ids: List[str]) -> Dict[str, UniversalStatus]:
+        """Cached statuses by id (ids that aren't cached are left out)."""
+        if not self.is_available() or not status_ids:
+            return {}
+        with self._lock:
+            try:
+                cursor = self._conn.cursor()
+                rows = self._select_rows_by_id(cursor, 'statuses', [str(status_id) for status_id in status_ids])
+                ids = list(rows)
+                return dict(zip(ids, self._hydrate_statuses(cursor, [rows[status_id] for status_id in ids])))
+            except Exception as e:
+                _log_error(f"Cache load_statuses error: {e}")
+                return {}
+
+    def _clear_search(self, cursor, orphaned_only: bool = False):
+        """Empty the search index, or drop the entries of statuses no longer cached."""
+        if not self._search_available:
+            return
+        if orphaned_only:
+            cursor.execute('''
+                DELETE FROM status_search WHERE rowid IN (
+                    SELECT row FROM status_search_ids WHERE status_id NOT IN (SELECT id FROM statuses)
+                )
+            ''')
+            cursor.execute('DELETE FROM status_search_ids WHERE status_id NOT IN (SELECT id FROM statuses)')
+        else:
+            cursor.execute('DELETE FROM status_search')
+            cursor.execute('DELETE FROM status_search_ids')
+            cursor.execute('DELETE FROM status_search_backfill')
+        self._search_digests = {}
 
     # ============ Notification Operations ============
 
@@ -452,6 +947,7 @@ class TimelineCache:
                 ''', (row['id'], row['type'], row['account_id'], row['created_at'],
                       row['status_id'], row['platform'], row['cached_at']))
                 self._conn.commit()
+                self._row_digests.pop(f"n:{notification.id}", None)
             except Exception as e:
                 _log_error(f"Cache save_notification error: {e}")
 
@@ -484,41 +980,130 @@ class TimelineCache:
             return
         with self._lock:
             try:
-                # Collect all users and statuses
-                users = []
-                statuses = []
-                for notif in notifications:
-                    if notif is None:
-                        continue
-                    if notif.account:
-                        users.append(notif.account)
-                    if notif.status:
-                        statuses.append(notif.status)
-                        if notif.status.account:
-                            users.append(notif.status.account)
-
-                # Save users and statuses
-                self.save_users_batch(users)
-                self.save_statuses_batch(statuses)
-
-                # Save notifications
-                cursor = self._conn.cursor()
-                cached_at = datetime.now().isoformat()
-                for notif in notifications:
-                    if notif is None:
-                        continue
-                    row = notification_to_row(notif)
-                    row['cached_at'] = cached_at
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO notifications
-                        (id, type, account_id, created_at, status_id, platform, cached_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (row['id'], row['type'], row['account_id'], row['created_at'],
-                          row['status_id'], row['platform'], row['cached_at']))
+                digests = self._write_notifications(self._conn.cursor(), notifications)
                 self._conn.commit()
+                self._row_digests.update(digests)
             except Exception as e:
                 _log_error(f"Cache save_notifications_batch error: {e}")
 
+    def _write_notifications(self, cursor, notifications: List[UniversalNotification], changed_only: bool = False) -> Dict[str, int]:
+        """Insert or replace notifications, their statuses and accounts (without committing).
+
+        changed_only and the return value are as for _write_statuses().
+        """
+        notifications = [notif for notif in notifications if notif is not None]
+        digests = self._write_statuses(cursor, [notif.status for notif in notifications if notif.status], changed_only)
+        users = []
+        values = []
+        cached_at = datetime.now().isoformat()
+        for notif in notifications:
+            row = notification_to_row(notif)
+            if self._unchanged(f"n:{notif.id}", [row], digests, changed_only):
+                continue
+            if notif.account:
+                users.append(notif.account)
+            values.append((row['id'], row['type'], row['account_id'], row['created_at'],
+                           row['status_id'], row['platform'], cached_at))
+        self._write_users(cursor, users)
+        cursor.executemany('''
+            INSERT OR REPLACE INTO notifications
+            (id, type, account_id, created_at, status_id, platform, cached_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', values)
+        return digests
+
+    # ============ Relationship Operations ============
+
+    def save_relationships(self, kind: str, entries: List[Tuple[UniversalUser, Optional[str]]],
+                           updated_at: float, missing: int = 0):
+        """Replace the stored followers or following snapshot.
+
+        Args:
+            kind: 'followers' or 'following'
+            entries: (user, last_status_at) pairs, newest relationship first
+            updated_at: When the snapshot was fetched (epoch seconds)
+            missing: How many accounts the server counts but doesn't list
+        """
+        if not self.is_available():
+            return
+        with self._lock:
+            try:
+                self.save_users_batch([user for user, _ in entries])
+                cursor = self._conn.cursor()
+                cursor.execute('DELETE FROM relationships WHERE kind = ?', (kind,))
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO relationships (kind, user_id, position, last_status_at)
+                    VALUES (?, ?, ?, ?)
+                ''', [(kind, str(user.id), position, last_status_at)
+                      for position, (user, last_status_at) in enumerate(entries)])
+                cursor.execute('''
+                    INSERT OR REPLACE INTO relationship_metadata (kind, updated_at, missing)
+                    VALUES (?, ?, ?)
+                ''', (kind, updated_at, missing))
+                self._conn.commit()
+            except Exception as e:
+                _log_error(f"Cache save_relationships error: {e}")
+
+    def add_relationship(self, kind: str, user: UniversalUser, last_status_at: Optional[str] = None):
+        """Put one user at the top of a stored snapshot (the account just followed them)."""
+        if not self.is_available():
+            return
+        with self._lock:
+            try:
+                cursor = self._conn.cursor()
+                self._write_users(cursor, [user])
+                cursor.execute('''
+                    INSERT OR REPLACE INTO relationships (kind, user_id, position, last_status_at)
+                    SELECT ?, ?, COALESCE(MIN(position), 0) - 1, ?
+                    FROM relationships WHERE kind = ?
+                ''', (kind, str(user.id), last_status_at, kind))
+                self._conn.commit()
+            except Exception as e:
+                _log_error(f"Cache add_relationship error: {e}")
+
+    def remove_relationship(self, kind: str, user_id: str):
+        """Take one user out of a stored snapshot (the account just unfollowed them)."""
+        if not self.is_available():
+            return
+        with self._lock:
+            try:
+                self._conn.execute('DELETE FROM relationships WHERE kind = ? AND user_id = ?', (kind, str(user_id)))
+                self._conn.commit()
+            except Exception as e:
+                _log_error(f"Cache remove_relationship error: {e}")
+
+    def load_relationships(self, kind: str) -> Optional[Tuple[List[Tuple[UniversalUser, Optional[str]]], float, int]]:
+        """Load a stored followers or following snapshot.
+
+        Returns:
+            (entries, updated_at, missing) as passed to save_relationships(),
+            or None if there is no snapshot of this kind.
+        """
+        if not self.is_available():
+            return None
+        with self._lock:
+            try:
+                cursor = self._conn.cursor()
+                cursor.execute('SELECT updated_at, missing FROM relationship_metadata WHERE kind = ?', (kind,))
+                meta = cursor.fetchone()
+                if meta is None:
+                    return None
+                cursor.execute('''
+                    SELECT users.*, relationships.last_status_at AS relationship_last_status_at
+                    FROM relationships JOIN users ON users.id = relationships.user_id
+                    WHERE relationships.kind = ?
+                    ORDER BY relationships.position
+                ''', (kind,))
+                entries = []
+                for row in cursor.fetchall():
+                    row = dict(row)
+                    last_status_at = row.pop('relationship_last_status_at')
+                    entries.append((row_to_user(row), last_status_at))
+                return entries, meta['updated_at'], meta['missing'] or 0
+            except Exception as e:
+                _log_error(f"Cache load_relationships error: {e}")
+        return None
+
     # ============ Timeline Operations ============
 
     def _get_timeline_key(self, timeline_type: str, timeline_name: str, timeline_data: Any) -> str:
@@ -551,32 +1136,36 @@ class TimelineCache:
         with self._lock:
             try:
                 data_key = self._get_timeline_key(timeline_type, timeline_name, timeline_data)
+                kept = [item for item in items[:limit] if item is not None]
+                cursor = self._conn.cursor()
+                cached_at = datetime.now().isoformat()
 
-                # Save items first
+                # Save items first, skipping those unchanged since this session last wrote them
                 if item_type == 'status':
-                    self.save_statuses_batch(items[:limit])
+                    digests = self._write_statuses(cursor, kept, changed_only=True)
                 else:
-                    self.save_notifications_batch(items[:limit])
-
-                cursor = self._conn.cursor()
-                cached_at = datetime.now().isoformat()
+                    digests = self._write_notifications(cursor, kept, changed_only=True)
 
-                # Clear old timeline items
+                # Only write the entries that were added, removed or moved
                 cursor.execute('''
-                    DELETE FROM timeline_items
+                    SELECT item_id, position FROM timeline_items
                     WHERE timeline_type = ? AND timeline_name = ? AND timeline_data = ?
                 ''', (timeline_type, timeline_name, data_key))
-
-                # Insert new items with positions
-                for position, item in enumerate(items[:limit]):
-                    if item is None:
-                        continue
-                    item_id = str(item.id)
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO timeline_items
-                        (timeline_type, timeline_name, timeline_data, item_id, item_type, position, cached_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (timeline_type, timeline_name, data_key, item_id, item_type, position, cached_at))
+                stored = {row[0]: row[1] for row in cursor.fetchall()}
+                item_ids = list(dict.fromkeys(str(item.id) for item in kept))
+                positions = _timeline_positions(item_ids, stored)
+                new_ids = set(item_ids)
+                cursor.executemany('''
+                    DELETE FROM timeline_items
+                    WHERE timeline_type = ? AND timeline_name = ? AND timeline_data = ? AND item_id = ?
+                ''', [(timeline_type, timeline_name, data_key, item_id)
+                      for item_id in stored if item_id not in new_ids])
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO timeline_items
+                    (timeline_type, timeline_name, timeline_data, item_id, item_type, position, cached_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', [(timeline_type, timeline_name, data_key, item_id, item_type, position, cached_at)
+                      for item_id, position in zip(item_ids, positions) if stored.get(item_id) != position])
 
                 # Serialize gaps to JSON
                 gaps_json = None
@@ -590,10 +1179,12 @@ class TimelineCache:
                     INSERT OR REPLACE INTO timeline_metadata
                     (timeline_type, timeline_name, timeline_data, last_index, last_position_id, since_id, oldest_id, item_count, last_updated, gaps_json)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (timeline_type, timeline_name, data_key, last_index, last_position_id, since_id, oldest_id, len(items[:limit]), cached_at, gaps_json))
+                ''', (timeline_type, timeline_name, data_key, last_index, last_position_id, since_id, oldest_id, len(item_ids), cached_at, gaps_json))
 
                 self._conn.commit()
+                self._row_digests.update(digests)
             except Exception as e:
+                self._conn.rollback()
                 _log_error(f"Cache save_timeline error: {e}")
 
     def load_timeline(self, timeline_type: str, timeline_name: str, timeline_data: Any,
@@ -618,23 +1209,25 @@ class TimelineCache:
 
                 cursor = self._conn.cursor()
 
-                # Get timeline items in order
-                cursor.execute('''
-                    SELECT item_id, item_type FROM timeline_items
-                    WHERE timeline_type = ? AND timeline_name = ? AND timeline_data = ?
-                    ORDER BY position ASC
-                ''', (timeline_type, timeline_name, data_key))
-
-                rows = cursor.fetchall()
-                items = []
-                for row in rows:
-                    item_id = row['item_id']
-                    if item_type == 'status':
-                        item = self.get_status(item_id)
-                    else:
-                        item = self.get_notification(item_id)
-                    if item:
-                        items.append(item)
+                # Get timeline items in order, joined with their rows so the
+                # whole timeline hydrates from a handful of set-based queries
+                # instead of several lookups per item.
+                if item_type == 'status':
+                    cursor.execute('''
+                        SELECT s.* FROM timeline_items ti
+                        JOIN statuses s ON s.id = ti.item_id
+                        WHERE ti.timeline_type = ? AND ti.timeline_name = ? AND ti.timeline_data = ?
+                        ORDER BY ti.position ASC
+                    ''', (timeline_type, timeline_name, data_key))
+                    items = self._hydrate_statuses(cursor, [dict(row) for row in cursor.fetchall()])
+                else:
+                    cursor.execute('''
+                        SELECT n.* FROM timeline_items ti
+                        JOIN notifications n ON n.id = ti.item_id
+                        WHERE ti.timeline_type = ? AND ti.timeline_name = ? AND ti.timeline_data = ?
+                        ORDER BY ti.position ASC
+                    ''', (timeline_type, timeline_name, data_key))
+                    items = self._hydrate_notifications(cursor, [dict(row) for row in cursor.fetchall()])
 
                 # Get metadata
                 cursor.execute('''
@@ -668,6 +1261,101 @@ class TimelineCache:
                 _log_error(f"Cache load_timeline error: {e}")
                 return [], {}
 
+    # Max bound parameters per IN (...) query; stays well under SQLite's
+    # SQLITE_MAX_VARIABLE_NUMBER on older builds (999).
+    _IN_CHUNK_SIZE = 500
+
+    def _select_rows_by_id(self, cursor, table: str, ids) -> Dict[str, Dict[str, Any]]:
+        """Fetch rows from a table for a set of IDs, keyed by ID."""
+        ids = list(ids)
+        rows = {}
+        for start in range(0, len(ids), self._IN_CHUNK_SIZE):
+            chunk = ids[start:start + self._IN_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f'SELECT * FROM {table} WHERE id IN ({placeholders})', chunk)
+            for row in cursor.fetchall():
+                rows[row['id']] = dict(row)
+        return rows
+
+    def _hydrate_statuses(self, cursor, rows: List[Dict[str, Any]]) -> List[UniversalStatus]:
+        """Build statuses for a list of status rows using bulk lookups.
+
+        Nested reblogs/quotes are resolved to the same depth as get_status()
+        (two levels below the top-level row), and authors are fetched with a
+        single IN query. Everything is then assembled in memory.
+        """
+        if not rows:
+            return []
+
+        # Fetch nested reblog/quote rows level by level
+        nested_rows = {}
+        level = rows
+        for _ in range(2):
+            wanted = set()
+            for row in level:
+                for key in ('reblog_id', 'quote_id'):
+                    if row.get(key) and row[key] not in nested_rows:
+                        wanted.add(row[key])
+            if not wanted:
+                break
+            fetched = self._select_rows_by_id(cursor, 'statuses', wanted)
+            nested_rows.update(fetched)
+            level = list(fetched.values())
+
+        # Fetch every referenced author at once
+        user_ids = set()
+        for row in rows:
+            if row.get('account_id'):
+                user_ids.add(row['account_id'])
+        for row in nested_rows.values():
+            if row.get('account_id'):
+                user_ids.add(row['account_id'])
+        users = {}
+        for uid, user_row in self._select_rows_by_id(cursor, 'users', user_ids).items():
+            users[uid] = row_to_user(user_row)
+
+        def user_lookup(uid):
+            return users.get(str(uid))
+
+        def build(row, depth):
+            def status_lookup(sid):
+                if depth >= 2:
+                    return None
+                nested = nested_rows.get(str(sid))
+                if nested is None:
+                    return None
+                return build(nested, depth + 1)
+            return row_to_status(row, user_lookup, status_lookup)
+
+        return [build(row, 0) for row in rows]
+
+    def _hydrate_notifications(self, cursor, rows: List[Dict[str, Any]]) -> List[UniversalNotification]:
+        """Build notifications for a list of notification rows using bulk lookups."""
+        if not rows:
+            return []
+
+        status_ids = set(row['status_id'] for row in rows if row.get('status_id'))
+        status_rows = self._select_rows_by_id(cursor, 'statuses', status_ids)
+        # Hydrate one status per notification (not per unique ID) so each
+        # notification owns its status object, as get_notification() does.
+        with_status = [row for row in rows if row.get('status_id') in status_rows]
+        hydrated = self._hydrate_statuses(cursor, [status_rows[row['status_id']] for row in with_status])
+        statuses = {id(row): status for row, status in zip(with_status, hydrated)}
+
+        user_ids = set(row['account_id'] for row in rows if row.get('account_id'))
+        users = {}
+        for uid, user_row in self._select_rows_by_id(cursor, 'users', user_ids).items():
+            users[uid] = row_to_user(user_row)
+
+        def user_lookup(uid):
+            return users.get(str(uid))
+
+        notifications = []
+        for row in rows:
+            status = statuses.get(id(row))
+            notifications.append(row_to_notification(row, user_lookup, lambda sid, status=status: status))
+        return notifications
+
     def has_timeline_cache(self, timeline_type: str, timeline_name: str, timeline_data: Any) -> bool:
         """Check if there's cached data for a timeline."""
         if not self.is_available():
@@ -721,7 +1409,11 @@ class TimelineCache:
                 cursor.execute('DELETE FROM statuses')
                 cursor.execute('DELETE FROM notifications')
                 cursor.execute('DELETE FROM users')
+                cursor.execute('DELETE FROM relationships')
+                cursor.execute('DELETE FROM relationship_metadata')
+                self._clear_search(cursor)
                 self._conn.commit()
+                self._row_digests = {}
 
                 # Also VACUUM to reclaim space
                 cursor.execute('VACUUM')
@@ -795,8 +1487,14 @@ class TimelineCache:
             ''')
             deleted_notifications = cursor.rowcount
 
+            # Drop the search entries of deleted statuses (and of statuses
+            # indexed from a timeline without being cached)
+            self._clear_search(cursor, orphaned_only=True)
+            self._conn.commit()
+            # Deleted rows must be written again when a timeline next has them
+            self._row_digests = {}
+
             if deleted_statuses > 0 or deleted_notifications > 0:
-                self._conn.commit()
                 _log_info(f"Cache cleanup: removed {deleted_statuses} orphaned statuses, {deleted_notifications} orphaned notifications")
 
         except Exception as e:
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""Write-behind timeline saves for one account's cache."""
+
+import threading
+import time
+from typing import Any, List, Optional
+
+# Get logger for cache operations
+try:
+    from logging_config import get_logger
+    _logger = get_logger('cache')
+except ImportError:
+    _logger = None
+
+
+def _log_error(msg: str):
+    """Log an error message."""
+    if _logger:
+        _logger.error(msg)
+
+
+def _log_warning(msg: str):
+    """Log a warning message."""
+    if _logger:
+        _logger.warning(msg)
+
+
+class CacheWriter:
+    """One background thread that saves timelines to a TimelineCache.
+
+    Timelines used to start a thread per save. Saves queued here are kept
+    per timeline, so if a timeline asks again before its last save was
+    written only the newest one is written. Loaded items queued for the
+    search index are indexed here too, off the GUI thread, and so is the
+    search backfill after an upgrade, a chunk at a time when there's
+    nothing else to write.
+    """
+
+    # Seconds to wait for queued writes when the app exits
+    EXIT_TIMEOUT = 5.0
+
+    def __init__(self, cache):
+        self.cache = cache
+        # (timeline_type, timeline_name, data key) -> (args, kwargs) of the newest save
+        self._pending = {}
+        # Loaded items waiting to be added to the search index
+        self._index = []
+        # Whether TimelineCache.backfill_search() has more to do
+        self._backfill = False
+        self._condition = threading.Condition()
+        self._writing = False
+        self._closed = False
+        self._thread = None
+
+    def save_timeline(self, timeline_type: str, timeline_name: str, timeline_data: Any, *args, **kwargs):
+        """Queue TimelineCache.save_timeline(), replacing any unwritten save of the same timeline."""
+        key = (timeline_type, timeline_name,
+               self.cache._get_timeline_key(timeline_type, timeline_name, timeline_data))
+        with self._condition:
+            if self._closed:
+                return
+            self._pending[key] = ((timeline_type, timeline_name, timeline_data) + args, kwargs)
+            self._wake()
+
+    def index_statuses(self, items: List):
+        """Queue TimelineCache.index_statuses() for loaded timeline items."""
+        with self._condition:
+            if self._closed:
+                return
+            self._index.extend(items)
+            self._wake()
+
+    def backfill_search(self):
+        """Run TimelineCache.backfill_search() until it's done, between other writes."""
+        with self._condition:
+            if self._closed:
+                return
+            self._backfill = True
+            self._wake()
+
+    def _wake(self):
+        # Called holding the condition
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='CacheWriter', daemon=True)
+            self._thread.start()
+        self._condition.notify_all()
+
+    def _idle(self) -> bool:
+        # The backfill carries on next session if need be, so it isn't waited for
+        return not self._pending and not self._index and not self._writing
+
+    def idle(self) -> bool:
+        """Whether everything queued has been written."""
+        with self._condition:
+            return self._idle()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._index or self._backfill or self._closed)
+                if not self._pending and not self._index and (self._closed or not self._backfill):
+                    return
+                items, self._index = self._index, []
+                save = None
+                if not items and self._pending:
+                    save = self._pending.pop(next(iter(self._pending)))
+                self._writing = True
+            try:
+                if items:
+                    self.cache.index_statuses(items)
+                elif save is not None:
+                    args, kwargs = save
+                    self.cache.save_timeline(*args, **kwargs)
+                elif not self.cache.backfill_search():
+                    with self._condition:
+                        self._backfill = False
+            except Exception as e:
+                _log_error(f"Cache writer error: {e}")
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
+
+    def _queued(self) -> str:
+        # Called holding the condition
+        saves = ', '.join(f"{timeline_type}/{timeline_name}" for timeline_type, timeline_name, _ in self._pending)
+        return f"{len(self._pending)} timeline saves ({saves or 'none'}) and {len(self._index)} items to index"
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued is written. Returns False on timeout."""
+        with self._condition:
+            if self._thread is None:
+                return True
+            if self._condition.wait_for(self._idle, timeout):
+                return True
+            _log_warning(f"Cache writer still busy after {timeout}s, with {self._queued()} queued")
+            return False
+
+    def close(self, timeout: Optional[float] = None):
+        """Write what's queued, then stop the thread.
+
+        What isn't written within timeout seconds is dropped, and so are
+        later saves.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            if self._pending or self._index:
+                _log_warning(f"Cache writer closing; dropped {self._queued()}")
+                self._pending.clear()
+                self._index = []
+            thread = self._thread
+            self._condition.notify_all()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
@@ -1,5 +1,8 @@
-import datetime
 from mastodon import Mastodon, MastodonError
+import rate_limit
+import relationships
+import stream_engine
+from status_index import StatusIndex
 import streaming
 import application
 from version import APP_NAME, APP_VERSION
@@ -49,6 +52,7 @@ class mastodon(object):
 		self.folder_index = index
 		self.ready = False
 		self.timelines = []
+		self.status_index = StatusIndex()  # status id -> every loaded copy, for state sync
 		self.currentTimeline = None
 		self.currentIndex = 0
 		self.currentStatus = None
@@ -58,7 +62,9 @@ class mastodon(object):
 		self._initial_loads_lock = threading.Lock()
 		self._stream_lock = threading.Lock()  # Prevents multiple stream connections
 		self.stream_listener = None
-		self.stream_thread = None
+		self.stream_subscription = None  # stream_engine.MuxSubscription for the user stream
+		self.stream_mux = None  # stream_engine.MultiplexedStream shared by all of this account's streams
+		self.relationships = None  # relationships.RelationshipSnapshot of my followers/following
 		self.stream = None
 		self._stream_started = False
 		# In portable mode, don't add FastSM prefix (userdata is already app-specific)
@@ -200,7 +206,10 @@ class mastodon(object):
 			client_secret=self.prefs.client_secret,
 			access_token=self.prefs.access_token,
 			api_base_url=self.prefs.instance_url,
-			user_agent=f"{APP_NAME}/{APP_VERSION}"
+			user_agent=f"{APP_NAME}/{APP_VERSION}",
+			session=rate_limit.GovernedSession(self.prefs.instance_url),
+			# The governor does the waiting, and only for background requests
+			ratelimit_method="throw"
 		)
 
 		# Verify credentials and get user info
@@ -334,7 +343,7 @@ class mastodon(object):
 
 		# Only reset stream state if not already streaming
 		# (this can be called during re-init while stream is running)
-		if not (self.stream_thread is not None and self.stream_thread.is_alive()):
+		if not (self.stream_subscription is not None and self.stream_subscription.active):
 			self.stream_listener = None
 			self.stream = None
 			self._stream_started = False
@@ -411,6 +420,7 @@ class mastodon(object):
 			except Exception as ua_e:
 				if _logger:
 					_logger.warning("Could not set Bluesky User-Agent override: %s", ua_e)
+			rate_limit.install_httpx(self.api, service)
 			raw_profile = self.api.login(handle, self.prefs.bluesky_password)
 			self.me = bluesky_profile_to_universal(raw_profile)
 			if _logger:
@@ -604,103 +614,46 @@ class mastodon(object):
 			if hasattr(self, '_stream_started') and self._stream_started:
 				return
 
-			if self.stream_thread is not None and self.stream_thread.is_alive():
+			if self.stream_subscription is not None and self.stream_subscription.active:
 				return  # Stream already running
 
-			# Mark as started before creating thread
 			self._stream_started = True
-
-			self.stream_thread = threading.Thread(
-				target=self._run_stream,
-				daemon=True
-			)
-			self.stream_thread.start()
-
-	def _run_stream(self):
-		# Bluesky doesn't support streaming
-		if self.prefs.platform_type == "bluesky":
-			return
-
-		import time
-		import threading
-		import requests
-		import json
-		thread_id = threading.current_thread().ident
-		consecutive_errors = 0
-		base_delay = 5  # seconds
-		max_delay = 300  # 5 minutes max
-
-		# Create listener once
-		self.stream_listener = streaming.MastodonStreamListener(self)
-
-		while True:
-			try:
-				# Ensure API is available before attempting stream
-				if not hasattr(self, 'api') or self.api is None:
-					time.sleep(5)
-					continue
-
-				# Check if we're still the active stream thread
-				if self.stream_thread is None or self.stream_thread.ident != thread_id:
-					return
-
-				# Use our own SSE implementation instead of Mastodon.py's buggy one
-				stream_url = f"{self.prefs.instance_url}/api/v1/streaming/user"
-				headers = {
-					"Authorization": f"Bearer {self.prefs.access_token}",
-					"Accept": "text/event-stream",
-				}
-
-				with requests.get(stream_url, headers=headers, stream=True, timeout=300) as response:
-					response.raise_for_status()
-					consecutive_errors = 0  # Reset on successful connect
-
-					event_type = None
-					data_lines = []
-
-					for line in response.iter_lines():
-						# Check if we should stop
-						if self.stream_thread is None or self.stream_thread.ident != thread_id:
-							return
-
-						if line:
-							line = line.decode('utf-8')
-							if line.startswith('event:'):
-								event_type = line[6:].strip()
-							elif line.startswith('data:'):
-								data_lines.append(line[5:].strip())
-						else:
-							# Empty line = end of event
-							if event_type and data_lines:
-								data_str = '\n'.join(data_lines)
-								try:
-									data = json.loads(data_str)
-									self._handle_stream_event(event_type, data)
-								except json.JSONDecodeError:
-									pass  # Ignore malformed JSON
-							event_type = None
-							data_lines = []
-
-			except requests.exceptions.Timeout:
-				time.sleep(2)
-				continue
-			except Exception as e:
-				error_str = str(e).lower()
-
-				transient_errors = [
-					"connection", "timeout", "reset", "refused", "unreachable",
-					"network", "socket", "eof", "broken pipe", "ssl", "certificate"
-				]
-				if any(err in error_str for err in transient_errors):
-					time.sleep(2)
-					continue
-
-				consecutive_errors += 1
-				if consecutive_errors >= 5:
-					consecutive_errors = 0
-
-				delay = min(base_delay * (2 ** (consecutive_errors - 1)), max_delay)
-				time.sleep(delay)
+			# Create listener once
+			if self.stream_listener is None:
+				self.stream_listener = streaming.MastodonStreamListener(self)
+			acct = getattr(self.me, 'acct', '') if getattr(self, 'me', None) else ''
+			self.stream_subscription = self.get_stream_mux().subscribe(
+				{"stream": "user"}, self._handle_stream_event,
+				fallback_request=self._stream_request, name=f"{acct} user stream")
+
+	def get_stream_mux(self):
+		"""The websocket carrying this account's user, list and public streams."""
+		if self.stream_mux is None:
+			acct = getattr(self.me, 'acct', '') if getattr(self, 'me', None) else ''
+			self.stream_mux = stream_engine.get_engine().multiplex(self._websocket_request, name=acct)
+		return self.stream_mux
+
+	def _websocket_request(self):
+		"""URL and headers for the multiplexed streaming websocket, or None until the API is ready."""
+		if not hasattr(self, 'api') or self.api is None:
+			return None
+		from version import APP_NAME, APP_VERSION
+		headers = {
+			"Authorization": f"Bearer {self.prefs.access_token}",
+			"User-Agent": f"{APP_NAME}/{APP_VERSION}",
+		}
+		return f"{self.prefs.instance_url}/api/v1/streaming", headers
+
+	def _stream_request(self):
+		"""URL and headers for the user stream, or None until the API is ready."""
+		if not hasattr(self, 'api') or self.api is None:
+			return None
+		stream_url = f"{self.prefs.instance_url}/api/v1/streaming/user"
+		headers = {
+			"Authorization": f"Bearer {self.prefs.access_token}",
+			"Accept": "text/event-stream",
+		}
+		return stream_url, headers
 
 	def _handle_stream_event(self, event_type, data):
 		"""Handle a streaming event by dispatching to the listener."""
@@ -708,32 +661,21 @@ class mastodon(object):
 		if self.stream_listener is None:
 			return
 
-		from mastodon import AttribAccessDict
-
-		def convert_to_attrib_dict(obj):
-			"""Recursively convert dicts to AttribAccessDict for attribute access."""
-			if isinstance(obj, dict):
-				converted = {k: convert_to_attrib_dict(v) for k, v in obj.items()}
-				return AttribAccessDict(**converted)
-			elif isinstance(obj, list):
-				return [convert_to_attrib_dict(item) for item in obj]
-			return obj
+		from platforms.mastodon.models import attrib_dict
 
+		# Events arrive as plain JSON; the listener converts them to universal
+		# models straight from the dicts, attribute access is only for leftovers
 		try:
 			if event_type == 'update':
-				status = convert_to_attrib_dict(data)
-				self.stream_listener.on_update(status)
+				self.stream_listener.on_update(attrib_dict(data))
 			elif event_type == 'notification':
-				notification = convert_to_attrib_dict(data)
-				self.stream_listener.on_notification(notification)
+				self.stream_listener.on_notification(attrib_dict(data))
 			elif event_type == 'delete':
 				self.stream_listener.on_delete(data)
 			elif event_type == 'status.update':
-				status = convert_to_attrib_dict(data)
-				self.stream_listener.on_status_update(status)
+				self.stream_listener.on_status_update(attrib_dict(data))
 			elif event_type == 'conversation':
-				conversation = convert_to_attrib_dict(data)
-				self.stream_listener.on_conversation(conversation)
+				self.stream_listener.on_conversation(attrib_dict(data))
 		except Exception:
 			pass  # Silently ignore stream handler errors
 
@@ -755,7 +697,8 @@ class mastodon(object):
 
 		while page and count < self.app.prefs.user_limit:
 			try:
-				page = self.api.fetch_next(page)
+				with rate_limit.priority(rate_limit.BULK):
+					page = self.api.fetch_next(page)
 				if page:
 					followers.extend(page)
 					count += 1
@@ -783,7 +726,8 @@ class mastodon(object):
 
 		while page and count < self.app.prefs.user_limit:
 			try:
-				page = self.api.fetch_next(page)
+				with rate_limit.priority(rate_limit.BULK):
+					page = self.api.fetch_next(page)
 				if page:
 					following.extend(page)
 					count += 1
@@ -794,44 +738,47 @@ class mastodon(object):
 		return following
 
 
+	def _relationship_pages(self, kind):
+		if hasattr(self, '_platform') and self._platform:
+			if kind == relationships.FOLLOWERS:
+				return self._platform.iter_follower_pages(self.me.id, limit=80)
+			return self._platform.iter_following_pages(self.me.id, limit=80)
+		# No backend: the whole list as one page
+		return iter([self.followers(self.me.id) if kind == relationships.FOLLOWERS else self.following(self.me.id)])
+
+	def _relationship_counts(self):
+		if hasattr(self, '_platform') and self._platform:
+			me = self._platform.get_user(self.me.id)
+		else:
+			try:
+				me = self.api.account(id=self.me.id)
+			except MastodonError:
+				me = None
+		if me is None:
+			return None
+		return {relationships.FOLLOWERS: me.followers_count, relationships.FOLLOWING: me.following_count}
+
+	def get_relationships(self):
+		"""The snapshot of my followers and following, fetched or refreshed as needed."""
+		if self.relationships is None:
+			self.relationships = relationships.RelationshipSnapshot(
+				self._relationship_pages, self._relationship_counts,
+				store=getattr(self._platform, 'timeline_cache', None),
+				max_pages=lambda: self.app.prefs.user_limit)
+		self.relationships.ensure()
+		return self.relationships
+
 	def mutual_following(self):
-		followers = self.followers(self.me.id)
-		following = self.following(self.me.id)
-		users = []
-		follower_ids = {f.id for f in followers}
-		for i in following:
-			if i.id in follower_ids:
-				users.append(i)
-		return users
+		return self.get_relationships().mutual()
 
 	def not_following(self):
-		followers = self.followers(self.me.id)
-		following = self.following(self.me.id)
-		following_ids = {f.id for f in following}
-		users = []
-		for i in followers:
-			if i.id not in following_ids:
-				users.append(i)
-		return users
+		return self.get_relationships().not_following()
 
 	def not_following_me(self):
-		followers = self.followers(self.me.id)
-		following = self.following(self.me.id)
-		follower_ids = {f.id for f in followers}
-		users = []
-		for i in following:
-			if i.id not in follower_ids:
-				users.append(i)
-		return users
+		return self.get_relationships().not_following_me()
 
 	def havent_posted(self):
-		following = self.following(self.me.id)
-		users = []
-		for i in following:
-			if hasattr(i, "last_status_at") and i.last_status_at:
-				if i.last_status_at.year < datetime.datetime.now().year - 1:
-					users.append(i)
-		return users
+		return self.get_relationships().havent_posted()
 
 
 	def list_timelines(self, hidden=False):
@@ -994,10 +941,16 @@ class mastodon(object):
 			else:
 				speak.speak("User not found")
 				return
+		else:
+			user = self.user_cache.lookup_by_id(str(user_id)) if getattr(self, '_platform', None) else None
 		# Use platform backend if available
 		if hasattr(self, '_platform') and self._platform:
-			return self._platform.follow(user_id)
-		self.api.account_follow(id=user_id)
+			result = self._platform.follow(user_id)
+		else:
+			result = self.api.account_follow(id=user_id)
+		if self.relationships and result is not False:
+			self.relationships.note_follow(user_id, user)
+		return result
 
 	def unfollow(self, user_id):
 		"""Unfollow a user by ID or acct"""
@@ -1010,8 +963,12 @@ class mastodon(object):
 				return
 		# Use platform backend if available
 		if hasattr(self, '_platform') and self._platform:
-			return self._platform.unfollow(user_id)
-		self.api.account_unfollow(id=user_id)
+			result = self._platform.unfollow(user_id)
+		else:
+			result = self.api.account_unfollow(id=user_id)
+		if self.relationships and result is not False:
+			self.relationships.note_unfollow(user_id)
+		return result
 
 	def block(self, user_id):
 		"""Block a user by ID or acct"""
@@ -1,7 +1,7 @@
 """Universal models for multi-platform social media support."""
 
 from .status import UniversalStatus, UniversalMedia, UniversalMention
-from .user import UniversalUser, UserCache
+from .user import UniversalUser, UserCache, shared_user
 from .notification import UniversalNotification
 
 __all__ = [
@@ -10,5 +10,6 @@ __all__ = [
     'UniversalMention',
     'UniversalUser',
     'UserCache',
+    'shared_user',
     'UniversalNotification',
 ]
@@ -0,0 +1,52 @@
+"""Helpers shared by the universal models.
+
+The models are slotted dataclasses, so an instance holds its fields and
+nothing else: no per-instance __dict__. A few attributes are set on models
+after they're built (state sync, pinned and scheduled posts, remote
+timelines). Those get slots of their own in a small base class next to
+each model. Reading one that was never set raises AttributeError, as with
+the old __dict__ models, so hasattr() and the _platform_data fallback in
+__getattr__ behave as before.
+
+Strings that repeat across thousands of objects (platform, visibility,
+media type, acct) are interned when a model is built.
+"""
+
+import sys
+import threading
+import weakref
+
+
+def intern(value):
+    """sys.intern() for strings; anything else is returned as is."""
+    return sys.intern(value) if type(value) is str else value
+
+
+class SharedInstances:
+    """Weak registry handing out one instance for identical objects with the same key.
+
+    share() returns the registered instance if its `names` attributes equal
+    the new object's, otherwise it registers and returns the new one.
+    Registered objects are never changed, so a newer version of a user
+    doesn't alter posts that were built with an older one.
+    """
+
+    def __init__(self, names):
+        self.names = tuple(names)
+        self._instances = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def share(self, key, obj):
+        with self._lock:
+            existing = self._instances.get(key)
+            if existing is not None and existing is not obj:
+                for name in self.names:
+                    if getattr(existing, name) != getattr(obj, name):
+                        break
+                else:
+                    return existing
+            self._instances[key] = obj
+            return obj
+
+    def __len__(self):
+        return len(self._instances)
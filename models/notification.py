@@ -4,8 +4,10 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional, Any
 
+from .base import intern
 
-@dataclass
+
+@dataclass(slots=True)
 class UniversalNotification:
     """Universal notification representation that works across platforms."""
     id: str
@@ -18,6 +20,10 @@ class UniversalNotification:
     _platform_data: Any = None
     _platform: str = ""
 
+    def __post_init__(self):
+        self.type = intern(self.type)
+        self._platform = intern(self._platform)
+
     def __getattr__(self, name):
         """Fallback to platform data for attributes we don't have."""
         if name.startswith('_'):
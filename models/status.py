@@ -4,8 +4,10 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, List, Any
 
+from .base import intern
 
-@dataclass
+
+@dataclass(slots=True)
 class UniversalMedia:
     """Universal media attachment representation."""
     id: str
@@ -15,8 +17,11 @@ class UniversalMedia:
     description: Optional[str] = None
     _platform_data: Any = None
 
+    def __post_init__(self):
+        self.type = intern(self.type)
+
 
-@dataclass
+@dataclass(slots=True)
 class UniversalMention:
     """Universal mention representation."""
     id: str
@@ -25,9 +30,29 @@ class UniversalMention:
     url: Optional[str] = None
     _platform_data: Any = None
 
+    def __post_init__(self):
+        self.acct = intern(self.acct)
+        self.username = intern(self.username)
+
 
-@dataclass
-class UniversalStatus:
+class _StatusSlots:
+    """Attributes set on statuses after they're built."""
+    __slots__ = (
+        # Interaction state synced across buffers
+        'favourited', 'reblogged', 'bookmarked', 'muted',
+        # Mentions wrapped from notifications
+        '_original_status_id',
+        # Pinned and scheduled posts
+        '_pinned', '_scheduled', '_scheduled_id', '_scheduled_at',
+        # Posts from remote instance timelines
+        '_instance_url', '_resolved_id',
+        # Cache rows whose quote wasn't loaded, Bluesky link facets
+        '_unresolved_quote_id', '_facet_links',
+    )
+
+
+@dataclass(slots=True)
+class UniversalStatus(_StatusSlots):
     """Universal status representation that works across platforms."""
     id: str
     account: 'UniversalUser'  # Forward reference
@@ -60,6 +85,10 @@ class UniversalStatus:
     # For notification-sourced statuses, store the notification ID
     _notification_id: Optional[str] = None
 
+    def __post_init__(self):
+        self.visibility = intern(self.visibility)
+        self._platform = intern(self._platform)
+
     def __getattr__(self, name):
         """Fallback to platform data for attributes we don't have."""
         if name.startswith('_'):
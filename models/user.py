@@ -1,14 +1,23 @@
 """Universal user representation and caching for multi-platform support."""
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from datetime import datetime
-from typing import Optional, List, Any
+from collections import OrderedDict
+from typing import Optional, List, Any, Dict, Set
 import pickle
 import os
+import threading
 
+from .base import SharedInstances, intern
 
-@dataclass
-class UniversalUser:
+
+class _UserSlots:
+    """Attributes set on users after they're built, plus a weakref slot for sharing."""
+    __slots__ = ('__weakref__', '_instance_url')
+
+
+@dataclass(slots=True)
+class UniversalUser(_UserSlots):
     """Universal user representation that works across platforms."""
     id: str
     acct: str  # username@instance or just username
@@ -31,6 +40,11 @@ class UniversalUser:
     _platform_data: Any = None
     _platform: str = ""
 
+    def __post_init__(self):
+        self.acct = intern(self.acct)
+        self.username = intern(self.username)
+        self._platform = intern(self._platform)
+
     def __getattr__(self, name):
         """Fallback to platform data for attributes we don't have."""
         if name.startswith('_'):
@@ -48,38 +62,124 @@ class UniversalUser:
         return hash((self.id, self._platform))
 
 
+# Equal users compare by id and platform only, so sharing checks every field
+_shared_users = SharedInstances([f.name for f in fields(UniversalUser)])
+
+
+def shared_user(user: Optional[UniversalUser]) -> Optional[UniversalUser]:
+    """Return an existing user identical to this one, or register this one.
+
+    The same people show up on thousands of posts. Converters pass every
+    user they build through here so identical copies share one object.
+    The returned user may be held by other posts: code that changes a
+    user's fields has to change a copy (dataclasses.replace()).
+    """
+    if user is None:
+        return None
+    return _shared_users.share((user._platform, user.id), user)
+
+
 class UserCache:
     """Per-account user cache for looking up users by ID or name.
 
-    This is an in-memory only cache - no persistence to disk.
-    Users are collected as the app runs and discarded on exit.
+    Lookups go through two tiers before the caller falls back to the API:
+
+    1. An in-memory LRU keyed by ID, with a secondary index on the lowercased
+       acct and local username so lookups by either are O(1).
+    2. An optional on-disk store (the account's TimelineCache ``users``
+       table), so people seen in earlier sessions resolve without an API
+       call. Disk hits are promoted into memory.
+
+    Users added in memory are written to the store in batches by save().
     """
 
-    MAX_CACHE_SIZE = 500  # Limit cache size
+    MAX_CACHE_SIZE = 500  # Default limit on cached users
+    MAX_DIRTY_USERS = 2000  # Cap on users waiting to be written by save()
+
+    def __init__(self, confpath: str, platform: str, account_id: str, max_size: Optional[int] = None,
+                 store=None, max_age_days: Optional[float] = None):
+        self.max_size = max_size if max_size and max_size > 0 else self.MAX_CACHE_SIZE
+        # Persistent second tier (TimelineCache or None)
+        self.store = store
+        self.max_age_days = max_age_days
+        # id -> user waiting to be persisted by save()
+        self._dirty: 'OrderedDict[str, UniversalUser]' = OrderedDict()
+        self.disk_hits = 0
+        # id -> user, least recently added first
+        self._users: 'OrderedDict[str, UniversalUser]' = OrderedDict()
+        # lowercase acct -> id
+        self._acct_index: Dict[str, str] = {}
+        # lowercase local username -> ids, least recently added first
+        self._username_index: Dict[str, 'OrderedDict[str, None]'] = {}
+        self.unknown_users: Set[str] = set()  # IDs to look up later
+        self.hits = 0
+        self.misses = 0
+        # Streaming and refresh threads add users concurrently
+        self._lock = threading.RLock()
 
-    def __init__(self, confpath: str, platform: str, account_id: str):
-        self.users: List[UniversalUser] = []
-        self.unknown_users: List[str] = []  # IDs to look up later
+    def _store_available(self) -> bool:
+        return self.store is not None and self.store.is_available()
 
     def load(self) -> bool:
-        """No-op - cache is in-memory only."""
+        """Prepare the persistent tier, evicting users not seen for max_age_days."""
+        if self._store_available() and self.max_age_days:
+            self.store.evict_stale_users(self.max_age_days)
         return True
 
     def save(self):
-        """No-op - cache is in-memory only."""
-        pass
+        """Write users added since the last save to the persistent tier."""
+        if not self._store_available():
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            users = list(self._dirty.values())
+            self._dirty.clear()
+        self.store.save_users_batch(users)
+
+    @property
+    def users(self) -> List[UniversalUser]:
+        """Cached users, most recently seen first."""
+        return self.get_all_users()
+
+    def _index_keys(self, user: UniversalUser):
+        acct = (user.acct or '').lower()
+        return acct, acct.split('@')[0]
+
+    def _unindex(self, user_id: str, user: UniversalUser):
+        acct, username = self._index_keys(user)
+        if self._acct_index.get(acct) == user_id:
+            del self._acct_index[acct]
+        ids = self._username_index.get(username)
+        if ids is not None:
+            ids.pop(user_id, None)
+            if not ids:
+                del self._username_index[username]
 
     def add_user(self, user: UniversalUser):
         """Add or update a user in the cache."""
         if user is None:
             return
-        # Remove existing entry with same ID
-        self.users = [u for u in self.users if u.id != user.id]
-        # Insert at front (most recently seen)
-        self.users.insert(0, user)
-        # Trim if too large
-        if len(self.users) > self.MAX_CACHE_SIZE:
-            self.users = self.users[:self.MAX_CACHE_SIZE]
+        user_id = str(user.id)
+        with self._lock:
+            existing = self._users.pop(user_id, None)
+            if existing is not None:
+                self._unindex(user_id, existing)
+            # Most recently seen goes at the end
+            self._users[user_id] = user
+            acct, username = self._index_keys(user)
+            self._acct_index[acct] = user_id
+            self._username_index.setdefault(username, OrderedDict())[user_id] = None
+            self.unknown_users.discard(user_id)
+            if self.store is not None:
+                self._dirty[user_id] = user
+                self._dirty.move_to_end(user_id)
+                while len(self._dirty) > self.MAX_DIRTY_USERS:
+                    self._dirty.popitem(last=False)
+            # Trim least recently seen entries if too large
+            while len(self._users) > self.max_size:
+                old_id, old_user = self._users.popitem(last=False)
+                self._unindex(old_id, old_user)
 
     def add_users_from_status(self, status):
         """Extract and cache users from a status."""
@@ -99,24 +199,62 @@ class UserCache:
         if hasattr(notification, 'status') and notification.status:
             self.add_users_from_status(notification.status)
 
+    def _promote(self, user: UniversalUser):
+        """Put a user loaded from the store into memory without re-saving it."""
+        with self._lock:
+            self.add_user(user)
+            self._dirty.pop(str(user.id), None)
+
     def lookup_by_id(self, user_id: str) -> Optional[UniversalUser]:
         """Look up a user by ID."""
-        for user in self.users:
-            if str(user.id) == str(user_id):
+        with self._lock:
+            user = self._users.get(str(user_id))
+            if user is not None:
+                self.hits += 1
+                return user
+        if self._store_available():
+            user = self.store.get_user(str(user_id))
+            if user is not None:
+                self.disk_hits += 1
+                self._promote(user)
                 return user
-        # Add to unknown list for later lookup
-        if user_id not in self.unknown_users:
-            self.unknown_users.append(user_id)
+        with self._lock:
+            self.misses += 1
+            # Add to unknown set for later lookup
+            self.unknown_users.add(str(user_id))
         return None
 
+    def _lookup_name_in_memory(self, name: str) -> Optional[UniversalUser]:
+        user_id = self._acct_index.get(name)
+        if user_id is None:
+            ids = self._username_index.get(name)
+            if ids:
+                # Most recently seen user with this local username
+                user_id = next(reversed(ids))
+        if user_id is None:
+            return None
+        return self._users.get(user_id)
+
     def lookup_by_name(self, name: str, use_api_callback=None) -> Optional[UniversalUser]:
         """Look up a user by acct/username."""
         name = name.lstrip('@').lower()
 
-        for user in self.users:
-            if user.acct.lower() == name or user.acct.split('@')[0].lower() == name:
+        with self._lock:
+            user = self._lookup_name_in_memory(name)
+            if user is not None:
+                self.hits += 1
                 return user
 
+        if self._store_available():
+            user = self.store.get_user_by_acct(name)
+            if user is not None:
+                self.disk_hits += 1
+                self._promote(user)
+                return user
+
+        with self._lock:
+            self.misses += 1
+
         # Try API lookup if callback provided
         if use_api_callback:
             user = use_api_callback(name)
@@ -127,10 +265,58 @@ class UserCache:
         return None
 
     def get_all_users(self) -> List[UniversalUser]:
-        """Return all cached users."""
-        return self.users
+        """Return all cached users, most recently seen first."""
+        with self._lock:
+            return list(reversed(self._users.values()))
+
+    def search(self, prefix: str, limit: int = 20) -> List[UniversalUser]:
+        """Find users whose acct, username or display name starts with prefix.
+
+        Memory matches (most recently seen first) come before matches from the
+        persistent tier. Used for mention autocomplete.
+        """
+        prefix = prefix.lstrip('@').lower()
+        if not prefix:
+            return []
+        matches = []
+        seen = set()
+        for user in self.get_all_users():
+            acct = (user.acct or '').lower()
+            display_name = (getattr(user, 'display_name', '') or '').lower()
+            if acct.startswith(prefix) or acct.split('@')[0].startswith(prefix) or display_name.startswith(prefix):
+                matches.append(user)
+                seen.add(str(user.id))
+                if len(matches) >= limit:
+                    return matches
+        if self._store_available():
+            for user in self.store.search_users_prefix(prefix, limit=limit):
+                if str(user.id) in seen:
+                    continue
+                matches.append(user)
+                seen.add(str(user.id))
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def stats(self) -> Dict[str, int]:
+        """Return size and hit/miss counters for diagnostics."""
+        return {
+            'size': len(self._users),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'unknown': len(self.unknown_users),
+        }
+
+    def __len__(self):
+        return len(self._users)
 
     def clear(self):
         """Clear the cache."""
-        self.users = []
-        self.unknown_users = []
+        with self._lock:
+            self._users.clear()
+            self._acct_index.clear()
+            self._username_index.clear()
+            self._dirty.clear()
+            self.unknown_users = set()
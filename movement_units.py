@@ -2,8 +2,26 @@
 
 Alt+Left/Right cycles the active unit; Alt+Up/Down jumps to the next item
 matching it. Ported from FastSMApple (FastSMCore/Timeline/Movement.swift).
+
+Jumps go through a NavigationIndex instead of walking the timeline. A
+timeline's StatusList keeps one up to date as items are added and removed
+(see navigation()):
+
+- Every slot gets a key from a range that grows at both ends, so keys
+  increase with position: a key's position is a bisect away.
+- Authors and the posts replied to map to sorted lists of keys. The next
+  post by the same author is a bisect in that author's list.
+- Threads are sets of posts joined by in_reply_to_id (union-find), each
+  with a sorted list of keys. A thread can't be split, so removing an item
+  rebuilds them on the next thread jump.
+- Time jumps binary search the items' timestamps while the timeline is in
+  time order (either way), and walk it as before when it isn't.
+
+Inserting in the middle, sorting and the like mark the index stale; the
+next jump rebuilds it.
 """
 
+import bisect
 from dataclasses import dataclass
 from typing import List, Optional
 
@@ -67,6 +85,12 @@ def _ts(status):
 		return None
 
 
+def navigation(statuses) -> "NavigationIndex":
+	"""The NavigationIndex of a list of items: the one a StatusList keeps, or a new one for a plain list."""
+	index = getattr(statuses, "navigation", None)
+	return index() if index is not None else NavigationIndex(statuses)
+
+
 def destination(statuses, from_index: int, unit: MovementUnit, direction: str) -> Optional[int]:
 	"""Index to jump to from `from_index` by one `unit` step, or None.
 
@@ -75,69 +99,289 @@ def destination(statuses, from_index: int, unit: MovementUnit, direction: str) -
 	if not (0 <= from_index < len(statuses)):
 		return None
 	step = 1 if direction == "down" else -1
+	index = navigation(statuses)
 
 	if unit.kind == "time":
-		base = _ts(statuses[from_index])
-		if base is None:
-			return None
-		threshold = unit.seconds
-		i = from_index + step
-		while 0 <= i < len(statuses):
-			t = _ts(statuses[i])
-			if t is not None and abs(base - t) >= threshold:
-				return i
-			i += step
-		return None
-
+		return index.by_time(from_index, unit.seconds, step)
 	if unit.kind == "same_user":
-		uid = _author_id(statuses[from_index])
-		if uid is None:
+		return index.same_user(from_index, step)
+	if unit.kind == "thread":
+		return index.same_thread(from_index, step)
+	return None
+
+
+def _author_id(status):
+	a = getattr(status, "account", None)
+	i = getattr(a, "id", None) if a is not None else None
+	return str(i) if i is not None else None
+
+
+def _id(value):
+	return str(value) if value is not None else None
+
+
+def _add_key(lists, name, key):
+	keys = lists.get(name)
+	if keys is None:
+		keys = lists[name] = []
+	if not keys or key > keys[-1]:
+		keys.append(key)
+	else:
+		bisect.insort(keys, key)
+
+
+def _remove_key(lists, name, key):
+	keys = lists.get(name)
+	if keys is None:
+		return
+	i = bisect.bisect_left(keys, key)
+	if i < len(keys) and keys[i] == key:
+		del keys[i]
+	if not keys:
+		del lists[name]
+
+
+class _Threads(object):
+	"""Union-find of item ids joined by in_reply_to_id, with the sorted keys of each thread."""
+
+	def __init__(self):
+		self._parent = {}  # id -> id, toward the thread's root
+		self._keys = {}  # root id -> sorted keys
+		self._waiting = {}  # id not loaded -> ids of loaded replies to it
+
+	def _root(self, sid):
+		parent = self._parent
+		root = sid
+		while parent[root] != root:
+			root = parent[root]
+		while parent[sid] != root:
+			parent[sid], sid = root, parent[sid]
+		return root
+
+	def _union(self, a, b):
+		a, b = self._root(a), self._root(b)
+		if a == b:
+			return
+		# Merge the smaller thread into the larger
+		if len(self._keys[a]) < len(self._keys[b]):
+			a, b = b, a
+		self._parent[b] = a
+		self._keys[a] = sorted(self._keys[a] + self._keys.pop(b))
+
+	def add(self, key, item):
+		sid = _id(getattr(item, "id", None))
+		if sid is None:
+			return
+		if sid not in self._parent:
+			self._parent[sid] = sid
+			self._keys[sid] = []
+			for child in self._waiting.pop(sid, ()):
+				self._union(child, sid)
+		_add_key(self._keys, self._root(sid), key)
+		parent = _id(getattr(item, "in_reply_to_id", None))
+		if parent is not None and parent != sid:
+			if parent in self._parent:
+				self._union(sid, parent)
+			else:
+				self._waiting.setdefault(parent, []).append(sid)
+
+	def keys(self, item):
+		"""Sorted keys of the thread of a loaded item, or None."""
+		sid = _id(getattr(item, "id", None))
+		if sid is None or sid not in self._parent:
 			return None
-		i = from_index + step
-		while 0 <= i < len(statuses):
-			if _author_id(statuses[i]) == uid:
-				return i
-			i += step
+		return self._keys[self._root(sid)]
+
+
+class NavigationIndex(object):
+	"""Finds the next item by author, thread, reply or time in O(log n)."""
+
+	def __init__(self, items):
+		self.items = items
+		self.rebuild()
+
+	def rebuild(self):
+		items = self.items
+		self._slots = list(range(len(items)))  # position -> key, increasing
+		self._times = [_ts(item) for item in items]  # position -> timestamp
+		self._authors = {}  # author id -> sorted keys
+		self._replies = {}  # id replied to -> sorted keys
+		for key, item in enumerate(items):
+			self._index(key, item)
+		self._threads = None  # built on the first thread jump
+		# Adjacent pairs in increasing and decreasing time order, and items without a time
+		self._rises = self._falls = 0
+		for a, b in zip(self._times, self._times[1:]):
+			self._pair(a, b, 1)
+		self._untimed = self._times.count(None)
+		self.stale = False
+
+	def _index(self, key, item):
+		author = _author_id(item)
+		if author is not None:
+			_add_key(self._authors, author, key)
+		parent = _id(getattr(item, "in_reply_to_id", None))
+		if parent is not None:
+			_add_key(self._replies, parent, key)
+
+	def _unindex(self, key, item):
+		author = _author_id(item)
+		if author is not None:
+			_remove_key(self._authors, author, key)
+		parent = _id(getattr(item, "in_reply_to_id", None))
+		if parent is not None:
+			_remove_key(self._replies, parent, key)
+
+	def _pair(self, a, b, sign):
+		if a is not None and b is not None:
+			if a < b:
+				self._rises += sign
+			elif a > b:
+				self._falls += sign
+
+	def _neighbours(self, position, sign):
+		"""Count (sign=1) or uncount (-1) the pairs of position with its neighbours."""
+		times = self._times
+		t = times[position]
+		if position > 0:
+			self._pair(times[position - 1], t, sign)
+		if position + 1 < len(times):
+			self._pair(t, times[position + 1], sign)
+
+	# ---- changes, reported by the list ----
+
+	def inserted(self, position):
+		"""An item was inserted at position."""
+		if self.stale:
+			return
+		slots = self._slots
+		if position == 0:
+			key = slots[0] - 1 if slots else 0
+		elif position == len(slots):
+			key = slots[-1] + 1
+		else:
+			self.stale = True
+			return
+		item = self.items[position]
+		times = self._times
+		if 0 < position < len(times):
+			self._pair(times[position - 1], times[position], -1)
+		slots.insert(position, key)
+		times.insert(position, _ts(item))
+		self._neighbours(position, 1)
+		if times[position] is None:
+			self._untimed += 1
+		self._index(key, item)
+		if self._threads is not None:
+			self._threads.add(key, item)
+
+	def removing(self, position):
+		"""The item at position is about to be removed."""
+		if self.stale:
+			return
+		times = self._times
+		self._neighbours(position, -1)
+		if 0 < position < len(times) - 1:
+			self._pair(times[position - 1], times[position + 1], 1)
+		if times[position] is None:
+			self._untimed -= 1
+		del times[position]
+		self._unindex(self._slots.pop(position), self.items[position])
+		self._threads = None
+
+	def replaced(self, position, old):
+		"""The item at position, old, was replaced."""
+		if self.stale:
+			return
+		item = self.items[position]
+		key = self._slots[position]
+		self._neighbours(position, -1)
+		if self._times[position] is None:
+			self._untimed -= 1
+		self._times[position] = _ts(item)
+		if self._times[position] is None:
+			self._untimed += 1
+		self._neighbours(position, 1)
+		self._unindex(key, old)
+		self._index(key, item)
+		if _id(getattr(old, "id", None)) != _id(getattr(item, "id", None)) or _id(getattr(old, "in_reply_to_id", None)) != _id(getattr(item, "in_reply_to_id", None)):
+			self._threads = None
+
+	# ---- jumps ----
+
+	def _current(self):
+		if self.stale or len(self._slots) != len(self.items):
+			self.rebuild()
+
+	def _next_key(self, keys, position, step):
+		key = self._slots[position]
+		if step > 0:
+			i = bisect.bisect_right(keys, key)
+		else:
+			i = bisect.bisect_left(keys, key) - 1
+		if 0 <= i < len(keys):
+			return bisect.bisect_left(self._slots, keys[i])
 		return None
 
-	if unit.kind == "thread":
-		keys = _thread_keys(statuses)
-		key = keys[from_index]
-		if key is None:
+	def same_user(self, position: int, step: int) -> Optional[int]:
+		"""Position of the nearest item by the same author in the direction of step, or None."""
+		self._current()
+		author = _author_id(self.items[position])
+		if author is None:
 			return None
-		i = from_index + step
-		while 0 <= i < len(statuses):
-			if keys[i] == key:
-				return i
-			i += step
-		return None
+		return self._next_key(self._authors[author], position, step)
 
-	return None
+	def same_thread(self, position: int, step: int) -> Optional[int]:
+		"""Position of the nearest item in the same thread in the direction of step, or None."""
+		self._current()
+		if self._threads is None:
+			self._threads = _Threads()
+			for key, item in zip(self._slots, self.items):
+				self._threads.add(key, item)
+		keys = self._threads.keys(self.items[position])
+		if keys is None:
+			return None
+		return self._next_key(keys, position, step)
 
+	def first_reply(self, status_id) -> Optional[int]:
+		"""Position of the first reply to status_id, or None."""
+		self._current()
+		keys = self._replies.get(_id(status_id))
+		if not keys:
+			return None
+		return bisect.bisect_left(self._slots, keys[0])
 
-def _author_id(status):
-	a = getattr(status, "account", None)
-	return getattr(a, "id", None) if a is not None else None
-
-
-def _thread_keys(statuses):
-	parent = {}
-	for s in statuses:
-		sid = getattr(s, "id", None)
-		if sid is not None:
-			parent[sid] = getattr(s, "in_reply_to_id", None)
-
-	def root(sid):
-		cur = sid
-		for _ in range(1000):
-			p = parent.get(cur)
-			if p is None or p not in parent:
-				break
-			cur = p
-		return cur
-
-	keys = []
-	for s in statuses:
-		sid = getattr(s, "id", None)
-		keys.append(root(sid) if sid is not None else None)
-	return keys
+	def by_time(self, position: int, seconds: int, step: int) -> Optional[int]:
+		"""Position of the nearest item at least seconds older or newer in the direction of step, or None."""
+		self._current()
+		times = self._times
+		base = times[position]
+		if base is None:
+			return None
+		if self._untimed or (self._rises and self._falls):
+			# Not in time order: walk
+			i = position + step
+			while 0 <= i < len(times):
+				t = times[i]
+				if t is not None and abs(base - t) >= seconds:
+					return i
+				i += step
+			return None
+		# In time order, the items far enough away are all those past a point
+		if step > 0:
+			lo, hi = position + 1, len(times)
+			while lo < hi:
+				mid = (lo + hi) // 2
+				if abs(base - times[mid]) >= seconds:
+					hi = mid
+				else:
+					lo = mid + 1
+			return lo if lo < len(times) else None
+		lo, hi = 0, position
+		while lo < hi:
+			mid = (lo + hi) // 2
+			if abs(base - times[mid]) >= seconds:
+				lo = mid + 1
+			else:
+				hi = mid
+		return lo - 1 if lo > 0 else None
@@ -203,6 +203,14 @@ class PlatformAccount(ABC):
         """Get users that a user is following."""
         pass
 
+    def iter_follower_pages(self, user_id: str, limit: int = 80):
+        """Yield pages of a user's followers, most recent first. Override to page through all of them."""
+        yield self.get_followers(user_id, limit)
+
+    def iter_following_pages(self, user_id: str, limit: int = 80):
+        """Yield pages of the users a user follows, most recent first. Override to page through all of them."""
+        yield self.get_following(user_id, limit)
+
     # ============ List Methods ============
 
     def get_lists(self) -> List[Any]:
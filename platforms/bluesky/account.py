@@ -5,6 +5,7 @@ from datetime import datetime, timezone
 from atproto import Client
 from atproto.exceptions import AtProtocolError, InvokeTimeoutError
 
+import rate_limit
 from platforms.base import PlatformAccount
 from models import UniversalStatus, UniversalUser, UniversalNotification, UserCache
 from models.status import UniversalMention
@@ -40,16 +41,19 @@ class BlueskyAccount(PlatformAccount):
         self._max_chars = 300  # Bluesky character limit
         self._prefs = prefs  # Store reference to account wrapper's prefs
 
-        # Initialize user cache
-        self.user_cache = UserCache(confpath, 'bluesky', str(self._me.id))
-        self.user_cache.load()
-
         # Initialize timeline cache for fast startup
         if app.prefs.timeline_cache_enabled:
             self.timeline_cache = TimelineCache(confpath, str(self._me.id))
         else:
             self.timeline_cache = None
 
+        # Initialize user cache (memory LRU backed by the timeline cache's users table)
+        self.user_cache = UserCache(confpath, 'bluesky', str(self._me.id),
+                                    max_size=getattr(app.prefs, 'user_cache_size', None),
+                                    store=self.timeline_cache,
+                                    max_age_days=getattr(app.prefs, 'user_cache_max_age_days', None))
+        self.user_cache.load()
+
         # Cursor tracking for pagination (Bluesky uses cursors, not max_id)
         self._cursors = {}  # timeline_type -> cursor
 
@@ -1054,6 +1058,31 @@ class BlueskyAccount(PlatformAccount):
             self.app.handle_error(e, "report")
             return False
 
+    def _iter_user_pages(self, fetch, field, user_id, limit):
+        """Yield pages of universal users, following the API's cursor."""
+        cursor = None
+        first = True
+        while True:
+            params = {'actor': user_id, 'limit': min(limit, 100)}
+            if cursor:
+                params['cursor'] = cursor
+            # Pages after the first are a bulk scan
+            with rate_limit.priority(rate_limit.INTERACTIVE if first else rate_limit.BULK):
+                response = fetch(**params)
+            first = False
+            yield self._convert_profiles(getattr(response, field))
+            cursor = getattr(response, 'cursor', None)
+            if not cursor:
+                return
+
+    def iter_follower_pages(self, user_id: str, limit: int = 80):
+        """Yield pages of a user's followers, most recent first."""
+        return self._iter_user_pages(self.client.get_followers, 'followers', user_id, limit)
+
+    def iter_following_pages(self, user_id: str, limit: int = 80):
+        """Yield pages of the users a user follows, most recent first."""
+        return self._iter_user_pages(self.client.get_follows, 'follows', user_id, limit)
+
     def get_followers(self, user_id: str, limit: int = 80, max_pages: int = 1) -> List[UniversalUser]:
         """Get followers of a user.
 
@@ -1064,23 +1093,10 @@ class BlueskyAccount(PlatformAccount):
         """
         try:
             all_users = []
-            cursor = None
-            page_count = 0
-
-            while page_count < max_pages:
-                params = {'actor': user_id, 'limit': min(limit, 100)}
-                if cursor:
-                    params['cursor'] = cursor
-
-                response = self.client.get_followers(**params)
-                users = self._convert_profiles(response.followers)
+            for page_count, users in enumerate(self.iter_follower_pages(user_id, limit), 1):
                 all_users.extend(users)
-                page_count += 1
-
-                cursor = getattr(response, 'cursor', None)
-                if not cursor:
+                if page_count >= max_pages:
                     break
-
             return all_users
         except (AtProtocolError, InvokeTimeoutError) as e:
             self.app.handle_error(e, "followers")
@@ -1096,23 +1112,10 @@ class BlueskyAccount(PlatformAccount):
         """
         try:
             all_users = []
-            cursor = None
-            page_count = 0
-
-            while page_count < max_pages:
-                params = {'actor': user_id, 'limit': min(limit, 100)}
-                if cursor:
-                    params['cursor'] = cursor
-
-                response = self.client.get_follows(**params)
-                users = self._convert_profiles(response.follows)
+            for page_count, users in enumerate(self.iter_following_pages(user_id, limit), 1):
                 all_users.extend(users)
-                page_count += 1
-
-                cursor = getattr(response, 'cursor', None)
-                if not cursor:
+                if page_count >= max_pages:
                     break
-
             return all_users
         except (AtProtocolError, InvokeTimeoutError) as e:
             self.app.handle_error(e, "following")
@@ -9,6 +9,7 @@ from models import (
     UniversalNotification,
     UniversalMedia,
     UniversalMention,
+    shared_user,
 )
 
 
@@ -81,7 +82,7 @@ def bluesky_profile_to_universal(profile, platform_data=None) -> Optional[Univer
     follows_count = get_attr(profile, 'follows_count', None)
     posts_count = get_attr(profile, 'posts_count', None)
 
-    return UniversalUser(
+    return shared_user(UniversalUser(
         id=did,
         acct=handle,
         username=handle.split('.')[0] if '.' in handle else handle,
@@ -98,7 +99,7 @@ def bluesky_profile_to_universal(profile, platform_data=None) -> Optional[Univer
         locked=False,  # Bluesky doesn't have locked accounts
         _platform_data=platform_data or profile,
         _platform='bluesky',
-    )
+    ))
 
 
 def bluesky_media_to_universal(embed_image) -> UniversalMedia:
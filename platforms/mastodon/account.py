@@ -1,9 +1,11 @@
 """Mastodon platform account implementation."""
 
+import dataclasses
 from typing import List, Optional, Any, Dict
 from mastodon import Mastodon, MastodonError
 
 from version import APP_NAME, APP_VERSION
+import rate_limit
 from platforms.base import PlatformAccount
 from models import UniversalStatus, UniversalUser, UniversalNotification, UserCache
 from cache import TimelineCache
@@ -39,15 +41,19 @@ class MastodonAccount(PlatformAccount):
         self._max_chars = max_chars
         self._prefs = prefs  # Store reference to account wrapper's prefs
 
-        # Initialize user cache (in-memory only, no disk persistence)
-        self.user_cache = UserCache(confpath, 'mastodon', str(self._me.id))
-
         # Initialize timeline cache for fast startup
         if app.prefs.timeline_cache_enabled:
             self.timeline_cache = TimelineCache(confpath, str(self._me.id))
         else:
             self.timeline_cache = None
 
+        # Initialize user cache (memory LRU backed by the timeline cache's users table)
+        self.user_cache = UserCache(confpath, 'mastodon', str(self._me.id),
+                                    max_size=getattr(app.prefs, 'user_cache_size', None),
+                                    store=self.timeline_cache,
+                                    max_age_days=getattr(app.prefs, 'user_cache_max_age_days', None))
+        self.user_cache.load()
+
         # Get default visibility
         try:
             self.default_visibility = getattr(me, 'source', {}).get('privacy', 'public')
@@ -350,7 +356,10 @@ class MastodonAccount(PlatformAccount):
             return account.remote_apis[instance_url]
 
         # Create new unauthenticated client
-        remote_api = Mastodon(api_base_url=instance_url, user_agent=f"{APP_NAME}/{APP_VERSION}")
+        remote_api = Mastodon(api_base_url=instance_url, user_agent=f"{APP_NAME}/{APP_VERSION}",
+                              session=rate_limit.GovernedSession(instance_url),
+                              # The governor does the waiting, and only for background requests
+                              ratelimit_method="throw")
         account.remote_apis[instance_url] = remote_api
         return remote_api
 
@@ -376,23 +385,25 @@ class MastodonAccount(PlatformAccount):
             instance_domain = parsed.netloc or parsed.path.strip('/')
 
             def fix_user_acct(user):
-                """Add instance domain to user acct if not present."""
-                if user and '@' not in user.acct:
+                """Copy of a user with the instance domain added to acct if not present."""
+                # Users are shared between posts; change a copy
+                user = dataclasses.replace(user)
+                if '@' not in user.acct:
                     user.acct = f"{user.acct}@{instance_domain}"
-                if user:
-                    user._instance_url = instance_url
+                user._instance_url = instance_url
+                return user
 
             # Mark all statuses as being from a remote instance
             for status in result:
                 status._instance_url = instance_url
                 # Mark users as remote too (don't cache - IDs are local to remote instance)
                 if hasattr(status, 'account') and status.account:
-                    fix_user_acct(status.account)
+                    status.account = fix_user_acct(status.account)
                 # Also handle reblogged posts
                 if hasattr(status, 'reblog') and status.reblog:
                     status.reblog._instance_url = instance_url
                     if hasattr(status.reblog, 'account') and status.reblog.account:
-                        fix_user_acct(status.reblog.account)
+                        status.reblog.account = fix_user_acct(status.reblog.account)
                 # Handle mentions
                 if hasattr(status, 'mentions') and status.mentions:
                     for mention in status.mentions:
@@ -491,21 +502,23 @@ class MastodonAccount(PlatformAccount):
             instance_domain = parsed.netloc or parsed.path.strip('/')
 
             def fix_user_acct(user):
-                """Add instance domain to user acct if not present."""
-                if user and '@' not in user.acct:
+                """Copy of a user with the instance domain added to acct if not present."""
+                # Users are shared between posts; change a copy
+                user = dataclasses.replace(user)
+                if '@' not in user.acct:
                     user.acct = f"{user.acct}@{instance_domain}"
-                if user:
-                    user._instance_url = instance_url
+                user._instance_url = instance_url
+                return user
 
             # Mark all statuses as being from a remote instance
             for status in result:
                 status._instance_url = instance_url
                 if hasattr(status, 'account') and status.account:
-                    fix_user_acct(status.account)
+                    status.account = fix_user_acct(status.account)
                 if hasattr(status, 'reblog') and status.reblog:
                     status.reblog._instance_url = instance_url
                     if hasattr(status.reblog, 'account') and status.reblog.account:
-                        fix_user_acct(status.reblog.account)
+                        status.reblog.account = fix_user_acct(status.reblog.account)
                 if hasattr(status, 'mentions') and status.mentions:
                     for mention in status.mentions:
                         if hasattr(mention, 'acct') and '@' not in mention.acct:
@@ -942,6 +955,26 @@ class MastodonAccount(PlatformAccount):
         except MastodonError:
             return False
 
+    def _iter_user_pages(self, first_page):
+        """Yield pages of universal users, following the API's next links."""
+        page = first_page
+        while page:
+            users = self._convert_users(page)
+            for user in users:
+                self.user_cache.add_user(user)
+            yield users
+            # Pages after the first are a bulk scan
+            with rate_limit.priority(rate_limit.BULK):
+                page = self.api.fetch_next(page)
+
+    def iter_follower_pages(self, user_id: str, limit: int = 80):
+        """Yield pages of a user's followers, most recent first."""
+        return self._iter_user_pages(self.api.account_followers(id=user_id, limit=limit))
+
+    def iter_following_pages(self, user_id: str, limit: int = 80):
+        """Yield pages of the users a user follows, most recent first."""
+        return self._iter_user_pages(self.api.account_following(id=user_id, limit=limit))
+
     def get_followers(self, user_id: str, limit: int = 80, max_pages: int = 1) -> List[UniversalUser]:
         """Get followers of a user.
 
@@ -952,22 +985,10 @@ class MastodonAccount(PlatformAccount):
         """
         try:
             all_users = []
-            page = self.api.account_followers(id=user_id, limit=limit)
-            users = self._convert_users(page)
-            for user in users:
-                self.user_cache.add_user(user)
-            all_users.extend(users)
-
-            page_count = 1
-            while page and page_count < max_pages:
-                page = self.api.fetch_next(page)
-                if page:
-                    users = self._convert_users(page)
-                    for user in users:
-                        self.user_cache.add_user(user)
-                    all_users.extend(users)
-                    page_count += 1
-
+            for page_count, users in enumerate(self.iter_follower_pages(user_id, limit), 1):
+                all_users.extend(users)
+                if page_count >= max_pages:
+                    break
             return all_users
         except MastodonError:
             return []
@@ -982,22 +1003,10 @@ class MastodonAccount(PlatformAccount):
         """
         try:
             all_users = []
-            page = self.api.account_following(id=user_id, limit=limit)
-            users = self._convert_users(page)
-            for user in users:
-                self.user_cache.add_user(user)
-            all_users.extend(users)
-
-            page_count = 1
-            while page and page_count < max_pages:
-                page = self.api.fetch_next(page)
-                if page:
-                    users = self._convert_users(page)
-                    for user in users:
-                        self.user_cache.add_user(user)
-                    all_users.extend(users)
-                    page_count += 1
-
+            for page_count, users in enumerate(self.iter_following_pages(user_id, limit), 1):
+                all_users.extend(users)
+                if page_count >= max_pages:
+                    break
             return all_users
         except MastodonError:
             return []
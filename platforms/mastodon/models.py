@@ -1,9 +1,8 @@
 """Conversion functions from Mastodon objects to universal models."""
 
+from dataclasses import fields
 from datetime import datetime
 from typing import Optional, List, Any
-import html
-import re
 
 from models import (
     UniversalStatus,
@@ -11,10 +10,9 @@ from models import (
     UniversalNotification,
     UniversalMedia,
     UniversalMention,
+    shared_user,
 )
-
-# HTML tag pattern for stripping
-_html_tag_re = re.compile(r'<[^>]+>')
+from text_utils import html_to_text
 
 
 def parse_datetime(value):
@@ -43,79 +41,226 @@ def parse_datetime(value):
 
 def strip_html(text: str) -> str:
     """Strip HTML tags and decode entities, preserving spacing for block elements."""
-    # Add spaces for block elements and line breaks to prevent text concatenation
-    # Note: Don't add spaces for inline elements like <span> - Mastodon uses spans
-    # within URLs (e.g., <span class="invisible">https://</span>) and adding spaces
-    # would break the URL (causing "https:// example.com" instead of "https://example.com")
-    text = re.sub(r'</(p|div)>', ' ', text, flags=re.IGNORECASE)
-    text = re.sub(r'<br\s*/?>', ' ', text, flags=re.IGNORECASE)
-    text = _html_tag_re.sub('', text)
-    text = html.unescape(text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+    return html_to_text(text)
+
+
+class AttribDict(dict):
+    """A dict with attribute access, for raw JSON from the streaming API.
+
+    Stands in for Mastodon.py's AttribAccessDict where code reads fields as
+    attributes (model __getattr__ fallbacks, card, poll, conversations).
+    Nested objects are wrapped the first time they're read rather than all
+    up front.
+    """
+
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        try:
+            value = self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+        wrapped = attrib_dict(value)
+        if wrapped is not value:
+            self[name] = wrapped
+        return wrapped
+
+
+def attrib_dict(value):
+    """Wrap plain JSON dicts (and lists of them) in AttribDict; anything else is returned as is."""
+    if type(value) is dict:
+        return AttribDict(value)
+    if type(value) is list and value and type(value[0]) is dict:
+        return [attrib_dict(v) for v in value]
+    return value
+
+
+def _field_names(cls):
+    return frozenset(f.name for f in fields(cls))
+
+
+_STATUS_FIELDS = _field_names(UniversalStatus)
+_USER_FIELDS = _field_names(UniversalUser)
+_NOTIFICATION_FIELDS = _field_names(UniversalNotification)
+_MEDIA_FIELDS = _field_names(UniversalMedia)
+_MENTION_FIELDS = _field_names(UniversalMention)
+
+
+def compact_platform_data(data, shadowed):
+    """The part of an API object a universal model keeps as _platform_data.
+
+    Keys named like a model field can't be reached through the model's
+    __getattr__ fallback (the field wins), and neither can keys starting
+    with an underscore, so they're dropped. For a status that removes the
+    converted account, reblog, quote, media, mentions, card and poll, which
+    would otherwise be kept twice. Returns None if nothing is left.
+    """
+    kept = AttribDict({key: value for key, value in data.items() if key not in shadowed and key[:1] != '_'})
+    return kept or None
+
+
+def _get(obj, name, default=None):
+    """Read a field from a dict or an attribute-style object."""
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def _status_text(status, content):
+    """Plain text for a status.
+
+    Tries, in order: Misskey/Iceshrimp _misskey_content (original plaintext/MFM),
+    ActivityPub source.content when it's plain text, Mastodon's text field (only
+    present on deleted statuses for redraft), and finally the stripped HTML.
+    """
+    misskey_content = _get(status, '_misskey_content')
+    if misskey_content and isinstance(misskey_content, str) and misskey_content.strip():
+        return misskey_content
+
+    source = _get(status, 'source')
+    if source:
+        source_content = _get(source, 'content')
+        # Only plaintext (markdown/bbcode would need conversion) with actual content
+        if source_content and isinstance(source_content, str) and source_content.strip() and _get(source, 'mediaType', '') in ('text/plain', ''):
+            return source_content
+
+    mastodon_text = _get(status, 'text')
+    if mastodon_text and isinstance(mastodon_text, str) and mastodon_text.strip():
+        return mastodon_text
+
+    return strip_html(content)
+
+
+def mastodon_user_from_json(user, platform_data=None) -> UniversalUser:
+    """Build a UniversalUser straight from an account dict (JSON or Mastodon.py)."""
+    get = user.get
+    return shared_user(UniversalUser(
+        id=str(get('id', '')),
+        acct=get('acct', ''),
+        username=get('username', ''),
+        display_name=get('display_name', '') or get('acct', ''),
+        note=get('note', ''),
+        avatar=get('avatar'),
+        header=get('header'),
+        followers_count=get('followers_count', 0),
+        following_count=get('following_count', 0),
+        statuses_count=get('statuses_count', 0),
+        created_at=parse_datetime(get('created_at')),
+        url=get('url'),
+        bot=get('bot', False),
+        locked=get('locked', False),
+        _platform_data=platform_data or compact_platform_data(user, _USER_FIELDS),
+        _platform='mastodon',
+    ))
+
+
+def mastodon_status_from_json(status, platform_data=None) -> UniversalStatus:
+    """Build a UniversalStatus straight from a status dict (JSON or Mastodon.py).
+
+    Nested accounts, reblogs, quotes, media and mentions are converted the same
+    way; only the objects kept as-is (card, poll, _platform_data) are wrapped
+    for attribute access.
+    """
+    get = status.get
+    content = get('content', '')
+
+    reblog = get('reblog')
+    quote = get('quote')
+    if quote:
+        # Mastodon 4.0+: a Quote object with quoted_status; older: the status itself
+        quote = _get(quote, 'quoted_status') or quote
+    in_reply_to_id = get('in_reply_to_id')
+    in_reply_to_account_id = get('in_reply_to_account_id')
+
+    return UniversalStatus(
+        id=str(get('id', '')),
+        account=mastodon_user_to_universal(get('account')),
+        content=content,
+        text=_status_text(status, content),
+        created_at=parse_datetime(get('created_at')) or datetime.now(),
+        favourites_count=get('favourites_count', 0),
+        boosts_count=get('reblogs_count', 0),
+        replies_count=get('replies_count', 0),
+        in_reply_to_id=str(in_reply_to_id) if in_reply_to_id else None,
+        in_reply_to_account_id=str(in_reply_to_account_id) if in_reply_to_account_id else None,
+        reblog=mastodon_status_to_universal(reblog) if reblog else None,
+        quote=mastodon_status_to_universal(quote) if quote else None,
+        media_attachments=[mastodon_media_to_universal(m) for m in get('media_attachments') or ()],
+        mentions=[mastodon_mention_to_universal(m) for m in get('mentions') or ()],
+        url=get('url'),
+        visibility=get('visibility'),
+        spoiler_text=get('spoiler_text'),
+        card=attrib_dict(get('card')),
+        poll=attrib_dict(get('poll')),
+        pinned=get('pinned', False) or False,
+        quote_approval=attrib_dict(get('quote_approval')),
+        _platform_data=platform_data or compact_platform_data(status, _STATUS_FIELDS),
+        _platform='mastodon',
+    )
+
+
+def mastodon_notification_from_json(notification) -> UniversalNotification:
+    """Build a UniversalNotification straight from a notification dict (JSON or Mastodon.py)."""
+    get = notification.get
+    status = get('status')
+    return UniversalNotification(
+        id=str(get('id', '')),
+        type=get('type', 'unknown'),
+        account=mastodon_user_to_universal(get('account')),
+        created_at=parse_datetime(get('created_at')) or datetime.now(),
+        status=mastodon_status_to_universal(status) if status else None,
+        _platform_data=compact_platform_data(notification, _NOTIFICATION_FIELDS),
+        _platform='mastodon',
+    )
 
 
 def mastodon_user_to_universal(user, platform_data=None) -> Optional[UniversalUser]:
     """Convert a Mastodon user/account to UniversalUser."""
     if user is None:
         return None
-
-    # Handle both dict and object formats
-    def get_attr(obj, name, default=None):
-        if isinstance(obj, dict):
-            return obj.get(name, default)
-        return getattr(obj, name, default)
-
-    return UniversalUser(
-        id=str(get_attr(user, 'id', '')),
-        acct=get_attr(user, 'acct', ''),
-        username=get_attr(user, 'username', ''),
-        display_name=get_attr(user, 'display_name', '') or get_attr(user, 'acct', ''),
-        note=get_attr(user, 'note', ''),
-        avatar=get_attr(user, 'avatar', None),
-        header=get_attr(user, 'header', None),
-        followers_count=get_attr(user, 'followers_count', 0),
-        following_count=get_attr(user, 'following_count', 0),
-        statuses_count=get_attr(user, 'statuses_count', 0),
-        created_at=parse_datetime(get_attr(user, 'created_at')),
-        url=get_attr(user, 'url', None),
-        bot=get_attr(user, 'bot', False),
-        locked=get_attr(user, 'locked', False),
+    if isinstance(user, dict):
+        return mastodon_user_from_json(user, platform_data)
+
+    return shared_user(UniversalUser(
+        id=str(_get(user, 'id', '')),
+        acct=_get(user, 'acct', ''),
+        username=_get(user, 'username', ''),
+        display_name=_get(user, 'display_name', '') or _get(user, 'acct', ''),
+        note=_get(user, 'note', ''),
+        avatar=_get(user, 'avatar', None),
+        header=_get(user, 'header', None),
+        followers_count=_get(user, 'followers_count', 0),
+        following_count=_get(user, 'following_count', 0),
+        statuses_count=_get(user, 'statuses_count', 0),
+        created_at=parse_datetime(_get(user, 'created_at')),
+        url=_get(user, 'url', None),
+        bot=_get(user, 'bot', False),
+        locked=_get(user, 'locked', False),
         _platform_data=platform_data or user,
         _platform='mastodon',
-    )
+    ))
 
 
 def mastodon_media_to_universal(media) -> UniversalMedia:
     """Convert a Mastodon media attachment to UniversalMedia."""
-    def get_attr(obj, name, default=None):
-        if isinstance(obj, dict):
-            return obj.get(name, default)
-        return getattr(obj, name, default)
-
     return UniversalMedia(
-        id=str(get_attr(media, 'id', '')),
-        type=get_attr(media, 'type', 'unknown'),
-        url=get_attr(media, 'url', ''),
-        preview_url=get_attr(media, 'preview_url', None),
-        description=get_attr(media, 'description', None),
-        _platform_data=media,
+        id=str(_get(media, 'id', '')),
+        type=_get(media, 'type', 'unknown'),
+        url=_get(media, 'url', ''),
+        preview_url=_get(media, 'preview_url', None),
+        description=_get(media, 'description', None),
+        _platform_data=compact_platform_data(media, _MEDIA_FIELDS) if isinstance(media, dict) else media,
     )
 
 
 def mastodon_mention_to_universal(mention) -> UniversalMention:
     """Convert a Mastodon mention to UniversalMention."""
-    def get_attr(obj, name, default=None):
-        if isinstance(obj, dict):
-            return obj.get(name, default)
-        return getattr(obj, name, default)
-
     return UniversalMention(
-        id=str(get_attr(mention, 'id', '')),
-        acct=get_attr(mention, 'acct', ''),
-        username=get_attr(mention, 'username', ''),
-        url=get_attr(mention, 'url', None),
-        _platform_data=mention,
+        id=str(_get(mention, 'id', '')),
+        acct=_get(mention, 'acct', ''),
+        username=_get(mention, 'username', ''),
+        url=_get(mention, 'url', None),
+        _platform_data=compact_platform_data(mention, _MENTION_FIELDS) if isinstance(mention, dict) else mention,
     )
 
 
@@ -123,101 +268,43 @@ def mastodon_status_to_universal(status, platform_data=None) -> Optional[Univers
     """Convert a Mastodon status to UniversalStatus."""
     if status is None:
         return None
+    if isinstance(status, dict):
+        return mastodon_status_from_json(status, platform_data)
 
-    def get_attr(obj, name, default=None):
-        if isinstance(obj, dict):
-            return obj.get(name, default)
-        return getattr(obj, name, default)
-
-    content = get_attr(status, 'content', '')
-
-    # Try to get plaintext from various sources before falling back to HTML stripping
-    # 1. Misskey/Iceshrimp: _misskey_content contains original plaintext/MFM
-    # 2. ActivityPub standard: source.content with source.mediaType
-    # 3. Mastodon: text field (only present on deleted statuses for redraft)
-    # 4. Fallback: strip HTML from content
-    text = None
-
-    # Check for Misskey plaintext
-    misskey_content = get_attr(status, '_misskey_content', None)
-    if misskey_content and isinstance(misskey_content, str) and misskey_content.strip():
-        text = misskey_content
-
-    # Check for ActivityPub source property
-    if not text:
-        source = get_attr(status, 'source', None)
-        if source:
-            source_content = get_attr(source, 'content', None)
-            source_mediatype = get_attr(source, 'mediaType', '')
-            # Only use if it's plaintext (not markdown/bbcode which would need conversion)
-            # and has actual content (not just whitespace)
-            if source_content and isinstance(source_content, str) and source_content.strip() and source_mediatype in ('text/plain', ''):
-                text = source_content
-
-    # Check for Mastodon text field (deleted statuses)
-    if not text:
-        mastodon_text = get_attr(status, 'text', None)
-        if mastodon_text and isinstance(mastodon_text, str) and mastodon_text.strip():
-            text = mastodon_text
-
-    # Fallback: strip HTML from content
-    if not text:
-        text = strip_html(content)
-
-    # Convert account
-    account = mastodon_user_to_universal(get_attr(status, 'account', None))
-
-    # Convert reblog if present
-    reblog = None
-    reblog_data = get_attr(status, 'reblog', None)
-    if reblog_data:
-        reblog = mastodon_status_to_universal(reblog_data)
+    content = _get(status, 'content', '')
 
     # Convert quote if present (Mastodon 4.0+)
     # In Mastodon.py 2.x, quote is a Quote object with quoted_status field
     quote = None
-    quote_data = get_attr(status, 'quote', None)
+    quote_data = _get(status, 'quote', None)
     if quote_data:
-        # Check if it's a Quote object (has quoted_status) or direct status
-        quoted_status = get_attr(quote_data, 'quoted_status', None)
-        if quoted_status:
-            quote = mastodon_status_to_universal(quoted_status)
-        else:
-            # Fallback: maybe it's directly a status (older format)
-            quote = mastodon_status_to_universal(quote_data)
-
-    # Convert media attachments
-    media_attachments = []
-    for media in get_attr(status, 'media_attachments', []):
-        media_attachments.append(mastodon_media_to_universal(media))
-
-    # Convert mentions
-    mentions = []
-    for mention in get_attr(status, 'mentions', []):
-        mentions.append(mastodon_mention_to_universal(mention))
+        # Fallback to the object itself if it's directly a status (older format)
+        quote = mastodon_status_to_universal(_get(quote_data, 'quoted_status', None) or quote_data)
+
+    reblog_data = _get(status, 'reblog', None)
 
     return UniversalStatus(
-        id=str(get_attr(status, 'id', '')),
-        account=account,
+        id=str(_get(status, 'id', '')),
+        account=mastodon_user_to_universal(_get(status, 'account', None)),
         content=content,
-        text=text,
-        created_at=parse_datetime(get_attr(status, 'created_at')) or datetime.now(),
-        favourites_count=get_attr(status, 'favourites_count', 0),
-        boosts_count=get_attr(status, 'reblogs_count', 0),
-        replies_count=get_attr(status, 'replies_count', 0),
-        in_reply_to_id=str(get_attr(status, 'in_reply_to_id', '')) if get_attr(status, 'in_reply_to_id') else None,
-        in_reply_to_account_id=str(get_attr(status, 'in_reply_to_account_id', '')) if get_attr(status, 'in_reply_to_account_id') else None,
-        reblog=reblog,
+        text=_status_text(status, content),
+        created_at=parse_datetime(_get(status, 'created_at')) or datetime.now(),
+        favourites_count=_get(status, 'favourites_count', 0),
+        boosts_count=_get(status, 'reblogs_count', 0),
+        replies_count=_get(status, 'replies_count', 0),
+        in_reply_to_id=str(_get(status, 'in_reply_to_id', '')) if _get(status, 'in_reply_to_id') else None,
+        in_reply_to_account_id=str(_get(status, 'in_reply_to_account_id', '')) if _get(status, 'in_reply_to_account_id') else None,
+        reblog=mastodon_status_to_universal(reblog_data) if reblog_data else None,
         quote=quote,
-        media_attachments=media_attachments,
-        mentions=mentions,
-        url=get_attr(status, 'url', None),
-        visibility=get_attr(status, 'visibility', None),
-        spoiler_text=get_attr(status, 'spoiler_text', None),
-        card=get_attr(status, 'card', None),
-        poll=get_attr(status, 'poll', None),
-        pinned=get_attr(status, 'pinned', False) or False,
-        quote_approval=get_attr(status, 'quote_approval', None),
+        media_attachments=[mastodon_media_to_universal(m) for m in _get(status, 'media_attachments', []) or ()],
+        mentions=[mastodon_mention_to_universal(m) for m in _get(status, 'mentions', []) or ()],
+        url=_get(status, 'url', None),
+        visibility=_get(status, 'visibility', None),
+        spoiler_text=_get(status, 'spoiler_text', None),
+        card=_get(status, 'card', None),
+        poll=_get(status, 'poll', None),
+        pinned=_get(status, 'pinned', False) or False,
+        quote_approval=_get(status, 'quote_approval', None),
         _platform_data=platform_data or status,
         _platform='mastodon',
     )
@@ -227,25 +314,16 @@ def mastodon_notification_to_universal(notification) -> Optional[UniversalNotifi
     """Convert a Mastodon notification to UniversalNotification."""
     if notification is None:
         return None
+    if isinstance(notification, dict):
+        return mastodon_notification_from_json(notification)
 
-    def get_attr(obj, name, default=None):
-        if isinstance(obj, dict):
-            return obj.get(name, default)
-        return getattr(obj, name, default)
-
-    account = mastodon_user_to_universal(get_attr(notification, 'account', None))
-
-    status = None
-    status_data = get_attr(notification, 'status', None)
-    if status_data:
-        status = mastodon_status_to_universal(status_data)
-
+    status_data = _get(notification, 'status', None)
     return UniversalNotification(
-        id=str(get_attr(notification, 'id', '')),
-        type=get_attr(notification, 'type', 'unknown'),
-        account=account,
-        created_at=parse_datetime(get_attr(notification, 'created_at')) or datetime.now(),
-        status=status,
+        id=str(_get(notification, 'id', '')),
+        type=_get(notification, 'type', 'unknown'),
+        account=mastodon_user_to_universal(_get(notification, 'account', None)),
+        created_at=parse_datetime(_get(notification, 'created_at')) or datetime.now(),
+        status=mastodon_status_to_universal(status_data) if status_data else None,
         _platform_data=notification,
         _platform='mastodon',
     )
@@ -0,0 +1,151 @@
+"""Adaptive REST polling for timelines.
+
+timelineThread used to sleep update_time minutes and then load() every
+timeline of the account one after another, streaming or not. PollScheduler
+gives each timeline its own next-due time instead:
+
+- Busy timelines are polled every update_time. Quiet ones back off towards
+  MAX_BACKOFF times that, following an average of how often new items
+  turned up in past polls.
+- Timelines fed by a connected stream aren't polled. They get one catch-up
+  poll after the stream reconnects, to fill the gap while it was down.
+- Every due time gets +/- JITTER so timelines don't all fire together.
+- Polls run in their own threads. At most MAX_CONCURRENT run at once per
+  instance, counted across all accounts on that instance.
+
+The scheduler only needs a few things from a timeline: a hashable object
+and a covering_stream() method returning a stream_engine subscription (or
+None). The poll function does the actual loading and returns how many new
+items it found, or None if it failed.
+"""
+
+import random
+import threading
+import time
+
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+
+def host_slots(host, limit):
+	"""Semaphore limiting concurrent polls against one instance."""
+	with _host_slots_lock:
+		slots = _host_slots.get(host)
+		if slots is None:
+			slots = _host_slots[host] = threading.BoundedSemaphore(limit)
+		return slots
+
+
+class PollState(object):
+	"""Scheduling state for one timeline."""
+
+	__slots__ = ('next_due', 'last_poll', 'rate', 'interval', 'generation', 'running')
+
+	def __init__(self, now, interval):
+		self.next_due = now + interval
+		self.last_poll = now
+		self.rate = None  # new items per second, averaged over polls
+		self.interval = interval
+		self.generation = 0  # stream generation already caught up with
+		self.running = False
+
+
+class PollScheduler(object):
+	"""Decides when each timeline of an account is polled, and runs the polls."""
+
+	JITTER = 0.1
+	MAX_BACKOFF = 4
+	# How often to check timelines covered by a stream for a gap (no API call)
+	STREAM_CHECK = 30
+	RATE_WEIGHT = 0.3
+	MAX_CONCURRENT = 3
+
+	def __init__(self, host, base_interval, poll, clock=time.monotonic, rand=random.random):
+		"""base_interval() returns the user's refresh interval in seconds; poll(tl) loads one timeline."""
+		self.host = host
+		self.base_interval = base_interval
+		self.poll = poll
+		self.clock = clock
+		self.rand = rand
+		self._states = {}
+		self._lock = threading.Lock()
+
+	def _jitter(self, interval):
+		return interval * (1 + self.JITTER * (2 * self.rand() - 1))
+
+	def interval_for(self, rate):
+		"""Poll interval for an observed arrival rate (items per second)."""
+		base = self.base_interval()
+		if rate is None or rate * base >= 1:
+			return base
+		if rate <= 0:
+			return base * self.MAX_BACKOFF
+		return min(1 / rate, base * self.MAX_BACKOFF)
+
+	def due(self, timelines):
+		"""Timelines that should be polled now. Marks them running."""
+		now = self.clock()
+		due = []
+		with self._lock:
+			# Forget timelines that were closed
+			alive = set(map(id, timelines))
+			for tl in list(self._states):
+				if id(tl) not in alive:
+					del self._states[tl]
+			for tl in timelines:
+				state = self._states.get(tl)
+				if state is None:
+					# The timeline has just done its initial load
+					state = self._states[tl] = PollState(now, self._jitter(self.base_interval()))
+				if state.running or now < state.next_due:
+					continue
+				stream = tl.covering_stream()
+				if stream is not None and stream.active and stream.connected:
+					if stream.generation == state.generation:
+						state.next_due = now + self.STREAM_CHECK
+						continue
+					# Reconnected since we last caught up: one poll to fill the gap
+					state.generation = stream.generation
+					state.last_poll = None
+				state.running = True
+				due.append(tl)
+		return due
+
+	def record(self, tl, new_items):
+		"""Update a timeline's schedule after a poll."""
+		now = self.clock()
+		with self._lock:
+			state = self._states.get(tl)
+			if state is None:
+				return
+			state.running = False
+			# Catch-up polls after a stream gap say nothing about the arrival rate
+			if new_items is not None and state.last_poll is not None and now > state.last_poll:
+				observed = new_items / (now - state.last_poll)
+				state.rate = observed if state.rate is None else self.RATE_WEIGHT * observed + (1 - self.RATE_WEIGHT) * state.rate
+			state.last_poll = now
+			state.interval = self.interval_for(state.rate)
+			state.next_due = now + self._jitter(state.interval)
+
+	def _run(self, tl):
+		new_items = None
+		try:
+			with host_slots(self.host, self.MAX_CONCURRENT):
+				new_items = self.poll(tl)
+		finally:
+			self.record(tl, new_items)
+
+	def tick(self, timelines):
+		"""Start polls for every due timeline. Returns seconds until the next check."""
+		for tl in self.due(timelines):
+			threading.Thread(target=self._run, args=(tl,), daemon=True).start()
+		return self.sleep_time()
+
+	def sleep_time(self):
+		now = self.clock()
+		with self._lock:
+			next_due = min((s.next_due for s in self._states.values() if not s.running), default=now + self.STREAM_CHECK)
+		return max(1, min(next_due - now, self.STREAM_CHECK))
+
+	def state(self, tl):
+		return self._states.get(tl)
@@ -0,0 +1,277 @@
+"""Rate-limit governor for backend API calls.
+
+Every request to an instance goes through that instance's RateLimitGovernor.
+The governor tracks the budget the server reports in its rate-limit headers
+(X-RateLimit-* for Mastodon, ratelimit-* for Bluesky), one budget per access
+token, and holds requests back before the server has to refuse them:
+
+- INTERACTIVE requests (anything the user asked for) may use the whole budget,
+  and never wait: many run on the GUI thread, so when the budget is gone or
+  the instance is blocked they raise RateLimited ("retry in Ns") instead.
+- POLL requests (background refresh, housekeeping) leave POLL_RESERVE of it.
+- BULK requests (load all previous, multi-page follower scans) leave
+  BULK_RESERVE, and are paced evenly over the rest of the window once half
+  the budget is gone.
+
+A 429 on any token blocks the whole instance until its reset. Per-IP limits
+are shared by every account on the instance, so retrying with another
+account's token only makes the storm worse.
+
+The priority comes from the calling thread: wrap background work in
+`with rate_limit.priority(rate_limit.POLL):`. Mastodon clients get a
+GovernedSession. Bluesky clients get httpx event hooks through
+install_httpx().
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlsplit
+
+try:
+	from logging_config import get_logger
+	_logger = get_logger('rate_limit')
+except ImportError:
+	_logger = None
+
+INTERACTIVE, POLL, BULK = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", POLL: "poll", BULK: "bulk"}
+
+_local = threading.local()
+
+
+def current_priority():
+	return getattr(_local, 'priority', INTERACTIVE)
+
+
+@contextmanager
+def priority(level):
+	"""Run the requests made by this thread inside the block at the given priority."""
+	previous = current_priority()
+	# A background job never raises the priority of work it calls into
+	_local.priority = max(previous, level)
+	try:
+		yield
+	finally:
+		_local.priority = previous
+
+
+class RateLimited(Exception):
+	"""An INTERACTIVE request would have had to wait for the instance's rate limit."""
+
+	def __init__(self, host, retry_in):
+		super(RateLimited, self).__init__(f"Rate limited by {host}, retry in {int(math.ceil(retry_in))}s")
+		self.host = host
+		self.retry_in = retry_in
+
+
+class Budget(object):
+	"""Server-reported budget for one access token."""
+
+	__slots__ = ('limit', 'remaining', 'reset', 'last_request')
+
+	def __init__(self):
+		self.limit = None
+		self.remaining = None
+		self.reset = 0.0
+		self.last_request = 0.0
+
+
+def _parse_reset(value, now):
+	"""Reset header to epoch seconds: Mastodon sends an ISO date, Bluesky epoch seconds."""
+	try:
+		number = float(value)
+	except ValueError:
+		try:
+			return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+		except ValueError:
+			return None
+	# Some servers send seconds remaining rather than a timestamp
+	return number if number > 1e9 else now + number
+
+
+class RateLimitGovernor(object):
+	"""Paces requests to one instance according to its rate-limit headers."""
+
+	POLL_RESERVE = 0.1
+	BULK_RESERVE = 0.25
+	# Wait this long after a 429 that didn't say when to retry
+	DEFAULT_BACKOFF = 60
+	# Never sleep longer than this in one go, so waiting threads recheck the budget
+	MAX_WAIT_STEP = 5
+
+	def __init__(self, host, clock=time.time, sleep=time.sleep):
+		self.host = host
+		self.clock = clock
+		self.sleep = sleep
+		self.blocked_until = 0.0
+		self.throttled = 0
+		self.waiting = {INTERACTIVE: 0, POLL: 0, BULK: 0}
+		self._budgets = {}
+		self._lock = threading.Lock()
+
+	def _budget(self, key):
+		budget = self._budgets.get(key)
+		if budget is None:
+			budget = self._budgets[key] = Budget()
+		return budget
+
+	def delay(self, key, level):
+		"""Seconds a request at this priority should wait before going out."""
+		now = self.clock()
+		with self._lock:
+			if now < self.blocked_until:
+				return self.blocked_until - now
+			budget = self._budgets.get(key)
+			if budget is None or budget.limit is None or budget.remaining is None:
+				return 0
+			if budget.reset <= now:
+				# Window over; the next response will tell us the new numbers
+				return 0
+			reserve = budget.limit * (self.BULK_RESERVE if level == BULK else self.POLL_RESERVE if level == POLL else 0)
+			spare = budget.remaining - reserve
+			if spare < 1:
+				return budget.reset - now
+			if level == BULK and budget.remaining < budget.limit / 2:
+				spacing = (budget.reset - now) / spare
+				return max(0, budget.last_request + spacing - now)
+			return 0
+
+	def acquire(self, key, level=None):
+		"""Block until a request may be sent, then count it against the budget.
+
+		INTERACTIVE requests don't block: they raise RateLimited.
+		"""
+		if level is None:
+			level = current_priority()
+		wait = self.delay(key, level)
+		if wait > 0 and level == INTERACTIVE:
+			raise RateLimited(self.host, wait)
+		if wait > 0:
+			with self._lock:
+				self.waiting[level] += 1
+			try:
+				while wait > 0:
+					self.sleep(min(wait, self.MAX_WAIT_STEP))
+					wait = self.delay(key, level)
+			finally:
+				with self._lock:
+					self.waiting[level] -= 1
+		with self._lock:
+			budget = self._budget(key)
+			budget.last_request = self.clock()
+			if budget.remaining:
+				budget.remaining -= 1
+
+	def update(self, key, status, headers):
+		"""Record the rate-limit headers of a response."""
+		now = self.clock()
+		lower = {k.lower(): v for k, v in headers.items() if 'ratelimit' in k.lower() or k.lower() == 'retry-after'}
+		limit = lower.get('x-ratelimit-limit', lower.get('ratelimit-limit'))
+		remaining = lower.get('x-ratelimit-remaining', lower.get('ratelimit-remaining'))
+		reset = lower.get('x-ratelimit-reset', lower.get('ratelimit-reset'))
+		with self._lock:
+			budget = self._budget(key)
+			try:
+				if limit is not None:
+					# Bluesky may send "3000;w=300"
+					budget.limit = int(str(limit).split(';')[0])
+				if remaining is not None:
+					budget.remaining = int(remaining)
+			except ValueError:
+				pass
+			if reset is not None:
+				reset_at = _parse_reset(str(reset), now)
+				if reset_at is not None:
+					budget.reset = reset_at
+			if status == 429:
+				self.throttled += 1
+				retry_after = lower.get('retry-after')
+				until = budget.reset if budget.reset > now else now + self.DEFAULT_BACKOFF
+				if retry_after is not None:
+					until = _parse_reset(str(retry_after), now) or until
+				self.blocked_until = max(self.blocked_until, until)
+				if _logger:
+					_logger.warning(f"Rate limited by {self.host}; holding requests for {self.blocked_until - now:.0f}s")
+
+	def stats(self):
+		"""Current budgets and queue, for diagnostics."""
+		now = self.clock()
+		with self._lock:
+			return {
+				'host': self.host,
+				'blocked_for': max(0.0, self.blocked_until - now),
+				'throttled': self.throttled,
+				'waiting': {PRIORITY_NAMES[k]: v for k, v in self.waiting.items()},
+				'budgets': [
+					{'limit': b.limit, 'remaining': b.remaining, 'reset_in': max(0.0, b.reset - now)}
+					for b in self._budgets.values()
+				],
+			}
+
+
+_governors = {}
+_governors_lock = threading.Lock()
+
+
+def get_governor(url_or_host):
+	"""The governor for an instance, shared by every account on it."""
+	host = urlsplit(url_or_host).hostname if '//' in url_or_host else url_or_host
+	host = (host or url_or_host).lower()
+	with _governors_lock:
+		governor = _governors.get(host)
+		if governor is None:
+			governor = _governors[host] = RateLimitGovernor(host)
+		return governor
+
+
+def stats():
+	"""stats() of every governor."""
+	with _governors_lock:
+		governors = list(_governors.values())
+	return [g.stats() for g in governors]
+
+
+try:
+	import requests
+
+	class GovernedSession(requests.Session):
+		"""requests session for Mastodon.py that goes through the instance's governor."""
+
+		def __init__(self, url):
+			super(GovernedSession, self).__init__()
+			self.governor = get_governor(url)
+
+		def request(self, method, url, *args, **kwargs):
+			key = (kwargs.get('headers') or {}).get('Authorization') or self.headers.get('Authorization')
+			self.governor.acquire(key)
+			response = super(GovernedSession, self).request(method, url, *args, **kwargs)
+			self.governor.update(key, response.status_code, response.headers)
+			return response
+except ImportError:
+	GovernedSession = None
+
+
+def install_httpx(client, url):
+	"""Route an atproto Client's httpx requests through the instance's governor."""
+	http = getattr(getattr(client, 'request', None), '_client', None)
+	if http is None or not hasattr(http, 'event_hooks'):
+		return False
+	governor = get_governor(url)
+
+	def key_for(request):
+		return request.headers.get('Authorization')
+
+	def before(request):
+		governor.acquire(key_for(request))
+
+	def after(response):
+		governor.update(key_for(response.request), response.status_code, response.headers)
+
+	hooks = http.event_hooks
+	hooks['request'] = list(hooks.get('request', [])) + [before]
+	hooks['response'] = list(hooks.get('response', [])) + [after]
+	http.event_hooks = hooks
+	return True
@@ -0,0 +1,279 @@
+"""Snapshot of an account's own followers and following.
+
+mutual_following(), not_following(), not_following_me() and havent_posted()
+used to fetch both lists from scratch on every call, a page at a time. For
+an account following tens of thousands of people that took minutes per menu
+action. RelationshipSnapshot keeps both lists in memory and in the
+account's timeline cache, so the set operations only touch memory:
+
+- The first use with nothing stored fetches both lists, the two in parallel.
+  During a full fetch the next page of each is requested while the last one
+  is still being converted. Mastodon and Bluesky page with opaque cursors,
+  so one list can't be split across several requests at once.
+- Later uses return the snapshot straight away. If it is older than
+  REFRESH_AGE, a BULK-priority refresh is started in the background.
+- A refresh reads from the top of each list (newest first) until it reaches
+  an account it already has, and keeps the rest of the old snapshot. If the
+  server's follower/following counts then disagree with the snapshot,
+  someone left from further down and the list is fetched again in full.
+
+Counts can include suspended or deleted accounts the list never returns.
+The difference seen after a full fetch is stored as `missing` and allowed
+for in later checks.
+"""
+
+import datetime
+import queue
+import threading
+import time
+
+import rate_limit
+
+try:
+	from logging_config import get_logger
+	_logger = get_logger('relationships')
+except ImportError:
+	_logger = None
+
+FOLLOWERS = 'followers'
+FOLLOWING = 'following'
+KINDS = (FOLLOWERS, FOLLOWING)
+
+_DONE = object()
+
+
+def prefetch(pages):
+	"""Iterate pages while a helper thread is already fetching the next one."""
+	results = queue.Queue(maxsize=1)
+	stopped = threading.Event()
+	level = rate_limit.current_priority()
+
+	def produce():
+		try:
+			with rate_limit.priority(level):
+				for page in pages:
+					results.put((page, None))
+					if stopped.is_set():
+						return
+			results.put((_DONE, None))
+		except Exception as e:
+			results.put((_DONE, e))
+
+	threading.Thread(target=produce, daemon=True).start()
+	try:
+		while True:
+			page, error = results.get()
+			if error is not None:
+				raise error
+			if page is _DONE:
+				return
+			yield page
+	finally:
+		stopped.set()
+		# Unblock a producer waiting to hand over a page nobody wants
+		try:
+			results.get_nowait()
+		except queue.Empty:
+			pass
+
+
+def last_status_date(user):
+	"""A user's last_status_at as 'YYYY-MM-DD', or None."""
+	value = getattr(user, 'last_status_at', None)
+	if not value:
+		return None
+	if hasattr(value, 'isoformat'):
+		value = value.isoformat()
+	return str(value)[:10]
+
+
+class RelationshipSnapshot(object):
+	"""The followers and following of one account, kept up to date."""
+
+	REFRESH_AGE = 15 * 60
+
+	def __init__(self, pages, counts, store=None, max_pages=lambda: 1, clock=time.time):
+		"""
+		pages(kind) iterates pages (lists of users) of FOLLOWERS or FOLLOWING,
+		newest first. counts() returns the server's {kind: count}, or None if
+		it can't be fetched. store is a TimelineCache, or None. max_pages()
+		caps the pages fetched per list.
+		"""
+		self.pages = pages
+		self.counts = counts
+		self.store = store
+		self.max_pages = max_pages
+		self.clock = clock
+		self._entries = {}
+		self._updated = {}
+		self._missing = {}
+		self._loaded = False
+		self._refreshing = False
+		self._lock = threading.Lock()
+		self._refresh_lock = threading.Lock()
+
+	def load(self):
+		"""Read the stored snapshot, if there is one."""
+		with self._lock:
+			if self._loaded:
+				return
+			self._loaded = True
+			if self.store is None:
+				return
+			for kind in KINDS:
+				stored = self.store.load_relationships(kind)
+				if stored is not None:
+					self._entries[kind], self._updated[kind], self._missing[kind] = stored
+
+	def ensure(self):
+		"""Make sure there is a snapshot, fetching one if needed. Refreshes stale ones in the background."""
+		self.load()
+		if any(kind not in self._entries for kind in KINDS):
+			self.refresh()
+		elif self.stale():
+			self.refresh_async()
+
+	def stale(self):
+		now = self.clock()
+		return any(now - self._updated.get(kind, 0) > self.REFRESH_AGE for kind in KINDS)
+
+	def refresh(self, full=False):
+		"""Bring both lists up to date, fetching them in parallel."""
+		with self._refresh_lock:
+			counts = self.counts() or {}
+			level = rate_limit.current_priority()
+			errors = []
+
+			def run(kind):
+				try:
+					with rate_limit.priority(level):
+						self._refresh_kind(kind, counts.get(kind), full)
+				except Exception as e:
+					errors.append(e)
+
+			threads = [threading.Thread(target=run, args=(kind,), daemon=True) for kind in KINDS]
+			for thread in threads:
+				thread.start()
+			for thread in threads:
+				thread.join()
+			if errors:
+				raise errors[0]
+
+	def refresh_async(self):
+		"""Start a background refresh unless one is running."""
+		with self._lock:
+			if self._refreshing:
+				return
+			self._refreshing = True
+		threading.Thread(target=self._background_refresh, daemon=True).start()
+
+	def _background_refresh(self):
+		try:
+			with rate_limit.priority(rate_limit.BULK):
+				self.refresh()
+		except Exception as e:
+			if _logger:
+				_logger.warning(f"Relationship refresh failed: {e}")
+		finally:
+			with self._lock:
+				self._refreshing = False
+
+	def _fetch(self, kind, known):
+		"""Fetch a list from the top, stopping at the first page with a known account."""
+		entries = []
+		max_pages = self.max_pages()
+		pages = self.pages(kind)
+		if known is None:
+			# An incremental refresh usually stops after one page; don't fetch a second ahead of it
+			pages = prefetch(pages)
+		for count, page in enumerate(pages, 1):
+			entries.extend((user, last_status_date(user)) for user in page)
+			if known is not None and any(str(user.id) in known for user in page):
+				break
+			if count >= max_pages:
+				break
+		return entries
+
+	def _refresh_kind(self, kind, expected, full):
+		with self._lock:
+			current = self._entries.get(kind)
+			missing = self._missing.get(kind, 0)
+		known = None if full or current is None else {str(user.id) for user, _ in current}
+		fetched = self._fetch(kind, known)
+		if known is None:
+			entries = fetched
+			missing = expected - len(entries) if expected is not None else 0
+		else:
+			seen = {str(user.id) for user, _ in fetched}
+			entries = fetched + [entry for entry in current if str(entry[0].id) not in seen]
+			if expected is not None and expected - len(entries) != missing:
+				if _logger:
+					_logger.info(f"{kind} count changed below the newest page; fetching the full list")
+				return self._refresh_kind(kind, expected, True)
+		now = self.clock()
+		with self._lock:
+			self._entries[kind] = entries
+			self._updated[kind] = now
+			self._missing[kind] = missing
+		if self.store is not None:
+			self.store.save_relationships(kind, entries, now, missing)
+
+	def users(self, kind):
+		"""Users of a list, newest first."""
+		with self._lock:
+			return [user for user, _ in self._entries.get(kind, ())]
+
+	def ids(self, kind):
+		with self._lock:
+			return {str(user.id) for user, _ in self._entries.get(kind, ())}
+
+	def mutual(self):
+		"""Users I follow who follow me back."""
+		followers = self.ids(FOLLOWERS)
+		return [user for user in self.users(FOLLOWING) if str(user.id) in followers]
+
+	def not_following(self):
+		"""Users who follow me that I don't follow."""
+		following = self.ids(FOLLOWING)
+		return [user for user in self.users(FOLLOWERS) if str(user.id) not in following]
+
+	def not_following_me(self):
+		"""Users I follow who don't follow me."""
+		followers = self.ids(FOLLOWERS)
+		return [user for user in self.users(FOLLOWING) if str(user.id) not in followers]
+
+	def havent_posted(self, before_year=None):
+		"""Users I follow whose last post was before before_year (default: last year)."""
+		if before_year is None:
+			before_year = datetime.datetime.now().year - 1
+		with self._lock:
+			entries = list(self._entries.get(FOLLOWING, ()))
+		return [user for user, last_status_at in entries if last_status_at and int(last_status_at[:4]) < before_year]
+
+	def note_follow(self, user_id, user=None):
+		"""The account followed someone. Without their user object, pick them up on the next use."""
+		self.load()
+		user_id = str(user_id)
+		with self._lock:
+			current = self._entries.get(FOLLOWING)
+			if current is None:
+				return
+			if user is None:
+				self._updated[FOLLOWING] = 0
+				return
+			entry = (user, last_status_date(user))
+			self._entries[FOLLOWING] = [entry] + [e for e in current if str(e[0].id) != user_id]
+		if self.store is not None:
+			self.store.add_relationship(FOLLOWING, *entry)
+
+	def note_unfollow(self, user_id):
+		"""The account unfollowed someone."""
+		self.load()
+		user_id = str(user_id)
+		with self._lock:
+			current = self._entries.get(FOLLOWING)
+			if current is None:
+				return
+			self._entries[FOLLOWING] = [entry for entry in current if str(entry[0].id) != user_id]
+		if self.store is not None:
+			self.store.remove_relationship(FOLLOWING, user_id)
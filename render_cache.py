@@ -0,0 +1,194 @@
+"""Shared cache of rendered list text.
+
+Every timeline renders its items through Application.render_cache instead of
+stashing strings on the status objects. Entries are keyed by the item's
+(platform, id) and then by (kind, account), so the same boosted post shown in
+home, a list and a user buffer is rendered once per account.
+
+Any change to render settings (templates, 24-hour time, cw_mode, demojify,
+aliases) calls bump(), which moves to a new settings version and drops every
+entry. Changes to a single item (edits, resolved quotes) call invalidate().
+
+parse_date leaves the date off times from today, so an entry for an item
+created in the last day is tagged with the day it was rendered and re-rendered
+once the local date changes. Older entries never go stale.
+
+Prefetcher fills the cache on a background thread for the virtual list, which
+only renders rows as they are shown.
+"""
+
+import collections
+import datetime
+import threading
+import time
+
+# Items created within this many seconds might be shown as "today"
+_RECENT_SECONDS = 36 * 60 * 60
+
+
+class RenderCache(object):
+	"""Bounded LRU of rendered display strings shared across timelines."""
+
+	DEFAULT_MAX_ENTRIES = 20000
+
+	def __init__(self, max_entries=None):
+		self.max_entries = max_entries or self.DEFAULT_MAX_ENTRIES
+		self.version = 0
+		# (platform, id) -> {(kind, account id): (version, day or None, text)}, least recent first
+		self._entries = collections.OrderedDict()
+		self._lock = threading.Lock()
+		self._today = None
+		self._day_ends = 0
+		self.hits = 0
+		self.misses = 0
+
+	def today(self):
+		"""Ordinal of the current local date (recomputed at most once per day)."""
+		now = time.time()
+		if now >= self._day_ends:
+			today = datetime.date.today()
+			midnight = datetime.datetime.combine(today + datetime.timedelta(days=1), datetime.time())
+			self._today = today.toordinal()
+			self._day_ends = midnight.timestamp()
+		return self._today
+
+	def stamp(self):
+		"""Return (settings version, day). Display lists built under another stamp are stale."""
+		return (self.version, self.today())
+
+	def bump(self):
+		"""Render settings changed: start a new version and drop every entry."""
+		with self._lock:
+			self.version += 1
+			self._entries = collections.OrderedDict()
+
+	def invalidate(self, item):
+		"""Drop every rendering of one item (e.g. after an edit)."""
+		key = _item_key(item)
+		if key is None:
+			return
+		with self._lock:
+			self._entries.pop(key, None)
+
+	def get(self, item, kind, account):
+		key = _item_key(item)
+		if key is None:
+			return None
+		with self._lock:
+			bucket = self._entries.get(key)
+			entry = bucket.get((kind, _account_key(account))) if bucket else None
+			if entry is None or entry[0] != self.version or (entry[1] is not None and entry[1] != self.today()):
+				self.misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return entry[2]
+
+	def put(self, item, kind, account, text, version):
+		"""Store `text`, rendered under settings `version` (read before rendering)."""
+		key = _item_key(item)
+		if key is None:
+			return
+		day = self.today() if _is_recent(item) else None
+		with self._lock:
+			if version != self.version:
+				return  # Settings changed while rendering
+			bucket = self._entries.get(key)
+			if bucket is None:
+				bucket = self._entries[key] = {}
+			else:
+				self._entries.move_to_end(key)
+			bucket[(kind, _account_key(account))] = (version, day, text)
+			while len(self._entries) > self.max_entries:
+				self._entries.popitem(last=False)
+
+	def render(self, item, kind, account, render_func):
+		"""Return the cached text for `item`, calling render_func() on a miss."""
+		text = self.get(item, kind, account)
+		if text is None:
+			version = self.version
+			text = render_func()
+			self.put(item, kind, account, text, version)
+		return text
+
+	def __len__(self):
+		return len(self._entries)
+
+
+def nearest_first(count, center):
+	"""Indices 0..count-1, nearest to center first (center, center+1, center-1, ...)."""
+	if count <= 0:
+		return
+	center = max(0, min(center, count - 1))
+	yield center
+	for distance in range(1, count):
+		after, before = center + distance, center - distance
+		if after >= count and before < 0:
+			return
+		if after < count:
+			yield after
+		if before >= 0:
+			yield before
+
+
+class Prefetcher(object):
+	"""Renders items into the cache on a background thread, nearest to the reader first.
+
+	Starting a job cancels the previous one, so switching buffers doesn't
+	leave the old buffer's rows rendering.
+	"""
+
+	def __init__(self):
+		self._job = None
+		self._lock = threading.Lock()
+
+	def start(self, items, center, render):
+		"""Call render(item) for every item, starting at items[center] and working outwards."""
+		job = object()
+		with self._lock:
+			self._job = job
+		thread = threading.Thread(target=self._run, args=(job, list(items), center, render), daemon=True)
+		thread.start()
+		return thread
+
+	def cancel(self):
+		with self._lock:
+			self._job = None
+
+	def _run(self, job, items, center, render):
+		for index in nearest_first(len(items), center):
+			if self._job is not job:
+				return
+			try:
+				render(items[index])
+			except Exception:
+				# The row renders (and reports) when it's shown instead
+				continue
+		with self._lock:
+			if self._job is job:
+				self._job = None
+
+
+def _item_key(item):
+	item_id = getattr(item, 'id', None)
+	if item_id is None:
+		return None
+	return (getattr(item, '_platform', ''), str(item_id))
+
+
+def _account_key(account):
+	me = getattr(account, 'me', None)
+	return str(getattr(me, 'id', '')) if me is not None else ''
+
+
+def _is_recent(item):
+	"""True if the item's time could be rendered without a date (i.e. as today)."""
+	created_at = getattr(item, 'created_at', None)
+	if created_at is None:
+		last_status = getattr(item, 'last_status', None)  # Conversations
+		created_at = getattr(last_status, 'created_at', None)
+	if not isinstance(created_at, datetime.datetime):
+		return created_at is not None
+	if created_at.tzinfo is None:
+		created_at = created_at.replace(tzinfo=datetime.timezone.utc)
+	return time.time() - created_at.timestamp() < _RECENT_SECONDS
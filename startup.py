@@ -0,0 +1,218 @@
+"""Startup scheduling and profiling.
+
+During Application.load, timelines hand their initial load to the
+StartupScheduler instead of restoring their cache inline in the constructor.
+Once every account has been created the scheduler runs two phases:
+
+1. Restore every cached timeline of every account concurrently (disk only).
+2. Refresh timelines from the API, bounded per instance, with the active
+   timeline first.
+
+StartupProfiler records how long each step took and writes a report to
+startup_profile.txt in the config directory.
+"""
+
+import concurrent.futures
+import contextlib
+import os
+import threading
+import time
+
+try:
+	from logging_config import get_logger
+	_logger = get_logger('startup')
+except ImportError:
+	_logger = None
+
+
+class StartupProfiler(object):
+	"""Collects per-phase startup timings."""
+
+	def __init__(self):
+		self._t0 = time.perf_counter()
+		self._lock = threading.Lock()
+		self.entries = []  # (phase, label, start offset, duration)
+		self.first_paint = None
+
+	def now(self):
+		return time.perf_counter()
+
+	def record(self, phase, label, started, ended=None):
+		"""Record a step that began at `started` (a perf_counter value)."""
+		if ended is None:
+			ended = time.perf_counter()
+		with self._lock:
+			self.entries.append((phase, label, started - self._t0, ended - started))
+
+	@contextlib.contextmanager
+	def measure(self, phase, label=""):
+		started = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.record(phase, label, started)
+
+	def mark_first_paint(self, label=""):
+		"""Record the first time list2 is filled with items. Later calls are ignored."""
+		if self.first_paint is not None:
+			return False
+		with self._lock:
+			if self.first_paint is not None:
+				return False
+			self.first_paint = (label, time.perf_counter() - self._t0)
+		return True
+
+	def report(self):
+		"""Return the timing report as text."""
+		with self._lock:
+			entries = list(self.entries)
+			first_paint = self.first_paint
+		lines = ["FastSM startup profile", ""]
+		phases = []
+		for phase, _, _, _ in entries:
+			if phase not in phases:
+				phases.append(phase)
+		for phase in phases:
+			rows = [e for e in entries if e[0] == phase]
+			start = min(r[2] for r in rows)
+			end = max(r[2] + r[3] for r in rows)
+			total = sum(r[3] for r in rows)
+			lines.append(f"{phase}: {len(rows)} step(s), wall {end - start:.3f}s, summed {total:.3f}s")
+			for _, label, offset, duration in sorted(rows, key=lambda r: r[2]):
+				lines.append(f"  +{offset:7.3f}s  {duration:7.3f}s  {label}")
+			lines.append("")
+		if first_paint:
+			lines.append(f"first paint of list2: +{first_paint[1]:.3f}s ({first_paint[0]})")
+		else:
+			lines.append("first paint of list2: not recorded")
+		return "\n".join(lines) + "\n"
+
+	def write_report(self, path):
+		try:
+			with open(path, "w", encoding="utf-8") as f:
+				f.write(self.report())
+		except Exception as e:
+			if _logger:
+				_logger.warning(f"Could not write startup profile: {e}")
+
+
+class StartupScheduler(object):
+	"""Runs the initial load of every startup timeline in two phases."""
+
+	MAX_RESTORE_WORKERS = 8
+	MAX_REFRESHES_PER_INSTANCE = 3
+
+	def __init__(self, app):
+		self.app = app
+		self.profiler = StartupProfiler()
+		self._lock = threading.Lock()
+		self._pending = []
+		self._accepting = True
+		self.finished = False
+
+	def defer(self, tl):
+		"""Take over the initial load of a timeline created during startup.
+
+		Returns False once the scheduler has started, so timelines opened later
+		load the normal way.
+		"""
+		with self._lock:
+			if not self._accepting:
+				return False
+			self._pending.append(tl)
+			return True
+
+	def start(self):
+		"""Stop accepting timelines and run both phases in the background."""
+		with self._lock:
+			self._accepting = False
+			timelines = self._pending
+			self._pending = []
+		threading.Thread(target=self._run, args=(timelines,), daemon=True).start()
+
+	def _label(self, tl):
+		acct = getattr(getattr(tl.account, 'me', None), 'acct', '')
+		return f"{acct}: {tl.name}"
+
+	def _instance_key(self, account):
+		prefs = account.prefs
+		if getattr(prefs, 'platform_type', '') == 'bluesky':
+			return getattr(prefs, 'bluesky_service', '') or 'bluesky'
+		return getattr(prefs, 'instance_url', '') or 'mastodon'
+
+	def _priority(self, tl):
+		"""Sort key for refreshes: active timeline, then active account, then the rest."""
+		current = self.app.currentAccount
+		if current is tl.account:
+			active = current.currentTimeline
+			if active is None and current.timelines:
+				active = current.timelines[0]
+			if active is tl:
+				return 0
+			return 1
+		return 2
+
+	def _restore(self, tl):
+		"""Phase one: load a timeline from the cache. Returns True if restored."""
+		try:
+			if not tl._should_use_cache():
+				return False
+			with self.profiler.measure("cache restore", self._label(tl)):
+				return tl._load_from_cache()
+		except Exception as e:
+			if _logger:
+				_logger.error(f"Startup cache restore failed for {self._label(tl)}: {e}")
+			return False
+
+	def _refresh(self, tl, restored):
+		"""Phase two: fetch the first page from the API."""
+		try:
+			with self.profiler.measure("first API page", self._label(tl)):
+				if restored:
+					tl._refresh_after_cache()
+				else:
+					tl.load()
+		except Exception as e:
+			if _logger:
+				_logger.error(f"Startup refresh failed for {self._label(tl)}: {e}")
+
+	def _run(self, timelines):
+		started = self.profiler.now()
+		restored = {}
+		if timelines:
+			workers = min(self.MAX_RESTORE_WORKERS, len(timelines))
+			with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+				for tl, ok in zip(timelines, executor.map(self._restore, timelines)):
+					restored[id(tl)] = ok
+		self.profiler.record("phases", "phase one (cache restore)", started)
+
+		started = self.profiler.now()
+		ordered = sorted(timelines, key=self._priority)  # stable: keeps creation order within a tier
+		executors = {}
+		futures = []
+		for tl in ordered:
+			key = self._instance_key(tl.account)
+			if key not in executors:
+				executors[key] = concurrent.futures.ThreadPoolExecutor(max_workers=self.MAX_REFRESHES_PER_INSTANCE)
+			futures.append(executors[key].submit(self._refresh, tl, restored.get(id(tl), False)))
+		concurrent.futures.wait(futures)
+		for executor in executors.values():
+			executor.shutdown(wait=False)
+		self.profiler.record("phases", "phase two (API refresh)", started)
+
+		self.finished = True
+		self.write_report()
+
+	def write_report(self):
+		confpath = getattr(self.app, 'confpath', '')
+		if not confpath:
+			return
+		self.profiler.write_report(os.path.join(confpath, 'startup_profile.txt'))
+		if _logger:
+			_logger.info(self.profiler.report())
+
+	def mark_first_paint(self, label=""):
+		"""Called by the main window whenever list2 is filled."""
+		if self.profiler.mark_first_paint(label) and self.finished:
+			# Refreshes finished before anything was painted; rewrite with it.
+			self.write_report()
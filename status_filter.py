@@ -0,0 +1,127 @@
+"""Timeline filter settings compiled into a predicate.
+
+The Filter Timeline dialog stores a timeline's settings as a dict of post
+types to show (original, replies, replies_to_me, threads, boosts, quotes,
+media, no_media, my_posts, my_replies), each True unless unchecked, plus
+an optional text. should_show_status() used to define ten helper closures
+and work out every post type on every call. StatusFilter reads the
+settings and the account's own id once and then only checks the types
+that are hidden.
+
+Whether a reply is a thread (the author replying to themselves) or a reply
+to me depends on who wrote the parent post. Mastodon sends that as
+in_reply_to_account_id. When it's missing, a filter made by the timeline
+asks the timeline for the author of the parent if that post is loaded
+(timeline.parent_author_id). It never asks the server.
+"""
+
+# Settings that hide a post type when False
+POST_TYPES = ('original', 'replies', 'replies_to_me', 'threads', 'boosts', 'quotes', 'media', 'no_media', 'my_posts', 'my_replies')
+
+
+def _no_parent(status_id):
+	return None
+
+
+def _author_id(post):
+	author = getattr(post, 'account', None)
+	return str(getattr(author, 'id', '')) if author else None
+
+
+class StatusFilter(object):
+	"""Predicate for one timeline's filter settings: StatusFilter(settings, ...)(status) is True to show it."""
+
+	def __init__(self, settings, account=None, strip_html=None, parent_author=None):
+		"""
+		settings is the dialog's dict. account is the timeline's account
+		(for replies to me and my posts). strip_html(html) is used for posts
+		without plain text. parent_author(status_id) returns the author id of
+		a loaded post, or None.
+		"""
+		self.settings = dict(settings or {})
+		self.hidden = frozenset(name for name in POST_TYPES if not self.settings.get(name, True))
+		self.text = (self.settings.get('text') or '').strip().lower()
+		me = getattr(account, 'me', None) if account is not None else None
+		self.me_id = str(getattr(me, 'id', '') or '')
+		self.strip_html = strip_html
+		self.parent_author = parent_author or _no_parent
+		hidden = self.hidden
+		self._boosts = 'boosts' in hidden
+		self._quotes = 'quotes' in hidden
+		self._original = 'original' in hidden
+		self._media = 'media' in hidden
+		self._no_media = 'no_media' in hidden
+		self._my_posts = 'my_posts' in hidden and bool(self.me_id)
+		self._my_replies = 'my_replies' in hidden and bool(self.me_id)
+		self._threads = 'threads' in hidden
+		self._replies = 'replies' in hidden
+		self._replies_to_me = 'replies_to_me' in hidden and bool(self.me_id)
+		self._replies_checked = self._threads or self._replies or self._replies_to_me or self._my_replies
+		self.active = bool(hidden or self.text)
+
+	def matches(self, settings):
+		"""Whether this filter was compiled from these settings."""
+		return self.settings == settings
+
+	def _parent_author_id(self, post, reply_id):
+		parent = getattr(post, 'in_reply_to_account_id', None)
+		if parent is not None:
+			return str(parent)
+		return self.parent_author(str(reply_id))
+
+	def __call__(self, status):
+		if not self.active:
+			return True
+		reblog = getattr(status, 'reblog', None)
+		# Content checks look at the boosted post
+		post = reblog or status
+		if reblog is not None:
+			if self._boosts:
+				return False
+		elif self._original and getattr(post, 'in_reply_to_id', None) is None:
+			return False
+		if self._quotes and getattr(post, 'quote', None) is not None:
+			return False
+		if self._media or self._no_media:
+			attachments = getattr(post, 'media_attachments', None)
+			if attachments:
+				if self._media:
+					return False
+			elif self._no_media:
+				return False
+
+		author_id = None
+		if self._my_posts or self._replies_checked:
+			author_id = _author_id(post)
+		mine = author_id is not None and author_id == self.me_id and bool(self.me_id)
+		if self._my_posts and mine:
+			return False
+
+		if self._replies_checked:
+			reply_id = getattr(post, 'in_reply_to_id', None)
+			if reply_id is not None:
+				if self._my_replies and mine:
+					return False
+				parent_author = self._parent_author_id(post, reply_id)
+				thread = author_id is not None and parent_author is not None and parent_author == author_id
+				if thread and self._threads:
+					return False
+				if not thread and self._replies:
+					return False
+				if self._replies_to_me and parent_author is not None and parent_author == self.me_id:
+					return False
+
+		if self.text:
+			return self.text in self._searchable(post)
+		return True
+
+	def _searchable(self, post):
+		post_text = getattr(post, 'text', '')
+		if not post_text:
+			content = getattr(post, 'content', '')
+			if content and self.strip_html is not None:
+				post_text = self.strip_html(content)
+		author = getattr(post, 'account', None)
+		display_name = getattr(author, 'display_name', '') if author else ''
+		acct = getattr(author, 'acct', '') if author else ''
+		return f"{post_text or ''} {display_name} {acct}".lower()
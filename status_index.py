@@ -0,0 +1,313 @@
+"""Reverse index from status id to the objects holding that status.
+
+Liking or boosting a post has to update every copy of it the account has
+loaded: the post itself, boosts of it, quotes of it and notifications
+about it, in every timeline. Finding them used to mean walking every item
+of every timeline. StatusIndex keeps, per account, a map from status id to
+(timeline, item, target). item is the top-level entry in the timeline,
+whose rendering goes stale. target is the object whose fields change.
+
+Timelines keep the index current through StatusList. It is the list type
+behind timeline.statuses and timeline._unfiltered_statuses, and it reports
+every item added to or removed from it. An item that is in both lists of a
+filtered timeline is counted twice, so filtering never drops it from the
+index. StatusList also finds an item's position by id without a scan, and
+keeps the movement_units.NavigationIndex used to jump by author, thread or
+time.
+"""
+
+import bisect
+import threading
+
+from models import UniversalNotification
+from movement_units import NavigationIndex
+
+
+def _status_targets(status, depth=0):
+	"""(status id, object) pairs for a status and the statuses nested in it."""
+	if status is None or depth > 2:
+		return
+	status_id = getattr(status, 'id', None)
+	if status_id is not None:
+		yield str(status_id), status
+	# Mentions wrapped from notifications carry the id of the original post
+	original_id = getattr(status, '_original_status_id', None)
+	if original_id is not None and str(original_id) != str(status_id):
+		yield str(original_id), status
+	for name in ('reblog', 'quote'):
+		nested = getattr(status, name, None)
+		if nested is not None and not isinstance(nested, (str, bool)):
+			yield from _status_targets(nested, depth + 1)
+
+
+def item_targets(item):
+	"""(status id, object) pairs for a timeline item (status or notification)."""
+	if isinstance(item, UniversalNotification):
+		return list(_status_targets(item.status))
+	return list(_status_targets(item))
+
+
+class StatusIndex(object):
+	"""Status id -> every (timeline, item, target) holding that status, for one account."""
+
+	def __init__(self):
+		# (id(timeline), id(item)) -> [timeline, item, references, targets]
+		self._items = {}
+		# status id -> {(id(timeline), id(item), id(target)): (timeline, item, target)}
+		self._by_status = {}
+		self._lock = threading.Lock()
+
+	def add(self, timeline, item):
+		key = (id(timeline), id(item))
+		with self._lock:
+			entry = self._items.get(key)
+			if entry is not None:
+				entry[2] += 1
+				return
+			targets = item_targets(item)
+			self._items[key] = [timeline, item, 1, targets]
+			for status_id, target in targets:
+				self._by_status.setdefault(status_id, {})[key + (id(target),)] = (timeline, item, target)
+
+	def discard(self, timeline, item):
+		key = (id(timeline), id(item))
+		with self._lock:
+			entry = self._items.get(key)
+			if entry is None:
+				return
+			entry[2] -= 1
+			if entry[2] > 0:
+				return
+			del self._items[key]
+			for status_id, target in entry[3]:
+				holders = self._by_status.get(status_id)
+				if holders is not None:
+					holders.pop(key + (id(target),), None)
+					if not holders:
+						del self._by_status[status_id]
+
+	def holders(self, status_id):
+		"""Every (timeline, item, target) holding the status with this id."""
+		with self._lock:
+			return list(self._by_status.get(str(status_id), {}).values())
+
+	def __len__(self):
+		with self._lock:
+			return len(self._items)
+
+
+def _index_of(timeline):
+	return getattr(getattr(timeline, 'account', None), 'status_index', None)
+
+
+def _id_of(item):
+	return str(getattr(item, 'id', '')) or None
+
+
+class StatusList(list):
+	"""A timeline's item list that keeps the account's StatusIndex up to date.
+
+	It also maps item ids to positions, for position(). Every slot gets a
+	key from a contiguous range: inserting at the front takes the key below
+	the range, appending the key above it, and the keys of removed items are
+	kept in a sorted list. An item's position is its key minus the base of
+	the range minus the removed keys below it. Any other change (inserts in
+	the middle, slices, reverse, sort) marks the map dirty, and the next
+	lookup rebuilds it.
+	"""
+
+	__slots__ = ('owner', '_keys', '_base', '_removed_keys', '_dirty', '_duplicates', '_navigation')
+
+	# Rebuild instead of letting the removed keys pile up
+	MAX_REMOVED_KEYS = 256
+
+	def __init__(self, owner, items=()):
+		super(StatusList, self).__init__(items)
+		self.owner = owner
+		self._keys = {}
+		self._base = 0
+		self._removed_keys = []
+		self._dirty = True
+		self._duplicates = False
+		# Built on the first jump (navigation())
+		self._navigation = None
+		self._added(self)
+
+	def _added(self, items):
+		index = _index_of(self.owner)
+		if index is not None:
+			for item in items:
+				index.add(self.owner, item)
+
+	def _removed(self, items):
+		index = _index_of(self.owner)
+		if index is not None:
+			for item in items:
+				index.discard(self.owner, item)
+
+	def release(self):
+		"""Drop every item from the index and stop tracking (the list is being replaced)."""
+		self._removed(self)
+		self.owner = None
+
+	# ---- id -> position ----
+
+	def _rebuild(self):
+		keys = {}
+		duplicates = False
+		for position, item in enumerate(self):
+			item_id = _id_of(item)
+			if item_id is None:
+				continue
+			# Like a linear scan, an id found twice maps to its first position
+			if item_id in keys:
+				duplicates = True
+			else:
+				keys[item_id] = position
+		self._keys = keys
+		self._duplicates = duplicates
+		self._base = 0
+		self._removed_keys = []
+		self._dirty = False
+
+	def _position_of_key(self, key):
+		return key - self._base - bisect.bisect_left(self._removed_keys, key)
+
+	def position(self, item_id):
+		"""Position of the first item with this id, or None."""
+		if self._dirty:
+			self._rebuild()
+		key = self._keys.get(str(item_id))
+		if key is None:
+			return None
+		return self._position_of_key(key)
+
+	def navigation(self):
+		"""The list's NavigationIndex, kept up to date from now on."""
+		if self._navigation is None:
+			self._navigation = NavigationIndex(self)
+		return self._navigation
+
+	def _navigation_stale(self):
+		if self._navigation is not None:
+			self._navigation.stale = True
+
+	def _map_appended(self, item):
+		if self._dirty:
+			return
+		item_id = _id_of(item)
+		if item_id in self._keys:
+			self._duplicates = True
+		elif item_id is not None:
+			self._keys[item_id] = self._base + len(self) - 1 + len(self._removed_keys)
+
+	def _map_removal(self, position, item):
+		"""Record the removal of the item at position (before it is removed)."""
+		if self._dirty:
+			return
+		key = self._keys.get(_id_of(item))
+		if self._duplicates or key is None or self._position_of_key(key) != position or len(self._removed_keys) >= self.MAX_REMOVED_KEYS:
+			# The slot has no key of its own, or another item has the same id
+			self._dirty = True
+			return
+		del self._keys[_id_of(item)]
+		bisect.insort(self._removed_keys, key)
+
+	# ---- list methods ----
+
+	def append(self, item):
+		super(StatusList, self).append(item)
+		self._map_appended(item)
+		if self._navigation is not None:
+			self._navigation.inserted(len(self) - 1)
+		self._added((item,))
+
+	def insert(self, position, item):
+		length = len(self)
+		super(StatusList, self).insert(position, item)
+		if position >= length:
+			self._map_appended(item)
+		elif position == 0 or position <= -length:
+			if not self._dirty:
+				self._base -= 1
+				item_id = _id_of(item)
+				if item_id in self._keys:
+					self._duplicates = True
+				if item_id is not None:
+					self._keys[item_id] = self._base
+		else:
+			self._dirty = True
+		if self._navigation is not None:
+			self._navigation.inserted(min(max(position + length if position < 0 else position, 0), length))
+		self._added((item,))
+
+	def extend(self, items):
+		items = list(items)
+		for item in items:
+			super(StatusList, self).append(item)
+			self._map_appended(item)
+			if self._navigation is not None:
+				self._navigation.inserted(len(self) - 1)
+		self._added(items)
+
+	def __iadd__(self, items):
+		self.extend(items)
+		return self
+
+	def pop(self, position=-1):
+		if position < 0:
+			position += len(self)
+		if 0 <= position < len(self):
+			self._map_removal(position, self[position])
+			if self._navigation is not None:
+				self._navigation.removing(position)
+		item = super(StatusList, self).pop(position)
+		self._removed((item,))
+		return item
+
+	def remove(self, item):
+		# list.remove() compares with ==, which may match a different but equal object
+		self.pop(self.index(item))
+
+	def clear(self):
+		items = list(self)
+		super(StatusList, self).clear()
+		self._dirty = True
+		self._navigation_stale()
+		self._removed(items)
+
+	def reverse(self):
+		super(StatusList, self).reverse()
+		self._dirty = True
+		self._navigation_stale()
+
+	def sort(self, *args, **kwargs):
+		super(StatusList, self).sort(*args, **kwargs)
+		self._dirty = True
+		self._navigation_stale()
+
+	def __setitem__(self, key, value):
+		if isinstance(key, slice):
+			old = self[key]
+			value = list(value)
+			self._dirty = True
+			self._navigation_stale()
+		else:
+			old = [self[key]]
+			if _id_of(old[0]) != _id_of(value):
+				self._dirty = True
+		super(StatusList, self).__setitem__(key, value)
+		if self._navigation is not None and not isinstance(key, slice):
+			self._navigation.replaced(key + len(self) if key < 0 else key, old[0])
+		self._removed(old)
+		self._added(value if isinstance(key, slice) else (value,))
+
+	def __delitem__(self, key):
+		if isinstance(key, slice):
+			old = self[key]
+			super(StatusList, self).__delitem__(key)
+			self._dirty = True
+			self._navigation_stale()
+			self._removed(old)
+		else:
+			self.pop(key)
@@ -0,0 +1,68 @@
+"""Batching of stream events for delivery on the GUI thread."""
+
+import threading
+
+
+class StreamBatcher(object):
+	"""Coalesces stream events per account and hands them to the GUI thread in batches.
+
+	Events arriving within WINDOW seconds of the first one are delivered
+	together: each timeline gets a single load(items=[...]) per window, so a
+	bursty stream costs one list update and one sound per timeline instead of
+	one per event.
+	"""
+
+	WINDOW = 0.15
+
+	def __init__(self, schedule, window=None):
+		# schedule(delay, callback) calls callback on the GUI thread after delay seconds
+		self._schedule = schedule
+		self.window = window if window is not None else self.WINDOW
+		self._lock = threading.Lock()
+		self._pending = {}  # id(timeline) -> (timeline, [items in arrival order])
+		self._scheduled = False
+
+	def add(self, tl, item):
+		"""Queue an item for a timeline (callable from any thread)."""
+		with self._lock:
+			entry = self._pending.get(id(tl))
+			if entry is None:
+				self._pending[id(tl)] = (tl, [item])
+			else:
+				entry[1].append(item)
+			if self._scheduled:
+				return
+			self._scheduled = True
+		self._schedule(self.window, self.flush)
+
+	def discard(self, item_id):
+		"""Drop a queued item (deleted before it was delivered)."""
+		item_id = str(item_id)
+		with self._lock:
+			for tl, items in self._pending.values():
+				items[:] = [i for i in items if str(getattr(i, 'id', '')) != item_id]
+
+	def replace(self, item):
+		"""Swap a queued item for a newer version (edited before it was delivered)."""
+		item_id = str(getattr(item, 'id', ''))
+		with self._lock:
+			for tl, items in self._pending.values():
+				for n, i in enumerate(items):
+					if str(getattr(i, 'id', '')) == item_id:
+						items[n] = item
+
+	def flush(self):
+		"""Deliver everything queued. Runs on the GUI thread."""
+		with self._lock:
+			pending = self._pending
+			self._pending = {}
+			self._scheduled = False
+		for tl, items in pending.values():
+			if not items:
+				continue
+			# load() expects API order: newest first
+			items.reverse()
+			try:
+				tl.load(items=items)
+			except Exception as e:
+				tl.app.handle_error(e, "Stream update (main thread)")
@@ -0,0 +1,723 @@
+"""Shared asyncio engine for server-sent event (SSE) streams.
+
+Every Mastodon stream - the per-account user stream and the list, local,
+federated and hashtag timeline streams - runs as a task on one event loop in
+one background thread, instead of a blocking requests thread per stream. The
+thread count stays at one however many buffers are streaming.
+
+Streams to the same instance share a connection pool entry: one SSL context
+and a limit on simultaneous connection attempts, so a network blip doesn't
+turn into dozens of parallel TLS handshakes against one server. (HTTP/1.1
+SSE holds its connection open for the life of the stream, so each stream
+still has its own socket.) Like the requests streams before it, connections
+go through HTTP(S)_PROXY unless NO_PROXY says otherwise, and redirects keep
+the account token on its own host.
+
+All streams share one reconnect policy (ReconnectPolicy). Parsed events are
+passed to the subscriber's handler as (event_type, data), with data already
+decoded from JSON, on the engine thread.
+
+Mastodon also accepts a single websocket per token carrying any number of
+streams (user, list, hashtag, public...) selected with subscribe/unsubscribe
+messages. MultiplexedStream uses that, so an account needs one socket for all
+of its streams. If the instance refuses the websocket upgrade (400, 404 or
+426, or an answer that isn't an upgrade), every stream on it falls back to
+its own SSE connection. Other errors are retried like any stream's.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import ssl
+import struct
+import threading
+from urllib.parse import unquote, urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+import certifi
+
+try:
+	from logging_config import get_logger
+	_logger = get_logger('stream_engine')
+except ImportError:
+	_logger = None
+
+# Error messages that indicate a network problem rather than a server refusal
+TRANSIENT_ERRORS = (
+	"connection", "timeout", "reset", "refused", "unreachable",
+	"network", "socket", "eof", "broken pipe", "ssl"
+)
+
+
+def redirect_headers(url, location, headers):
+	"""Headers for following a redirect from url to location.
+
+	Like requests, the Authorization header (the account token) is only
+	sent on to the same scheme and host. A redirect from https to http is
+	refused rather than sending anything in the clear.
+	"""
+	old, new = urlsplit(url), urlsplit(location)
+	if old.scheme in ("https", "wss") and new.scheme not in ("https", "wss"):
+		raise StreamHTTPError(310, f"Refused redirect to {new.scheme}")
+	if (old.scheme, old.hostname, old.port) != (new.scheme, new.hostname, new.port):
+		return {k: v for k, v in headers.items() if k.lower() != "authorization"}
+	return headers
+
+
+def proxy_for(url):
+	"""The proxy URL from HTTP(S)_PROXY / NO_PROXY (or the system settings) for url, or None."""
+	parts = urlsplit(url)
+	tls = parts.scheme in ("https", "wss")
+	proxy = getproxies().get("https" if tls else "http")
+	if not proxy or proxy_bypass(parts.hostname or ""):
+		return None
+	# "host:port" is an http proxy, as requests reads it
+	return proxy if "://" in proxy else "http://" + proxy
+
+
+class StreamHTTPError(Exception):
+	"""The server answered the stream request with a non-2xx status."""
+
+	def __init__(self, status, reason=""):
+		super(StreamHTTPError, self).__init__(f"HTTP {status} {reason}".strip())
+		self.status = status
+
+
+class WebSocketRefused(StreamHTTPError):
+	"""The server answered, but won't upgrade the connection to a websocket."""
+
+
+# Statuses with which a server says it doesn't do websockets here
+WEBSOCKET_REFUSED = (400, 404, 426)
+
+
+class ReconnectPolicy(object):
+	"""Backoff shared by every stream.
+
+	Network errors retry quickly (TRANSIENT_DELAY, doubling while they keep
+	failing) and never give up. Server errors back off from BASE_DELAY and,
+	if give_up_after is set, stop the stream after that many in a row.
+	Both are capped at MAX_DELAY and reset once a connection succeeds.
+	A certificate that doesn't verify won't fix itself, so it stops the
+	stream at once.
+	"""
+
+	TRANSIENT_DELAY = 2
+	BASE_DELAY = 5
+	MAX_DELAY = 300
+
+	def __init__(self, give_up_after=None):
+		self.give_up_after = give_up_after
+		self.failures = 0
+
+	def reset(self):
+		self.failures = 0
+
+	@staticmethod
+	def is_fatal(error):
+		return isinstance(error, ssl.SSLCertVerificationError)
+
+	@staticmethod
+	def is_transient(error):
+		if ReconnectPolicy.is_fatal(error):
+			return False
+		if isinstance(error, (asyncio.TimeoutError, OSError, asyncio.IncompleteReadError)):
+			return True
+		if isinstance(error, StreamHTTPError):
+			return False
+		message = str(error).lower()
+		return any(err in message for err in TRANSIENT_ERRORS)
+
+	def failure(self, error):
+		"""Record a failed attempt. Returns the delay before retrying, or None to give up."""
+		self.failures += 1
+		if self.is_fatal(error):
+			return None
+		if self.is_transient(error):
+			return min(self.TRANSIENT_DELAY * (2 ** min(self.failures - 1, 16)), self.MAX_DELAY)
+		if self.give_up_after and self.failures >= self.give_up_after:
+			return None
+		return min(self.BASE_DELAY * (2 ** min(self.failures - 1, 16)), self.MAX_DELAY)
+
+
+class SSEParser(object):
+	"""Incremental parser for a text/event-stream body."""
+
+	def __init__(self):
+		self._buffer = b""
+		self._event_type = None
+		self._data_lines = []
+
+	def feed(self, chunk):
+		"""Feed raw bytes; returns a list of complete (event_type, data) events."""
+		events = []
+		self._buffer += chunk
+		*lines, self._buffer = self._buffer.split(b"\n")
+		for raw in lines:
+			line = raw.rstrip(b"\r").decode("utf-8", "replace")
+			if line:
+				if line.startswith("event:"):
+					self._event_type = line[6:].strip()
+				elif line.startswith("data:"):
+					self._data_lines.append(line[5:].strip())
+				# ":" heartbeats and other fields are ignored
+				continue
+			# Empty line = end of event
+			if self._event_type and self._data_lines:
+				try:
+					events.append((self._event_type, json.loads("\n".join(self._data_lines))))
+				except ValueError:
+					pass  # Ignore malformed JSON
+			self._event_type = None
+			self._data_lines = []
+		return events
+
+
+class StreamSubscription(object):
+	"""Handle for one stream running on the engine."""
+
+	def __init__(self, request, on_event, name="", give_up_after=None, on_give_up=None):
+		self.request = request
+		self.on_event = on_event
+		self.name = name
+		self.give_up_after = give_up_after
+		self.on_give_up = on_give_up
+		self._future = None
+		self.cancelled = False
+		self._connected = False
+		self._generation = 0
+
+	@property
+	def active(self):
+		return self._future is not None and not self._future.done()
+
+	@property
+	def connected(self):
+		return self._connected
+
+	@property
+	def generation(self):
+		"""Number of connections made so far; a change means events may have been missed in between."""
+		return self._generation
+
+	def cancel(self):
+		"""Stop the stream (callable from any thread)."""
+		self.cancelled = True
+		if self._future is not None:
+			self._future.cancel()
+
+	def dispatch(self, event_type, data):
+		try:
+			self.on_event(event_type, data)
+		except Exception as e:
+			if _logger:
+				_logger.error(f"Stream handler error ({self.name}): {e}")
+
+
+class MuxSubscription(StreamSubscription):
+	"""Handle for one stream carried on a MultiplexedStream."""
+
+	def __init__(self, mux, params, on_event, fallback_request=None, name="", give_up_after=None, on_give_up=None):
+		super(MuxSubscription, self).__init__(fallback_request, on_event, name, give_up_after, on_give_up)
+		self.mux = mux
+		self.params = params
+		self.key = stream_key(params)
+		self._fallback = None
+
+	@property
+	def active(self):
+		if self.cancelled:
+			return False
+		if self._fallback is not None:
+			return self._fallback.active
+		return self.mux.active
+
+	@property
+	def connected(self):
+		if self._fallback is not None:
+			return self._fallback.connected
+		return self.mux.connected
+
+	@property
+	def generation(self):
+		if self._fallback is not None:
+			return self._fallback.generation
+		return self.mux.generation
+
+	def cancel(self):
+		self.cancelled = True
+		if self._fallback is not None:
+			self._fallback.cancel()
+		else:
+			self.mux._remove(self)
+
+	def _start_fallback(self, engine):
+		if self.cancelled or self._fallback is not None:
+			return
+		if self.request is None:
+			if _logger:
+				_logger.warning(f"No SSE fallback for stream {self.name}")
+			return
+		self._fallback = engine.subscribe(self.request, self.on_event, self.name, self.give_up_after, self.on_give_up)
+
+
+def stream_key(stream):
+	"""Routing key for a stream, from subscribe params or a message's "stream" list."""
+	if isinstance(stream, dict):
+		stream = [stream["stream"]] + [v for k, v in stream.items() if k not in ("stream", "type")]
+	return tuple(str(part).lower() for part in stream)
+
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+WS_TEXT, WS_BINARY, WS_CLOSE, WS_PING, WS_PONG = 0x1, 0x2, 0x8, 0x9, 0xA
+
+
+def ws_frame(opcode, payload):
+	"""Encode one masked client frame."""
+	length = len(payload)
+	if length < 126:
+		header = struct.pack("!BB", 0x80 | opcode, 0x80 | length)
+	elif length < 65536:
+		header = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, length)
+	else:
+		header = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, length)
+	mask = os.urandom(4)
+	masked = bytes(b ^ mask[i & 3] for i, b in enumerate(payload))
+	return header + mask + masked
+
+
+def ws_accept_key(key):
+	return base64.b64encode(hashlib.sha1((key + WS_GUID).encode("ascii")).digest()).decode("ascii")
+
+
+class MultiplexedStream(object):
+	"""Every stream of one account over a single Mastodon websocket.
+
+	subscribe() adds a stream ({"stream": "list", "list": "42"} etc.) and
+	returns a MuxSubscription. The socket is opened with the first
+	subscription and closed with the last; reconnects resubscribe everything.
+	If the server won't upgrade to a websocket, each subscription switches to
+	its own SSE stream using the fallback_request it was given.
+	"""
+
+	PING_INTERVAL = 60
+
+	def __init__(self, engine, request, name=""):
+		self.engine = engine
+		self.request = request
+		self.name = name
+		self.fallback = False
+		self.connected = False
+		self.generation = 0
+		self._lock = threading.Lock()
+		self._subs = {}  # stream_key -> [MuxSubscription]
+		self._future = None
+		self._writer = None
+
+	@property
+	def active(self):
+		return self._future is not None and not self._future.done()
+
+	def subscribe(self, params, on_event, fallback_request=None, name="", give_up_after=None, on_give_up=None):
+		"""Start a stream on this connection (callable from any thread)."""
+		sub = MuxSubscription(self, params, on_event, fallback_request, name, give_up_after, on_give_up)
+		with self._lock:
+			if self.fallback:
+				sub._start_fallback(self.engine)
+				return sub
+			subs = self._subs.setdefault(sub.key, [])
+			subs.append(sub)
+			if not self.active:
+				self._future = asyncio.run_coroutine_threadsafe(self._run(), self.engine._ensure_loop())
+			elif len(subs) == 1:
+				self._post(dict(params, type="subscribe"))
+		return sub
+
+	def _remove(self, sub):
+		with self._lock:
+			subs = self._subs.get(sub.key)
+			if not subs or sub not in subs:
+				return
+			subs.remove(sub)
+			if subs:
+				return
+			del self._subs[sub.key]
+			if self._subs:
+				self._post(dict(sub.params, type="unsubscribe"))
+			elif self._future is not None:
+				self._future.cancel()
+				self._future = None
+
+	def _post(self, message):
+		# Not connected yet: the (re)connect subscribes to everything anyway
+		if self.connected:
+			self.engine._loop.call_soon_threadsafe(self._send, message)
+
+	def _send(self, message):
+		if self._writer is not None:
+			self._writer.write(ws_frame(WS_TEXT, json.dumps(message).encode("utf-8")))
+
+	def _fall_back(self, error):
+		if _logger:
+			_logger.info(f"Websocket streaming unavailable for {self.name} ({error}), using SSE")
+		with self._lock:
+			self.fallback = True
+			subs = [sub for key_subs in self._subs.values() for sub in key_subs]
+			self._subs = {}
+			self._future = None
+		for sub in subs:
+			sub._start_fallback(self.engine)
+
+	def _give_up(self, error):
+		if _logger:
+			_logger.warning(f"Giving up on streaming for {self.name}: {error}")
+		with self._lock:
+			subs = [sub for key_subs in self._subs.values() for sub in key_subs]
+			self._subs = {}
+			self._future = None
+		for sub in subs:
+			if sub.on_give_up:
+				sub.on_give_up()
+
+	async def _run(self):
+		policy = ReconnectPolicy()
+		while True:
+			request = self.request()
+			if request is None:
+				await asyncio.sleep(StreamEngine.NOT_READY_DELAY)
+				continue
+			url, headers = request
+			try:
+				await self._session(url, headers, policy)
+				delay = ReconnectPolicy.TRANSIENT_DELAY
+			except asyncio.CancelledError:
+				raise
+			except WebSocketRefused as e:
+				self._fall_back(e)
+				return
+			except Exception as e:
+				# Including other HTTP errors (401, 429, 502 while the instance restarts...)
+				delay = policy.failure(e)
+				if delay is None:
+					self._give_up(e)
+					return
+			finally:
+				self.connected = False
+				self._writer = None
+			await asyncio.sleep(delay)
+
+	async def _session(self, url, headers, policy):
+		key = base64.b64encode(os.urandom(16)).decode("ascii")
+		headers = dict(headers, Upgrade="websocket", Connection="Upgrade")
+		headers["Sec-WebSocket-Key"] = key
+		headers["Sec-WebSocket-Version"] = "13"
+		reader, writer, status, reason, response_headers = await self.engine._open(url, headers)
+		try:
+			if status in WEBSOCKET_REFUSED or 200 <= status < 300:
+				raise WebSocketRefused(status, reason)
+			if status != 101:
+				raise StreamHTTPError(status, reason)
+			if response_headers.get("sec-websocket-accept") != ws_accept_key(key):
+				raise WebSocketRefused(status, "Bad Sec-WebSocket-Accept")
+			policy.reset()
+			with self._lock:
+				self._writer = writer
+				self.connected = True
+				self.generation += 1
+				for subs in self._subs.values():
+					self._send(dict(subs[0].params, type="subscribe"))
+			await self._read_messages(reader, writer)
+		finally:
+			writer.close()
+
+	async def _read_messages(self, reader, writer):
+		message = []
+		awaiting_pong = False
+		while True:
+			try:
+				# Only the frame header read is interrupted, so no partial frame is lost
+				head = await asyncio.wait_for(reader.readexactly(2), self.PING_INTERVAL)
+			except asyncio.TimeoutError:
+				if awaiting_pong:
+					raise
+				awaiting_pong = True
+				writer.write(ws_frame(WS_PING, b""))
+				continue
+			awaiting_pong = False
+			fin, opcode = head[0] & 0x80, head[0] & 0x0F
+			length = head[1] & 0x7F
+			if length == 126:
+				length = struct.unpack("!H", await asyncio.wait_for(reader.readexactly(2), StreamEngine.READ_TIMEOUT))[0]
+			elif length == 127:
+				length = struct.unpack("!Q", await asyncio.wait_for(reader.readexactly(8), StreamEngine.READ_TIMEOUT))[0]
+			mask = await asyncio.wait_for(reader.readexactly(4), StreamEngine.READ_TIMEOUT) if head[1] & 0x80 else None
+			payload = await asyncio.wait_for(reader.readexactly(length), StreamEngine.READ_TIMEOUT)
+			if mask:
+				payload = bytes(b ^ mask[i & 3] for i, b in enumerate(payload))
+
+			if opcode == WS_PING:
+				writer.write(ws_frame(WS_PONG, payload))
+			elif opcode == WS_CLOSE:
+				writer.write(ws_frame(WS_CLOSE, payload[:2]))
+				return
+			elif opcode in (WS_TEXT, WS_BINARY, 0x0):
+				message.append(payload)
+				if fin:
+					self._dispatch(b"".join(message))
+					message = []
+
+	def _dispatch(self, raw):
+		try:
+			message = json.loads(raw)
+		except ValueError:
+			return
+		event_type = message.get("event")
+		if not event_type or not message.get("stream"):
+			if _logger and message.get("error"):
+				_logger.warning(f"Stream error ({self.name}): {message.get('error')}")
+			return
+		data = message.get("payload")
+		# Payloads are JSON strings, except delete which is the bare id
+		if event_type != "delete" and isinstance(data, str):
+			try:
+				data = json.loads(data)
+			except ValueError:
+				return
+		with self._lock:
+			subs = list(self._subs.get(stream_key(message["stream"]), ()))
+		for sub in subs:
+			sub.dispatch(event_type, data)
+
+
+class _HostPool(object):
+	"""Per-instance connection settings shared by every stream to that host."""
+
+	MAX_CONCURRENT_CONNECTS = 2
+
+	def __init__(self, ssl_context):
+		self.ssl_context = ssl_context
+		self.connect_slots = asyncio.Semaphore(self.MAX_CONCURRENT_CONNECTS)
+
+
+class StreamEngine(object):
+	"""Runs every SSE stream on a single asyncio loop thread."""
+
+	READ_TIMEOUT = 300
+	CONNECT_TIMEOUT = 30
+	MAX_REDIRECTS = 5
+	# Wait this long when the stream has nothing to connect to yet (e.g. not logged in)
+	NOT_READY_DELAY = 5
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._loop = None
+		self._thread = None
+		self._ssl_context = None
+		self._hosts = {}
+
+	def _ensure_loop(self):
+		with self._lock:
+			if self._loop is None:
+				self._loop = asyncio.new_event_loop()
+				self._thread = threading.Thread(target=self._loop.run_forever, name="stream-engine", daemon=True)
+				self._thread.start()
+			return self._loop
+
+	def subscribe(self, request, on_event, name="", give_up_after=None, on_give_up=None):
+		"""Start a stream.
+
+		request() returns (url, headers) for the next connection attempt, or
+		None if the stream can't connect yet. on_event(event_type, data) is
+		called on the engine thread for every event. If give_up_after server
+		errors happen in a row, or the server's certificate doesn't verify,
+		the stream stops and on_give_up() is called.
+		"""
+		sub = StreamSubscription(request, on_event, name, give_up_after, on_give_up)
+		loop = self._ensure_loop()
+		sub._future = asyncio.run_coroutine_threadsafe(self._run(sub), loop)
+		return sub
+
+	def multiplex(self, request, name=""):
+		"""Create a MultiplexedStream; request() returns (url, headers) for the websocket."""
+		return MultiplexedStream(self, request, name)
+
+	def _pool(self, host):
+		pool = self._hosts.get(host)
+		if pool is None:
+			if self._ssl_context is None:
+				# The CA bundle requests uses; frozen builds may have no system one
+				self._ssl_context = ssl.create_default_context(cafile=certifi.where())
+			pool = self._hosts[host] = _HostPool(self._ssl_context)
+		return pool
+
+	async def _run(self, sub):
+		policy = ReconnectPolicy(sub.give_up_after)
+		while not sub.cancelled:
+			request = sub.request()
+			if request is None:
+				await asyncio.sleep(self.NOT_READY_DELAY)
+				continue
+			url, headers = request
+			try:
+				await self._stream(url, headers, sub, policy)
+				# Server closed the stream cleanly; reconnect shortly
+				delay = ReconnectPolicy.TRANSIENT_DELAY
+			except asyncio.CancelledError:
+				raise
+			except Exception as e:
+				delay = policy.failure(e)
+				if delay is None:
+					if _logger:
+						_logger.warning(f"Giving up on stream {sub.name}: {e}")
+					if sub.on_give_up:
+						sub.on_give_up()
+					return
+			finally:
+				sub._connected = False
+			await asyncio.sleep(delay)
+
+	async def _open(self, url, headers):
+		"""Send a GET, following redirects. Returns (reader, writer, status, reason, response_headers)."""
+		for _ in range(self.MAX_REDIRECTS + 1):
+			parts = urlsplit(url)
+			tls = parts.scheme in ("https", "wss")
+			host = parts.hostname
+			port = parts.port or (443 if tls else 80)
+			proxy = proxy_for(url)
+			pool = self._pool(host)
+			async with pool.connect_slots:
+				reader, writer = await asyncio.wait_for(self._connect(host, port, tls, pool, proxy), self.CONNECT_TIMEOUT)
+			try:
+				path = parts.path or "/"
+				if parts.query:
+					path += "?" + parts.query
+				request_headers = dict(headers)
+				if proxy and not tls:
+					# Plain http through a proxy names the whole URL
+					path = f"{'ws' if parts.scheme == 'ws' else 'http'}://{parts.netloc}{path}"
+					request_headers.update(self._proxy_auth(proxy))
+				lines = [f"GET {path} HTTP/1.1", f"Host: {parts.netloc}", "Accept-Encoding: identity", "Cache-Control: no-cache"]
+				lines.extend(f"{k}: {v}" for k, v in request_headers.items())
+				writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("utf-8"))
+				await writer.drain()
+
+				status, reason, response_headers = await self._read_head(reader)
+			except BaseException:
+				writer.close()
+				raise
+			if status in (301, 302, 303, 307, 308) and "location" in response_headers:
+				writer.close()
+				location = urljoin(url, response_headers["location"])
+				headers = redirect_headers(url, location, headers)
+				url = location
+				continue
+			return reader, writer, status, reason, response_headers
+		raise StreamHTTPError(310, "Too many redirects")
+
+	@staticmethod
+	def _proxy_auth(proxy):
+		parts = urlsplit(proxy)
+		if parts.username is None:
+			return {}
+		credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+		return {"Proxy-Authorization": "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")}
+
+	async def _connect(self, host, port, tls, pool, proxy):
+		"""Open (reader, writer) to host:port, through proxy if given (https through a CONNECT tunnel)."""
+		ssl_context = pool.ssl_context if tls else None
+		if proxy is None:
+			return await asyncio.open_connection(host, port, ssl=ssl_context, server_hostname=host if tls else None)
+		parts = urlsplit(proxy)
+		proxy_tls = parts.scheme == "https"
+		reader, writer = await asyncio.open_connection(parts.hostname, parts.port or (443 if proxy_tls else 8080),
+			ssl=pool.ssl_context if proxy_tls else None, server_hostname=parts.hostname if proxy_tls else None)
+		if not tls:
+			return reader, writer
+		try:
+			lines = [f"CONNECT {host}:{port} HTTP/1.1", f"Host: {host}:{port}"]
+			lines.extend(f"{k}: {v}" for k, v in self._proxy_auth(proxy).items())
+			writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("utf-8"))
+			await writer.drain()
+			status, reason, _ = await self._read_head(reader)
+			if not 200 <= status < 300:
+				raise StreamHTTPError(status, f"Proxy: {reason}")
+			# TLS to the instance inside the tunnel
+			if hasattr(writer, "start_tls"):  # Python 3.11+
+				await writer.start_tls(ssl_context, server_hostname=host)
+				return reader, writer
+			loop = asyncio.get_running_loop()
+			protocol = writer.transport.get_protocol()
+			transport = await loop.start_tls(writer.transport, protocol, ssl_context, server_hostname=host)
+		except BaseException:
+			writer.close()
+			raise
+		return reader, asyncio.StreamWriter(transport, protocol, reader, loop)
+
+	async def _stream(self, url, headers, sub, policy):
+		reader, writer, status, reason, response_headers = await self._open(url, headers)
+		try:
+			if not 200 <= status < 300:
+				raise StreamHTTPError(status, reason)
+
+			policy.reset()
+			sub._connected = True
+			sub._generation += 1
+			parser = SSEParser()
+			chunked = "chunked" in response_headers.get("transfer-encoding", "").lower()
+			async for block in (self._read_chunked(reader) if chunked else self._read_raw(reader)):
+				if sub.cancelled:
+					return
+				for event_type, data in parser.feed(block):
+					sub.dispatch(event_type, data)
+		finally:
+			writer.close()
+
+	async def _read_head(self, reader):
+		status_line = await asyncio.wait_for(reader.readline(), self.READ_TIMEOUT)
+		if not status_line:
+			raise ConnectionError("Connection closed before response")
+		parts = status_line.decode("latin-1").strip().split(" ", 2)
+		status = int(parts[1])
+		reason = parts[2] if len(parts) > 2 else ""
+		response_headers = {}
+		while True:
+			line = await asyncio.wait_for(reader.readline(), self.READ_TIMEOUT)
+			line = line.decode("latin-1").strip()
+			if not line:
+				break
+			name, _, value = line.partition(":")
+			response_headers[name.strip().lower()] = value.strip()
+		return status, reason, response_headers
+
+	async def _read_chunked(self, reader):
+		while True:
+			size_line = await asyncio.wait_for(reader.readline(), self.READ_TIMEOUT)
+			if not size_line:
+				return
+			size = int(size_line.split(b";")[0].strip() or b"0", 16)
+			if size == 0:
+				return
+			data = await asyncio.wait_for(reader.readexactly(size + 2), self.READ_TIMEOUT)
+			yield data[:-2]
+
+	async def _read_raw(self, reader):
+		while True:
+			data = await asyncio.wait_for(reader.read(65536), self.READ_TIMEOUT)
+			if not data:
+				return
+			yield data
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+	"""Return the process-wide StreamEngine."""
+	global _engine
+	with _engine_lock:
+		if _engine is None:
+			_engine = StreamEngine()
+		return _engine
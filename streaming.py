@@ -1,11 +1,34 @@
 # -*- coding: utf-8 -*-
 from mastodon import StreamListener
 from GUI import main
+import threading
 import time
 import speak
 import sys
 import wx
 from platforms.mastodon.models import mastodon_status_to_universal, mastodon_notification_to_universal
+from stream_batcher import StreamBatcher
+
+
+def _flush_later(delay, flush):
+	"""Call flush on the GUI thread after delay seconds."""
+	timer = threading.Timer(delay, wx.CallAfter, args=(flush,))
+	timer.daemon = True
+	timer.start()
+
+
+_batcher_lock = threading.Lock()
+
+
+def get_batcher(account):
+	"""Return the account's StreamBatcher, creating it on first use."""
+	batcher = getattr(account, 'stream_batcher', None)
+	if batcher is None:
+		with _batcher_lock:
+			batcher = getattr(account, 'stream_batcher', None)
+			if batcher is None:
+				batcher = account.stream_batcher = StreamBatcher(_flush_later)
+	return batcher
 
 class MastodonStreamListener(StreamListener):
 	"""Handles Mastodon streaming events"""
@@ -31,33 +54,20 @@ class MastodonStreamListener(StreamListener):
 			if not status:
 				return
 
-			# Use wx.CallAfter for all timeline modifications (thread safety)
-			def do_update():
-				try:
-					# Add to home timeline
-					home_tl = self.account.get_timeline_by_type("home")
-					if home_tl:
-						home_tl.load(items=[status])
-
-					# Note: Mentions are handled by on_notification to avoid duplicates
-
-					# Check if it's from us (add to Sent)
-					if str(status.account.id) == str(self.account.me.id):
-						for tl in self.account.timelines:
-							if tl.type == "user" and tl.name == "Sent":
-								tl.load(items=[status])
-								break
-
-					# Check user timelines
-					for tl in self.account.timelines:
-						if tl.type == "list" and str(status.account.id) in [str(m) for m in tl.members]:
-							tl.load(items=[status])
-						if tl.type == "user" and tl.user and str(status.account.id) == str(tl.user.id):
-							tl.load(items=[status])
-				except Exception as e:
-					if not self._is_network_error(e):
-						self.account.app.handle_error(e, "Stream update (main thread)")
-			wx.CallAfter(do_update)
+			# Route to timelines here; the batcher delivers on the GUI thread
+			batcher = get_batcher(self.account)
+			account_id = str(status.account.id)
+			for tl in list(self.account.timelines):
+				if tl.type == "home":
+					batcher.add(tl, status)
+				# Note: Mentions are handled by on_notification to avoid duplicates
+				elif tl.type == "user" and tl.name == "Sent" and account_id == str(self.account.me.id):
+					# From us: add to Sent
+					batcher.add(tl, status)
+				elif tl.type == "list" and account_id in tl.members:
+					batcher.add(tl, status)
+				elif tl.type == "user" and tl.user and account_id == str(tl.user.id):
+					batcher.add(tl, status)
 		except Exception as e:
 			if not self._is_network_error(e):
 				self.account.app.handle_error(e, "Stream update")
@@ -83,26 +93,20 @@ class MastodonStreamListener(StreamListener):
 					mention_status.id = str(notification.id)
 					mention_status._notification_id = str(notification.id)
 
-			# Use wx.CallAfter for all timeline modifications (thread safety)
-			def do_notification():
-				try:
-					# Add to notifications timeline (mentions only if setting enabled)
-					if uni_notif:
-						for tl in self.account.timelines:
-							if tl.type == "notifications":
-								tl.load(items=[uni_notif])
-								break
-
-					# Add mentions to mentions timeline as STATUS (not notification)
-					if mention_status:
-						for tl in self.account.timelines:
-							if tl.type == "mentions":
-								tl.load(items=[mention_status])
-								break
-				except Exception as e:
-					if not self._is_network_error(e):
-						self.account.app.handle_error(e, "Stream notification (main thread)")
-			wx.CallAfter(do_notification)
+			batcher = get_batcher(self.account)
+			# Add to notifications timeline (mentions only if setting enabled)
+			if uni_notif:
+				for tl in list(self.account.timelines):
+					if tl.type == "notifications":
+						batcher.add(tl, uni_notif)
+						break
+
+			# Add mentions to mentions timeline as STATUS (not notification)
+			if mention_status:
+				for tl in list(self.account.timelines):
+					if tl.type == "mentions":
+						batcher.add(tl, mention_status)
+						break
 		except Exception as e:
 			if not self._is_network_error(e):
 				self.account.app.handle_error(e, "Stream notification")
@@ -110,17 +114,10 @@ class MastodonStreamListener(StreamListener):
 	def on_conversation(self, conversation):
 		"""Called when a direct message conversation is updated"""
 		try:
-			# Use wx.CallAfter for all timeline modifications (thread safety)
-			def do_conversation():
-				try:
-					for tl in self.account.timelines:
-						if tl.type == "conversations":
-							tl.load(items=[conversation])
-							break
-				except Exception as e:
-					if not self._is_network_error(e):
-						self.account.app.handle_error(e, "Stream conversation (main thread)")
-			wx.CallAfter(do_conversation)
+			for tl in list(self.account.timelines):
+				if tl.type == "conversations":
+					get_batcher(self.account).add(tl, conversation)
+					break
 		except Exception as e:
 			if not self._is_network_error(e):
 				self.account.app.handle_error(e, "Stream conversation")
@@ -129,27 +126,15 @@ class MastodonStreamListener(StreamListener):
 		"""Called when a status is deleted"""
 		try:
 			status_id_str = str(status_id)
+			# Don't deliver it later if it's still waiting in the batch
+			get_batcher(self.account).discard(status_id_str)
 			# Use wx.CallAfter for all timeline modifications (thread safety)
 			def do_delete():
 				try:
-					needs_refresh = False
 					for tl in self.account.timelines:
-						for i, status in enumerate(tl.statuses):
-							if hasattr(status, 'id') and str(status.id) == status_id_str:
-								# Adjust index if deleted item was at or before current position
-								if i < tl.index:
-									tl.index = max(0, tl.index - 1)
-								elif i == tl.index and tl.index >= len(tl.statuses) - 1:
-									# Deleted item was at current position and at end of list
-									tl.index = max(0, len(tl.statuses) - 2)
-								tl.statuses.pop(i)
-								tl._status_ids.discard(status_id_str)
-								tl.invalidate_display_cache()
-								if tl == self.account.currentTimeline and self.account == self.account.app.currentAccount:
-									needs_refresh = True
-								break
-					if needs_refresh:
-						main.window.refreshList()
+						position = tl.remove_status(status_id_str)
+						if position is not None and tl == self.account.currentTimeline and self.account == self.account.app.currentAccount:
+							main.window.removeListItem(position)
 					self.account.app.refresh_fusion_view_soon()
 				except Exception as e:
 					if not self._is_network_error(e):
@@ -166,19 +151,16 @@ class MastodonStreamListener(StreamListener):
 			uni_status = mastodon_status_to_universal(status)
 			if not uni_status:
 				return
+			get_batcher(self.account).replace(uni_status)
 
 			# Use wx.CallAfter for all timeline modifications (thread safety)
 			def do_status_update():
 				try:
 					needs_refresh = False
 					for tl in self.account.timelines:
-						for i, s in enumerate(tl.statuses):
-							if hasattr(s, 'id') and str(s.id) == str(uni_status.id):
-								tl.statuses[i] = uni_status
-								tl.invalidate_display_cache()
-								if tl == self.account.currentTimeline and self.account == self.account.app.currentAccount:
-									needs_refresh = True
-								break
+						position = tl.replace_status(uni_status)
+						if position is not None and tl == self.account.currentTimeline and self.account == self.account.app.currentAccount:
+							needs_refresh = True
 					if needs_refresh:
 						main.window.refreshList()
 					self.account.app.refresh_fusion_view_soon()
@@ -0,0 +1,162 @@
+"""Compiled display templates.
+
+Templates such as postTemplate are strings with $placeholder$ fields
+("$account.display_name$ (@$account.acct$): $text$ $created_at$"). Rendering
+used to re-parse the template for every status. TemplateEngine parses each
+template once into a list of literal strings and accessor functions, and
+rendering is a single join over that list.
+
+Compiled templates are cached per (template, demojify pref), so a
+pref change can never render with stale flags; invalidate() drops the cache
+when the options dialog saves.
+"""
+
+import re
+import threading
+
+_placeholder_re = re.compile(r'\$([A-Za-z_][A-Za-z0-9_.]*)\$')
+
+# Attributes that get alias and demojify handling
+NAME_ATTRS = ('name', 'display_name')
+
+
+class CompiledTemplate(object):
+	"""A template split into literal strings and accessor functions."""
+
+	__slots__ = ('source', 'segments', 'uses_text')
+
+	def __init__(self, source, segments, uses_text):
+		self.source = source
+		self.segments = segments
+		self.uses_text = uses_text
+
+	def render(self, s, account=None, text=""):
+		"""Render for status/user `s`. `text` fills $text$."""
+		return "".join([seg if seg.__class__ is str else seg(s, account, text) for seg in self.segments])
+
+
+class TemplateEngine(object):
+	"""Compiles and caches templates for an Application."""
+
+	MAX_TEMPLATES = 64
+
+	def __init__(self, app):
+		self.app = app
+		self._compiled = {}
+		self._lock = threading.Lock()
+
+	def invalidate(self):
+		"""Forget every compiled template (call after template prefs change)."""
+		with self._lock:
+			self._compiled = {}
+
+	def get(self, template):
+		"""Return the CompiledTemplate for `template` under the current prefs."""
+		prefs = self.app.prefs
+		key = (template, bool(getattr(prefs, 'demojify', False)))
+		compiled = self._compiled.get(key)
+		if compiled is None:
+			compiled = self.compile(template, key[1])
+			with self._lock:
+				if len(self._compiled) >= self.MAX_TEMPLATES:
+					self._compiled = {}
+				self._compiled[key] = compiled
+		return compiled
+
+	def compile(self, template, demojify=False):
+		segments = []
+		uses_text = False
+		pos = 0
+		for match in _placeholder_re.finditer(template):
+			if match.start() > pos:
+				segments.append(template[pos:match.start()])
+			field = match.group(1)
+			if field == 'text':
+				uses_text = True
+				segments.append(_text)
+			elif '.' in field:
+				segments.append(self._path_accessor(match.group(0), field.split('.'), demojify))
+			else:
+				segments.append(self._attr_accessor(match.group(0), field, demojify))
+			pos = match.end()
+		if pos < len(template):
+			segments.append(template[pos:])
+		# Merge adjacent literals so render() joins as few parts as possible
+		merged = []
+		for seg in segments:
+			if seg.__class__ is str and merged and merged[-1].__class__ is str:
+				merged[-1] += seg
+			else:
+				merged.append(seg)
+		return CompiledTemplate(template, merged, uses_text)
+
+	def _path_accessor(self, raw, path, demojify):
+		"""Accessor for a dotted field like $reblog.account.display_name$."""
+		app = self.app
+		last = path[-1]
+		is_name = last in NAME_ATTRS
+		is_note = last == 'note'
+
+		def accessor(s, account, text):
+			try:
+				obj = s
+				parent = None
+				for attr in path:
+					if obj is None:
+						break
+					parent = obj
+					obj = getattr(obj, attr, None)
+				if obj is None:
+					return ""
+				if is_name:
+					if account is not None and parent is not None:
+						user_id = str(getattr(parent, 'id', ''))
+						if user_id and user_id in account.prefs.aliases:
+							return str(account.prefs.aliases[user_id])
+					if demojify:
+						demojied = app.demojify(str(obj))
+						if demojied == "":
+							return str(getattr(parent, 'acct', obj))
+						return demojied
+				elif is_note:
+					return app.strip_html(str(obj))
+				return str(obj)
+			except Exception:
+				return raw  # Leave placeholder if we can't resolve it
+		return accessor
+
+	def _attr_accessor(self, raw, attr, demojify):
+		"""Accessor for a top-level field like $acct$ or $created_at$."""
+		app = self.app
+		is_name = attr in NAME_ATTRS
+		# "name" is always demojified; display_name only with the demojify pref
+		demojify_attr = attr == 'name' or (attr == 'display_name' and demojify)
+
+		def accessor(s, account, text):
+			if not hasattr(s, attr):
+				return raw
+			try:
+				if is_name and account is not None:
+					user_id = str(getattr(s, 'id', ''))
+					if user_id and user_id in account.prefs.aliases:
+						return str(account.prefs.aliases[user_id])
+				if demojify_attr:
+					demojied = app.demojify(str(getattr(s, attr)))
+					if demojied == "":
+						return str(getattr(s, 'acct', ''))
+					return demojied
+				if attr == 'created_at':
+					return app.parse_date(getattr(s, attr))
+				if attr == 'note':
+					return app.strip_html(str(getattr(s, attr)))
+				return str(getattr(s, attr))
+			except Exception:
+				try:
+					return str(getattr(s, attr))
+				except Exception:
+					return raw  # Leave placeholder if we can't resolve it
+		return accessor
+
+
+def _text(s, account, text):
+	return text
@@ -0,0 +1,70 @@
+import unittest
+from types import SimpleNamespace
+
+from fusion_merge import FusionMerger
+
+
+def _post(post_id, timestamp):
+	return SimpleNamespace(id=post_id, timestamp=timestamp)
+
+
+class _Built(object):
+	def __init__(self, source, original):
+		self.source = source
+		self.original = original
+		self.timestamp = original.timestamp
+
+
+class FusionMergerTests(unittest.TestCase):
+	def setUp(self):
+		self.merger = FusionMerger()
+		self.home = [_post("a5", 50), _post("a3", 30), _post("a1", 10)]
+		self.other = [_post("b4", 40), _post("b2", 20)]
+
+	def _merge(self, stamp=None):
+		merged = self.merger.merge([("home", self.home), ("other", self.other)], _Built, stamp=stamp)
+		return [item.original.id for item in merged]
+
+	def test_merges_newest_first(self):
+		self.assertEqual(self._merge(), ["a5", "b4", "a3", "b2", "a1"])
+		self.assertEqual(self.merger.built, 5)
+
+	def test_only_new_items_are_built(self):
+		first = self.merger.merge([("home", self.home), ("other", self.other)], _Built)
+		self.home.insert(0, _post("a6", 60))
+		self.other.append(_post("b0", 0))
+		del self.home[2]
+
+		second = self.merger.merge([("home", self.home), ("other", self.other)], _Built)
+
+		self.assertEqual([item.original.id for item in second], ["a6", "a5", "b4", "b2", "a1", "b0"])
+		self.assertEqual(self.merger.built, 7)
+		reused = {item.original.id: item for item in first}
+		self.assertIs(second[1], reused["a5"])
+
+	def test_edited_items_are_rebuilt(self):
+		self._merge()
+		self.other[0] = _post("b4", 40)
+
+		self._merge()
+		self.assertEqual(self.merger.built, 6)
+
+	def test_unchanged_sources_and_new_stamp(self):
+		self._merge(stamp=1)
+		self._merge(stamp=1)
+		self.assertEqual(self.merger.built, 5)
+
+		self._merge(stamp=2)
+		self.assertEqual(self.merger.built, 10)
+
+	def test_ties_keep_source_order_and_unsorted_sources_are_sorted(self):
+		self.home = [_post("a1", 10), _post("a2", 20)]
+		self.other = [_post("b2", 20)]
+
+		self.assertEqual(self._merge(), ["a2", "b2", "a1"])
+
+	def test_removed_source_drops_its_items(self):
+		self._merge()
+		merged = self.merger.merge([("other", self.other)], _Built)
+
+		self.assertEqual([item.original.id for item in merged], ["b4", "b2"])
@@ -0,0 +1,61 @@
+import random
+import unittest
+
+from GUI.list_diff import apply_ops, diff_rows
+
+
+class _Rows(list):
+	"""Records calls the way wx.ListBox would apply them."""
+
+	def Delete(self, index):
+		del self[index]
+
+	def InsertItems(self, items, pos):
+		self[pos:pos] = items
+
+	def SetString(self, index, text):
+		self[index] = text
+
+
+def _texts(keys, suffix=""):
+	return [f"row {k}{suffix}" for k in keys]
+
+
+class DiffRowsTests(unittest.TestCase):
+	def _check(self, old_keys, new_keys, changed=(), **kwargs):
+		old = _texts(old_keys)
+		new = [f"row {k}" + ("*" if k in changed else "") for k in new_keys]
+		ops = diff_rows(old_keys, old, new_keys, new, **kwargs)
+		if ops is not None:
+			rows = _Rows(old)
+			apply_ops(rows, ops)
+			self.assertEqual(rows, new)
+		return ops
+
+	def test_prepend_and_delete(self):
+		old = [str(i) for i in range(20)]
+		new = ["a", "b"] + old[:5] + old[6:]
+		ops = self._check(old, new, changed={"3"})
+
+		self.assertEqual(ops, [("delete", 5), ("insert", 0, ["row a", "row b"]), ("set", 5, "row 3*")])
+
+	def test_scattered_changes_round_trip(self):
+		rng = random.Random(3)
+		old = [str(i) for i in range(200)]
+		for _ in range(50):
+			new = [k for k in old if rng.random() > 0.05]
+			for _ in range(rng.randint(0, 10)):
+				new.insert(rng.randint(0, len(new)), f"n{rng.random()}")
+			self.assertIsNotNone(self._check(old, new, changed=set(rng.sample(new, 3))))
+
+	def test_unchanged_rows_need_no_ops(self):
+		keys = [str(i) for i in range(10)]
+		self.assertEqual(self._check(keys, keys), [])
+
+	def test_falls_back_to_set(self):
+		keys = [str(i) for i in range(10)]
+		self.assertIsNone(self._check([], keys))
+		self.assertIsNone(self._check(keys, list(reversed(keys))))
+		self.assertIsNone(self._check(keys, ["x" + k for k in keys]))
+		self.assertIsNone(self._check(keys, keys + ["1"]))
+		self.assertIsNone(self._check(keys, keys[:4], max_change_ratio=0.5))
@@ -0,0 +1,150 @@
+import dataclasses
+import json
+import unittest
+from types import SimpleNamespace
+
+from platforms.mastodon.models import (
+	AttribDict,
+	attrib_dict,
+	mastodon_notification_to_universal,
+	mastodon_status_to_universal,
+	mastodon_user_to_universal,
+)
+
+
+def _account(**overrides):
+	account = {"id": 7, "acct": "cat@example.social", "username": "cat", "display_name": "",
+		"emojis": [{"shortcode": "blobcat", "url": "https://example.social/e.png"}],
+		"fields": [{"name": "Web", "value": "example.com"}]}
+	account.update(overrides)
+	return account
+
+
+def _status(**overrides):
+	status = {"id": 100, "content": "<p>Hello &amp; welcome</p><p>second</p>", "created_at": "2024-05-01T12:34:56.789Z",
+		"account": _account(), "in_reply_to_id": 99, "in_reply_to_account_id": None, "reblog": None,
+		"media_attachments": [{"id": 1, "type": "image", "url": "https://example.social/1.jpg", "description": "A cat"}],
+		"mentions": [{"id": 8, "acct": "dog", "username": "dog", "url": "https://example.social/@dog"}],
+		"card": {"url": "https://example.com", "title": "Example"}, "poll": None, "visibility": "public",
+		"favourites_count": 3, "reblogs_count": 2, "replies_count": 1, "application": {"name": "FastSM"}}
+	status.update(overrides)
+	return json.loads(json.dumps(status))
+
+
+def _namespace(value):
+	"""Attribute-only objects, like the non-dict models the slow path handles."""
+	if isinstance(value, dict):
+		return SimpleNamespace(**{k: _namespace(v) for k, v in value.items()})
+	if isinstance(value, list):
+		return [_namespace(v) for v in value]
+	return value
+
+
+class StatusFromJsonTests(unittest.TestCase):
+	def test_matches_attribute_object_conversion(self):
+		data = _status(reblog=_status(id=50, content="<p>boosted</p>"))
+		fast = mastodon_status_to_universal(attrib_dict(data))
+		slow = mastodon_status_to_universal(_namespace(data))
+
+		for name in ("id", "content", "text", "created_at", "favourites_count", "boosts_count", "replies_count",
+				"in_reply_to_id", "in_reply_to_account_id", "url", "visibility", "pinned"):
+			self.assertEqual(getattr(fast, name), getattr(slow, name), name)
+		self.assertEqual(fast.text, "Hello & welcome second")
+		self.assertEqual(fast.in_reply_to_id, "99")
+		self.assertEqual((fast.account.id, fast.account.display_name), ("7", "cat@example.social"))
+		self.assertEqual(fast.reblog.id, slow.reblog.id)
+		self.assertEqual([(m.id, m.description) for m in fast.media_attachments], [("1", "A cat")])
+		self.assertEqual([m.acct for m in fast.mentions], ["dog"])
+
+	def test_leftover_fields_read_as_attributes(self):
+		status = mastodon_status_to_universal(_status())
+
+		self.assertEqual(status.application.name, "FastSM")
+		self.assertEqual(status.card.title, "Example")
+		self.assertEqual(status.account.emojis[0].shortcode, "blobcat")
+		self.assertEqual(status.account.fields[0].value, "example.com")
+		self.assertFalse(hasattr(status, "not_a_field"))
+
+	def test_quote_and_source_text(self):
+		data = _status(quote={"state": "accepted", "quoted_status": _status(id=5)},
+			source={"content": "plain *source*", "mediaType": "text/plain"})
+		status = mastodon_status_to_universal(data)
+
+		self.assertEqual(status.quote.id, "5")
+		self.assertEqual(status.text, "plain *source*")
+
+
+class CompactModelTests(unittest.TestCase):
+	def test_platform_data_keeps_only_unconverted_keys(self):
+		status = mastodon_status_to_universal(_status(reblog=_status(id=50)))
+
+		self.assertEqual(set(status._platform_data), {"reblogs_count", "application"})
+		self.assertEqual(status.reblogs_count, 2)
+		self.assertIsNone(status.mentions[0]._platform_data)
+		self.assertEqual(set(status.account._platform_data), {"emojis", "fields"})
+
+	def test_slots_take_state_set_later(self):
+		status = mastodon_status_to_universal(_status(favourited=False))
+		self.assertFalse(hasattr(status, "__dict__"))
+
+		# Unset extra slots still fall back to the API object, or don't exist
+		self.assertIs(status.favourited, False)
+		self.assertFalse(hasattr(status, "_original_status_id"))
+		status.favourited = True
+		status._original_status_id = "9"
+		self.assertTrue(status.favourited)
+		with self.assertRaises(AttributeError):
+			status.unknown_state = True
+
+	def test_repeated_strings_are_interned(self):
+		first = mastodon_status_to_universal(_status())
+		second = mastodon_status_to_universal(json.loads(json.dumps(_status())))
+
+		self.assertIs(first.visibility, second.visibility)
+		self.assertIs(first.mentions[0].acct, second.mentions[0].acct)
+		self.assertIs(first.media_attachments[0].type, second.media_attachments[0].type)
+
+	def test_identical_users_are_shared(self):
+		first = mastodon_status_to_universal(_status())
+		second = mastodon_status_to_universal(_status(id=101))
+		changed = mastodon_user_to_universal(_account(display_name="Cat!"))
+
+		self.assertIs(first.account, second.account)
+		self.assertIsNot(changed, first.account)
+		self.assertEqual(first.account.display_name, "cat@example.social")
+		self.assertEqual(changed.display_name, "Cat!")
+
+	def test_copies_of_shared_users_are_independent(self):
+		user = mastodon_user_to_universal(_account())
+		copy = dataclasses.replace(user)
+		copy.acct = "cat@remote.example"
+
+		self.assertEqual(mastodon_user_to_universal(_account()).acct, "cat@example.social")
+
+
+class AttribDictTests(unittest.TestCase):
+	def test_wraps_nested_objects_once(self):
+		data = AttribDict({"a": {"b": [{"c": 1}]}, "n": None})
+		first = data.a
+		self.assertIs(data.a, first)
+		self.assertEqual(data.a.b[0].c, 1)
+		self.assertIsNone(data.n)
+		with self.assertRaises(AttributeError):
+			data.missing
+		self.assertEqual(json.loads(json.dumps(data)), {"a": {"b": [{"c": 1}]}, "n": None})
+
+	def test_leaves_other_objects_alone(self):
+		obj = SimpleNamespace(a=1)
+		self.assertIs(attrib_dict(obj), obj)
+		self.assertEqual(attrib_dict([1, 2]), [1, 2])
+
+
+class NotificationFromJsonTests(unittest.TestCase):
+	def test_mention_notification(self):
+		notification = mastodon_notification_to_universal(attrib_dict({
+			"id": 3, "type": "mention", "created_at": "2024-05-01T00:00:00Z",
+			"account": _account(), "status": _status(), "group_key": "ungrouped-3"}))
+
+		self.assertEqual((notification.id, notification.type), ("3", "mention"))
+		self.assertEqual(notification.status.id, "100")
+		self.assertEqual(notification.group_key, "ungrouped-3")
@@ -0,0 +1,136 @@
+import random
+import unittest
+from types import SimpleNamespace
+
+import movement_units
+from movement_units import MovementUnit, destination
+from status_index import StatusList
+
+HOUR = MovementUnit(kind="time", seconds=3600)
+SAME_USER = MovementUnit(kind="same_user")
+THREAD = MovementUnit(kind="thread")
+
+
+def _item(sid, author, created_at, reply_to=None):
+	return SimpleNamespace(id=sid, account=SimpleNamespace(id=author), created_at=created_at, in_reply_to_id=reply_to)
+
+
+def _walk(statuses, from_index, step, matches):
+	i = from_index + step
+	while 0 <= i < len(statuses):
+		if matches(statuses[i]):
+			return i
+		i += step
+	return None
+
+
+def _root(statuses, item):
+	parents = {s.id: s.in_reply_to_id for s in statuses}
+	sid = item.id
+	while parents.get(sid) in parents:
+		sid = parents[sid]
+	return sid
+
+
+def _expected(statuses, from_index, unit, step):
+	"""The item-by-item walk destination() did before the index."""
+	origin = statuses[from_index]
+	if unit.kind == "time":
+		if origin.created_at is None:
+			return None
+		return _walk(statuses, from_index, step, lambda s: s.created_at is not None and abs(origin.created_at - s.created_at) >= unit.seconds)
+	if unit.kind == "same_user":
+		return _walk(statuses, from_index, step, lambda s: s.account.id == origin.account.id)
+	root = _root(statuses, origin)
+	return _walk(statuses, from_index, step, lambda s: _root(statuses, s) == root)
+
+
+class MovementUnitTests(unittest.TestCase):
+	def setUp(self):
+		# Newest first, the way timelines load
+		self.items = StatusList(None, [
+			_item("9", "a", 9000, reply_to="7"),
+			_item("8", "b", 8000),
+			_item("7", "a", 7000, reply_to="5"),
+			_item("6", "c", 3000, reply_to="8"),
+			_item("5", "a", 2000),
+			_item("4", "b", 1000, reply_to="1"),
+		])
+
+	def test_jumps(self):
+		self.assertEqual(destination(self.items, 0, HOUR, "down"), 3)
+		self.assertEqual(destination(self.items, 3, HOUR, "up"), 2)
+		self.assertIsNone(destination(self.items, 5, HOUR, "down"))
+		self.assertEqual(destination(self.items, 0, SAME_USER, "down"), 2)
+		self.assertEqual(destination(self.items, 4, SAME_USER, "up"), 2)
+		self.assertEqual(destination(self.items, 0, THREAD, "down"), 2)
+		self.assertEqual(destination(self.items, 3, THREAD, "up"), 1)
+		# The post replied to isn't loaded
+		self.assertIsNone(destination(self.items, 5, THREAD, "up"))
+
+	def test_index_follows_changes(self):
+		destination(self.items, 0, THREAD, "down")
+		self.items.insert(0, _item("10", "c", 10000, reply_to="6"))
+		self.items.append(_item("3", "a", 500, reply_to="9"))
+		self.assertEqual(destination(self.items, 0, THREAD, "down"), 2)
+		self.assertEqual(destination(self.items, 7, THREAD, "up"), 5)
+		self.assertEqual(destination(self.items, 7, SAME_USER, "up"), 5)
+		# Without 7, 9 and its reply 3 are a thread of their own
+		self.items.pop(3)
+		self.assertEqual(destination(self.items, 0, THREAD, "down"), 2)
+		self.assertEqual(destination(self.items, 6, THREAD, "up"), 1)
+
+	def test_first_reply(self):
+		index = movement_units.navigation(self.items)
+		self.assertEqual(index.first_reply("8"), 3)
+		self.assertIsNone(index.first_reply("9"))
+		self.items.insert(0, _item("10", "c", 10000, reply_to="8"))
+		self.assertEqual(index.first_reply(8), 0)
+
+	def test_out_of_order_times_are_walked(self):
+		self.items[1] = _item("8", "b", 13000)
+		self.assertEqual(destination(self.items, 0, HOUR, "down"), 1)
+		self.items[1] = _item("8", "b", None)
+		self.assertEqual(destination(self.items, 0, HOUR, "down"), 3)
+
+	def test_matches_walk_after_random_changes(self):
+		rng = random.Random(3)
+		items = StatusList(None)
+		plain = []
+		serial = 0
+		for _ in range(400):
+			serial += 1
+			ids = [s.id for s in plain]
+			reply_to = rng.choice(ids + ["gone"]) if ids and rng.random() < 0.5 else None
+			new = _item(str(serial), rng.choice("abcd"), rng.choice((None,) + (serial * 600,) * 20), reply_to)
+			change = rng.random()
+			if change < 0.35 or not plain:
+				items.insert(0, new)
+				plain.insert(0, new)
+			elif change < 0.7:
+				items.append(new)
+				plain.append(new)
+			elif change < 0.8:
+				position = rng.randrange(len(plain))
+				items.pop(position)
+				plain.pop(position)
+			elif change < 0.85:
+				position = rng.randrange(len(plain))
+				items.insert(position, new)
+				plain.insert(position, new)
+			elif change < 0.9:
+				position = rng.randrange(len(plain))
+				items[position] = new
+				plain[position] = new
+			elif change < 0.92:
+				items.reverse()
+				plain.reverse()
+			from_index = rng.randrange(len(plain))
+			unit = rng.choice(movement_units.CATALOG)
+			direction = rng.choice(("up", "down"))
+			self.assertEqual(destination(items, from_index, unit, direction),
+				_expected(plain, from_index, unit, 1 if direction == "down" else -1), (unit, direction, from_index))
+
+
+if __name__ == '__main__':
+	unittest.main()
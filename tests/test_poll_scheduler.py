@@ -0,0 +1,119 @@
+import threading
+import time
+import unittest
+
+from poll_scheduler import PollScheduler
+
+
+class _Clock(object):
+	def __init__(self):
+		self.now = 1000.0
+
+	def __call__(self):
+		return self.now
+
+
+class _Timeline(object):
+	def __init__(self, stream=None):
+		self.stream = stream
+
+	def covering_stream(self):
+		return self.stream
+
+
+class _Stream(object):
+	def __init__(self, connected=True, generation=1):
+		self.active = True
+		self.connected = connected
+		self.generation = generation
+
+
+class PollSchedulerTests(unittest.TestCase):
+	def setUp(self):
+		self.clock = _Clock()
+		self.scheduler = PollScheduler("example.social", lambda: 60, lambda tl: 0, clock=self.clock, rand=lambda: 0.5)
+
+	def _poll(self, tl, new_items):
+		"""Advance to tl's next due time and complete one poll."""
+		self.clock.now = self.scheduler.state(tl).next_due
+		self.assertEqual(self.scheduler.due([tl]), [tl])
+		self.scheduler.record(tl, new_items)
+
+	def test_quiet_timelines_back_off_and_busy_ones_recover(self):
+		tl = _Timeline()
+		self.scheduler.due([tl])
+		self.assertEqual(self.scheduler.state(tl).next_due, 1060)
+
+		for _ in range(6):
+			self._poll(tl, 0)
+		self.assertEqual(self.scheduler.state(tl).interval, 240)
+
+		self._poll(tl, 50)
+		self.assertEqual(self.scheduler.state(tl).interval, 60)
+
+	def test_interval_follows_arrival_rate(self):
+		self.assertEqual(self.scheduler.interval_for(None), 60)
+		self.assertEqual(self.scheduler.interval_for(1 / 30), 60)
+		self.assertEqual(self.scheduler.interval_for(1 / 150), 150)
+		self.assertEqual(self.scheduler.interval_for(1 / 1000), 240)
+		self.assertEqual(self.scheduler.interval_for(0), 240)
+
+	def test_streamed_timelines_poll_only_after_a_gap(self):
+		stream = _Stream(generation=1)
+		tl = _Timeline(stream)
+		self.scheduler.due([tl])
+		# First check after the stream came up: catch up once
+		self._poll(tl, 3)
+		for _ in range(5):
+			self.clock.now = self.scheduler.state(tl).next_due
+			self.assertEqual(self.scheduler.due([tl]), [])
+
+		stream.connected = False
+		self._poll(tl, 0)
+		stream.connected = True
+		stream.generation = 2
+		self._poll(tl, 2)
+		self.clock.now = self.scheduler.state(tl).next_due
+		self.assertEqual(self.scheduler.due([tl]), [])
+
+	def test_running_and_closed_timelines(self):
+		a, b = _Timeline(), _Timeline()
+		self.scheduler.due([a, b])
+		self.clock.now += 100
+		self.assertEqual(self.scheduler.due([a, b]), [a, b])
+		self.assertEqual(self.scheduler.due([a, b]), [])
+		self.scheduler.due([a])
+		self.assertIsNone(self.scheduler.state(b))
+
+	def test_jitter_spreads_due_times(self):
+		values = iter([0.0, 1.0])
+		scheduler = PollScheduler("h", lambda: 100, lambda tl: 0, clock=self.clock, rand=lambda: next(values))
+		a, b = _Timeline(), _Timeline()
+		scheduler.due([a, b])
+		self.assertEqual((scheduler.state(a).next_due, scheduler.state(b).next_due), (1090, 1110))
+
+	def test_concurrent_polls_limited_per_instance(self):
+		lock = threading.Lock()
+		running = []
+		peak = []
+
+		def poll(tl):
+			with lock:
+				running.append(tl)
+				peak.append(len(running))
+			time.sleep(0.05)
+			with lock:
+				running.remove(tl)
+			return 0
+
+		timelines = [_Timeline() for _ in range(8)]
+		scheduler = PollScheduler("limited.example", lambda: 60, poll, clock=self.clock)
+		scheduler.due(timelines)
+		self.clock.now += 100
+		scheduler.tick(timelines)
+		deadline = time.time() + 5
+		while any(scheduler.state(tl).running for tl in timelines) and time.time() < deadline:
+			time.sleep(0.01)
+
+		self.assertEqual(len(peak), 8)
+		self.assertEqual(max(peak), PollScheduler.MAX_CONCURRENT)
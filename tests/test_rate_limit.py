@@ -0,0 +1,111 @@
+import threading
+import unittest
+
+import rate_limit
+from rate_limit import BULK, INTERACTIVE, POLL, RateLimitGovernor
+
+
+class _Clock(object):
+	def __init__(self):
+		self.now = 1_700_000_000.0
+		self.slept = []
+
+	def __call__(self):
+		return self.now
+
+	def sleep(self, seconds):
+		self.slept.append(seconds)
+		self.now += seconds
+
+
+class GovernorTests(unittest.TestCase):
+	def setUp(self):
+		self.clock = _Clock()
+		self.governor = RateLimitGovernor("example.social", clock=self.clock, sleep=self.clock.sleep)
+
+	def _headers(self, remaining, limit=300, reset_in=300):
+		return {"X-RateLimit-Limit": str(limit), "X-RateLimit-Remaining": str(remaining),
+			"X-RateLimit-Reset": f"{int(self.clock.now + reset_in)}"}
+
+	def test_no_headers_no_waiting(self):
+		self.assertEqual(self.governor.delay("token", BULK), 0)
+
+	def test_reserves_keep_budget_for_the_user(self):
+		self.governor.update("token", 200, self._headers(remaining=50))
+
+		self.assertEqual(self.governor.delay("token", INTERACTIVE), 0)
+		self.assertEqual(self.governor.delay("token", POLL), 0)
+		self.assertEqual(self.governor.delay("token", BULK), 300)
+
+		self.governor.update("token", 200, self._headers(remaining=20))
+		self.assertEqual(self.governor.delay("token", POLL), 300)
+		self.assertEqual(self.governor.delay("token", INTERACTIVE), 0)
+
+	def test_bulk_is_paced_once_half_the_budget_is_gone(self):
+		self.governor.update("token", 200, self._headers(remaining=200))
+		self.governor.acquire("token", BULK)
+		self.governor.acquire("token", BULK)
+		self.assertEqual(self.clock.slept, [])
+
+		self.governor.update("token", 200, self._headers(remaining=100, reset_in=150))
+		self.governor.acquire("token", BULK)
+		self.governor.acquire("token", BULK)
+		# 150s left over the 25 requests above the bulk reserve: about 6s apart
+		self.assertAlmostEqual(sum(self.clock.slept), 12, delta=0.5)
+
+	def test_429_blocks_every_token_on_the_instance(self):
+		self.governor.update("a", 429, {"Retry-After": "30"})
+
+		self.assertEqual(self.governor.delay("b", INTERACTIVE), 30)
+		self.governor.acquire("b", POLL)
+		self.assertEqual(sum(self.clock.slept), 30)
+		self.assertEqual(self.governor.stats()["throttled"], 1)
+
+	def test_interactive_requests_never_wait(self):
+		self.governor.update("a", 200, self._headers(remaining=0, reset_in=12))
+		with self.assertRaises(rate_limit.RateLimited) as raised:
+			self.governor.acquire("a")
+		self.assertEqual(str(raised.exception), "Rate limited by example.social, retry in 12s")
+		self.governor.update("a", 429, {"Retry-After": "30"})
+		with self.assertRaises(rate_limit.RateLimited):
+			self.governor.acquire("b", INTERACTIVE)
+		self.assertEqual(self.clock.slept, [])
+
+	def test_budgets_are_per_token(self):
+		self.governor.update("a", 200, self._headers(remaining=0))
+
+		self.assertEqual(self.governor.delay("a", INTERACTIVE), 300)
+		self.assertEqual(self.governor.delay("b", INTERACTIVE), 0)
+
+	def test_header_formats(self):
+		self.governor.update("iso", 200, {"x-ratelimit-limit": "300", "x-ratelimit-remaining": "0",
+			"x-ratelimit-reset": "2023-11-14T22:18:20.000Z"})
+		self.governor.update("bsky", 200, {"ratelimit-limit": "3000;w=300", "ratelimit-remaining": "0",
+			"ratelimit-reset": str(int(self.clock.now) + 60)})
+
+		self.assertEqual(self.governor.delay("iso", INTERACTIVE), 1_700_000_300 - self.clock.now)
+		self.assertEqual(self.governor.delay("bsky", INTERACTIVE), 60)
+		self.assertEqual([b["limit"] for b in self.governor.stats()["budgets"]], [300, 3000])
+
+	def test_window_reset_releases_waiters(self):
+		self.governor.update("token", 200, self._headers(remaining=0, reset_in=12))
+		self.governor.acquire("token", BULK)
+		self.assertEqual(sum(self.clock.slept), 12)
+		self.assertEqual(max(self.clock.slept), RateLimitGovernor.MAX_WAIT_STEP)
+
+
+class PriorityTests(unittest.TestCase):
+	def test_priority_is_per_thread_and_never_raised(self):
+		seen = []
+		with rate_limit.priority(BULK):
+			with rate_limit.priority(INTERACTIVE):
+				seen.append(rate_limit.current_priority())
+			thread = threading.Thread(target=lambda: seen.append(rate_limit.current_priority()))
+			thread.start()
+			thread.join()
+		seen.append(rate_limit.current_priority())
+
+		self.assertEqual(seen, [BULK, INTERACTIVE, INTERACTIVE])
+
+	def test_governors_are_shared_per_host(self):
+		self.assertIs(rate_limit.get_governor("https://Shared.example/api"), rate_limit.get_governor("shared.example"))
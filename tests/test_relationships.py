@@ -0,0 +1,178 @@
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+
+from cache import TimelineCache
+from models import UniversalUser
+from relationships import FOLLOWERS, FOLLOWING, RelationshipSnapshot, prefetch
+
+
+def _user(uid, last_status_at=None):
+	return UniversalUser(id=str(uid), acct=f"user{uid}", username=f"user{uid}", display_name=f"User {uid}",
+		_platform="mastodon", _platform_data=SimpleNamespace(last_status_at=last_status_at))
+
+
+class _Server(object):
+	"""Followers/following lists, newest first, served in pages."""
+
+	PAGE = 3
+
+	def __init__(self, followers, following):
+		self.lists = {FOLLOWERS: list(followers), FOLLOWING: list(following)}
+		self.extra = {FOLLOWERS: 0, FOLLOWING: 0}
+		self.requests = {FOLLOWERS: 0, FOLLOWING: 0}
+		self.lock = threading.Lock()
+
+	def pages(self, kind):
+		users = self.lists[kind]
+		for start in range(0, len(users), self.PAGE):
+			with self.lock:
+				self.requests[kind] += 1
+			yield users[start:start + self.PAGE]
+
+	def counts(self):
+		return {kind: len(users) + self.extra[kind] for kind, users in self.lists.items()}
+
+
+class _Clock(object):
+	def __init__(self):
+		self.now = 1000.0
+
+	def __call__(self):
+		return self.now
+
+
+class RelationshipSnapshotTests(unittest.TestCase):
+	def setUp(self):
+		self._tmp = tempfile.TemporaryDirectory()
+		self.cache = TimelineCache(self._tmp.name, "acct")
+		self.clock = _Clock()
+		self.server = _Server(
+			followers=[_user(i) for i in (1, 2, 3, 4)],
+			following=[_user(3, "2024-05-01"), _user(5, "2019-01-02"), _user(1), _user(6, "2020-12-31")])
+
+	def tearDown(self):
+		self.cache.close()
+		self._tmp.cleanup()
+
+	def _snapshot(self):
+		return RelationshipSnapshot(self.server.pages, self.server.counts, store=self.cache,
+			max_pages=lambda: 100, clock=self.clock)
+
+	def _ids(self, users):
+		return [user.id for user in users]
+
+	def test_set_operations(self):
+		snapshot = self._snapshot()
+		snapshot.ensure()
+
+		self.assertEqual(self._ids(snapshot.mutual()), ["3", "1"])
+		self.assertEqual(self._ids(snapshot.not_following()), ["2", "4"])
+		self.assertEqual(self._ids(snapshot.not_following_me()), ["5", "6"])
+		self.assertEqual(self._ids(snapshot.havent_posted(before_year=2023)), ["5", "6"])
+
+	def test_snapshot_is_persisted(self):
+		self._snapshot().ensure()
+		requests = dict(self.server.requests)
+
+		snapshot = self._snapshot()
+		snapshot.ensure()
+
+		self.assertEqual(self.server.requests, requests)
+		self.assertEqual(self._ids(snapshot.users(FOLLOWING)), ["3", "5", "1", "6"])
+		self.assertEqual(self._ids(snapshot.havent_posted(before_year=2023)), ["5", "6"])
+
+	def test_refresh_reads_only_new_pages(self):
+		snapshot = self._snapshot()
+		snapshot.ensure()
+		before = self.server.requests[FOLLOWERS]
+		self.server.lists[FOLLOWERS][:0] = [_user(i) for i in (10, 11, 12, 13)]
+
+		snapshot.refresh()
+
+		self.assertEqual(self.server.requests[FOLLOWERS] - before, 2)
+		self.assertEqual(self._ids(snapshot.users(FOLLOWERS)), ["10", "11", "12", "13", "1", "2", "3", "4"])
+
+	def test_removal_below_first_page_forces_full_fetch(self):
+		snapshot = self._snapshot()
+		snapshot.ensure()
+		del self.server.lists[FOLLOWERS][3]
+
+		snapshot.refresh()
+
+		self.assertEqual(self._ids(snapshot.users(FOLLOWERS)), ["1", "2", "3"])
+
+	def test_accounts_the_server_counts_but_never_lists(self):
+		self.server.extra[FOLLOWERS] = 2
+		snapshot = self._snapshot()
+		snapshot.ensure()
+		before = self.server.requests[FOLLOWERS]
+
+		snapshot.refresh()
+
+		self.assertEqual(self.server.requests[FOLLOWERS] - before, 1)
+
+	def test_stale_snapshot_refreshes_in_background(self):
+		snapshot = self._snapshot()
+		snapshot.ensure()
+		self.server.lists[FOLLOWING].insert(0, _user(7))
+		self.clock.now += RelationshipSnapshot.REFRESH_AGE + 1
+
+		snapshot.ensure()
+		self.assertNotIn("7", snapshot.ids(FOLLOWING))
+		for _ in range(200):
+			if "7" in snapshot.ids(FOLLOWING):
+				break
+			threading.Event().wait(0.01)
+		self.assertIn("7", snapshot.ids(FOLLOWING))
+
+	def test_unfollow_updates_snapshot(self):
+		snapshot = self._snapshot()
+		snapshot.ensure()
+		snapshot.note_unfollow(5)
+
+		self.assertEqual(self._ids(snapshot.not_following_me()), ["6"])
+		restarted = self._snapshot()
+		restarted.ensure()
+		self.assertEqual(self._ids(restarted.not_following_me()), ["6"])
+
+	def test_follow_updates_snapshot(self):
+		snapshot = self._snapshot()
+		snapshot.ensure()
+		snapshot.note_follow(2, _user(2, "2018-03-04"))
+
+		self.assertEqual(self._ids(snapshot.users(FOLLOWING)), ["2", "3", "5", "1", "6"])
+		self.assertEqual(self._ids(snapshot.not_following()), ["4"])
+		restarted = self._snapshot()
+		restarted.ensure()
+		self.assertEqual(self._ids(restarted.users(FOLLOWING)), ["2", "3", "5", "1", "6"])
+		self.assertEqual(self._ids(restarted.havent_posted(2019)), ["2"])
+		self.assertEqual(sum(self.server.requests.values()), 4)
+
+
+class PrefetchTests(unittest.TestCase):
+	def test_yields_pages_in_order_and_stops_early(self):
+		fetched = []
+
+		def pages():
+			for i in range(10):
+				fetched.append(i)
+				yield [i]
+
+		result = []
+		for page in prefetch(pages()):
+			result.append(page)
+			if len(result) == 3:
+				break
+
+		self.assertEqual(result, [[0], [1], [2]])
+		self.assertLess(len(fetched), 10)
+
+	def test_errors_reach_the_caller(self):
+		def pages():
+			yield [1]
+			raise ValueError("boom")
+
+		with self.assertRaises(ValueError):
+			list(prefetch(pages()))
@@ -0,0 +1,119 @@
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from render_cache import Prefetcher, RenderCache, nearest_first
+
+
+def _item(item_id, days_old=10, platform="mastodon"):
+	created_at = datetime.now(timezone.utc) - timedelta(days=days_old)
+	return SimpleNamespace(id=item_id, _platform=platform, created_at=created_at)
+
+
+def _account(account_id):
+	return SimpleNamespace(me=SimpleNamespace(id=account_id))
+
+
+class RenderCacheTests(unittest.TestCase):
+	def test_shared_per_account_and_kind(self):
+		cache = RenderCache()
+		calls = []
+		render = lambda: calls.append(1) or "text"
+		me, other = _account("1"), _account("2")
+
+		cache.render(_item("5"), "status", me, render)
+		cache.render(_item("5"), "status", me, render)
+		cache.render(_item("5"), "status", other, render)
+		cache.render(_item("5"), "notifications", me, render)
+		cache.render(_item("5", platform="bluesky"), "status", me, render)
+
+		self.assertEqual(len(calls), 4)
+		self.assertEqual(cache.hits, 1)
+
+	def test_bump_and_invalidate(self):
+		cache = RenderCache()
+		me = _account("1")
+		cache.put(_item("5"), "status", me, "old", cache.version)
+		cache.put(_item("6"), "status", me, "six", cache.version)
+
+		cache.invalidate(_item("5"))
+		self.assertIsNone(cache.get(_item("5"), "status", me))
+		self.assertEqual(cache.get(_item("6"), "status", me), "six")
+
+		stamp = cache.stamp()
+		cache.bump()
+		self.assertNotEqual(cache.stamp(), stamp)
+		self.assertIsNone(cache.get(_item("6"), "status", me))
+
+	def test_render_started_before_bump_is_not_stored(self):
+		cache = RenderCache()
+		version = cache.version
+		cache.bump()
+		cache.put(_item("5"), "status", None, "stale", version)
+
+		self.assertEqual(len(cache), 0)
+
+	def test_recent_items_expire_when_the_day_changes(self):
+		cache = RenderCache()
+		me = _account("1")
+		cache.put(_item("new", days_old=0), "status", me, "today", cache.version)
+		cache.put(_item("old"), "status", me, "then", cache.version)
+
+		cache._today += 1
+		self.assertIsNone(cache.get(_item("new", days_old=0), "status", me))
+		self.assertEqual(cache.get(_item("old"), "status", me), "then")
+
+	def test_bounded(self):
+		cache = RenderCache(max_entries=2)
+		for item_id in ("1", "2", "3"):
+			cache.put(_item(item_id), "status", None, item_id, cache.version)
+
+		self.assertEqual(len(cache), 2)
+		self.assertIsNone(cache.get(_item("1"), "status", None))
+
+
+class PrefetcherTests(unittest.TestCase):
+	def test_nearest_first(self):
+		self.assertEqual(list(nearest_first(6, 2)), [2, 3, 1, 4, 0, 5])
+		self.assertEqual(list(nearest_first(3, 0)), [0, 1, 2])
+		self.assertEqual(list(nearest_first(3, 9)), [2, 1, 0])
+		self.assertEqual(list(nearest_first(0, 0)), [])
+
+	def test_renders_everything_around_the_reader(self):
+		rendered = []
+		Prefetcher().start(range(5), 3, rendered.append).join()
+
+		self.assertEqual(rendered, [3, 4, 2, 1, 0])
+
+	def test_new_job_cancels_the_old_one(self):
+		prefetcher = Prefetcher()
+		started, release = threading.Event(), threading.Event()
+		first = []
+
+		def slow(item):
+			first.append(item)
+			started.set()
+			release.wait()
+
+		old = prefetcher.start(range(100), 0, slow)
+		started.wait()
+		second = []
+		new = prefetcher.start(range(3), 0, second.append)
+		release.set()
+		old.join()
+		new.join()
+
+		self.assertEqual(first, [0])
+		self.assertEqual(second, [0, 1, 2])
+
+	def test_errors_skip_the_item(self):
+		rendered = []
+
+		def render(item):
+			if item == 1:
+				raise ValueError(item)
+			rendered.append(item)
+
+		Prefetcher().start(range(3), 0, render).join()
+		self.assertEqual(rendered, [0, 2])
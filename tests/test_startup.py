@@ -0,0 +1,121 @@
+import os
+import tempfile
+import threading
+import time
+import types
+import unittest
+
+import startup
+
+
+class _FakeTimeline(object):
+	def __init__(self, account, name, events, cached=True):
+		self.account = account
+		self.name = name
+		self._events = events
+		self._cached = cached
+
+	def _should_use_cache(self):
+		return self._cached
+
+	def _load_from_cache(self):
+		self._events.append(("restore", self.name))
+		return True
+
+	def _refresh_after_cache(self):
+		self._events.append(("refresh", self.name))
+
+	def load(self):
+		self._events.append(("load", self.name))
+
+
+def _account(acct, instance):
+	account = types.SimpleNamespace(
+		me=types.SimpleNamespace(acct=acct),
+		prefs=types.SimpleNamespace(platform_type="mastodon", instance_url=instance),
+		timelines=[],
+		currentTimeline=None,
+	)
+	return account
+
+
+class StartupSchedulerTests(unittest.TestCase):
+	def setUp(self):
+		self._tmp = tempfile.TemporaryDirectory()
+		startup._logger = None
+
+	def tearDown(self):
+		self._tmp.cleanup()
+
+	def _run(self, scheduler):
+		scheduler.start()
+		deadline = time.time() + 5
+		while not scheduler.finished and time.time() < deadline:
+			time.sleep(0.01)
+		self.assertTrue(scheduler.finished)
+
+	def test_restores_everything_before_refreshing_active_timeline_first(self):
+		events = []
+		first = _account("a@one", "https://one.example")
+		second = _account("b@two", "https://two.example")
+		home = _FakeTimeline(first, "Home", events)
+		mentions = _FakeTimeline(first, "Mentions", events, cached=False)
+		other = _FakeTimeline(second, "Home", events)
+		first.timelines = [home, mentions]
+		first.currentTimeline = mentions
+		second.timelines = [other]
+		app = types.SimpleNamespace(currentAccount=first, confpath=self._tmp.name)
+		scheduler = startup.StartupScheduler(app)
+		scheduler.MAX_REFRESHES_PER_INSTANCE = 1
+		for tl in (home, mentions, other):
+			self.assertTrue(scheduler.defer(tl))
+
+		self._run(scheduler)
+
+		kinds = [kind for kind, _ in events]
+		self.assertEqual(kinds[:2], ["restore", "restore"])
+		self.assertNotIn("restore", kinds[2:])
+		self.assertIn(("load", "Mentions"), events)
+		self.assertLess(events.index(("load", "Mentions")), events.index(("refresh", "Home")))
+		self.assertFalse(scheduler.defer(home))
+		with open(os.path.join(self._tmp.name, "startup_profile.txt"), encoding="utf-8") as f:
+			report = f.read()
+		self.assertIn("cache restore", report)
+		self.assertIn("first API page", report)
+
+	def test_refreshes_are_bounded_per_instance(self):
+		active = []
+		peak = []
+		lock = threading.Lock()
+		account = _account("a@one", "https://one.example")
+
+		class SlowTimeline(_FakeTimeline):
+			def load(self):
+				with lock:
+					active.append(1)
+					peak.append(len(active))
+				time.sleep(0.02)
+				with lock:
+					active.pop()
+
+		timelines = [SlowTimeline(account, f"tl{i}", [], cached=False) for i in range(6)]
+		account.timelines = timelines
+		app = types.SimpleNamespace(currentAccount=account, confpath="")
+		scheduler = startup.StartupScheduler(app)
+		for tl in timelines:
+			scheduler.defer(tl)
+
+		self._run(scheduler)
+
+		self.assertLessEqual(max(peak), scheduler.MAX_REFRESHES_PER_INSTANCE)
+
+	def test_first_paint_is_recorded_once(self):
+		profiler = startup.StartupProfiler()
+		self.assertTrue(profiler.mark_first_paint("Home"))
+		self.assertFalse(profiler.mark_first_paint("Mentions"))
+		self.assertIn("first paint of list2", profiler.report())
+		self.assertIn("(Home)", profiler.report())
+
+
+if __name__ == "__main__":
+	unittest.main()
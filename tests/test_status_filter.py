@@ -0,0 +1,78 @@
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+
+from models import UniversalStatus, UniversalUser
+from status_filter import StatusFilter
+
+ME = UniversalUser(id="1", acct="me", username="me", display_name="Me")
+ALICE = UniversalUser(id="2", acct="alice@example.com", username="alice", display_name="Alice")
+ACCOUNT = SimpleNamespace(me=SimpleNamespace(id="1"))
+
+
+def _status(sid, author=ALICE, reply_to=None, reply_to_account=None, reblog=None, media=(), text="hello"):
+	return UniversalStatus(id=sid, account=author, content=f"<p>{text}</p>", text=text, created_at=datetime(2024, 1, 1),
+		in_reply_to_id=reply_to, in_reply_to_account_id=reply_to_account, reblog=reblog, media_attachments=list(media))
+
+
+def _shown(settings, statuses, **kwargs):
+	status_filter = StatusFilter(settings, account=ACCOUNT, **kwargs)
+	return [status.id for status in statuses if status_filter(status)]
+
+
+class StatusFilterTests(unittest.TestCase):
+	def setUp(self):
+		self.original = _status("10")
+		self.thread = _status("11", reply_to="10", reply_to_account="2")
+		self.reply = _status("12", reply_to="99", reply_to_account="3")
+		self.reply_to_me = _status("13", reply_to="98", reply_to_account="1")
+		self.boost = _status("14", author=ME, reblog=_status("5", media=["image"]))
+		self.mine = _status("15", author=ME, text="coffee")
+		self.my_reply = _status("16", author=ME, reply_to="12", reply_to_account="2")
+		self.all = [self.original, self.thread, self.reply, self.reply_to_me, self.boost, self.mine, self.my_reply]
+
+	def test_no_settings_show_everything(self):
+		self.assertEqual(_shown({}, self.all), [s.id for s in self.all])
+		self.assertEqual(_shown({"boosts": True, "text": "  "}, self.all), [s.id for s in self.all])
+
+	def test_post_types(self):
+		self.assertEqual(_shown({"boosts": False}, self.all), ["10", "11", "12", "13", "15", "16"])
+		self.assertEqual(_shown({"original": False}, self.all), ["11", "12", "13", "14", "16"])
+		self.assertEqual(_shown({"threads": False}, self.all), ["10", "12", "13", "14", "15", "16"])
+		self.assertEqual(_shown({"replies": False}, self.all), ["10", "11", "14", "15"])
+		self.assertEqual(_shown({"replies_to_me": False}, self.all), ["10", "11", "12", "14", "15", "16"])
+
+	def test_boosts_are_checked_by_the_boosted_post(self):
+		self.assertEqual(_shown({"media": False}, self.all), ["10", "11", "12", "13", "15", "16"])
+		self.assertEqual(_shown({"no_media": False}, self.all), ["14"])
+		# The boosted post isn't mine
+		self.assertEqual(_shown({"my_posts": False}, self.all), ["10", "11", "12", "13", "14"])
+		self.assertEqual(_shown({"my_replies": False}, self.all), ["10", "11", "12", "13", "14", "15"])
+
+	def test_my_posts_need_the_account(self):
+		status_filter = StatusFilter({"my_posts": False, "replies_to_me": False})
+		self.assertTrue(all(status_filter(status) for status in self.all))
+
+	def test_text_matches_post_and_author(self):
+		self.assertEqual(_shown({"text": "COFFEE"}, self.all), ["15"])
+		self.assertEqual(_shown({"text": "example.com"}, self.all), ["10", "11", "12", "13", "14"])
+		self.reply.text = ""
+		self.assertEqual(_shown({"text": "world"}, [self.reply], strip_html=lambda html: "hello world"), ["12"])
+
+	def test_parent_author_finds_threads(self):
+		unknown = _status("20", reply_to="10")
+		self.assertEqual(_shown({"replies": False}, [unknown]), [])
+		authors = {"10": "2"}
+		self.assertEqual(_shown({"replies": False}, [unknown], parent_author=authors.get), ["20"])
+		self.assertEqual(_shown({"threads": False}, [unknown], parent_author=authors.get), [])
+
+	def test_matches(self):
+		settings = {"boosts": False}
+		status_filter = StatusFilter(settings)
+		self.assertTrue(status_filter.matches({"boosts": False}))
+		settings["replies"] = False
+		self.assertFalse(status_filter.matches(settings))
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,141 @@
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+
+from models import UniversalNotification, UniversalStatus, UniversalUser
+from status_index import StatusIndex, StatusList
+
+
+def _status(sid, reblog=None, quote=None):
+	author = UniversalUser(id="1", acct="alice", username="alice", display_name="Alice")
+	return UniversalStatus(id=sid, account=author, content="", text="", created_at=datetime(2024, 1, 1),
+		reblog=reblog, quote=quote)
+
+
+class _Timeline(object):
+	def __init__(self, account):
+		self.account = account
+
+
+class StatusIndexTests(unittest.TestCase):
+	def setUp(self):
+		self.account = SimpleNamespace(status_index=StatusIndex())
+		self.home = _Timeline(self.account)
+		self.notifications = _Timeline(self.account)
+
+	def _held(self, status_id):
+		return sorted((id(tl), item.id, target.id) for tl, item, target in self.account.status_index.holders(status_id))
+
+	def test_finds_every_copy(self):
+		post = _status("10")
+		boost = _status("11", reblog=_status("10"))
+		quote = _status("12", quote=_status("10"))
+		mention = _status("13")
+		mention._original_status_id = "10"
+		notification = UniversalNotification(id="n1", type="favourite", account=post.account,
+			created_at=datetime(2024, 1, 1), status=_status("10"))
+		home = StatusList(self.home, [post, boost, quote, mention])
+		StatusList(self.notifications, [notification])
+
+		holders = self.account.status_index.holders(10)
+		self.assertEqual(len(holders), 5)
+		self.assertEqual({item.id for _, item, _ in holders}, {"10", "11", "12", "13", "n1"})
+		for tl, item, target in holders:
+			self.assertEqual("10", target.id if target is not mention else target._original_status_id)
+			self.assertIn(item, home if tl is self.home else [notification])
+
+	def test_mutations_keep_index_current(self):
+		a, b, c = _status("1"), _status("2"), _status("3")
+		statuses = StatusList(self.home, [a])
+		statuses.append(b)
+		statuses.insert(0, c)
+		self.assertEqual(len(self.account.status_index), 3)
+
+		statuses.pop(0)
+		self.assertEqual(self._held("3"), [])
+		statuses[0] = c
+		self.assertEqual(self._held("1"), [])
+		self.assertEqual(len(self._held("3")), 1)
+		del statuses[:]
+		self.assertEqual(len(self.account.status_index), 0)
+
+	def test_item_in_two_lists_stays_until_both_drop_it(self):
+		a, b = _status("1"), _status("2")
+		unfiltered = StatusList(self.home, [a, b])
+		filtered = StatusList(self.home, [b])
+
+		unfiltered.release()
+		self.assertEqual(self._held("1"), [])
+		self.assertEqual(len(self._held("2")), 1)
+		filtered.remove(b)
+		self.assertEqual(self._held("2"), [])
+
+	def test_released_list_stops_tracking(self):
+		statuses = StatusList(self.home, [_status("1")])
+		statuses.release()
+		statuses.append(_status("2"))
+
+		self.assertEqual(len(self.account.status_index), 0)
+
+	def test_remove_uses_identity(self):
+		first, equal = _status("1"), _status("1")
+		statuses = StatusList(self.home, [first])
+		StatusList(self.notifications, [equal])
+
+		statuses.remove(equal)
+		self.assertEqual([tl for tl, _, _ in self.account.status_index.holders("1")], [self.notifications])
+
+
+class PositionTests(unittest.TestCase):
+	def setUp(self):
+		self.statuses = StatusList(_Timeline(SimpleNamespace(status_index=StatusIndex())), [_status(str(i)) for i in range(5)])
+
+	def assertPositionsMatchScan(self):
+		for position, item in enumerate(self.statuses):
+			self.assertEqual(self.statuses.position(item.id), position, item.id)
+		self.assertIsNone(self.statuses.position("missing"))
+
+	def test_front_inserts_appends_and_removals(self):
+		self.assertEqual(self.statuses.position("3"), 3)
+		self.statuses.insert(0, _status("new1"))
+		self.statuses.insert(0, _status("new2"))
+		self.statuses.append(_status("old"))
+		self.statuses.extend([_status("older")])
+		self.assertFalse(self.statuses._dirty)
+		self.assertPositionsMatchScan()
+
+		self.statuses.pop(self.statuses.position("2"))
+		del self.statuses[self.statuses.position("new2")]
+		self.statuses.pop()
+		self.assertFalse(self.statuses._dirty)
+		self.assertIsNone(self.statuses.position("2"))
+		self.assertPositionsMatchScan()
+
+	def test_other_changes_rebuild(self):
+		self.statuses.insert(2, _status("middle"))
+		self.assertPositionsMatchScan()
+		self.statuses.reverse()
+		self.assertPositionsMatchScan()
+		self.statuses[0] = _status("replaced")
+		self.assertPositionsMatchScan()
+		self.statuses[1:3] = [_status("a")]
+		self.assertPositionsMatchScan()
+
+	def test_edit_keeps_position(self):
+		self.statuses.position("0")
+		self.statuses[2] = _status("2")
+		self.assertFalse(self.statuses._dirty)
+		self.assertPositionsMatchScan()
+
+	def test_duplicate_ids_find_the_first(self):
+		self.statuses.append(_status("1"))
+		self.assertEqual(self.statuses.position("1"), 1)
+		self.statuses.pop(1)
+		self.assertEqual(self.statuses.position("1"), 4)
+
+	def test_many_removals(self):
+		for i in range(300):
+			self.statuses.insert(0, _status(f"n{i}"))
+		for i in range(0, 300, 2):
+			self.statuses.pop(self.statuses.position(f"n{i}"))
+		self.assertPositionsMatchScan()
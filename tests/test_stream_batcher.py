@@ -0,0 +1,104 @@
+import unittest
+
+from stream_batcher import StreamBatcher
+
+
+class _Timer(object):
+	"""Records what the batcher schedules; tests fire it by hand."""
+
+	def __init__(self):
+		self.calls = []
+
+	def __call__(self, delay, callback):
+		self.calls.append((delay, callback))
+
+	def fire(self):
+		delay, callback = self.calls.pop(0)
+		callback()
+
+
+class _Item(object):
+	def __init__(self, id, text=""):
+		self.id = id
+		self.text = text
+
+
+class _Timeline(object):
+	def __init__(self):
+		self.loads = []
+
+	def load(self, items):
+		self.loads.append([(i.id, i.text) for i in items])
+
+
+class StreamBatcherTests(unittest.TestCase):
+	def setUp(self):
+		self.timer = _Timer()
+		self.batcher = StreamBatcher(self.timer)
+
+	def test_events_within_the_window_are_coalesced(self):
+		home, local = _Timeline(), _Timeline()
+		self.batcher.add(home, _Item("1"))
+		self.batcher.add(local, _Item("2"))
+		self.batcher.add(home, _Item("3"))
+		self.assertEqual([delay for delay, _ in self.timer.calls], [StreamBatcher.WINDOW])
+
+		self.timer.fire()
+		self.assertEqual(home.loads, [[("3", ""), ("1", "")]])
+		self.assertEqual(local.loads, [[("2", "")]])
+
+	def test_discard_drops_a_queued_item(self):
+		home = _Timeline()
+		self.batcher.add(home, _Item("1"))
+		self.batcher.add(home, _Item("2"))
+		self.batcher.discard(1)
+		self.timer.fire()
+		self.assertEqual(home.loads, [[("2", "")]])
+
+	def test_timelines_left_empty_are_not_loaded(self):
+		home = _Timeline()
+		self.batcher.add(home, _Item("1"))
+		self.batcher.discard("1")
+		self.timer.fire()
+		self.assertEqual(home.loads, [])
+
+	def test_replace_swaps_an_edited_item_in_place(self):
+		home, user = _Timeline(), _Timeline()
+		self.batcher.add(home, _Item("1", "old"))
+		self.batcher.add(home, _Item("2"))
+		self.batcher.add(user, _Item("1", "old"))
+		self.batcher.replace(_Item("1", "edited"))
+		self.timer.fire()
+		self.assertEqual(home.loads, [[("2", ""), ("1", "edited")]])
+		self.assertEqual(user.loads, [[("1", "edited")]])
+
+	def test_flush_delivers_newest_first_and_starts_a_new_window(self):
+		home = _Timeline()
+		for n in range(3):
+			self.batcher.add(home, _Item(str(n)))
+		self.batcher.flush()
+		self.assertEqual(home.loads, [[("2", ""), ("1", ""), ("0", "")]])
+		self.assertFalse(self.batcher._scheduled)
+
+		self.batcher.add(home, _Item("3"))
+		self.assertEqual(len(self.timer.calls), 2)
+		self.timer.calls[-1][1]()
+		self.assertEqual(home.loads[-1], [("3", "")])
+
+	def test_load_errors_are_reported(self):
+		class _Broken(_Timeline):
+			def load(self, items):
+				raise ValueError("bad")
+
+		errors = []
+		broken, home = _Broken(), _Timeline()
+		broken.app = type("App", (), {"handle_error": lambda app, e, where: errors.append(where)})()
+		self.batcher.add(broken, _Item("1"))
+		self.batcher.add(home, _Item("2"))
+		self.timer.fire()
+		self.assertEqual(errors, ["Stream update (main thread)"])
+		self.assertEqual(home.loads, [[("2", "")]])
+
+
+if __name__ == "__main__":
+	unittest.main()
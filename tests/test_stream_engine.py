@@ -0,0 +1,254 @@
+import json
+import os
+import socketserver
+import ssl
+import threading
+import unittest
+from unittest import mock
+
+from stream_engine import ReconnectPolicy, SSEParser, StreamEngine, StreamHTTPError, redirect_headers, stream_key, ws_accept_key
+
+
+def _proxy_env(proxy=""):
+	return {name: value for key, value in (("http_proxy", proxy), ("https_proxy", ""), ("no_proxy", "" if proxy else "*"))
+		for name in (key, key.upper())}
+
+
+def _chunk(data):
+	return b"%x\r\n%s\r\n" % (len(data), data)
+
+
+def _server_frame(message):
+	payload = json.dumps(message).encode()
+	return bytes([0x81, len(payload)]) + payload
+
+
+class _Handler(socketserver.StreamRequestHandler):
+	def handle(self):
+		request_line = self.rfile.readline().decode()
+		headers = {}
+		while True:
+			line = self.rfile.readline().decode().strip()
+			if not line:
+				break
+			name, _, value = line.partition(":")
+			headers[name.lower()] = value.strip()
+		self.server.requests.append((request_line.split()[1], headers))
+		if request_line.split()[1] == "/api/v1/streaming":
+			if not self.server.websockets:
+				self.wfile.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+				return
+			if self.server.unavailable:
+				self.server.unavailable -= 1
+				self.wfile.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\n\r\n")
+				return
+			accept = ws_accept_key(headers["sec-websocket-key"])
+			self.wfile.write(f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n".encode())
+			while len(self.server.subscribed) < 2:
+				head = self.rfile.read(2)
+				mask = self.rfile.read(4)
+				payload = bytes(b ^ mask[i & 3] for i, b in enumerate(self.rfile.read(head[1] & 0x7F)))
+				self.server.subscribed.append(json.loads(payload))
+			self.wfile.write(_server_frame({"stream": ["list", "42"], "event": "update", "payload": json.dumps({"id": "1"})}))
+			self.wfile.write(_server_frame({"stream": ["hashtag", "Cats"], "event": "delete", "payload": "9"}))
+			self.rfile.read()
+			return
+		if request_line.split()[1] == "/old":
+			self.wfile.write(b"HTTP/1.1 301 Moved\r\nLocation: /api/v1/streaming/user\r\nContent-Length: 0\r\n\r\n")
+			return
+		if request_line.split()[1] == "/elsewhere":
+			location = f"http://localhost:{self.server.server_address[1]}/api/v1/streaming/user"
+			self.wfile.write(f"HTTP/1.1 302 Found\r\nLocation: {location}\r\nContent-Length: 0\r\n\r\n".encode())
+			return
+		self.wfile.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n")
+		status = json.dumps({"id": "1", "content": "<p>hi</p>"}).encode()
+		self.wfile.write(_chunk(b":thump\n\nevent: update\ndata: " + status[:10]))
+		self.wfile.write(_chunk(status[10:] + b"\n\nevent: delete\ndata: 42\n\n"))
+		self.wfile.write(b"0\r\n\r\n")
+
+
+class SSEParserTests(unittest.TestCase):
+	def test_events_split_across_chunks(self):
+		parser = SSEParser()
+		self.assertEqual(parser.feed(b"event: upd"), [])
+		self.assertEqual(parser.feed(b"ate\r\ndata: {\"a\":"), [])
+		self.assertEqual(parser.feed(b" 1}\r\n\r\n:heartbeat\n\nevent: delete\ndata: 7\n\n"), [("update", {"a": 1}), ("delete", 7)])
+
+	def test_malformed_json_is_skipped(self):
+		self.assertEqual(SSEParser().feed(b"event: update\ndata: {nope\n\n"), [])
+
+
+class ReconnectPolicyTests(unittest.TestCase):
+	def test_network_errors_back_off_but_never_give_up(self):
+		policy = ReconnectPolicy(give_up_after=2)
+		delays = [policy.failure(ConnectionResetError()) for _ in range(12)]
+		self.assertEqual(delays[:3], [2, 4, 8])
+		self.assertEqual(delays[-1], ReconnectPolicy.MAX_DELAY)
+
+	def test_server_errors_give_up(self):
+		policy = ReconnectPolicy(give_up_after=3)
+		self.assertEqual([policy.failure(StreamHTTPError(404)) for _ in range(3)], [5, 10, None])
+		policy.reset()
+		self.assertEqual(policy.failure(StreamHTTPError(500)), 5)
+
+	def test_certificate_errors_give_up_at_once(self):
+		policy = ReconnectPolicy()
+		self.assertIsNone(policy.failure(ssl.SSLCertVerificationError("certificate verify failed")))
+		self.assertEqual(policy.failure(ssl.SSLError("ssl handshake reset")), 4)
+
+
+class RedirectTests(unittest.TestCase):
+	def test_token_stays_on_its_host(self):
+		headers = {"Authorization": "Bearer t", "User-Agent": "x"}
+		self.assertEqual(redirect_headers("https://a.social/x", "https://a.social/y", headers), headers)
+		self.assertEqual(redirect_headers("https://a.social/x", "https://b.social/x", headers), {"User-Agent": "x"})
+		self.assertEqual(redirect_headers("http://a.social/x", "https://a.social/x", headers), {"User-Agent": "x"})
+		with self.assertRaises(StreamHTTPError):
+			redirect_headers("https://a.social/x", "http://a.social/x", headers)
+
+
+class StreamEngineTests(unittest.TestCase):
+	def setUp(self):
+		environment = mock.patch.dict(os.environ, _proxy_env())
+		environment.start()
+		self.addCleanup(environment.stop)
+		self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _Handler)
+		self.server.daemon_threads = True
+		self.server.requests = []
+		self.server.subscribed = []
+		self.server.websockets = True
+		self.server.unavailable = 0
+		threading.Thread(target=self.server.serve_forever, daemon=True).start()
+		self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+	def tearDown(self):
+		self.server.shutdown()
+		self.server.server_close()
+
+	def test_follows_redirect_and_dispatches_events(self):
+		events = []
+		done = threading.Event()
+
+		def on_event(event_type, data):
+			events.append((event_type, data))
+			if len(events) == 2:
+				done.set()
+
+		engine = StreamEngine()
+		sub = engine.subscribe(lambda: (self.base + "/old", {"Authorization": "Bearer t"}), on_event, name="test")
+		self.assertTrue(done.wait(5))
+		sub.cancel()
+
+		self.assertEqual(events, [("update", {"id": "1", "content": "<p>hi</p>"}), ("delete", 42)])
+		self.assertEqual([path for path, _ in self.server.requests[:2]], ["/old", "/api/v1/streaming/user"])
+		self.assertEqual(self.server.requests[1][1]["authorization"], "Bearer t")
+
+	def _stream_once(self, url, headers):
+		events = []
+		done = threading.Event()
+
+		def on_event(event_type, data):
+			events.append(event_type)
+			if len(events) == 2:
+				done.set()
+
+		sub = StreamEngine().subscribe(lambda: (url, headers), on_event, name="test")
+		self.assertTrue(done.wait(5))
+		sub.cancel()
+
+	def test_redirect_to_another_host_drops_the_token(self):
+		self._stream_once(self.base + "/elsewhere", {"Authorization": "Bearer t"})
+		self.assertEqual([path for path, _ in self.server.requests[:2]], ["/elsewhere", "/api/v1/streaming/user"])
+		self.assertNotIn("authorization", self.server.requests[1][1])
+
+	def test_uses_proxy_from_environment(self):
+		with mock.patch.dict(os.environ, _proxy_env(self.base)):
+			self._stream_once("http://stream.invalid/api/v1/streaming/user", {})
+		self.assertEqual(self.server.requests[0][0], "http://stream.invalid/api/v1/streaming/user")
+		self.assertEqual(self.server.requests[0][1]["host"], "stream.invalid")
+
+	def test_https_through_proxy_tunnels(self):
+		proxy = self.base.replace("http://", "http://me:secret@")
+		with mock.patch.dict(os.environ, dict(_proxy_env(), HTTPS_PROXY=proxy, https_proxy=proxy, NO_PROXY="", no_proxy="")):
+			sub = StreamEngine().subscribe(lambda: ("https://stream.invalid/api/v1/streaming/user", {"Authorization": "Bearer t"}), lambda *a: None)
+			for _ in range(50):
+				if self.server.requests:
+					break
+				threading.Event().wait(0.1)
+			sub.cancel()
+		path, headers = self.server.requests[0]
+		self.assertEqual(path, "stream.invalid:443")
+		self.assertEqual(headers["proxy-authorization"], "Basic bWU6c2VjcmV0")
+		# The token only goes inside the tunnel
+		self.assertNotIn("authorization", headers)
+
+	def test_streams_share_one_thread(self):
+		engine = StreamEngine()
+		before = threading.active_count()
+		subs = [engine.subscribe(lambda: None, lambda *a: None) for _ in range(10)]
+		after = threading.active_count()
+		for sub in subs:
+			sub.cancel()
+
+		self.assertEqual(after - before, 1)
+
+	def _collect(self, count):
+		events = {}
+		done = threading.Event()
+
+		def handler(name):
+			def on_event(event_type, data):
+				events.setdefault(name, []).append((event_type, data))
+				if sum(len(v) for v in events.values()) == count:
+					done.set()
+			return on_event
+		return events, done, handler
+
+	def test_multiplexed_streams_share_one_websocket(self):
+		events, done, handler = self._collect(2)
+		mux = StreamEngine().multiplex(lambda: (self.base + "/api/v1/streaming", {}))
+		subs = [
+			mux.subscribe({"stream": "list", "list": "42"}, handler("list")),
+			mux.subscribe({"stream": "hashtag", "tag": "cats"}, handler("tag")),
+		]
+		self.assertTrue(done.wait(5))
+		for sub in subs:
+			sub.cancel()
+
+		self.assertEqual(events, {"list": [("update", {"id": "1"})], "tag": [("delete", "9")]})
+		self.assertEqual(len(self.server.requests), 1)
+		self.assertEqual(sorted(m["stream"] for m in self.server.subscribed), ["hashtag", "list"])
+		self.assertTrue(all(m["type"] == "subscribe" for m in self.server.subscribed))
+		self.assertFalse(mux.active)
+
+	def test_falls_back_to_sse_without_websockets(self):
+		self.server.websockets = False
+		events, done, handler = self._collect(2)
+		mux = StreamEngine().multiplex(lambda: (self.base + "/api/v1/streaming", {}))
+		sub = mux.subscribe({"stream": "user"}, handler("user"), fallback_request=lambda: (self.base + "/api/v1/streaming/user", {}))
+		self.assertTrue(done.wait(5))
+		sub.cancel()
+
+		self.assertTrue(mux.fallback)
+		self.assertEqual([e[0] for e in events["user"]], ["update", "delete"])
+		self.assertEqual([path for path, _ in self.server.requests[:2]], ["/api/v1/streaming", "/api/v1/streaming/user"])
+
+	def test_retries_websocket_after_server_errors(self):
+		self.server.unavailable = 2
+		events, done, handler = self._collect(1)
+		mux = StreamEngine().multiplex(lambda: (self.base + "/api/v1/streaming", {}))
+		with mock.patch.object(ReconnectPolicy, "BASE_DELAY", 0.05):
+			subs = [
+				mux.subscribe({"stream": "list", "list": "42"}, handler("list"), fallback_request=lambda: (self.base + "/api/v1/streaming/user", {})),
+				mux.subscribe({"stream": "hashtag", "tag": "cats"}, handler("tag")),
+			]
+			self.assertTrue(done.wait(5))
+		for sub in subs:
+			sub.cancel()
+
+		self.assertFalse(mux.fallback)
+		self.assertEqual([path for path, _ in self.server.requests[:3]], ["/api/v1/streaming"] * 3)
+
+	def test_stream_key_matches_messages(self):
+		self.assertEqual(stream_key({"stream": "hashtag", "tag": "Cats", "type": "subscribe"}), stream_key(["hashtag", "cats"]))
+		self.assertEqual(stream_key({"stream": "public:local"}), ("public:local",))
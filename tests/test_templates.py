@@ -0,0 +1,71 @@
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+
+from models import UniversalStatus, UniversalUser
+from templates import TemplateEngine
+
+
+class _App(object):
+	def __init__(self, demojify=False):
+		self.prefs = SimpleNamespace(demojify=demojify, demojify_post=False)
+
+	def demojify(self, text):
+		return str(text).replace("\U0001F600", "").strip()
+
+	def strip_html(self, text):
+		return text.replace("<p>", "").replace("</p>", "")
+
+	def parse_date(self, date):
+		return date.strftime("%H:%M")
+
+
+def _status(display_name="Alice", reblog=None):
+	user = UniversalUser(id="1", acct="alice@example.com", username="alice", display_name=display_name)
+	return UniversalStatus(id="s1", account=user, content="<p>hi</p>", text="hi",
+		created_at=datetime(2024, 1, 1, 12, 30), reblog=reblog)
+
+
+class TemplateEngineTests(unittest.TestCase):
+	def test_renders_default_post_template(self):
+		engine = TemplateEngine(_App())
+		compiled = engine.get("$account.display_name$ (@$account.acct$): $text$ $created_at$")
+
+		self.assertEqual(compiled.render(_status(), None, "hello"), "Alice (@alice@example.com): hello 12:30")
+		self.assertIs(engine.get(compiled.source), compiled)
+
+	def test_alias_wins_over_demojify(self):
+		engine = TemplateEngine(_App(demojify=True))
+		account = SimpleNamespace(prefs=SimpleNamespace(aliases={"1": "Al"}))
+		compiled = engine.get("$account.display_name$")
+
+		self.assertEqual(compiled.render(_status("\U0001F600"), account), "Al")
+		self.assertEqual(compiled.render(_status("\U0001F600"), None), "alice@example.com")
+
+	def test_demojify_pref_change_recompiles(self):
+		app = _App()
+		engine = TemplateEngine(app)
+		status = _status("Alice \U0001F600")
+
+		self.assertEqual(engine.get("$account.display_name$").render(status), "Alice \U0001F600")
+		app.prefs.demojify = True
+		self.assertEqual(engine.get("$account.display_name$").render(status), "Alice")
+
+	def test_missing_values(self):
+		engine = TemplateEngine(_App())
+		compiled = engine.get("$reblog.account.acct$|$nonexistent$|$5")
+
+		self.assertEqual(compiled.render(_status()), "|$nonexistent$|$5")
+
+	def test_text_is_not_reinterpreted(self):
+		engine = TemplateEngine(_App())
+		compiled = engine.get("$text$ $account.acct$")
+
+		self.assertEqual(compiled.render(_status(), None, "$account.acct$"), "$account.acct$ alice@example.com")
+
+	def test_invalidate(self):
+		engine = TemplateEngine(_App())
+		compiled = engine.get("$account.acct$")
+		engine.invalidate()
+
+		self.assertIsNot(engine.get("$account.acct$"), compiled)
@@ -0,0 +1,41 @@
+import unittest
+
+import text_utils
+from text_utils import collapse_whitespace, demojify, html_to_text
+
+
+class HtmlToTextTests(unittest.TestCase):
+	def test_blocks_and_breaks_become_spaces(self):
+		self.assertEqual(html_to_text("<p>one</p><p>two<br>three<BR />four</p><div>five</div>"), "one two three four five")
+
+	def test_inline_spans_do_not_split_urls(self):
+		html = '<a href="https://example.com/a"><span class="invisible">https://</span><span>example.com/a</span></a>'
+		self.assertEqual(html_to_text(html), "https://example.com/a")
+
+	def test_entities_are_decoded_and_whitespace_collapsed(self):
+		self.assertEqual(html_to_text("<p>  fish &amp; chips&nbsp;&nbsp;</p>\n<p>it&#39;s\tfine </p>"), "fish & chips it's fine")
+
+	def test_plain_text_and_empty(self):
+		self.assertEqual(html_to_text("no markup here"), "no markup here")
+		self.assertEqual(html_to_text(""), "")
+		self.assertEqual(html_to_text(None), "")
+
+	def test_collapse_whitespace(self):
+		self.assertEqual(collapse_whitespace(" line one\n\nline two "), "line one line two")
+
+
+class DemojifyTests(unittest.TestCase):
+	def test_removes_emoji_and_shortcodes_but_keeps_accents(self):
+		self.assertEqual(demojify("Zoë \U0001F600 :blobcat: José"), "Zoë   José")
+		self.assertEqual(demojify("\U0001F1FA\U0001F1E6\u2728"), "")
+
+	def test_ascii_fast_path(self):
+		self.assertEqual(demojify("plain name"), "plain name")
+		self.assertEqual(demojify("at 12:30"), "at 12:30")
+		self.assertEqual(demojify(42), "42")
+
+	def test_long_text_is_not_memoized(self):
+		text_utils._demojify_memo.cache_clear()
+		demojify("\U0001F600" + "x" * text_utils.DEMOJIFY_MEMO_MAX_LEN)
+		demojify("short \U0001F600")
+		self.assertEqual(text_utils._demojify_memo.cache_info().currsize, 1)
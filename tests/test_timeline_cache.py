@@ -0,0 +1,328 @@
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import mock
+
+from cache import CacheWriter, TimelineCache
+from models import UniversalNotification, UniversalStatus, UniversalUser
+
+
+def _user(uid):
+	return UniversalUser(id=uid, acct=f"user{uid}@example.com", username=f"user{uid}", display_name=f"User {uid}", _platform="mastodon")
+
+
+def _status(sid, author, reblog=None, quote=None):
+	return UniversalStatus(
+		id=sid,
+		account=author,
+		content=f"<p>post {sid}</p>",
+		text=f"post {sid}",
+		created_at=datetime(2024, 1, 1, 12, 0, 0),
+		reblog=reblog,
+		quote=quote,
+		_platform="mastodon",
+	)
+
+
+class TimelineCacheLoadTests(unittest.TestCase):
+	def setUp(self):
+		self._tmp = tempfile.TemporaryDirectory()
+		self.cache = TimelineCache(self._tmp.name, "acct")
+
+	def tearDown(self):
+		self.cache.close()
+		self._tmp.cleanup()
+
+	def test_load_timeline_matches_per_item_lookup(self):
+		alice, bob, carol = _user("1"), _user("2"), _user("3")
+		quoted = _status("q1", carol)
+		boosted = _status("b1", bob, quote=quoted)
+		items = [
+			_status("s3", alice, reblog=boosted),
+			_status("s2", bob, quote=quoted),
+			_status("s1", alice),
+		]
+		self.cache.save_timeline("home", "Home", None, items, "status")
+
+		loaded, metadata = self.cache.load_timeline("home", "Home", None, "status")
+
+		self.assertEqual([s.id for s in loaded], ["s3", "s2", "s1"])
+		self.assertEqual(metadata["since_id"], "s3")
+		for item in loaded:
+			single = self.cache.get_status(item.id)
+			self.assertEqual(item.account.acct, single.account.acct)
+			self.assertEqual(getattr(item.reblog, "id", None), getattr(single.reblog, "id", None))
+			self.assertEqual(getattr(item.quote, "id", None), getattr(single.quote, "id", None))
+		self.assertEqual(loaded[0].reblog.quote.account.acct, carol.acct)
+		self.assertEqual(loaded[1].quote.text, "post q1")
+
+	def test_load_timeline_marks_missing_quote_unresolved(self):
+		quoted = _status("q1", _user("3"))
+		self.cache.save_timeline("home", "Home", None, [_status("s1", _user("1"), quote=quoted)], "status")
+		self.cache._conn.execute("DELETE FROM statuses WHERE id = 'q1'")
+
+		loaded, _ = self.cache.load_timeline("home", "Home", None, "status")
+
+		self.assertIsNone(loaded[0].quote)
+		self.assertEqual(loaded[0]._unresolved_quote_id, "q1")
+
+	def test_load_notifications_hydrates_statuses_and_accounts(self):
+		me, fan = _user("1"), _user("2")
+		post = _status("s1", me)
+		notifications = [
+			UniversalNotification(id="n2", type="favourite", account=fan, created_at=datetime(2024, 1, 2), status=post, _platform="mastodon"),
+			UniversalNotification(id="n1", type="follow", account=fan, created_at=datetime(2024, 1, 1), _platform="mastodon"),
+		]
+		self.cache.save_timeline("notifications", "Notifications", None, notifications, "notification")
+
+		loaded, _ = self.cache.load_timeline("notifications", "Notifications", None, "notification")
+
+		self.assertEqual([n.id for n in loaded], ["n2", "n1"])
+		self.assertEqual(loaded[0].account.acct, fan.acct)
+		self.assertEqual(loaded[0].status.account.acct, me.acct)
+		self.assertIsNone(loaded[1].status)
+
+
+def _post(sid, author, text):
+	status = _status(sid, author)
+	status.text = text
+	status.content = f"<p>{text}</p>"
+	return status
+
+
+class TimelineCacheSearchTests(unittest.TestCase):
+	def setUp(self):
+		self._tmp = tempfile.TemporaryDirectory()
+		self.cache = TimelineCache(self._tmp.name, "acct")
+		self.alice, self.bob = _user("1"), _user("2")
+
+	def tearDown(self):
+		self.cache.close()
+		self._tmp.cleanup()
+
+	def test_saved_statuses_are_searchable(self):
+		boosted = _post("b1", self.bob, "Rust borrow checker tips")
+		items = [
+			_post("s1", self.alice, "Coffee and rust this morning"),
+			_status("s2", self.alice, reblog=boosted),
+			_post("s3", self.alice, "Tea, not coffee"),
+		]
+		self.cache.save_timeline("home", "Home", None, items, "status")
+
+		self.assertEqual(sorted(self.cache.search("rust")), ["b1", "s1"])
+		self.assertEqual(self.cache.search("coffee rust"), ["s1"])
+		# Words match as prefixes, in the post or the author
+		self.assertEqual(sorted(self.cache.search("borrow CHECK")), ["b1"])
+		self.assertEqual(sorted(self.cache.search("user2")), ["b1"])
+		self.assertEqual(self.cache.search("coffee", within=["s3"]), ["s3"])
+		self.assertEqual(self.cache.search("  \"*"), [])
+
+	def test_best_match_first(self):
+		self.cache.save_statuses_batch([
+			_post("s1", self.alice, "a long post that mentions cats once among many other words here"),
+			_post("s2", self.alice, "cats cats cats"),
+		])
+		self.assertEqual(self.cache.search("cats"), ["s2", "s1"])
+
+	def test_edits_are_reindexed(self):
+		self.cache.save_statuses_batch([_post("s1", self.alice, "first draft")])
+		self.cache.save_statuses_batch([_post("s1", self.alice, "second version")])
+
+		self.assertEqual(self.cache.search("draft"), [])
+		self.assertEqual(self.cache.search("version"), ["s1"])
+		self.assertEqual(self.cache._conn.execute("SELECT COUNT(*) FROM status_search").fetchone()[0], 1)
+
+	def test_index_statuses_without_caching(self):
+		notification = UniversalNotification(id="n1", type="mention", account=self.bob, created_at=datetime(2024, 1, 1),
+			status=_post("s9", self.bob, "hello there"), _platform="mastodon")
+		self.assertEqual(self.cache.index_statuses([notification]), 1)
+		self.assertEqual(self.cache.index_statuses([notification]), 0)
+		self.assertEqual(self.cache.search("hello"), ["s9"])
+		self.assertEqual(self.cache.load_statuses(["s9"]), {})
+
+	def test_conversations_index_their_last_status(self):
+		conversation = SimpleNamespace(id="c1", accounts=[self.bob], last_status=_post("s8", self.bob, "see you soon"))
+		self.assertEqual(self.cache.index_statuses([conversation]), 1)
+		self.assertEqual(self.cache.search("soon"), ["s8"])
+
+	def test_writer_indexes_loaded_items(self):
+		writer = self.cache.writer
+		self.assertTrue(writer.idle())
+		writer.index_statuses([_post("s7", self.alice, "queued for the index")])
+		self.assertTrue(writer.flush(timeout=5))
+		self.assertTrue(writer.idle())
+		self.assertEqual(self.cache.search("queued"), ["s7"])
+
+	def test_load_statuses_and_cleanup(self):
+		self.cache.save_timeline("home", "Home", None, [_post("s1", self.alice, "kept post")], "status")
+		self.cache.save_timeline("list", "Old", "7", [_post("s2", self.bob, "dropped post")], "status")
+		self.cache.index_statuses([_post("s3", self.bob, "loaded post")])
+
+		loaded = self.cache.load_statuses(["s2", "missing"])
+		self.assertEqual(list(loaded), ["s2"])
+		self.assertEqual(loaded["s2"].account.acct, self.bob.acct)
+
+		self.cache.cleanup_orphaned_data([("home", "Home", "")])
+		self.assertEqual(self.cache.search("post"), ["s1"])
+
+	def _drop_search_index(self):
+		for table in ("status_search", "status_search_ids", "status_search_backfill"):
+			self.cache._conn.execute(f"DROP TABLE {table}")
+		self.cache.close()
+
+	def test_existing_statuses_are_indexed_on_upgrade(self):
+		self.cache.save_statuses_batch([_post("s1", self.alice, "from before the index")])
+		self._drop_search_index()
+
+		self.cache = TimelineCache(self._tmp.name, "acct")
+		# In the background, on the writer
+		for _ in range(50):
+			if self.cache._search_backfill_row() is None:
+				break
+			time.sleep(0.1)
+		self.assertEqual(self.cache.search("before"), ["s1"])
+
+	def test_backfill_goes_in_chunks_and_resumes(self):
+		self.cache.save_statuses_batch([_post(f"s{n}", self.alice, f"old post {n}") for n in range(5)])
+		self._drop_search_index()
+		# Open without the writer starting the backfill
+		with mock.patch.object(CacheWriter, "backfill_search"):
+			self.cache = TimelineCache(self._tmp.name, "acct")
+
+		self.assertTrue(self.cache.backfill_search(limit=2))
+		self.assertEqual(len(self.cache.search("old")), 2)
+		self.cache.close()
+		with mock.patch.object(CacheWriter, "backfill_search"):
+			self.cache = TimelineCache(self._tmp.name, "acct")
+		self.assertTrue(self.cache.backfill_search(limit=2))
+		self.assertFalse(self.cache.backfill_search(limit=2))
+		self.assertEqual(sorted(self.cache.search("old")), [f"s{n}" for n in range(5)])
+		self.assertIsNone(self.cache._search_backfill_row())
+
+
+class TimelineCacheWriteTests(unittest.TestCase):
+	def setUp(self):
+		self._tmp = tempfile.TemporaryDirectory()
+		self.cache = TimelineCache(self._tmp.name, "acct")
+		self.alice = _user("1")
+
+	def tearDown(self):
+		self.cache.close()
+		self._tmp.cleanup()
+
+	def _save(self, ids, **kwargs):
+		self.cache.save_timeline("home", "Home", None, [_status(sid, self.alice) for sid in ids], "status", **kwargs)
+
+	def _stored(self):
+		rows = self.cache._conn.execute("SELECT item_id, position FROM timeline_items ORDER BY position").fetchall()
+		return {row[0]: row[1] for row in rows}
+
+	def _loaded(self):
+		return [s.id for s in self.cache.load_timeline("home", "Home", None, "status")[0]]
+
+	def test_only_new_and_moved_entries_are_written(self):
+		self._save(["s3", "s2", "s1"])
+		before = self._stored()
+		self._save(["s5", "s4", "s3", "s2", "s1"])
+		after = self._stored()
+		self.assertEqual(self._loaded(), ["s5", "s4", "s3", "s2", "s1"])
+		self.assertEqual({sid: after[sid] for sid in before}, before)
+
+		# s2 moved to the top, s4 gone, s6 new between s5 and s3
+		self._save(["s2", "s5", "s6", "s3", "s1"])
+		self.assertEqual(self._loaded(), ["s2", "s5", "s6", "s3", "s1"])
+		moved = self._stored()
+		self.assertNotIn("s4", moved)
+		self.assertEqual([moved[sid] for sid in ("s5", "s3", "s1")], [after[sid] for sid in ("s5", "s3", "s1")])
+
+	def test_renumbers_when_there_is_no_room(self):
+		self._save(["s2", "s1"])
+		self.cache._conn.execute("UPDATE timeline_items SET position = 1 WHERE item_id = 's1'")
+		self.cache._conn.execute("UPDATE timeline_items SET position = 0 WHERE item_id = 's2'")
+		self.cache._conn.commit()
+		self._save(["s2", "s4", "s3", "s1"])
+		self.assertEqual(self._loaded(), ["s2", "s4", "s3", "s1"])
+
+	def test_matches_saved_order_after_random_changes(self):
+		rng = random.Random(7)
+		ids = []
+		serial = 0
+		for _ in range(60):
+			for _ in range(rng.randint(0, 5)):
+				serial += 1
+				ids.insert(rng.choice((0, 0, len(ids), rng.randint(0, len(ids)))), f"s{serial}")
+			if ids and rng.random() < 0.3:
+				ids.insert(rng.randint(0, len(ids)), ids.pop(rng.randrange(len(ids))))
+			if len(ids) > 1 and rng.random() < 0.3:
+				del ids[rng.randrange(len(ids))]
+			if ids:
+				self._save(ids)
+				self.assertEqual(self._loaded(), ids)
+
+	def test_duplicates_and_limit(self):
+		self._save(["s3", "s2", "s3", "s1"], limit=3)
+		self.assertEqual(self._loaded(), ["s3", "s2"])
+
+	def test_unchanged_statuses_are_not_rewritten(self):
+		self._save(["s2", "s1"])
+		self.cache._conn.execute("UPDATE statuses SET text = 'stale'")
+		self.cache._conn.commit()
+		items = [_status("s2", self.alice), _status("s1", self.alice)]
+		items[0].favourites_count = 3
+		self.cache.save_timeline("home", "Home", None, items, "status")
+		texts = dict(self.cache._conn.execute("SELECT id, text FROM statuses").fetchall())
+		self.assertEqual(texts, {"s2": "post s2", "s1": "stale"})
+
+	def test_writer_keeps_the_newest_save(self):
+		writer = self.cache.writer
+		with self.cache._lock:
+			# The writer can't save until the lock is released
+			writer.save_timeline("home", "Home", None, [_status("s1", self.alice)], "status")
+			writer.save_timeline("home", "Home", None, [_status("s2", self.alice)], "status")
+			writer.save_timeline("mentions", "Mentions", None, [_status("s3", self.alice)], "status")
+		self.assertTrue(writer.flush(timeout=5))
+		self.assertEqual(self._loaded(), ["s2"])
+		self.assertEqual([s.id for s in self.cache.load_timeline("mentions", "Mentions", None, "status")[0]], ["s3"])
+
+	def test_close_gives_up_on_a_stuck_writer(self):
+		writer = self.cache.writer
+		with self.cache._lock:
+			# The writer takes the first save and then waits for the lock
+			writer.save_timeline("home", "Home", None, [_status("s1", self.alice)], "status")
+			writer.save_timeline("mentions", "Mentions", None, [_status("s2", self.alice)], "status")
+			started = time.monotonic()
+			self.assertFalse(writer.flush(timeout=0.2))
+			writer.close(timeout=0.2)
+			self.assertLess(time.monotonic() - started, 2)
+		writer._thread.join(5)
+		self.assertEqual(self._loaded(), ["s1"])
+		self.assertEqual(self.cache.load_timeline("mentions", "Mentions", None, "status")[0], [])
+
+	def test_cache_close_does_not_wait_for_a_stuck_write(self):
+		release = threading.Event()
+
+		def stuck(*args, **kwargs):
+			with self.cache._lock:
+				release.wait(5)
+
+		with mock.patch.object(self.cache, "save_timeline", stuck):
+			self.cache.writer.save_timeline("home", "Home", None, [], "status")
+			started = time.monotonic()
+			self.cache.close(timeout=0.2)
+			self.assertLess(time.monotonic() - started, 2)
+		release.set()
+
+	def test_close_writes_queued_saves(self):
+		self.cache.writer.save_timeline("home", "Home", None, [_status("s1", self.alice)], "status")
+		self.cache.close()
+		self.cache = TimelineCache(self._tmp.name, "acct")
+		self.assertEqual(self._loaded(), ["s1"])
+
+
+if __name__ == "__main__":
+	unittest.main()
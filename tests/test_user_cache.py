@@ -0,0 +1,140 @@
+import tempfile
+import threading
+import unittest
+
+from cache import TimelineCache
+from models import UniversalUser, UserCache
+
+
+def _user(uid, acct):
+	return UniversalUser(id=uid, acct=acct, username=acct.split("@")[0], display_name=acct)
+
+
+class UserCacheTests(unittest.TestCase):
+	def test_lookup_by_id_and_name(self):
+		cache = UserCache("", "mastodon", "me")
+		cache.add_user(_user("1", "Alice@example.com"))
+
+		self.assertEqual(cache.lookup_by_id(1).acct, "Alice@example.com")
+		self.assertEqual(cache.lookup_by_name("@alice@EXAMPLE.com").id, "1")
+		self.assertEqual(cache.lookup_by_name("alice").id, "1")
+		self.assertEqual(cache.stats()["hits"], 3)
+
+	def test_readding_moves_user_to_front_and_reindexes(self):
+		cache = UserCache("", "mastodon", "me")
+		cache.add_user(_user("1", "alice@example.com"))
+		cache.add_user(_user("2", "bob@example.com"))
+		cache.add_user(_user("1", "alice2@example.com"))
+
+		self.assertEqual([u.id for u in cache.get_all_users()], ["1", "2"])
+		self.assertIsNone(cache.lookup_by_name("alice@example.com"))
+		self.assertEqual(cache.lookup_by_name("alice2").id, "1")
+
+	def test_evicts_least_recently_added(self):
+		cache = UserCache("", "mastodon", "me", max_size=2)
+		cache.add_user(_user("1", "a@x"))
+		cache.add_user(_user("2", "b@x"))
+		cache.add_user(_user("3", "c@x"))
+
+		self.assertEqual(len(cache), 2)
+		self.assertIsNone(cache.lookup_by_id("1"))
+		self.assertIsNone(cache.lookup_by_name("a"))
+		self.assertEqual(cache.lookup_by_name("c@x").id, "3")
+
+	def test_username_lookup_prefers_most_recent_user(self):
+		cache = UserCache("", "mastodon", "me")
+		cache.add_user(_user("1", "sam@one.example"))
+		cache.add_user(_user("2", "sam@two.example"))
+
+		self.assertEqual(cache.lookup_by_name("sam").id, "2")
+
+	def test_unknown_users_are_deduplicated(self):
+		cache = UserCache("", "mastodon", "me")
+		cache.lookup_by_id("9")
+		cache.lookup_by_id(9)
+		self.assertEqual(cache.unknown_users, {"9"})
+		self.assertEqual(cache.stats()["misses"], 2)
+
+		cache.add_user(_user("9", "late@x"))
+		self.assertEqual(cache.unknown_users, set())
+
+	def test_api_callback_result_is_cached(self):
+		cache = UserCache("", "mastodon", "me")
+		found = cache.lookup_by_name("remote@x", lambda name: _user("5", name))
+
+		self.assertEqual(found.id, "5")
+		self.assertIs(cache.lookup_by_id("5"), found)
+
+
+class PersistentUserCacheTests(unittest.TestCase):
+	def setUp(self):
+		self._tmp = tempfile.TemporaryDirectory()
+		self.store = TimelineCache(self._tmp.name, "me")
+
+	def tearDown(self):
+		self.store.close()
+		self._tmp.cleanup()
+
+	def test_users_saved_in_one_session_resolve_in_the_next(self):
+		first = UserCache("", "mastodon", "me", store=self.store)
+		first.add_user(_user("7", "Dana@social.example"))
+		first.save()
+
+		second = UserCache("", "mastodon", "me", store=self.store)
+		self.assertEqual(second.lookup_by_name("dana@social.example").id, "7")
+		self.assertEqual(second.lookup_by_name("dana").id, "7")
+		self.assertEqual(second.lookup_by_id("7").acct, "Dana@social.example")
+		self.assertEqual(second.stats()["disk_hits"], 1)
+		self.assertEqual(second.stats()["hits"], 2)
+		self.assertEqual(second.unknown_users, set())
+
+	def test_search_merges_memory_and_disk_matches(self):
+		old = UserCache("", "mastodon", "me", store=self.store)
+		old.add_user(_user("1", "robin@a.example"))
+		old.add_user(_user("2", "rob@b.example"))
+		old.add_user(_user("3", "zed@c.example"))
+		old.save()
+
+		cache = UserCache("", "mastodon", "me", store=self.store)
+		cache.add_user(_user("4", "roberta@d.example"))
+
+		self.assertEqual([u.id for u in cache.search("@rob")][0], "4")
+		self.assertEqual(sorted(u.id for u in cache.search("rob")), ["1", "2", "4"])
+		self.assertEqual(cache.search("rob%"), [])
+
+	def test_search_does_not_wait_for_the_writer(self):
+		cache = UserCache("", "mastodon", "me", store=self.store)
+		cache.add_user(_user("1", "robin@a.example"))
+		cache.save()
+		results = []
+		with self.store._lock:
+			# The writer holds the lock while it saves
+			searcher = threading.Thread(target=lambda: results.append(self.store.search_users_prefix("rob")))
+			searcher.start()
+			searcher.join(5)
+			self.assertFalse(searcher.is_alive())
+		self.assertEqual([u.id for u in results[0]], ["1"])
+
+	def test_search_uses_the_indexes(self):
+		plan = " ".join(row[3] for row in self.store._conn.execute(
+			"EXPLAIN QUERY PLAN SELECT * FROM users WHERE acct LIKE 'a%' ESCAPE '\\' "
+			"OR username LIKE 'a%' ESCAPE '\\' OR display_name LIKE 'a%' ESCAPE '\\'"))
+		self.assertNotIn("SCAN users", plan)
+		self.assertIn("idx_users_display_name", plan)
+
+	def test_load_evicts_users_not_seen_recently(self):
+		cache = UserCache("", "mastodon", "me", store=self.store, max_age_days=30)
+		cache.add_user(_user("1", "stale@x"))
+		cache.add_user(_user("2", "fresh@x"))
+		cache.save()
+		self.store._conn.execute("UPDATE users SET cached_at = '2000-01-01T00:00:00' WHERE id = '1'")
+
+		cache.load()
+
+		fresh = UserCache("", "mastodon", "me", store=self.store)
+		self.assertIsNone(fresh.lookup_by_id("1"))
+		self.assertEqual(fresh.lookup_by_id("2").acct, "fresh@x")
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,71 @@
+"""Text helpers shared by the application and platform models: HTML-to-text
+conversion and emoji removal."""
+
+import functools
+import html
+import re
+
+# Block-level closers and line breaks become a space so words in adjacent
+# paragraphs don't run together. Inline elements like <span> must NOT add a
+# space - Mastodon uses spans within URLs (e.g. <span class="invisible">https://</span>)
+# and a space would turn "https://example.com" into "https:// example.com".
+_block_re = re.compile(r'</(?:p|div)>|<br\s*/?>', re.IGNORECASE)
+_tag_re = re.compile(r'<[^>]+>')
+
+
+def collapse_whitespace(text):
+	"""Collapse runs of whitespace to single spaces and strip the ends."""
+	return ' '.join(text.split())
+
+
+def html_to_text(text):
+	"""Strip HTML tags and decode entities, preserving spacing for block elements."""
+	if not text:
+		return ""
+	if '<' in text:
+		text = _tag_re.sub('', _block_re.sub(' ', text))
+	if '&' in text:
+		text = html.unescape(text)
+	return ' '.join(text.split())
+
+
+# Mastodon-style custom emoji shortcodes like :emoji_name:
+_shortcode_re = re.compile(r':[a-zA-Z0-9_]+:')
+
+# Most Unicode emoji ranges
+_emoji_re = re.compile(
+	"["
+	"\U0001F300-\U0001F9FF"  # Miscellaneous Symbols and Pictographs, Emoticons, etc.
+	"\U0001FA00-\U0001FAFF"  # Chess, symbols, etc.
+	"\U00002600-\U000027BF"  # Misc symbols, Dingbats
+	"\U0001F600-\U0001F64F"  # Emoticons
+	"\U0001F680-\U0001F6FF"  # Transport and Map
+	"\U0001F1E0-\U0001F1FF"  # Flags
+	"\U00002300-\U000023FF"  # Misc Technical
+	"\U00002B50-\U00002B55"  # Stars
+	"\U0000FE00-\U0000FE0F"  # Variation Selectors
+	"\U0000200D"             # Zero Width Joiner
+	"\U00003030\U000025AA\U000025AB\U000025B6\U000025C0\U000025FB-\U000025FE"
+	"]+"
+)
+
+# Strings up to this length (display names, short posts) go through the memo
+DEMOJIFY_MEMO_MAX_LEN = 100
+
+
+def _demojify(text):
+	return _emoji_re.sub('', _shortcode_re.sub('', text))
+
+
+_demojify_memo = functools.lru_cache(maxsize=4096)(_demojify)
+
+
+def demojify(text):
+	"""Remove emoji from text while preserving accented characters."""
+	text = str(text)
+	# Every emoji is non-ASCII and every shortcode contains ':'
+	if text.isascii() and ':' not in text:
+		return text
+	if len(text) <= DEMOJIFY_MEMO_MAX_LEN:
+		return _demojify_memo(text)
+	return _demojify(text)
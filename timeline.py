@@ -1,5 +1,6 @@
 from mastodon import MastodonError
 import collections
+import dataclasses
 import time
 import speak
 import sound
@@ -9,11 +10,38 @@ import wx
 from datetime import datetime, timezone
 from GUI import main
 from models import UniversalStatus, UniversalUser
+from platforms.mastodon.models import attrib_dict
+import poll_scheduler
+import rate_limit
+from fusion_merge import FusionMerger
+from status_index import StatusList
+from status_filter import StatusFilter
+
+# Timeline types fed by the account's user stream
+USER_STREAM_TYPES = ("home", "notifications", "mentions", "conversations")
+# Timeline types that are never polled
+UNPOLLED_TYPES = ("conversation", "fusion", "history")
+# List membership changes rarely; refetch it this often (seconds)
+LIST_MEMBERS_REFRESH = 30 * 60
+
+
+def _original_flag(name):
+	"""An interaction flag read from (and written to) the wrapped item, so reused Fusion items stay current."""
+	def get(self):
+		return getattr(self.original, name, False)
+
+	def set(self, value):
+		setattr(self.original, name, value)
+	return property(get, set)
 
 
 class FusionTimelineItem(object):
 	"""Normalized item for the virtual Fusion timeline."""
 
+	favourited = _original_flag('favourited')
+	reblogged = _original_flag('reblogged')
+	bookmarked = _original_flag('bookmarked')
+
 	def __init__(self, source, source_account, item_type, author, timestamp, time_text, text, post_url, original, notif_type=None):
 		self.source = source
 		self.source_account = source_account
@@ -30,9 +58,6 @@ class FusionTimelineItem(object):
 		self.account = getattr(original, 'account', None)
 		self.reblog = getattr(original, 'reblog', None)
 		self.quote = getattr(original, 'quote', None)
-		self.favourited = getattr(original, 'favourited', False)
-		self.reblogged = getattr(original, 'reblogged', False)
-		self.bookmarked = getattr(original, 'bookmarked', False)
 		self.url = post_url
 		self._fusion_item = True
 		self._display_cache = self.accessible_label()
@@ -83,7 +108,7 @@ class TimelineSettings(object):
 
 class timeline(object):
 	def __init__(self, account, name, type, data=None, user=None, status=None, silent=False):
-		self.members = []
+		self.members = set()  # str ids of list members, for routing stream events
 		self.account = account
 		self.app = account.app
 		self.status = status
@@ -119,7 +144,7 @@ class timeline(object):
 		self._last_load_time = None  # Timestamp of last successful load (for gap detection)
 		self._gap_idle_threshold = 600  # Seconds of idle time before gap detection triggers (10 minutes)
 		# Per-timeline streaming support
-		self._stream_thread = None
+		self._stream_subscription = None
 		self._stream_started = False
 		self._stream_lock = threading.Lock()
 
@@ -129,7 +154,7 @@ class timeline(object):
 				self.read = i.read
 				self.hide = i.hide
 
-		if self.type == "user" and self.name != "Sent" or self.type == "conversation" or self.type == "search" or self.type == "list":
+		if self.type == "user" and self.name != "Sent" or self.type == "conversation" or self.type == "search" or self.type == "history" or self.type == "list":
 			if not silent:
 				sound.play(self.account, "open")
 			self.removable = True
@@ -213,15 +238,13 @@ class timeline(object):
 			else:
 				self.func = lambda **kwargs: self.account.api.timeline_list(id=self.data, **kwargs)
 			# Fetch list members for streaming (in background to not block startup)
-			def fetch_members():
-				try:
-					members = self.account.api.list_accounts(id=self.data)
-					self.members = [m.id for m in members]
-				except:
-					pass
-			threading.Thread(target=fetch_members, daemon=True).start()
+			threading.Thread(target=self.refresh_members, daemon=True).start()
 		elif self.type == "search":
 			self.func = lambda **kwargs: self._search_statuses(**kwargs)
+		elif self.type == "history":
+			# Posts in the local search index (loaded timelines and the cache); works offline
+			self.func = lambda **kwargs: self._search_history(**kwargs)
+			self.removable = True
 		elif self.type == "feed":
 			# Bluesky custom feed
 			if hasattr(self.account, '_platform') and self.account._platform:
@@ -286,6 +309,7 @@ class timeline(object):
 			self.removable = True
 		elif self.type == "fusion":
 			self.func = self._load_fusion_items
+			self._fusion_merger = FusionMerger()
 
 		# Load saved filter settings if any
 		from GUI.timeline_filter import get_saved_filter
@@ -300,6 +324,10 @@ class timeline(object):
 			# skip the initial background load so they populate fresh only when shown.
 			if self.type == "fusion":
 				pass
+			elif getattr(self.app, 'startup', None) and self.app.startup.defer(self):
+				# Created during app startup - the startup scheduler restores the
+				# cache and refreshes once every account's timelines exist.
+				pass
 			elif self._should_use_cache() and self._load_from_cache():
 				# Cache loaded successfully - spawn background refresh thread
 				threading.Thread(target=self._refresh_after_cache, daemon=True).start()
@@ -309,6 +337,98 @@ class timeline(object):
 		else:
 			self.load_conversation()
 
+	@property
+	def statuses(self):
+		return self._statuses
+
+	@statuses.setter
+	def statuses(self, items):
+		# Keep the items indexed in the account's StatusIndex (status_index.StatusList)
+		old = self.__dict__.get('_statuses')
+		self._statuses = StatusList(self, items)
+		if old is not None:
+			old.release()
+
+	@property
+	def _unfiltered_statuses(self):
+		try:
+			return self.__dict__['_unfiltered']
+		except KeyError:
+			raise AttributeError('_unfiltered_statuses')
+
+	@_unfiltered_statuses.setter
+	def _unfiltered_statuses(self, items):
+		old = self.__dict__.get('_unfiltered')
+		self._unfiltered = StatusList(self, items) if items is not None else None
+		if old is not None:
+			old.release()
+
+	@_unfiltered_statuses.deleter
+	def _unfiltered_statuses(self):
+		old = self.__dict__.pop('_unfiltered', None)
+		if old is not None:
+			old.release()
+
+	def release_items(self):
+		"""Take this timeline's items out of the account's status index (the timeline is closing)."""
+		self._statuses.release()
+		if self.__dict__.get('_unfiltered') is not None:
+			self._unfiltered.release()
+
+	def remove_status(self, status_id):
+		"""Remove an item deleted on the server. Returns its former position, or None if it isn't loaded."""
+		status_id = str(status_id)
+		self._status_ids.discard(status_id)
+		unfiltered = self.__dict__.get('_unfiltered')
+		if unfiltered is not None:
+			position = unfiltered.position(status_id)
+			if position is not None:
+				unfiltered.pop(position)
+		position = self.statuses.position(status_id)
+		if position is None:
+			return None
+		if position < self.index:
+			self.index = max(0, self.index - 1)
+		elif position == self.index and self.index >= len(self.statuses) - 1:
+			# Deleted item was at current position and at end of list
+			self.index = max(0, len(self.statuses) - 2)
+		self.statuses.pop(position)
+		cache = getattr(self, '_display_list_cache', None)
+		if cache is not None and len(cache) == len(self.statuses) + 1:
+			del cache[position]
+		else:
+			self.invalidate_display_cache()
+		return position
+
+	def replace_status(self, status):
+		"""Swap in an edited version of a loaded status. Returns its position, or None if it isn't loaded."""
+		unfiltered = self.__dict__.get('_unfiltered')
+		if unfiltered is not None:
+			position = unfiltered.position(status.id)
+			if position is not None:
+				unfiltered[position] = status
+		position = self.statuses.position(status.id)
+		if position is None:
+			return None
+		self.statuses[position] = status
+		self.app.render_cache.invalidate(status)
+		cache = getattr(self, '_display_list_cache', None)
+		if self.type != "fusion" and cache is not None and len(cache) == len(self.statuses):
+			cache[position] = self._get_display_string(status)
+		else:
+			self.invalidate_display_cache()
+		return position
+
+	def refresh_item(self, item):
+		"""Re-render one item after its state changed, without rebuilding the display list."""
+		self.app.render_cache.invalidate(item)
+		cache = getattr(self, '_display_list_cache', None)
+		if self.type == "fusion" or cache is None or len(cache) != len(self.statuses):
+			return
+		position = self.statuses.position(getattr(item, 'id', None))
+		if position is not None and self.statuses[position] is item:
+			cache[position] = self._get_display_string(item)
+
 	def _load_remote_user(self, **kwargs):
 		"""Helper to load remote user timeline"""
 		if hasattr(self.account, '_platform') and self.account._platform:
@@ -353,7 +473,7 @@ class timeline(object):
 	def _load_fusion_items(self, **kwargs):
 		"""Combine already-loaded timeline items from real accounts."""
 		source_timeline_type = self.data or "home"
-		items = []
+		sources = []
 		for account in self.app.accounts:
 			if account is self.account or getattr(account, 'is_virtual', False):
 				continue
@@ -365,33 +485,37 @@ class timeline(object):
 			source_timeline = account.get_timeline_by_type(source_timeline_type) if hasattr(account, 'get_timeline_by_type') else None
 			if not source_timeline:
 				continue
-			source = "Mastodon" if platform_type == "mastodon" else "Bluesky"
-			for item in list(getattr(source_timeline, 'statuses', [])):
-				notif_type = None
-				if source_timeline_type == "notifications":
-					status_for_url = getattr(item, 'status', None)
-					author_obj = getattr(item, 'account', None)
-					timestamp = self._normalize_fusion_timestamp(getattr(item, 'created_at', None))
-					raw_notif_type = getattr(item, 'type', None)
-					notif_type = self.app.get_notification_type_label(raw_notif_type) if raw_notif_type else None
-					text = self.app.get_notification_status_text(status_for_url, account=account)
-					post_url = getattr(status_for_url, 'url', None) if status_for_url else None
-				else:
-					author_obj = getattr(item, 'account', None)
-					timestamp = self._normalize_fusion_timestamp(getattr(item, 'created_at', None))
-					text = self.app.process_status(item, return_only_text=True, account=account)
-					post_url = getattr(item, 'url', None)
-				author = ""
-				if author_obj:
-					author = getattr(author_obj, 'display_name', '') or getattr(author_obj, 'acct', '')
-				time_text = self.app.parse_date(timestamp)
-				items.append(FusionTimelineItem(source, account, source_timeline_type, author, timestamp, time_text, text, post_url, item, notif_type=notif_type))
-
-		items.sort(key=lambda item: item.timestamp, reverse=True)
+			sources.append((account, list(getattr(source_timeline, 'statuses', []))))
+
+		# Only items the sources gained since the last merge are rendered
+		items = self._fusion_merger.merge(sources, lambda account, item: self._make_fusion_item(account, source_timeline_type, item),
+			stamp=self.app.render_cache.stamp())
 		if items:
 			return items
 		return self._load_fusion_placeholder()
 
+	def _make_fusion_item(self, account, source_timeline_type, item):
+		source = "Mastodon" if getattr(account.prefs, 'platform_type', '') == "mastodon" else "Bluesky"
+		notif_type = None
+		if source_timeline_type == "notifications":
+			status_for_url = getattr(item, 'status', None)
+			author_obj = getattr(item, 'account', None)
+			timestamp = self._normalize_fusion_timestamp(getattr(item, 'created_at', None))
+			raw_notif_type = getattr(item, 'type', None)
+			notif_type = self.app.get_notification_type_label(raw_notif_type) if raw_notif_type else None
+			text = self.app.get_notification_status_text(status_for_url, account=account)
+			post_url = getattr(status_for_url, 'url', None) if status_for_url else None
+		else:
+			author_obj = getattr(item, 'account', None)
+			timestamp = self._normalize_fusion_timestamp(getattr(item, 'created_at', None))
+			text = self.app.process_status(item, return_only_text=True, account=account)
+			post_url = getattr(item, 'url', None)
+		author = ""
+		if author_obj:
+			author = getattr(author_obj, 'display_name', '') or getattr(author_obj, 'acct', '')
+		time_text = self.app.parse_date(timestamp)
+		return FusionTimelineItem(source, account, source_timeline_type, author, timestamp, time_text, text, post_url, item, notif_type=notif_type)
+
 	def _search_statuses(self, **kwargs):
 		"""Helper to search and return only statuses"""
 		# Extract only valid search parameters (avoid passing unsupported kwargs)
@@ -422,6 +546,37 @@ class timeline(object):
 			return result.statuses
 		return result.get('statuses', [])
 
+	def _search_history(self, **kwargs):
+		"""Loaded and cached posts matching self.data, best match first."""
+		cache = self._get_cache()
+		# One page of ranked results; there's nothing older to page to
+		if kwargs.get('max_id') or not cache or not cache.search_available():
+			return []
+		# Loaded posts are indexed as they load
+		cache.writer.flush()
+		ids = cache.search(self.data, limit=kwargs.get('limit', 40) * 5)
+		# Prefer the copies already loaded, which carry the current counts and state
+		loaded = {}
+		index = getattr(self.account, 'status_index', None)
+		if index is not None:
+			for status_id in ids:
+				for tl, item, target in index.holders(status_id):
+					if tl is not self:
+						loaded[status_id] = target
+						break
+		cached = cache.load_statuses([status_id for status_id in ids if status_id not in loaded])
+		return [loaded.get(status_id) or cached[status_id] for status_id in ids if status_id in loaded or status_id in cached]
+
+	def _index_for_search(self, items):
+		"""Have the cache writer add the statuses in newly loaded items to the search index."""
+		# Fusion items belong to their own accounts' timelines, and scheduled
+		# posts aren't posted yet
+		if self.type in ("fusion", "scheduled") or not items:
+			return
+		cache = self._get_cache()
+		if cache and cache.search_available():
+			cache.writer.index_statuses(list(items))
+
 	@property
 	def supports_streaming(self):
 		"""Check if this timeline type supports streaming."""
@@ -455,6 +610,21 @@ class timeline(object):
 			return f"{base_url}/api/v1/streaming/hashtag?tag={tag}"
 		return None
 
+	@property
+	def stream_params(self):
+		"""Subscribe parameters for this timeline on the account's streaming websocket."""
+		if not self.supports_streaming:
+			return None
+		if self.type == 'list':
+			return {"stream": "list", "list": str(self.data)}
+		elif self.type == 'local':
+			return {"stream": "public:local"}
+		elif self.type == 'federated':
+			return {"stream": "public"}
+		elif self.type == 'search' and self.data and str(self.data).startswith('#'):
+			return {"stream": "hashtag", "tag": str(self.data).lstrip('#')}
+		return None
+
 	def start_stream(self):
 		"""Start streaming for this timeline if supported."""
 		if not self.supports_streaming:
@@ -465,109 +635,65 @@ class timeline(object):
 		with self._stream_lock:
 			if self._stream_started:
 				return
-			if self._stream_thread is not None and self._stream_thread.is_alive():
+			if self._stream_subscription is not None and self._stream_subscription.active:
 				return
 
 			self._stream_started = True
-			self._stream_thread = threading.Thread(
-				target=self._run_stream,
-				daemon=True
-			)
-			self._stream_thread.start()
+			# Rides on the account's websocket; _stream_request is the SSE fallback
+			self._stream_subscription = self.account.get_stream_mux().subscribe(
+				self.stream_params,
+				lambda event_type, data: self._handle_stream_event(event_type, data, attrib_dict),
+				fallback_request=self._stream_request,
+				name=f"{getattr(self.account.me, 'acct', '')}: {self.name}",
+				give_up_after=10,
+				on_give_up=self.stop_stream)
 
 	def stop_stream(self):
 		"""Stop streaming for this timeline."""
 		with self._stream_lock:
 			self._stream_started = False
-			# Thread will exit on next iteration when it checks _stream_started
-
-	def _run_stream(self):
-		"""Run the streaming connection for this timeline."""
-		import requests
-		import json
-		from mastodon import AttribAccessDict
-		from platforms.mastodon.models import mastodon_status_to_universal
+			if self._stream_subscription is not None:
+				self._stream_subscription.cancel()
+				self._stream_subscription = None
+
+	def covering_stream(self):
+		"""The stream subscription that delivers this timeline's new items, if any."""
+		if self._stream_subscription is not None:
+			return self._stream_subscription
+		# The user stream carries home, notifications, mentions, direct messages and our own posts
+		if self.type in USER_STREAM_TYPES or (self.type == "user" and self.name == "Sent"):
+			return getattr(self.account, 'stream_subscription', None)
+		return None
 
-		thread_id = threading.current_thread().ident
-		consecutive_errors = 0
-		base_delay = 5
-		max_delay = 300
-
-		def convert_to_attrib_dict(obj):
-			"""Recursively convert dicts to AttribAccessDict for attribute access."""
-			if isinstance(obj, dict):
-				converted = {k: convert_to_attrib_dict(v) for k, v in obj.items()}
-				return AttribAccessDict(**converted)
-			elif isinstance(obj, list):
-				return [convert_to_attrib_dict(item) for item in obj]
-			return obj
-
-		while self._stream_started:
-			try:
-				# Check if we're still the active stream thread
-				if self._stream_thread is None or self._stream_thread.ident != thread_id:
-					return
-
-				stream_url = self.stream_endpoint
-				if not stream_url:
-					return
-
-				# Only list timelines require authentication
-				# Public streams (local, federated, hashtag, instance) don't need auth
-				from version import APP_NAME, APP_VERSION
-				headers = {
-					"Accept": "text/event-stream",
-					"User-Agent": f"{APP_NAME}/{APP_VERSION}",
-				}
-				if self.type == 'list':
-					headers["Authorization"] = f"Bearer {self.account.prefs.access_token}"
-
-				with requests.get(stream_url, headers=headers, stream=True, timeout=300) as response:
-					response.raise_for_status()
-					consecutive_errors = 0
-
-					event_type = None
-					data_lines = []
-
-					for line in response.iter_lines():
-						if not self._stream_started:
-							return
-						if self._stream_thread is None or self._stream_thread.ident != thread_id:
-							return
+	def refresh_members(self):
+		"""Fetch the accounts in this list, used to route user stream posts into it."""
+		try:
+			members = self.account.api.list_accounts(id=self.data)
+			self.members = set(str(m.id) for m in members)
+			self._members_fetched = time.time()
+		except:
+			pass
 
-						if line:
-							line = line.decode('utf-8')
-							if line.startswith('event:'):
-								event_type = line[6:].strip()
-							elif line.startswith('data:'):
-								data_lines.append(line[5:].strip())
-						else:
-							# Empty line = end of event
-							if event_type and data_lines:
-								data_str = '\n'.join(data_lines)
-								try:
-									data = json.loads(data_str)
-									self._handle_stream_event(event_type, data, convert_to_attrib_dict)
-								except json.JSONDecodeError:
-									pass
-							event_type = None
-							data_lines = []
-
-			except requests.exceptions.Timeout:
-				time.sleep(2)
-				continue
-			except Exception:
-				consecutive_errors += 1
-				if consecutive_errors >= 10:
-					# Too many errors, give up
-					self._stream_started = False
-					return
-				delay = min(base_delay * (2 ** (consecutive_errors - 1)), max_delay)
-				time.sleep(delay)
+	def _stream_request(self):
+		"""URL and headers for this timeline's stream."""
+		stream_url = self.stream_endpoint
+		if not stream_url:
+			return None
+		# Only list timelines require authentication
+		# Public streams (local, federated, hashtag, instance) don't need auth
+		from version import APP_NAME, APP_VERSION
+		headers = {
+			"Accept": "text/event-stream",
+			"User-Agent": f"{APP_NAME}/{APP_VERSION}",
+		}
+		if self.type == 'list':
+			headers["Authorization"] = f"Bearer {self.account.prefs.access_token}"
+		return stream_url, headers
 
 	def _handle_stream_event(self, event_type, data, convert_func):
 		"""Handle a streaming event for this timeline."""
 		import wx
+		import streaming
 		from platforms.mastodon.models import mastodon_status_to_universal
 
 		try:
@@ -575,35 +701,24 @@ class timeline(object):
 				status = convert_func(data)
 				uni_status = mastodon_status_to_universal(status)
 				if uni_status:
-					wx.CallAfter(lambda s=uni_status: self.load(items=[s]))
+					streaming.get_batcher(self.account).add(self, uni_status)
 			elif event_type == 'delete':
 				status_id = str(data)
+				streaming.get_batcher(self.account).discard(status_id)
 				def do_delete():
-					for i, s in enumerate(self.statuses):
-						if hasattr(s, 'id') and str(s.id) == status_id:
-							if i < self.index:
-								self.index = max(0, self.index - 1)
-							elif i == self.index and self.index >= len(self.statuses) - 1:
-								self.index = max(0, len(self.statuses) - 2)
-							self.statuses.pop(i)
-							self._status_ids.discard(status_id)
-							self.invalidate_display_cache()
-							if self == self.account.currentTimeline and self.account == self.app.currentAccount:
-								main.window.refreshList()
-							break
+					position = self.remove_status(status_id)
+					if position is not None and self == self.account.currentTimeline and self.account == self.app.currentAccount:
+						main.window.removeListItem(position)
 				wx.CallAfter(do_delete)
 			elif event_type == 'status.update':
 				status = convert_func(data)
 				uni_status = mastodon_status_to_universal(status)
 				if uni_status:
+					streaming.get_batcher(self.account).replace(uni_status)
 					def do_update():
-						for i, s in enumerate(self.statuses):
-							if hasattr(s, 'id') and str(s.id) == str(uni_status.id):
-								self.statuses[i] = uni_status
-								self.invalidate_display_cache()
-								if self == self.account.currentTimeline and self.account == self.app.currentAccount:
-									main.window.refreshList()
-								break
+						position = self.replace_status(uni_status)
+						if position is not None and self == self.account.currentTimeline and self.account == self.app.currentAccount:
+							main.window.refreshList()
 					wx.CallAfter(do_update)
 		except Exception:
 			pass  # Silently ignore stream handler errors
@@ -647,8 +762,6 @@ class timeline(object):
 		Returns:
 			True if the status was added to the visible list, False if filtered out
 		"""
-		from GUI.timeline_filter import should_show_status
-
 		with self._status_lock:
 			# Always track ID for duplicate checking, even if filtered
 			if hasattr(status, 'id'):
@@ -666,9 +779,9 @@ class timeline(object):
 					self._unfiltered_statuses.append(status)
 
 			# Check if we should show this status based on filter
-			if hasattr(self, '_filter_settings') and self._filter_settings:
-				if not should_show_status(status, self._filter_settings, self.app, account=self.account):
-					return False
+			status_filter = self.status_filter()
+			if status_filter is not None and not status_filter(status):
+				return False
 
 			# Add to visible statuses
 			if to_front:
@@ -794,9 +907,8 @@ class timeline(object):
 				return False
 
 			# Check if filter is active
-			filter_active = hasattr(self, '_filter_settings') and self._filter_settings
-			if filter_active:
-				from GUI.timeline_filter import should_show_status
+			status_filter = self.status_filter()
+			filter_active = status_filter is not None
 
 			# For notifications, check if we should filter out mentions from cache
 			filter_mentions_from_notifications = False
@@ -822,7 +934,7 @@ class timeline(object):
 				# If filter is active, add to unfiltered list and only add to visible if it passes filter
 				if filter_active:
 					self._unfiltered_statuses.append(item)
-					if should_show_status(item, self._filter_settings, self.app, account=self.account):
+					if status_filter(item):
 						self.statuses.append(item)
 				else:
 					self.statuses.append(item)
@@ -943,10 +1055,7 @@ class timeline(object):
 					except Exception:
 						pass
 				for obj in (host, target):
-					try:
-						del obj._display_cache
-					except AttributeError:
-						pass
+					self.app.render_cache.invalidate(obj)
 			self.invalidate_display_cache()
 			if self.account == self.app.currentAccount and self.account.currentTimeline == self:
 				wx.CallAfter(main.window.refreshList)
@@ -968,13 +1077,11 @@ class timeline(object):
 			position_restored = self.sync_local_position()
 		# For other timelines, use the cached position ID
 		elif hasattr(self, '_cached_position_id') and self._cached_position_id:
-			# Find the item with this ID and set index
-			for i, status in enumerate(self.statuses):
-				if str(status.id) == str(self._cached_position_id):
-					self.index = i
-					position_restored = True
-					break
-			if not position_restored:
+			position = self.statuses.position(self._cached_position_id)
+			if position is not None:
+				self.index = position
+				position_restored = True
+			else:
 				# Position ID not found - item may have been deleted or aged out
 				print(f"Position restore: ID {self._cached_position_id} not found in {self.name} ({len(self.statuses)} items)")
 			# Clean up
@@ -984,7 +1091,7 @@ class timeline(object):
 			wx.CallAfter(main.window.list2.SetSelection, self.index)
 
 	def _cache_timeline(self):
-		"""Save current timeline items to cache (called after API load)."""
+		"""Queue the current timeline items for the account's cache writer (called after API load)."""
 		if not self._should_use_cache():
 			return
 
@@ -1017,15 +1124,17 @@ class timeline(object):
 			if self.index >= 0 and self.index < len(self.statuses):
 				position_id = str(self.statuses[self.index].id)
 
-			# Save to cache with gap info and current position
-			cache.save_timeline(
+			# Save to cache with gap info and current position. The writer
+			# saves in the background and only the newest queued save of a
+			# timeline is written, so the items and gaps are copied.
+			cache.writer.save_timeline(
 				self.type,
 				self.name,
 				self._get_timeline_data_key(),
-				items_to_cache,
+				list(items_to_cache),
 				self._get_item_type(),
 				limit=cache_limit,
-				gaps=self._gaps if self._gaps else None,
+				gaps=[dict(gap) for gap in self._gaps] if self._gaps else None,
 				last_index=self.index,
 				last_position_id=position_id
 			)
@@ -1097,6 +1206,7 @@ class timeline(object):
 		# Ensure index is valid
 		if len(self.statuses) > 0:
 			self.index = max(0, min(self.index, len(self.statuses) - 1))
+		self._index_for_search(self.statuses)
 		if self.account.currentTimeline == self:
 			wx.CallAfter(main.window.refreshList)
 		sound.play(self.account, "search")
@@ -1115,7 +1225,7 @@ class timeline(object):
 			else:
 				sound.play(self.account, self.user.acct)
 		else:
-			if self.type == "search":
+			if self.type == "search" or self.type == "history":
 				sound.play(self.account, "search")
 			elif self.type == "list":
 				sound.play(self.account, "list")
@@ -1205,16 +1315,19 @@ class timeline(object):
 					parsed = urlparse(instance_url)
 					instance_domain = parsed.netloc or parsed.path.strip('/')
 					if hasattr(uni_status, 'account') and uni_status.account:
-						if '@' not in uni_status.account.acct:
-							uni_status.account.acct = f"{uni_status.account.acct}@{instance_domain}"
-						uni_status.account._instance_url = instance_url
+						# Users are shared between posts; change a copy
+						account = dataclasses.replace(uni_status.account)
+						if '@' not in account.acct:
+							account.acct = f"{account.acct}@{instance_domain}"
+						account._instance_url = instance_url
+						uni_status.account = account
 				return uni_status
 		except:
 			pass
 		return None
 
 	def hide_tl(self):
-		if self.type == "user" and self.name != "Sent" or self.type == "list" or self.type == "search" or self.type == "conversation" or self.type == "instance" or self.type == "remote_user" or self.type == "favourites" or self.type == "bookmarks":
+		if self.type == "user" and self.name != "Sent" or self.type == "list" or self.type == "search" or self.type == "history" or self.type == "conversation" or self.type == "instance" or self.type == "remote_user" or self.type == "favourites" or self.type == "bookmarks":
 			self.app.alert("You can't hide this timeline. Try closing it instead.", "Error")
 			return
 		self.hide = True
@@ -1277,13 +1390,8 @@ class timeline(object):
 			self.invalidate_display_cache()
 			if not self.statuses:
 				self.index = 0
-			elif current_id:
-				for idx, item in enumerate(self.statuses):
-					if str(getattr(item, 'id', '')) == current_id:
-						self.index = idx
-						break
-				else:
-					self.index = max(0, min(self.index, len(self.statuses) - 1))
+			elif current_id and self.statuses.position(current_id) is not None:
+				self.index = self.statuses.position(current_id)
 			else:
 				self.index = max(0, min(self.index, len(self.statuses) - 1))
 			if self.initial:
@@ -1330,9 +1438,10 @@ class timeline(object):
 			count_before = len(status_list)
 			shown_before = len(self.statuses)
 
-			# Try to load previous
+			# Try to load previous; the rate-limit governor paces bulk loads
 			try:
-				result = self.load(back=True, speech=False)
+				with rate_limit.priority(rate_limit.BULK):
+					result = self.load(back=True, speech=False)
 			except Exception as e:
 				speak.speak(f"Stopped loading: {e}")
 				break
@@ -1357,10 +1466,6 @@ class timeline(object):
 			total_loaded += new_items
 			total_shown += new_shown
 
-			# Small delay to avoid hammering the API
-			import time
-			time.sleep(0.5)
-
 		if self._stop_loading_all:
 			if hasattr(self, '_filter_settings') and self._filter_settings:
 				speak.speak(f"Loading stopped. {total_loaded} posts loaded, {total_shown} shown.")
@@ -1575,6 +1680,7 @@ class timeline(object):
 
 		# Track total items inserted for subsequent calls
 		self._load_here_items_inserted += items_added
+		self._index_for_search(new_items)
 
 		# Refresh the UI
 		if self.app.currentAccount == self.account and self.account.currentTimeline == self:
@@ -1597,10 +1703,37 @@ class timeline(object):
 
 		Returns True if the status should be shown, False if it should be filtered out.
 		"""
-		if not hasattr(self, '_filter_settings') or not self._filter_settings:
-			return True
-		from GUI.timeline_filter import should_show_status
-		return should_show_status(status, self._filter_settings, self.app, account=self.account)
+		status_filter = self.status_filter()
+		return status_filter is None or status_filter(status)
+
+	def status_filter(self):
+		"""The filter compiled from _filter_settings (a status_filter.StatusFilter), or None without one.
+
+		It's compiled again when the settings change.
+		"""
+		settings = getattr(self, '_filter_settings', None)
+		if not settings:
+			return None
+		compiled = self.__dict__.get('_compiled_filter')
+		if compiled is None or not compiled.matches(settings):
+			compiled = StatusFilter(settings, account=self.account, strip_html=self.app.strip_html, parent_author=self.parent_author_id)
+			self._compiled_filter = compiled
+		return compiled
+
+	def parent_author_id(self, status_id):
+		"""Author id of a loaded post, or None if it isn't loaded (filters use it to tell threads from replies)."""
+		for items in (self.__dict__.get('_unfiltered'), self.__dict__.get('_statuses')):
+			if items is None:
+				continue
+			position = items.position(status_id)
+			if position is not None:
+				item = items[position]
+				author = getattr(item, 'account', None)
+				# A boost's id isn't the id of the boosted post
+				if author is None or getattr(item, 'reblog', None) is not None:
+					return None
+				return str(getattr(author, 'id', ''))
+		return None
 
 	def _add_status_at_position(self, status, position):
 		"""Add a status at a specific position in the statuses list.
@@ -1753,6 +1886,7 @@ class timeline(object):
 				tl = sorted(tl, key=lambda x: getattr(x, '_scheduled_at', None) or getattr(x, 'scheduled_at', None) or '')
 
 			newitems = 0
+			added = []
 			objs = []
 			objs2 = []
 			for i in tl:
@@ -1774,6 +1908,7 @@ class timeline(object):
 				status_id = getattr(i, '_scheduled_id', None) or i.id
 				if self.try_add_status_id(status_id):
 					newitems += 1
+					added.append(i)
 					# For initial/back load: add directly to statuses
 					# For refresh: collect first, add after processing all items
 					if self.initial or back:
@@ -1793,6 +1928,7 @@ class timeline(object):
 							objs.insert(0, i)
 							objs2.insert(0, i)
 
+			self._index_for_search(added)
 			if newitems == 0 and speech:
 				speak.speak("Nothing new.")
 			if newitems > 0:
@@ -1894,8 +2030,8 @@ class timeline(object):
 					synced = self.sync_local_position()
 					if synced and self.app.currentAccount == self.account and self.account.currentTimeline == self:
 						wx.CallAfter(main.window.list2.SetSelection, self.index)
-				# Cache timeline for fast startup (in background to not block)
-				threading.Thread(target=self._cache_timeline, daemon=True).start()
+				# Cache timeline for fast startup (written in the background)
+				self._cache_timeline()
 				# Notify account that this timeline's initial load is complete
 				if hasattr(self.account, '_on_timeline_initial_load_complete'):
 					self.account._on_timeline_initial_load_complete()
@@ -1926,7 +2062,7 @@ class timeline(object):
 								self._gaps[0]['max_id'] = str(tl[-1].id)
 							else:
 								self._gaps[0]['max_id'] = str(tl[0].id)
-					threading.Thread(target=self._cache_timeline, daemon=True).start()
+					self._cache_timeline()
 		if self.account.timelines and self == self.account.timelines[-1] and not self.account.ready:
 			self.account.ready = True
 			sound.play(self.account, "ready")
@@ -1966,62 +2102,65 @@ class timeline(object):
 				items.append(display)
 			return items
 		# Return cached display list if available and valid
-		if hasattr(self, '_display_list_cache') and self._display_list_cache is not None:
+		stamp = self.app.render_cache.stamp()
+		if getattr(self, '_display_list_cache', None) is not None and getattr(self, '_display_list_stamp', None) == stamp:
 			if len(self._display_list_cache) == len(self.statuses):
 				return self._display_list_cache
 
-		# Build display list (cache individual items for future use)
-		items = []
+		# Build display list; individual renders are shared via app.render_cache
 		# Conversation threads are always displayed in chronological order (oldest first)
 		# regardless of global reversed setting, since they represent a chat-like thread
-		statuses_to_display = self.statuses
-		for i in statuses_to_display:
-			# Use cached display string if available
-			cache_attr = '_display_cache'
-			cached = getattr(i, cache_attr, None)
-			if cached is not None:
-				items.append(cached)
-			else:
-				if self.type == "notifications":
-					display = self.app.process_notification(i, account=self.account)
-				elif self.type == "conversations":
-					display = self.app.process_conversation(i, account=self.account)
-				else:
-					display = self.app.process_status(i, account=self.account)
-				# Try to cache, but don't fail if object doesn't support it
-				try:
-					setattr(i, cache_attr, display)
-				except (AttributeError, TypeError):
-					pass
-				items.append(display)
+		items = [self._get_display_string(i) for i in self.statuses]
 
 		# Cache the full display list
 		self._display_list_cache = items
+		self._display_list_stamp = stamp
 		return items
 
+	def display_row(self, index):
+		"""Display string for one row, rendered on demand (for the virtual list)."""
+		if not 0 <= index < len(self.statuses):
+			return ""
+		item = self.statuses[index]
+		if self.type == "fusion":
+			display = getattr(item, '_display_cache', None)
+			if display is None:
+				if hasattr(item, 'accessible_label'):
+					display = item.accessible_label()
+				else:
+					display = self.app.process_status(item, account=self.account)
+			return display
+		cache = getattr(self, '_display_list_cache', None)
+		if cache is not None and len(cache) == len(self.statuses) and getattr(self, '_display_list_stamp', None) == self.app.render_cache.stamp():
+			return cache[index]
+		return self._get_display_string(item)
+
+	def prerender(self, center=None):
+		"""Render every row into the render cache in the background, nearest to center first."""
+		if self.type == "fusion":
+			return
+		self.app.render_prefetcher.start(self.statuses, self.index if center is None else center, self._get_display_string)
+
 	def invalidate_display_cache(self):
 		"""Invalidate the cached display list (call when statuses change)."""
 		self._display_list_cache = None
 
-	def _get_display_string(self, status):
-		"""Get display string for a single status (using cache if available)."""
-		cached = getattr(status, '_display_cache', None)
-		if cached is not None:
-			return cached
+	def _render_kind(self):
+		if self.type in ("notifications", "conversations"):
+			return self.type
+		return "status"
 
+	def _render_uncached(self, status):
 		if self.type == "notifications":
-			display = self.app.process_notification(status, account=self.account)
+			return self.app.process_notification(status, account=self.account)
 		elif self.type == "conversations":
-			display = self.app.process_conversation(status, account=self.account)
-		else:
-			display = self.app.process_status(status, account=self.account)
+			return self.app.process_conversation(status, account=self.account)
+		# mentions now treated same as home/user/etc.
+		return self.app.process_status(status, account=self.account)
 
-		# Try to cache
-		try:
-			status._display_cache = display
-		except (AttributeError, TypeError):
-			pass
-		return display
+	def _get_display_string(self, status):
+		"""Get display string for a single status (using the shared render cache)."""
+		return self.app.render_cache.render(status, self._render_kind(), self.account, lambda: self._render_uncached(status))
 
 	def add_display_item(self, status, to_front=True):
 		"""Add a single item to display list incrementally (for streaming).
@@ -2053,22 +2192,7 @@ class timeline(object):
 		The items should already be in the correct order for display.
 		This function only converts them to strings, it does not reorder.
 		"""
-		items2 = []
-		for i in items:
-			if self.type == "notifications":
-				processed = self.app.process_notification(i, account=self.account)
-			elif self.type == "conversations":
-				processed = self.app.process_conversation(i, account=self.account)
-			else:
-				# mentions now treated same as home/user/etc.
-				processed = self.app.process_status(i, account=self.account)
-			# Cache the display string on the item (if supported)
-			try:
-				i._display_cache = processed
-			except (AttributeError, TypeError):
-				pass
-			items2.append(processed)
-		return items2
+		return [self._get_display_string(i) for i in items]
 
 	# ============ Position Sync Methods ============
 
@@ -2103,10 +2227,9 @@ class timeline(object):
 		entries have fallen out of the loaded statuses.
 		"""
 		while self._nav_history:
-			item_id = self._nav_history.pop()
-			for i, s in enumerate(self.statuses):
-				if getattr(s, 'id', None) == item_id:
-					return i
+			position = self.statuses.position(self._nav_history.pop())
+			if position is not None:
+				return position
 		return None
 
 	def _can_sync_position(self):
@@ -2142,13 +2265,12 @@ class timeline(object):
 			if not marker_id:
 				return False
 
-			# Find the status with this ID
-			for i, status in enumerate(self.statuses):
-				if str(status.id) == str(marker_id):
-					self.index = i
-					self._last_synced_id = marker_id
-					self._position_moved = False
-					return True
+			position = self.statuses.position(marker_id)
+			if position is not None:
+				self.index = position
+				self._last_synced_id = marker_id
+				self._position_moved = False
+				return True
 
 			# Marker ID not found in current statuses - might be older
 			# Just track it for later sync decisions
@@ -2213,11 +2335,10 @@ class timeline(object):
 			if not saved_id:
 				return False
 
-			# Find the status with this ID
-			for i, status in enumerate(self.statuses):
-				if str(status.id) == str(saved_id):
-					self.index = i
-					return True
+			position = self.statuses.position(saved_id)
+			if position is not None:
+				self.index = position
+				return True
 
 			# ID not found in current statuses
 			return False
@@ -2232,51 +2353,69 @@ def add(account, name, type, data=None, user=None):
 		main.window.refreshTimelines()
 
 
+def _poll(tl):
+	"""Load new items for one timeline. Returns the number added, or None on error."""
+	if tl.type == "list" and time.time() - getattr(tl, '_members_fetched', 0) > LIST_MEMBERS_REFRESH:
+		tl.refresh_members()
+	before = len(tl._status_ids)
+	try:
+		with rate_limit.priority(rate_limit.POLL):
+			tl.load()
+	except MastodonError as error:
+		sound.play(tl.account, "error")
+		speak.speak(str(error))
+		return None
+	return len(tl._status_ids) - before
+
+
 def timelineThread(account):
 	app = account.app
+	scheduler = poll_scheduler.PollScheduler(
+		account.prefs.get("instance_url", "") or id(account),
+		lambda: app.prefs.update_time * 60,
+		_poll)
+	account.poll_scheduler = scheduler
+	next_maintenance = time.monotonic() + app.prefs.update_time * 60
 	while 1:
-		time.sleep(app.prefs.update_time * 60)
-		for i in account.timelines:
-			try:
-				if i.type == "list":
-					try:
-						members = account.api.list_accounts(id=i.data)
-						i.members = []
-						for i2 in members:
-							i.members.append(i2.id)
-					except:
-						pass
-				if i.type != "conversation" and i.type != "fusion":
-					i.load()
-			except MastodonError as error:
-				sound.play(account, "error")
-				speak.speak(str(error))
-		if app.prefs.streaming and (account.stream is not None and not account.stream_thread.is_alive() or account.stream is None):
-			account.start_stream()
-
-		# Sync timeline positions to server if changed
-		if app.prefs.sync_timeline_position:
-			for i in account.timelines:
-				try:
-					i.sync_position_to_server()
-				except:
-					pass
+		wait = scheduler.tick([tl for tl in account.timelines if tl.type not in UNPOLLED_TYPES and not tl.hide])
+		if time.monotonic() < next_maintenance:
+			time.sleep(min(wait, max(0, next_maintenance - time.monotonic())))
+			continue
+		next_maintenance = time.monotonic() + app.prefs.update_time * 60
+		with rate_limit.priority(rate_limit.POLL):
+			_maintenance(account)
+
 
-		# Resolve unknown users using per-account cache
-		if len(account.user_cache.unknown_users) > 0:
+def _maintenance(account):
+	"""Periodic per-account housekeeping, every update_time minutes."""
+	app = account.app
+	if app.prefs.streaming:
+		# No-op while the user stream is running
+		account.start_stream()
+
+	# Sync timeline positions to server if changed
+	if app.prefs.sync_timeline_position:
+		for i in account.timelines:
 			try:
-				from platforms.mastodon.models import mastodon_user_to_universal
-				new_users = account.api.accounts(ids=account.user_cache.unknown_users)
-				for i in new_users:
-					universal_user = mastodon_user_to_universal(i)
-					if universal_user:
-						account.user_cache.add_user(universal_user)
-				account.user_cache.unknown_users = []
+				i.sync_position_to_server()
 			except:
-				account.user_cache.unknown_users = []
+				pass
+
+	# Resolve unknown users using per-account cache
+	if len(account.user_cache.unknown_users) > 0:
+		try:
+			from platforms.mastodon.models import mastodon_user_to_universal
+			new_users = account.api.accounts(ids=list(account.user_cache.unknown_users))
+			for i in new_users:
+				universal_user = mastodon_user_to_universal(i)
+				if universal_user:
+					account.user_cache.add_user(universal_user)
+			account.user_cache.unknown_users = set()
+		except:
+			account.user_cache.unknown_users = set()
 
-		# Save per-account user cache
-		account.user_cache.save()
+	# Save per-account user cache
+	account.user_cache.save()
 
 
 def reverse(app):